@@ -0,0 +1,111 @@
+"""
+Synthetic Vietnamese legal corpus and questions for the benchmarks.
+
+Global legal chunks use tenant_id=1 (the global knowledge base); every other
+tenant gets internal company rules on the same topics, so both retrieval
+scopes and the scenario detection are exercised.
+"""
+
+import random
+from typing import Any, Dict, List, Tuple
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.models import Distance, PointStruct, VectorParams
+from benchmarks.fakes import hash_embedding
+
+# (topic, rule text of the chunks, typical user question)
+TOPICS = [
+    ('nghỉ phép năm', 'Người lao động làm việc đủ 12 tháng được nghỉ hằng năm 12 ngày làm việc, hưởng nguyên lương',
+     'Người lao động làm việc đủ 12 tháng được nghỉ hằng năm bao nhiêu ngày?'),
+    ('thời giờ làm việc', 'Thời giờ làm việc bình thường không quá 08 giờ trong 01 ngày và không quá 48 giờ trong 01 tuần',
+     'Thời giờ làm việc bình thường tối đa bao nhiêu giờ trong 01 tuần?'),
+    ('làm thêm giờ', 'Số giờ làm thêm không quá 40 giờ trong 01 tháng và không quá 200 giờ trong 01 năm',
+     'Số giờ làm thêm tối đa trong 01 tháng là bao nhiêu?'),
+    ('tiền lương', 'Người sử dụng lao động phải trả lương trực tiếp, đầy đủ, đúng hạn cho người lao động',
+     'Người sử dụng lao động phải trả lương cho người lao động như thế nào?'),
+    ('hợp đồng lao động', 'Hợp đồng lao động phải được giao kết bằng văn bản và được làm thành 02 bản',
+     'Hợp đồng lao động có phải giao kết bằng văn bản không?'),
+    ('thử việc', 'Thời gian thử việc không quá 60 ngày đối với công việc cần trình độ chuyên môn từ cao đẳng trở lên',
+     'Thời gian thử việc tối đa đối với trình độ cao đẳng là bao nhiêu ngày?'),
+    ('bảo hiểm xã hội', 'Người lao động và người sử dụng lao động phải tham gia bảo hiểm xã hội bắt buộc',
+     'Người lao động có bắt buộc tham gia bảo hiểm xã hội không?'),
+    ('bảo hiểm y tế', 'Mức đóng bảo hiểm y tế hằng tháng bằng 4,5% mức tiền lương tháng',
+     'Mức đóng bảo hiểm y tế hằng tháng là bao nhiêu phần trăm tiền lương?'),
+    ('kỷ luật lao động', 'Hình thức xử lý kỷ luật lao động gồm khiển trách, kéo dài thời hạn nâng lương, cách chức, sa thải',
+     'Có những hình thức xử lý kỷ luật lao động nào?'),
+    ('chấm dứt hợp đồng', 'Người lao động có quyền đơn phương chấm dứt hợp đồng nhưng phải báo trước theo quy định',
+     'Người lao động đơn phương chấm dứt hợp đồng có phải báo trước không?'),
+    ('thai sản', 'Lao động nữ sinh con được nghỉ chế độ thai sản trước và sau khi sinh con là 06 tháng',
+     'Lao động nữ sinh con được nghỉ chế độ thai sản bao lâu?'),
+    ('an toàn lao động', 'Người sử dụng lao động phải bảo đảm nơi làm việc đạt yêu cầu về an toàn, vệ sinh lao động',
+     'Nơi làm việc phải đạt yêu cầu gì về an toàn, vệ sinh lao động?'),
+]
+
+DOCUMENTS = [
+    'Bộ luật Lao động 2019',
+    'Nghị định 145/2020/NĐ-CP',
+    'Luật Bảo hiểm xã hội 2014',
+    'Thông tư 10/2020/TT-BLĐTBXH'
+]
+
+# Vague questions that often fall below the similarity threshold (NONE scenario)
+VAGUE_TEMPLATES = [
+    'Quy định về {topic} như thế nào?',
+    'Cho tôi hỏi về {topic} theo Nghị định 145/2020/NĐ-CP',
+]
+PREFIXES = ['', 'Theo Bộ luật Lao động 2019, ', 'Cho tôi hỏi, ', 'Ở công ty, ']
+
+
+def build_corpus(chunks_per_topic: int = 20, tenants: int = 3, seed: int = 7) -> List[Dict[str, Any]]:
+    """Payloads of the synthetic corpus (global + per-tenant chunks)."""
+    rng = random.Random(seed)
+    payloads = []
+    source_id = 1
+    for tenant_id in [1] + list(range(2, tenants + 2)):
+        is_global = tenant_id == 1
+        for topic, rule, _ in TOPICS:
+            for index in range(chunks_per_topic if is_global else max(chunks_per_topic // 4, 1)):
+                article = rng.randint(1, 220)
+                document = rng.choice(DOCUMENTS) if is_global else f'Nội quy lao động công ty {tenant_id}'
+                text = (
+                    f'Điều {article}. {topic.capitalize()}\n'
+                    f'{index + 1}. {rule}. '
+                    + ('Trường hợp khác thực hiện theo quy định của pháp luật. ' if is_global else 'Nhân viên liên hệ phòng nhân sự để được hướng dẫn. ')
+                    + ' '.join(rng.sample(rule.split(), k=min(8, len(rule.split()))))
+                )
+                payloads.append({
+                    'text': text,
+                    'source_id': source_id,
+                    'document_name': document,
+                    'heading1': f'Chương {rng.randint(1, 17)}',
+                    'heading2': f'Điều {article}. {topic.capitalize()}',
+                    'tenant_id': tenant_id,
+                    'type': 1 if is_global else 2
+                })
+                source_id += 1
+    return payloads
+
+
+def build_questions(count: int, tenants: int = 3, vague_ratio: float = 0.2, seed: int = 11) -> List[Tuple[str, int]]:
+    """(question, tenant_id) pairs spread over topics and tenants."""
+    rng = random.Random(seed)
+    questions = []
+    for _ in range(count):
+        topic, _, question = rng.choice(TOPICS)
+        if rng.random() < vague_ratio:
+            question = rng.choice(VAGUE_TEMPLATES).format(topic=topic)
+        else:
+            prefix = rng.choice(PREFIXES)
+            question = prefix + (question[0].lower() + question[1:] if prefix else question)
+        questions.append((question, rng.randint(2, tenants + 1)))
+    return questions
+
+
+async def seed_collection(client: AsyncQdrantClient, collection_name: str, payloads: List[Dict[str, Any]], dim: int = 384) -> None:
+    """Create the collection in an (in-memory) Qdrant client and upload the corpus."""
+    await client.recreate_collection(collection_name=collection_name, vectors_config=VectorParams(size=dim, distance=Distance.COSINE))
+    points = [
+        PointStruct(id=index + 1, vector=hash_embedding(payload['text'], dim), payload=payload)
+        for index, payload in enumerate(payloads)
+    ]
+    for start in range(0, len(points), 256):
+        await client.upsert(collection_name=collection_name, points=points[start:start + 256])
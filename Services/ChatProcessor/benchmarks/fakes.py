@@ -0,0 +1,160 @@
+"""
+Local stand-ins for the ChatProcessor dependencies used by the benchmarks:
+- FakeBackendServer: one HTTP server answering Ollama (/api/tags, /api/chat,
+  streaming or not, with configurable time-to-first-token and tokens/sec)
+  and EmbeddingService (/embed)
+- hash_embedding: deterministic bag-of-words embedding, so similar texts get
+  similar vectors and similarity thresholds behave realistically
+"""
+
+import asyncio
+import hashlib
+import json
+import math
+import re
+import time
+from typing import Dict, List, Optional, Tuple
+
+WORD_PATTERN = re.compile(r'\w+', re.UNICODE)
+
+ANSWER_WORDS = (
+    'Theo quy định tại Điều 113 Bộ luật Lao động 2019, người lao động làm việc đủ 12 tháng '
+    'cho một người sử dụng lao động thì được nghỉ hằng năm, hưởng nguyên lương'
+).split()
+
+
+def hash_embedding(text: str, dim: int = 384) -> List[float]:
+    """Normalized hashed unigram + bigram counts."""
+    words = WORD_PATTERN.findall(text.lower())
+    vector = [0.0] * dim
+    for token in words + [f'{a} {b}' for a, b in zip(words, words[1:])]:
+        digest = hashlib.md5(token.encode('utf-8')).digest()
+        index = int.from_bytes(digest[:4], 'little') % dim
+        vector[index] += 1.0 if digest[4] & 1 else -1.0
+    norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+    return [v / norm for v in vector]
+
+
+class FakeBackendServer:
+    """
+    Minimal HTTP/1.1 server (keep-alive, Content-Length and chunked replies).
+
+    Args:
+        model: Model name reported by /api/tags and accepted by /api/chat
+        ttft: Seconds before the first token (prompt evaluation)
+        tokens_per_second: Generation speed
+        num_tokens: Tokens per answer (capped by options.num_predict)
+        embed_latency: Seconds per /embed call
+        dim: Embedding dimension
+    """
+
+    def __init__(self, model: str = 'bench-model', ttft: float = 0.2, tokens_per_second: float = 50.0, num_tokens: int = 64, embed_latency: float = 0.005, dim: int = 384):
+        self.model = model
+        self.ttft = ttft
+        self.tokens_per_second = tokens_per_second
+        self.num_tokens = num_tokens
+        self.embed_latency = embed_latency
+        self.dim = dim
+        self.requests: Dict[str, int] = {}
+        self._server: Optional[asyncio.AbstractServer] = None
+        self.port = 0
+
+    @property
+    def url(self) -> str:
+        return f'http://127.0.0.1:{self.port}'
+
+    async def start(self) -> 'FakeBackendServer':
+        self._server = await asyncio.start_server(self._handle, '127.0.0.1', 0, limit=16 * 1024 * 1024)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                method, path, body = request
+                self.requests[path] = self.requests.get(path, 0) + 1
+                await self._route(method, path, body, writer)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _read_request(reader: asyncio.StreamReader) -> Optional[Tuple[str, str, bytes]]:
+        head = await reader.readuntil(b'\r\n\r\n') if not reader.at_eof() else b''
+        if not head:
+            return None
+        lines = head.decode('latin-1').split('\r\n')
+        method, path, _ = lines[0].split(' ', 2)
+        headers = {}
+        for line in lines[1:]:
+            if ':' in line:
+                key, value = line.split(':', 1)
+                headers[key.strip().lower()] = value.strip()
+        length = int(headers.get('content-length', 0))
+        body = await reader.readexactly(length) if length else b''
+        return method, path.split('?', 1)[0], body
+
+    @staticmethod
+    async def _send_json(writer: asyncio.StreamWriter, data: dict, status: str = '200 OK') -> None:
+        payload = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        writer.write(
+            f'HTTP/1.1 {status}\r\nContent-Type: application/json\r\nContent-Length: {len(payload)}\r\n\r\n'.encode('latin-1') + payload
+        )
+        await writer.drain()
+
+    async def _route(self, method: str, path: str, body: bytes, writer: asyncio.StreamWriter) -> None:
+        if path == '/api/tags':
+            await self._send_json(writer, {'models': [{'name': self.model}]})
+        elif path == '/api/chat' and method == 'POST':
+            await self._chat(json.loads(body or b'{}'), writer)
+        elif path == '/embed' and method == 'POST':
+            await asyncio.sleep(self.embed_latency)
+            vector = hash_embedding(json.loads(body).get('text', ''), self.dim)
+            await self._send_json(writer, {'vector': vector, 'dimensions': self.dim})
+        else:
+            await self._send_json(writer, {'error': f'not found: {path}'}, '404 Not Found')
+
+    async def _chat(self, request: dict, writer: asyncio.StreamWriter) -> None:
+        if request.get('model') != self.model:
+            await self._send_json(writer, {'error': f"model '{request.get('model')}' not found"}, '404 Not Found')
+            return
+        num_predict = (request.get('options') or {}).get('num_predict')
+        count = min(self.num_tokens, num_predict) if num_predict else self.num_tokens
+        tokens = [ANSWER_WORDS[i % len(ANSWER_WORDS)] + ' ' for i in range(count)]
+        prompt_chars = sum(len(m.get('content', '')) for m in request.get('messages', []))
+        started_at = time.perf_counter()
+        stats = {
+            'model': self.model,
+            'done': True,
+            'prompt_eval_count': prompt_chars // 3,
+            'eval_count': count,
+            'prompt_eval_duration': int(self.ttft * 1e9),
+            'eval_duration': int(count / self.tokens_per_second * 1e9)
+        }
+
+        await asyncio.sleep(self.ttft)
+        if not request.get('stream'):
+            await asyncio.sleep(count / self.tokens_per_second)
+            stats['total_duration'] = int((time.perf_counter() - started_at) * 1e9)
+            await self._send_json(writer, {**stats, 'message': {'role': 'assistant', 'content': ''.join(tokens)}})
+            return
+
+        writer.write(b'HTTP/1.1 200 OK\r\nContent-Type: application/x-ndjson\r\nTransfer-Encoding: chunked\r\n\r\n')
+        for token in tokens:
+            line = json.dumps({'model': self.model, 'done': False, 'message': {'role': 'assistant', 'content': token}}, ensure_ascii=False).encode('utf-8') + b'\n'
+            writer.write(f'{len(line):x}\r\n'.encode() + line + b'\r\n')
+            await writer.drain()
+            await asyncio.sleep(1 / self.tokens_per_second)
+        stats['total_duration'] = int((time.perf_counter() - started_at) * 1e9)
+        line = json.dumps({**stats, 'message': {'role': 'assistant', 'content': ''}}).encode('utf-8') + b'\n'
+        writer.write(f'{len(line):x}\r\n'.encode() + line + b'\r\n0\r\n\r\n')
+        await writer.drain()
@@ -0,0 +1,243 @@
+"""
+Load test for the ChatProcessor message pipeline against local fakes.
+
+Starts a fake Ollama + EmbeddingService HTTP server, seeds an in-memory Qdrant
+(qdrant-client local mode) with a synthetic Vietnamese legal corpus, then
+drives N messages at a fixed concurrency through either
+- direct:   ChatBusiness.process_chat_message (default)
+- consumer: ChatProcessor.process_prompt (JWT validation, processing and
+            response publishing, with RabbitMQ publishing captured in memory)
+and reports p50/p95/p99 latency and messages/sec.
+
+Usage (from Services/ChatProcessor):
+    python -m benchmarks.load_test --messages 200 --concurrency 16
+    python -m benchmarks.load_test --write-baseline      # store benchmarks/baselines/load_test.json
+    python -m benchmarks.load_test --compare             # exit 1 on regression vs the baseline
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List
+
+from benchmarks.fakes import FakeBackendServer
+
+BASELINE_PATH = Path(__file__).parent / 'baselines' / 'load_test.json'
+COLLECTION = 'bench_documents'
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    rank = (len(ordered) - 1) * pct / 100
+    low, high = int(rank), min(int(rank) + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def configure_environment(args: argparse.Namespace, server: FakeBackendServer, workdir: str) -> None:
+    """Point the settings at the fakes; must run before any `src` import."""
+    os.environ.update({
+        'OLLAMA_BASE_URL': server.url,
+        'OLLAMA_BASE_URLS': '',
+        'OLLAMA_MODEL': server.model,
+        'OLLAMA_SMALL_MODEL': '',
+        'OLLAMA_NUM_PARALLEL': str(args.parallel),
+        'LLM_MAX_QUEUE': str(max(args.concurrency, 1) * 4),
+        'EMBEDDING_SERVICE_URL': server.url,
+        'QDRANT_COLLECTION': COLLECTION,
+        'TOKENIZER_NAME': '',
+        'TRACING_ENABLED': 'true' if args.tracing else 'false',
+        'TRACING_EXPORT_PATH': os.path.join(workdir, 'traces.jsonl'),
+        'EVALUATION_LOG_DIR': os.path.join(workdir, 'evaluation_logs'),
+        'LOG_LEVEL': 'WARNING',
+        'HYBRID_SEARCH_ENGINE': args.search_engine,
+        'KEYWORD_SEARCH_ENGINE': args.keyword_engine,
+        'HYBRID_RERANK_SERVED': 'true' if args.rerank_served else 'false',
+        'BM25_SNAPSHOT_DIR': os.path.join(workdir, 'bm25_index')
+    })
+
+
+async def run_load(args: argparse.Namespace) -> Dict[str, Any]:
+    server = await FakeBackendServer(
+        ttft=args.ttft, tokens_per_second=args.tps, num_tokens=args.tokens, embed_latency=args.embed_latency, dim=args.dim
+    ).start()
+    workdir = tempfile.mkdtemp(prefix='chatprocessor-bench-')
+    configure_environment(args, server, workdir)
+
+    from qdrant_client import AsyncQdrantClient
+    from benchmarks.corpus import build_corpus, build_questions, seed_collection
+    from src.business import ChatBusiness, OllamaService, QdrantService
+    from src.logger import logger
+    logger.setLevel('WARNING')
+
+    ollama_service = OllamaService()
+    qdrant_service = QdrantService()
+    qdrant_service.client = AsyncQdrantClient(location=':memory:')
+    corpus = build_corpus(args.chunks_per_topic, args.tenants)
+    await seed_collection(qdrant_service.client, COLLECTION, corpus, args.dim)
+    questions = build_questions(args.messages + args.warmup, args.tenants)
+
+    if args.mode == 'consumer':
+        process = await _consumer_driver(ollama_service, qdrant_service)
+    else:
+        async def process(index: int, question: str, tenant_id: int) -> str:
+            result = await ChatBusiness.process_chat_message(
+                conversation_id=index, user_id=1, message=question, tenant_id=tenant_id,
+                ollama_service=ollama_service, qdrant_service=qdrant_service
+            )
+            return result['scenario']
+
+    latencies: List[float] = []
+    scenarios: Dict[str, int] = {}
+    errors = 0
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def one(index: int, question: str, tenant_id: int, record: bool) -> None:
+        nonlocal errors
+        async with semaphore:
+            started_at = time.perf_counter()
+            try:
+                scenario = await process(index, question, tenant_id)
+            except Exception as e:
+                errors += record
+                scenario = f'error:{type(e).__name__}'
+            if record:
+                latencies.append(time.perf_counter() - started_at)
+                scenarios[scenario] = scenarios.get(scenario, 0) + 1
+
+    await asyncio.gather(*(one(i, q, t, False) for i, (q, t) in enumerate(questions[:args.warmup])))
+    started_at = time.perf_counter()
+    await asyncio.gather(*(one(i, q, t, True) for i, (q, t) in enumerate(questions[args.warmup:], start=args.warmup)))
+    elapsed = time.perf_counter() - started_at
+    await server.stop()
+
+    return {
+        'created_at': datetime.utcnow().isoformat(),
+        'machine': {'python': platform.python_version(), 'platform': platform.platform(), 'cpus': os.cpu_count()},
+        'config': {
+            key: getattr(args, key) for key in (
+                'mode', 'messages', 'concurrency', 'parallel', 'ttft', 'tps', 'tokens', 'embed_latency',
+                'dim', 'chunks_per_topic', 'tenants', 'search_engine', 'keyword_engine', 'rerank_served', 'tracing'
+            )
+        },
+        'corpus_points': len(corpus),
+        'messages_per_second': round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        'latency_ms': {
+            'p50': round(percentile(latencies, 50) * 1000, 1),
+            'p95': round(percentile(latencies, 95) * 1000, 1),
+            'p99': round(percentile(latencies, 99) * 1000, 1),
+            'mean': round(statistics.fmean(latencies) * 1000, 1) if latencies else 0.0,
+            'max': round(max(latencies) * 1000, 1) if latencies else 0.0
+        },
+        'errors': errors,
+        'scenarios': scenarios,
+        'fake_requests': dict(server.requests)
+    }
+
+
+async def _consumer_driver(ollama_service, qdrant_service):
+    """process() going through ChatProcessor.process_prompt with publishing captured in memory."""
+    import jwt
+    from main import ChatProcessor
+    from src.config import settings
+    from src.schemas import UserPromptReceivedMessage
+
+    processor = ChatProcessor.__new__(ChatProcessor)  # Skip the RabbitMQ connection setup
+    processor.ollama_service = ollama_service
+    processor.qdrant_service = qdrant_service
+    published: Dict[int, Any] = {}
+
+    class CapturingPublisher:
+        async def publish_response(self, response):
+            published[response.request_id] = response
+
+    processor.rabbitmq_service = CapturingPublisher()
+
+    async def process(index: int, question: str, tenant_id: int) -> str:
+        token = jwt.encode({'User': 1, 'Tenant': tenant_id, 'exp': int(time.time()) + 3600}, settings.jwt_secret_key, algorithm='HS256')
+        await processor.process_prompt(UserPromptReceivedMessage(conversation_id=index, message_id=index, message=question, token=token))
+        response = published.pop(index, None)
+        if response is None:
+            raise RuntimeError('no response published')
+        if response.model_used == 'error':
+            raise RuntimeError(response.message)
+        return 'published'
+
+    return process
+
+
+def compare(result: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Regressions beyond `threshold` (fraction) for p95/p99 latency and throughput."""
+    regressions = []
+    for key in ('p95', 'p99'):
+        old, new = baseline['latency_ms'][key], result['latency_ms'][key]
+        if old and new > old * (1 + threshold):
+            regressions.append(f'latency {key}: {new}ms vs baseline {old}ms (+{(new / old - 1) * 100:.0f}%)')
+    old, new = baseline['messages_per_second'], result['messages_per_second']
+    if old and new < old * (1 - threshold):
+        regressions.append(f'throughput: {new} msg/s vs baseline {old} msg/s ({(new / old - 1) * 100:.0f}%)')
+    if result['errors'] > baseline.get('errors', 0):
+        regressions.append(f"errors: {result['errors']} vs baseline {baseline.get('errors', 0)}")
+    return regressions
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mode', choices=('direct', 'consumer'), default='direct')
+    parser.add_argument('--messages', type=int, default=200)
+    parser.add_argument('--warmup', type=int, default=10)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--parallel', type=int, default=4, help='OLLAMA_NUM_PARALLEL of the fake backend')
+    parser.add_argument('--ttft', type=float, default=0.2, help='Fake Ollama time to first token (s)')
+    parser.add_argument('--tps', type=float, default=50.0, help='Fake Ollama tokens per second')
+    parser.add_argument('--tokens', type=int, default=64, help='Tokens per fake answer')
+    parser.add_argument('--embed-latency', type=float, default=0.005)
+    parser.add_argument('--dim', type=int, default=384)
+    parser.add_argument('--chunks-per-topic', type=int, default=20)
+    parser.add_argument('--tenants', type=int, default=3)
+    parser.add_argument('--search-engine', choices=('client', 'server'), default='client')
+    parser.add_argument('--keyword-engine', choices=('qdrant', 'bm25'), default='qdrant')
+    parser.add_argument('--rerank-served', action='store_true', help='Re-rank served retrieval by keywords with the engines above')
+    parser.add_argument('--tracing', action='store_true')
+    parser.add_argument('--baseline', type=Path, default=BASELINE_PATH)
+    parser.add_argument('--write-baseline', action='store_true')
+    parser.add_argument('--compare', action='store_true')
+    parser.add_argument('--threshold', type=float, default=0.2, help='Allowed regression fraction for --compare')
+    return parser.parse_args(argv)
+
+
+def main(argv: List[str]) -> int:
+    args = parse_args(argv)
+    result = asyncio.run(run_load(args))
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+    if args.write_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(result, ensure_ascii=False, indent=2) + '\n', encoding='utf-8')
+        print(f'Baseline written to {args.baseline}')
+
+    if args.compare:
+        if not args.baseline.exists():
+            print(f'No baseline at {args.baseline}; run with --write-baseline first')
+            return 2
+        baseline = json.loads(args.baseline.read_text(encoding='utf-8'))
+        if baseline.get('config') != result['config']:
+            print('Warning: baseline was recorded with a different configuration')
+        regressions = compare(result, baseline, args.threshold)
+        for regression in regressions:
+            print(f'REGRESSION {regression}')
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
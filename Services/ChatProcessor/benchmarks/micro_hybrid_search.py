@@ -0,0 +1,205 @@
+"""
+Micro-benchmarks for the per-message hybrid_search primitives.
+
+Times LegalTermExtractor.extract_keywords, ReciprocalRankFusion.fuse /
+fuse_multi_source, HybridSearchStrategy.apply_fallback_logic and
+merge_and_deduplicate over realistic input sizes (long queries, 100-1000
+candidates, large tenant system_instruction dictionaries).
+
+Each case reports the best time per call over several repeats (as timeit
+does: slower repeats measure interference, not the code). Timings are
+also stored relative to a fixed pure-Python calibration loop measured right
+before each case, so a baseline recorded on one machine remains comparable on
+a faster or slower one. A case only counts as a regression when both its raw
+and its normalized time exceed the threshold, which keeps a noisy
+calibration run from flagging (or hiding) changes on the same machine.
+
+Usage (from Services/ChatProcessor):
+    python -m benchmarks.micro_hybrid_search
+    python -m benchmarks.micro_hybrid_search --write-baseline   # store benchmarks/baselines/micro_hybrid_search.json
+    python -m benchmarks.micro_hybrid_search --compare          # exit 1 on regression vs the baseline
+    python -m benchmarks.micro_hybrid_search --case fuse        # only cases whose name contains 'fuse'
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from benchmarks.corpus import TOPICS, build_corpus
+
+BASELINE_PATH = Path(__file__).parent / 'baselines' / 'micro_hybrid_search.json'
+
+LONG_QUERY_PARTS = [
+    'Theo Điều 113 khoản 1 Bộ luật Lao động năm 2019 và Nghị định 145/2020/nđ-cp',
+    'NLĐ làm việc đủ 12 tháng cho NSDLĐ thì được nghỉ hằng năm, hưởng nguyên lương theo HĐLĐ',
+    'Công ty đóng BHXH, BHYT, BHTN cho CBNV như thế nào theo Thông tư 10/2020/tt-blđtbxh',
+    'Quy định về ATVSLĐ và PCCC tại nơi làm việc, Điều 6 khoản 2 năm 2015'
+]
+
+
+def calibrate(loops: int = 50_000) -> float:
+    """Seconds for a fixed dict/str workload, used to normalize across machines."""
+    best = float('inf')
+    for _ in range(3):
+        started_at = time.perf_counter()
+        scores: Dict[int, float] = {}
+        for i in range(loops):
+            key = i % 997
+            scores[key] = scores.get(key, 0.0) + 1.0 / (60 + i)
+        ' '.join(str(i) for i in range(loops // 10)).upper()
+        best = min(best, time.perf_counter() - started_at)
+    return best
+
+
+def make_points(count: int, id_offset: int = 0, seed: int = 0, source: str = 'tenant') -> list:
+    """RetrievalHits with realistic payloads, sorted by descending cosine score."""
+    from src.hybrid_search import RetrievalHit
+
+    rng = random.Random(seed)
+    corpus = build_corpus(chunks_per_topic=max(count // len(TOPICS), 1), tenants=1)
+    scores = sorted((rng.uniform(0.2, 0.9) for _ in range(count)), reverse=True)
+    return [RetrievalHit(id_offset + i, score, source, corpus[i % len(corpus)]) for i, score in enumerate(scores)]
+
+
+def make_system_instruction(size: int) -> List[Dict[str, str]]:
+    """Tenant term dictionary: the first entries occur in LONG_QUERY_PARTS, the rest don't."""
+    items = [{'key': 'nghỉ hằng năm', 'value': 'nghỉ phép năm'}, {'key': 'CBNV', 'value': 'cán bộ nhân viên'}]
+    items += [{'key': f'THUẬT_NGỮ_{i}', 'value': f'định nghĩa nội bộ số {i} của công ty'} for i in range(size - len(items))]
+    return items[:size]
+
+
+def build_cases() -> List[Tuple[str, Callable[[], Any]]]:
+    """(name, zero-argument callable) for every benchmark case."""
+    from src.hybrid_search import HybridSearchStrategy, LegalTermExtractor, ReciprocalRankFusion, merge_and_deduplicate
+
+    short_query = 'NLĐ được nghỉ phép năm bao nhiêu ngày theo Điều 113?'
+    long_query = ' '.join(LONG_QUERY_PARTS * 8)  # ~2.5k characters
+    cases: List[Tuple[str, Callable[[], Any]]] = [
+        ('extract_keywords/short', lambda: LegalTermExtractor.extract_keywords(short_query)),
+        ('extract_keywords/long', lambda: LegalTermExtractor.extract_keywords(long_query)),
+    ]
+    for size in (50, 500, 2000):
+        instruction = make_system_instruction(size)
+        cases.append((f'extract_keywords/long+instruction{size}', lambda i=instruction: LegalTermExtractor.extract_keywords(long_query, i)))
+
+    for size in (100, 1000):
+        # Half of the global candidates are also tenant candidates
+        tenant = make_points(size, seed=1)
+        global_ = make_points(size, id_offset=size // 2, seed=2, source='global')
+        cases += [
+            (f'rrf.fuse/{size}x2', lambda t=tenant, g=global_: ReciprocalRankFusion.fuse(t, g)),
+            (f'rrf.fuse_top5/{size}x2', lambda t=tenant, g=global_: ReciprocalRankFusion.fuse(t, g, limit=5)),
+            (f'rrf.fuse_multi_source/{size}x4', lambda t=tenant, g=global_: ReciprocalRankFusion.fuse_multi_source([t, g, t[::2], g[::3]])),
+            (f'apply_fallback_logic/balanced/{size}', lambda t=tenant, g=global_: HybridSearchStrategy.apply_fallback_logic(t, g, limit=5)),
+            (f'apply_fallback_logic/fallback/{size}', lambda t=tenant[-size // 4:], g=global_: HybridSearchStrategy.apply_fallback_logic(t, g, limit=5)),
+            (f'merge_and_deduplicate/{size}', lambda t=tenant, g=global_: merge_and_deduplicate(t, g, limit=5)),
+        ]
+    return cases
+
+
+def time_case(func: Callable[[], Any], repeat: int, min_time: float) -> float:
+    """Best seconds per call; each repeat runs enough calls to last `min_time`."""
+    func()  # Warm up (lazy imports, caches)
+    number = 1
+    while True:
+        started_at = time.perf_counter()
+        for _ in range(number):
+            func()
+        if time.perf_counter() - started_at >= min_time:
+            break
+        number *= 2
+    samples = []
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter() - started_at) / number)
+    return min(samples)
+
+
+def run_benchmarks(args: argparse.Namespace, names: Optional[Set[str]] = None) -> Dict[str, Any]:
+    from src.logger import logger
+    logger.setLevel('WARNING')  # Keep logging cost and output out of the timings
+
+    results = {}
+    for name, func in build_cases():
+        if (args.case and args.case not in name) or (names is not None and name not in names):
+            continue
+        calibration = calibrate()
+        seconds = time_case(func, args.repeat, args.min_time)
+        results[name] = {'us_per_call': round(seconds * 1e6, 2), 'relative': round(seconds / calibration, 6)}
+        print(f'{name:<45} {seconds * 1e6:>12.1f} us/call', file=sys.stderr)
+
+    return {
+        'created_at': datetime.utcnow().isoformat(),
+        'machine': {'python': platform.python_version(), 'platform': platform.platform(), 'cpus': os.cpu_count()},
+        'cases': results
+    }
+
+
+def compare(result: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> Dict[str, str]:
+    """Cases slower than the baseline by more than `threshold` (fraction), raw and machine-normalized."""
+    regressions = {}
+    for name, current in result['cases'].items():
+        old = baseline.get('cases', {}).get(name)
+        if not old or not old['relative'] or not old['us_per_call']:
+            continue
+        ratio = current['relative'] / old['relative']
+        if ratio > 1 + threshold and current['us_per_call'] > old['us_per_call'] * (1 + threshold):
+            regressions[name] = f"{current['us_per_call']}us vs baseline {old['us_per_call']}us (normalized +{(ratio - 1) * 100:.0f}%)"
+    return regressions
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--case', default='', help='Only run cases whose name contains this string')
+    parser.add_argument('--repeat', type=int, default=7)
+    parser.add_argument('--min-time', type=float, default=0.05, help='Minimum seconds per repeat')
+    parser.add_argument('--baseline', type=Path, default=BASELINE_PATH)
+    parser.add_argument('--write-baseline', action='store_true')
+    parser.add_argument('--compare', action='store_true')
+    parser.add_argument('--threshold', type=float, default=0.3, help='Allowed regression fraction for --compare')
+    parser.add_argument('--retries', type=int, default=2, help='Re-time regressed cases this many times before failing')
+    return parser.parse_args(argv)
+
+
+def main(argv: List[str]) -> int:
+    args = parse_args(argv)
+    result = run_benchmarks(args)
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+    if args.write_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(result, ensure_ascii=False, indent=2) + '\n', encoding='utf-8')
+        print(f'Baseline written to {args.baseline}')
+
+    if args.compare:
+        if not args.baseline.exists():
+            print(f'No baseline at {args.baseline}; run with --write-baseline first')
+            return 2
+        baseline = json.loads(args.baseline.read_text(encoding='utf-8'))
+        regressions = compare(result, baseline, args.threshold)
+        for _ in range(args.retries):
+            if not regressions:
+                break
+            # A slow outlier on a busy machine is not a regression: keep each case's best attempt
+            retried = run_benchmarks(args, set(regressions))['cases']
+            for name, current in retried.items():
+                if current['relative'] < result['cases'][name]['relative']:
+                    result['cases'][name] = current
+            regressions = compare(result, baseline, args.threshold)
+        for name, regression in regressions.items():
+            print(f'REGRESSION {name}: {regression}')
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -16,6 +16,10 @@ from src.schemas import UserPromptReceivedMessage, BotResponseCreatedMessage
 from src.consumer import RabbitMQService
 from src.business import OllamaService, QdrantService, ChatBusiness
 from src.logger import logger, set_session_id, clear_session_id
+from src.tracing import get_tracer, set_baggage
+from src.evaluation_logger import get_evaluation_logger
+from src.token_budget import get_token_counter
+from src.metrics import CONSUMER_IN_FLIGHT, track_in_flight, observe_queue_wait
 app = FastAPI(title='ChatProcessor API', version='1.0.0')
 
 @app.middleware('http')
@@ -134,11 +138,14 @@ class ChatProcessor:
         self.shutdown_event = asyncio.Event()
         logger.info('ChatProcessor initialized')
 
+    @track_in_flight(CONSUMER_IN_FLIGHT)
     async def process_prompt(self, prompt_message: UserPromptReceivedMessage) -> None:
+        observe_queue_wait(prompt_message.timestamp)
         try:
             # Step 1: Validate JWT token
             logger.info(f'[ConversationId: {prompt_message.conversation_id}] Validating JWT token')
-            token_claims = JWTValidator.validate_token(prompt_message.token)
+            with get_tracer().start_span('jwt.validate'):
+                token_claims = JWTValidator.validate_token(prompt_message.token)
 
             # Step 2: If token is invalid or expired, log error and do not process
             if token_claims is None:
@@ -155,6 +162,8 @@ class ChatProcessor:
                 return
 
             logger.info(f'[ConversationId: {prompt_message.conversation_id}] Token valid - Proceeding with message processing')
+            set_baggage('tenant_id', tenant_id)
+            set_baggage('conversation_id', prompt_message.conversation_id)
 
             # Step 4: Process the message with RAG logic
             system_instruction = None
@@ -169,7 +178,8 @@ class ChatProcessor:
                 ollama_service=self.ollama_service,
                 qdrant_service=self.qdrant_service,
                 system_instruction=system_instruction,
-                system_prompt=prompt_message.system_prompt
+                system_prompt=prompt_message.system_prompt,
+                request_timestamp=prompt_message.timestamp
             )
 
             # Step 5: Construct response with the original token and message_id as request_id
@@ -213,6 +223,10 @@ class ChatProcessor:
             logger.info(f'RabbitMQ Host: {settings.rabbitmq_host}:{settings.rabbitmq_port}')
             logger.info(f'Qdrant Host: {settings.qdrant_host}:{settings.qdrant_port}')
             await self.rabbitmq_service.connect()
+            # Load the prompt tokenizer off the event loop before the first message
+            await get_token_counter().load_async()
+            # Open the evaluation log store (and import a legacy JSON log) off the event loop
+            await asyncio.to_thread(get_evaluation_logger)
             logger.info('Performing health checks...')
             ollama_healthy = await self.ollama_service.health_check()
             qdrant_healthy = self.qdrant_service.health_check()
@@ -232,6 +246,7 @@ class ChatProcessor:
         finally:
             logger.info('Shutting down ChatProcessor...')
             await self.rabbitmq_service.disconnect()
+            get_evaluation_logger().store.close()
 
     async def run_fastapi(self) -> None:
         config = uvicorn.Config('main:app', host=settings.fastapi_host, port=settings.fastapi_port, log_level=settings.log_level.lower())
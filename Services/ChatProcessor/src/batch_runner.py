@@ -0,0 +1,124 @@
+"""
+Batch Test Runner Module
+
+Runs /api/test/batch regression sets as a background job:
+1. Entities are processed concurrently, bounded by the LLM scheduler's
+   parallelism (extra requests would only wait in its queue)
+2. Each result is appended to a JSONL file as soon as it completes, with
+   per-entity latency, scenario and model
+3. Re-submitting the same run_id skips TC_ids already answered, so a run
+   resumes after a crash or restart
+"""
+
+import asyncio
+import json
+import os
+import re
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+from src.config import settings
+from src.jobs import Job
+from src.llm_scheduler import get_llm_scheduler
+from src.logger import logger
+
+RUN_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+
+# process(entity) -> result dict of ChatBusiness.process_chat_message
+ProcessFunc = Callable[[Any], Awaitable[Dict[str, Any]]]
+
+
+def new_run_id() -> str:
+    return datetime.utcnow().strftime('%Y%m%d-%H%M%S-') + uuid.uuid4().hex[:6]
+
+
+class BatchTestRunner:
+    """Processes test entities into `<batch_test_dir>/<run_id>.jsonl`."""
+
+    def __init__(self, run_id: str, concurrency: Optional[int] = None, output_dir: Optional[str] = None):
+        if not RUN_ID_PATTERN.match(run_id):
+            raise ValueError(f'Invalid run_id: {run_id!r} (use letters, digits, _ and -)')
+        self.run_id = run_id
+        self.output_file = Path(output_dir or settings.batch_test_dir) / f'{run_id}.jsonl'
+        parallelism = get_llm_scheduler().parallelism
+        self.concurrency = max(min(concurrency or settings.batch_test_concurrency or parallelism, parallelism), 1)
+        self._write_lock = asyncio.Lock()
+
+    def load_done_ids(self) -> Set[str]:
+        """TC_ids already answered without error in a previous attempt of this run."""
+        done: Set[str] = set()
+        if not self.output_file.exists():
+            return done
+        with open(self.output_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # Torn last line of an interrupted run
+                if record.get('error') is None:
+                    done.add(record['TC_id'])
+        return done
+
+    def _append(self, record: Dict[str, Any]) -> None:
+        with open(self.output_file, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, ensure_ascii=False, default=str) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+    async def _process_one(self, entity: Any, process: ProcessFunc, semaphore: asyncio.Semaphore, job: Job) -> None:
+        async with semaphore:
+            started_at = time.perf_counter()
+            record: Dict[str, Any] = {'TC_id': entity.TC_id, 'tenant_id': entity.tenant_id, 'question': entity.questions}
+            try:
+                result = await process(entity)
+                record.update({
+                    'answer': result.get('message', ''),
+                    'scenario': result.get('scenario'),
+                    'model_used': result.get('model_used'),
+                    'rag_documents_used': result.get('rag_documents_used'),
+                    'error': None
+                })
+            except Exception as e:
+                logger.error(f'Error processing entity TC_id={entity.TC_id}: {e}', exc_info=True)
+                record.update({'answer': f'Error: {str(e)}', 'scenario': None, 'error': f'{type(e).__name__}: {e}'})
+            record['latency_ms'] = round((time.perf_counter() - started_at) * 1000, 1)
+            record['completed_at'] = datetime.utcnow().isoformat()
+
+        async with self._write_lock:
+            await asyncio.get_running_loop().run_in_executor(None, self._append, record)
+        job.advance(processed=1, failed=1 if record['error'] else 0)
+        logger.info(f"Completed entity TC_id={entity.TC_id} ({record['latency_ms']}ms, scenario={record['scenario']})")
+
+    async def run(self, entities: List[Any], process: ProcessFunc, job: Job) -> Dict[str, Any]:
+        """
+        Process all entities not yet answered in this run.
+
+        Args:
+            entities: TestEntity objects (TC_id, tenant_id, questions)
+            process: Coroutine function answering one entity
+            job: Job to report progress to
+
+        Returns:
+            Summary with counts and the output file
+        """
+        self.output_file.parent.mkdir(parents=True, exist_ok=True)
+        done_ids = await asyncio.get_running_loop().run_in_executor(None, self.load_done_ids)
+        pending = [entity for entity in entities if entity.TC_id not in done_ids]
+        job.total = len(entities)
+        job.skipped = len(entities) - len(pending)
+        logger.info(
+            f'Batch run {self.run_id}: {len(pending)} pending, {job.skipped} already done, '
+            f'concurrency={self.concurrency}, output={self.output_file}'
+        )
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        await asyncio.gather(*(self._process_one(entity, process, semaphore, job) for entity in pending))
+        return {
+            'run_id': self.run_id,
+            'processed': job.processed,
+            'failed': job.failed,
+            'skipped': job.skipped,
+            'output_file': str(self.output_file)
+        }
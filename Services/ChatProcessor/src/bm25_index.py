@@ -0,0 +1,321 @@
+"""
+BM25 Keyword Index Module
+
+In-process BM25 inverted index per tenant, used for keyword retrieval instead of
+Qdrant MatchText filters. Each tenant index is:
+1. Built by scrolling the tenant's points from the Qdrant collection
+2. Kept up to date from vectorize/delete events sent by EmbeddingService
+3. Persisted as a compact gzip-pickled snapshot so restarts don't rescan Qdrant
+"""
+
+import asyncio
+import gzip
+import heapq
+import math
+import pickle
+import re
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from src.config import settings
+from src.logger import logger
+
+TOKEN_PATTERN = re.compile(r'\w+', re.UNICODE)
+
+# Payload fields whose text is indexed (same fields the Qdrant keyword filter matched)
+INDEXED_FIELDS = ('text', 'document_name', 'heading1', 'heading2')
+
+SNAPSHOT_VERSION = 1
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokenization that keeps Vietnamese diacritics intact."""
+    if not text:
+        return []
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class BM25Index:
+    """
+    BM25 (Okapi) inverted index over the chunks of a single tenant.
+
+    Documents are addressed by Qdrant point ID. Postings map a term to
+    {doc_slot: term_frequency}; removed documents free their slot.
+    """
+
+    def __init__(self, tenant_id: int, k1: float = 1.5, b: float = 0.75):
+        self.tenant_id = tenant_id
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, Dict[int, int]] = {}
+        self.doc_lengths: Dict[int, int] = {}
+        self.point_ids: Dict[int, Any] = {}
+        self.payloads: Dict[int, Dict[str, Any]] = {}
+        self.slot_by_point: Dict[Any, int] = {}
+        self.total_length = 0
+        self.next_slot = 0
+        self.built_at = time.time()
+
+    def __len__(self) -> int:
+        return len(self.doc_lengths)
+
+    @staticmethod
+    def _document_terms(payload: Dict[str, Any]) -> List[str]:
+        terms = []
+        for field in INDEXED_FIELDS:
+            value = payload.get(field)
+            if value:
+                terms.extend(tokenize(str(value)))
+        return terms
+
+    def add(self, point_id: Any, payload: Dict[str, Any]) -> None:
+        """Add or replace a document."""
+        if point_id in self.slot_by_point:
+            self.remove(point_id)
+
+        terms = self._document_terms(payload)
+        slot = self.next_slot
+        self.next_slot += 1
+
+        frequencies: Dict[str, int] = {}
+        for term in terms:
+            frequencies[term] = frequencies.get(term, 0) + 1
+        for term, tf in frequencies.items():
+            self.postings.setdefault(term, {})[slot] = tf
+
+        self.doc_lengths[slot] = len(terms)
+        self.total_length += len(terms)
+        self.point_ids[slot] = point_id
+        self.payloads[slot] = payload
+        self.slot_by_point[point_id] = slot
+
+    def remove(self, point_id: Any) -> bool:
+        """Remove a document by point ID. Returns False if it was not indexed."""
+        slot = self.slot_by_point.pop(point_id, None)
+        if slot is None:
+            return False
+
+        for term in set(self._document_terms(self.payloads[slot])):
+            posting = self.postings.get(term)
+            if posting is not None:
+                posting.pop(slot, None)
+                if not posting:
+                    del self.postings[term]
+
+        self.total_length -= self.doc_lengths.pop(slot)
+        del self.point_ids[slot]
+        del self.payloads[slot]
+        return True
+
+    def remove_source(self, source_id: int, doc_type: Optional[int] = None) -> int:
+        """Remove every chunk of a source document (mirrors EmbeddingService.delete_by_filter)."""
+        matching = [
+            self.point_ids[slot]
+            for slot, payload in self.payloads.items()
+            if payload.get('source_id') == source_id
+            and (doc_type is None or payload.get('type') == doc_type)
+        ]
+        for point_id in matching:
+            self.remove(point_id)
+        return len(matching)
+
+    def search(self, keywords: List[str], limit: int = 10) -> List[Tuple[Any, float, Dict[str, Any]]]:
+        """
+        Rank documents against the keywords with BM25.
+
+        Args:
+            keywords: Keywords or phrases (e.g. ["điều 212", "BHXH"]); each is tokenized
+            limit: Maximum number of results
+
+        Returns:
+            List of (point_id, bm25_score, payload) sorted by score descending
+        """
+        doc_count = len(self.doc_lengths)
+        if doc_count == 0:
+            return []
+
+        query_terms = set()
+        for keyword in keywords:
+            query_terms.update(tokenize(keyword))
+
+        avg_length = self.total_length / doc_count
+        k1 = self.k1
+        length_norm = k1 * (1 - self.b)
+        length_scale = k1 * self.b / avg_length if avg_length else 0.0
+        doc_lengths = self.doc_lengths
+
+        scores: Dict[int, float] = {}
+        for term in query_terms:
+            posting = self.postings.get(term)
+            if not posting:
+                continue
+            df = len(posting)
+            idf = math.log(1 + (doc_count - df + 0.5) / (df + 0.5))
+            for slot, tf in posting.items():
+                denominator = tf + length_norm + length_scale * doc_lengths[slot]
+                scores[slot] = scores.get(slot, 0.0) + idf * tf * (k1 + 1) / denominator
+
+        top = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+        return [(self.point_ids[slot], score, self.payloads[slot]) for slot, score in top]
+
+    def to_snapshot(self) -> Dict[str, Any]:
+        """Compact snapshot: documents only, postings are rebuilt on load."""
+        return {
+            'version': SNAPSHOT_VERSION,
+            'tenant_id': self.tenant_id,
+            'built_at': self.built_at,
+            'documents': [(self.point_ids[slot], self.payloads[slot]) for slot in self.doc_lengths]
+        }
+
+    @classmethod
+    def from_snapshot(cls, snapshot: Dict[str, Any]) -> 'BM25Index':
+        index = cls(snapshot['tenant_id'])
+        for point_id, payload in snapshot['documents']:
+            index.add(point_id, payload)
+        index.built_at = snapshot.get('built_at', time.time())
+        return index
+
+
+class BM25IndexManager:
+    """
+    Owns the per-tenant BM25 indexes and their on-disk snapshots.
+
+    Indexes are loaded lazily on first use: from snapshot if it is fresh enough,
+    otherwise by scrolling the tenant's points from Qdrant.
+    """
+
+    def __init__(self, snapshot_dir: Optional[str] = None, max_snapshot_age_hours: Optional[float] = None):
+        self.snapshot_dir = Path(snapshot_dir or settings.bm25_snapshot_dir)
+        self.max_snapshot_age = (
+            max_snapshot_age_hours if max_snapshot_age_hours is not None
+            else settings.bm25_snapshot_max_age_hours
+        ) * 3600
+        self.indexes: Dict[int, BM25Index] = {}
+        self._build_locks: Dict[int, asyncio.Lock] = {}
+
+    def _snapshot_path(self, tenant_id: int) -> Path:
+        return self.snapshot_dir / f'tenant_{tenant_id}.bm25.gz'
+
+    def write_snapshot(self, tenant_id: int, snapshot: Dict[str, Any]) -> None:
+        """Write a snapshot atomically. Blocking - run in an executor."""
+        try:
+            self.snapshot_dir.mkdir(parents=True, exist_ok=True)
+            path = self._snapshot_path(tenant_id)
+            tmp_path = path.with_suffix('.tmp')
+            with gzip.open(tmp_path, 'wb') as f:
+                pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+            tmp_path.replace(path)
+            logger.debug(f"Saved BM25 snapshot for tenant {tenant_id} ({len(snapshot['documents'])} docs)")
+        except Exception as e:
+            logger.error(f'Failed to save BM25 snapshot for tenant {tenant_id}: {e}', exc_info=True)
+
+    async def save_snapshot(self, tenant_id: int) -> None:
+        index = self.indexes.get(tenant_id)
+        if index is None:
+            return
+        # Capture the document list on the event loop, pickle and write off it
+        snapshot = index.to_snapshot()
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.write_snapshot, tenant_id, snapshot)
+
+    def invalidate_snapshot(self, tenant_id: int) -> None:
+        self._snapshot_path(tenant_id).unlink(missing_ok=True)
+
+    def load_snapshot(self, tenant_id: int) -> Optional[BM25Index]:
+        path = self._snapshot_path(tenant_id)
+        if not path.exists():
+            return None
+        try:
+            with gzip.open(path, 'rb') as f:
+                snapshot = pickle.load(f)
+            if snapshot.get('version') != SNAPSHOT_VERSION:
+                logger.info(f'Ignoring BM25 snapshot for tenant {tenant_id}: version mismatch')
+                return None
+            if time.time() - snapshot.get('built_at', 0) > self.max_snapshot_age:
+                logger.info(f'Ignoring stale BM25 snapshot for tenant {tenant_id}')
+                return None
+            index = BM25Index.from_snapshot(snapshot)
+            logger.info(f'Loaded BM25 snapshot for tenant {tenant_id} ({len(index)} docs)')
+            return index
+        except Exception as e:
+            logger.error(f'Failed to load BM25 snapshot for tenant {tenant_id}: {e}', exc_info=True)
+            return None
+
+    async def get_index(self, tenant_id: int, qdrant_service) -> BM25Index:
+        """Return the tenant index, loading or building it on first use."""
+        index = self.indexes.get(tenant_id)
+        if index is not None:
+            return index
+
+        lock = self._build_locks.setdefault(tenant_id, asyncio.Lock())
+        async with lock:
+            index = self.indexes.get(tenant_id)
+            if index is not None:
+                return index
+
+            loop = asyncio.get_running_loop()
+            index = await loop.run_in_executor(None, self.load_snapshot, tenant_id)
+            if index is None:
+                index = await self.build_index(tenant_id, qdrant_service)
+                self.indexes[tenant_id] = index
+                await self.save_snapshot(tenant_id)
+            else:
+                self.indexes[tenant_id] = index
+            return index
+
+    async def build_index(self, tenant_id: int, qdrant_service) -> BM25Index:
+        """Build a tenant index by scrolling its points from Qdrant."""
+        start_time = time.perf_counter()
+        index = BM25Index(tenant_id)
+        records = await qdrant_service.scroll_tenant_points(tenant_id)
+        for record in records:
+            index.add(record.id, record.payload or {})
+        logger.info(
+            f'Built BM25 index for tenant {tenant_id}: {len(index)} docs, '
+            f'{len(index.postings)} terms in {time.perf_counter() - start_time:.2f}s'
+        )
+        return index
+
+    async def search(self, tenant_id: int, keywords: List[str], qdrant_service, limit: int = 10) -> List[Tuple[Any, float, Dict[str, Any]]]:
+        index = await self.get_index(tenant_id, qdrant_service)
+        return index.search(keywords, limit)
+
+    async def apply_upsert(self, tenant_id: int, points: List[Tuple[Any, Dict[str, Any]]]) -> int:
+        """Apply a vectorize event to the tenant index."""
+        index = self.indexes.get(tenant_id)
+        if index is None:
+            # Not loaded: drop the snapshot so the next build rescans Qdrant
+            self.invalidate_snapshot(tenant_id)
+            return 0
+        for point_id, payload in points:
+            index.add(point_id, payload)
+        await self.save_snapshot(tenant_id)
+        return len(points)
+
+    async def apply_delete(self, tenant_id: int, source_id: int, doc_type: Optional[int] = None) -> int:
+        """Apply a delete event for every chunk of a source document."""
+        index = self.indexes.get(tenant_id)
+        if index is None:
+            self.invalidate_snapshot(tenant_id)
+            return 0
+        removed = index.remove_source(source_id, doc_type)
+        if removed:
+            await self.save_snapshot(tenant_id)
+        return removed
+
+
+# Global singleton instance
+_bm25_index_manager = None
+
+
+def get_bm25_index_manager() -> BM25IndexManager:
+    """
+    Get or create the global BM25 index manager.
+
+    Returns:
+        BM25IndexManager: The global manager instance shared by all QdrantService instances
+    """
+    global _bm25_index_manager
+    if _bm25_index_manager is None:
+        _bm25_index_manager = BM25IndexManager()
+    return _bm25_index_manager
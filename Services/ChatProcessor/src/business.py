@@ -1,90 +1,194 @@
 import httpx
 import asyncio
-from typing import List, Dict, Any, Optional
+import functools
+import time
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
 from qdrant_client.async_qdrant_client import AsyncQdrantClient
-from qdrant_client.models import Filter, FieldCondition, MatchValue, MatchText, ScoredPoint
+from qdrant_client.models import Filter, FieldCondition, MatchValue, MatchText, ScoredPoint, SearchRequest, Prefetch, FusionQuery, Fusion, QueryRequest
 from src.config import settings
 from src.logger import logger
 from src.evaluation_logger import get_evaluation_logger
+from src.bm25_index import get_bm25_index_manager
+from src.vector_index import get_local_vector_index_manager
+from src.chunk_store import get_chunk_text_store
+from src.token_budget import ContextBudgeter, get_token_counter
+from src.llm_scheduler import get_llm_scheduler
+from src.ollama_pool import OllamaBackendPool, get_ollama_backend_pool, normalize_model_name
+from src.model_router import get_model_router
+from src.pipeline import Pipeline, Stage, StageTimings
+from src.term_matcher import TENANT, TermMatch, TermMatcher, get_term_matcher
+from src.response_cleanup import clean_response
+from src.prompt_cache import get_system_message_cache
+from src.tracing import get_tracer, traced, current_span, current_traceparent, set_baggage
+from src.metrics import EMBEDDING_LATENCY, QDRANT_SEARCH_LATENCY, observe_latency, observe_generation, observe_message_latency
 from src.hybrid_search import (
     LegalTermExtractor,
     ReciprocalRankFusion,
     HybridSearchStrategy,
+    RetrievalHit,
+    SOURCE_GLOBAL,
+    SOURCE_KEYWORD,
+    SOURCE_TENANT,
     merge_and_deduplicate
 )
 
 class OllamaService:
 
-    def __init__(self, base_url: Optional[str]=None, model: Optional[str]=None, timeout: Optional[int]=None):
-        self.base_url = (base_url or settings.ollama_base_url).rstrip('/')
+    def __init__(self, base_url: Optional[str]=None, model: Optional[str]=None, timeout: Optional[int]=None, keep_alive: Optional[str]=None, num_ctx: Optional[int]=None, base_urls: Optional[List[str]]=None):
+        if base_urls is None and base_url:
+            base_urls = [base_url]
+        self.pool = OllamaBackendPool(base_urls) if base_urls else get_ollama_backend_pool()
+        self.base_url = self.pool.backends[0].base_url
         self.model = model or settings.ollama_model
         self.timeout = timeout or settings.ollama_timeout
+        self.keep_alive = keep_alive if keep_alive is not None else settings.ollama_keep_alive
+        self.num_ctx = num_ctx if num_ctx is not None else settings.ollama_num_ctx
         self.chat_endpoint = f'{self.base_url}/api/chat'
-        logger.info(f'Initialized OllamaService: base_url={self.base_url}, model={self.model}, timeout={self.timeout}s')
+        logger.info(
+            f"Initialized OllamaService: backends={', '.join(b.base_url for b in self.pool.backends)}, "
+            f'model={self.model}, timeout={self.timeout}s, '
+            f'keep_alive={self.keep_alive or "default"}, num_ctx={self.num_ctx or "default"}'
+        )
 
-    async def generate_response(self, prompt: str, conversation_history: Optional[List[Dict[str, str]]]=None, stream: bool=False, temperature: Optional[float]=None) -> str:
+    async def generate_response(self, prompt: str, conversation_history: Optional[List[Dict[str, str]]]=None, stream: bool=False, temperature: Optional[float]=None, tenant_id: Optional[int]=None, model: Optional[str]=None, num_predict: Optional[int]=None) -> str:
+        ai_response, _ = await self.generate_response_with_stats(prompt, conversation_history, stream, temperature, tenant_id, model, num_predict)
+        return ai_response
+
+    @staticmethod
+    def _extract_stats(data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Extract timing counters from an Ollama /api/chat response (durations are ns).
+
+        A prompt_eval_count well below the prompt size means Ollama reused a
+        cached prefix and only evaluated the new tokens.
+        """
+        stats = {
+            'prompt_eval_count': data.get('prompt_eval_count'),
+            'eval_count': data.get('eval_count')
+        }
+        for field in ('prompt_eval_duration', 'eval_duration', 'load_duration', 'total_duration'):
+            duration = data.get(field)
+            stats[f'{field}_ms'] = round(duration / 1e6, 1) if duration is not None else None
+        return stats
+
+    def _has_other_backend(self, tried: set, model: str) -> bool:
+        return bool(self.pool.candidates(model, exclude=tried))
+
+    @traced('ollama.generate')
+    async def generate_response_with_stats(self, prompt: str, conversation_history: Optional[List[Dict[str, str]]]=None, stream: bool=False, temperature: Optional[float]=None, tenant_id: Optional[int]=None, model: Optional[str]=None, num_predict: Optional[int]=None) -> Tuple[str, Dict[str, Any]]:
+        model = model or self.model
         messages = conversation_history or []
         messages.append({'role': 'user', 'content': prompt})
-        payload = {'model': self.model, 'messages': messages, 'stream': stream}
+        payload = {'model': model, 'messages': messages, 'stream': stream}
 
+        options = {}
         # Inject temperature to reduce hallucination/creativity if provided
         if temperature is not None:
-            payload['options'] = {'temperature': temperature}
+            options['temperature'] = temperature
             logger.debug(f'Setting temperature to {temperature} for reduced hallucination')
+        # A fixed num_ctx avoids silent prompt truncation and model reloads caused by differing context sizes
+        if self.num_ctx:
+            options['num_ctx'] = self.num_ctx
+        # Cap the answer length (set lower for the small model)
+        if num_predict:
+            options['num_predict'] = num_predict
+        if options:
+            payload['options'] = options
+        # Keep the model (and its KV cache) loaded between sparse requests
+        if self.keep_alive:
+            payload['keep_alive'] = self.keep_alive
 
         logger.debug(f'Sending request to Ollama: {payload}')
-        try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(self.chat_endpoint, json=payload)
-                response.raise_for_status()
-                data = response.json()
+        await self.pool.refresh_models()
+        tried = set()
+        while True:
+            # Tenant-sticky, least-loaded healthy backend
+            backend = self.pool.select(model, tenant_id=tenant_id, exclude=tried)
+            tried.add(backend.base_url)
+            backend.in_flight += 1
+            try:
+                async with httpx.AsyncClient(timeout=self.timeout) as client:
+                    response = await client.post(backend.chat_endpoint, json=payload)
+                    response.raise_for_status()
+                    data = response.json()
+                self.pool.mark_success(backend)
                 if 'message' in data and 'content' in data['message']:
                     ai_response = data['message']['content']
-                    logger.info(f'Generated response (length: {len(ai_response)})')
-                    return ai_response
+                    stats = self._extract_stats(data)
+                    stats['backend'] = backend.base_url
+                    stats['model'] = model
+                    span = current_span()
+                    if span is not None:
+                        span.set_attribute('model', model)
+                        span.set_attribute('backend', backend.base_url)
+                        span.set_attribute('prompt_eval_count', stats['prompt_eval_count'])
+                        span.set_attribute('eval_count', stats['eval_count'])
+                    logger.info(
+                        f"Generated response (backend: {backend.base_url}, model: {model}, length: {len(ai_response)}, "
+                        f"prompt_eval_count: {stats['prompt_eval_count']}, "
+                        f"prompt_eval_duration: {stats['prompt_eval_duration_ms']}ms)"
+                    )
+                    return ai_response, stats
                 else:
                     logger.error(f'Unexpected response format: {data}')
                     raise ValueError(f'Unexpected response format: {data}')
-        except httpx.TimeoutException as e:
-            logger.error(f'Timeout calling Ollama: {e}')
-            raise Exception(f'Ollama timeout after {self.timeout}s: {str(e)}')
-        except httpx.HTTPStatusError as e:
-            error_detail = 'Unknown error'
-            try:
-                error_body = e.response.text
-                logger.error(f'HTTP error from Ollama: {e.response.status_code} | Response: {error_body}')
-                error_detail = error_body[:200] if error_body else f'Status {e.response.status_code}'
-            except:
-                logger.error(f'HTTP error from Ollama: {e.response.status_code} (could not read response body)')
-            raise Exception(f'Ollama error: {error_detail}')
-        except httpx.RequestError as e:
-            logger.error(f'Request error calling Ollama: {e}')
-            raise Exception(f'Failed to connect to Ollama: {str(e)}')
-        except Exception as e:
-            logger.error(f'Error during AI generation: {e}', exc_info=True)
-            raise
+            except httpx.ConnectError as e:
+                # Request never reached the backend: safe to retry elsewhere
+                self.pool.mark_failure(backend, 'connection failed')
+                if self._has_other_backend(tried, model):
+                    logger.warning(f'Failed to connect to Ollama backend {backend.base_url}, retrying on another backend: {e}')
+                    continue
+                logger.error(f'Request error calling Ollama: {e}')
+                raise Exception(f'Failed to connect to Ollama: {str(e)}')
+            except httpx.TimeoutException as e:
+                self.pool.mark_failure(backend, 'timeout')
+                logger.error(f'Timeout calling Ollama: {e}')
+                raise Exception(f'Ollama timeout after {self.timeout}s: {str(e)}')
+            except httpx.HTTPStatusError as e:
+                status_code = e.response.status_code
+                if status_code == 404 and backend.models is not None and self._has_other_backend(tried, model):
+                    # Model list was stale: the model is gone from this backend
+                    backend.models.discard(normalize_model_name(model))
+                    logger.warning(f"Model '{model}' not found on {backend.base_url}, retrying on another backend")
+                    continue
+                if status_code >= 500:
+                    self.pool.mark_failure(backend, f'HTTP {status_code}')
+                error_detail = 'Unknown error'
+                try:
+                    error_body = e.response.text
+                    logger.error(f'HTTP error from Ollama: {status_code} | Response: {error_body}')
+                    error_detail = error_body[:200] if error_body else f'Status {status_code}'
+                except:
+                    logger.error(f'HTTP error from Ollama: {status_code} (could not read response body)')
+                raise Exception(f'Ollama error: {error_detail}')
+            except httpx.RequestError as e:
+                self.pool.mark_failure(backend, 'request error')
+                logger.error(f'Request error calling Ollama: {e}')
+                raise Exception(f'Failed to connect to Ollama: {str(e)}')
+            except Exception as e:
+                logger.error(f'Error during AI generation: {e}', exc_info=True)
+                raise
+            finally:
+                backend.in_flight -= 1
 
     async def list_models(self) -> list:
-        try:
-            async with httpx.AsyncClient(timeout=5.0) as client:
-                response = await client.get(f'{self.base_url}/api/tags')
-                response.raise_for_status()
-                data = response.json()
-                models = [model.get('name', '') for model in data.get('models', [])]
-                return models
-        except Exception as e:
-            logger.error(f'Failed to list Ollama models: {e}')
-            return []
+        """Union of the models available on all backends."""
+        await self.pool.refresh_models(force=True)
+        models = set()
+        for backend in self.pool.backends:
+            models.update(backend.models or ())
+        return sorted(models)
 
     async def health_check(self) -> bool:
         try:
             models = await self.list_models()
             if models:
                 logger.info(f"Ollama health check passed. Available models: {', '.join(models)}")
-                if self.model not in models:
-                    logger.warning(f"Configured model '{self.model}' not found in Ollama. Available: {', '.join(models)}")
-                    logger.warning(f'Please run: ollama pull {self.model}')
+                for backend in self.pool.backends:
+                    if not backend.has_model(self.model):
+                        logger.warning(f"Configured model '{self.model}' not found on Ollama backend {backend.base_url}. Available: {', '.join(sorted(backend.models))}")
+                        logger.warning(f'Please run: ollama pull {self.model}')
                 return True
             else:
                 logger.warning('Ollama is running but no models found. Please pull a model first.')
@@ -95,19 +199,266 @@ class OllamaService:
 
 class QdrantService:
 
-    def __init__(self, host: Optional[str]=None, port: Optional[int]=None, collection_name: Optional[str]=None):
+    # Adaptive similarity threshold: Lower threshold to reduce false negatives
+    # Old threshold (0.5) was too aggressive and filtered out valid abbreviation matches
+    SIMILARITY_THRESHOLD = 0.3
+    # Reduced from 0.6 to 0.4 to improve recall for abbreviation queries
+    KEYWORD_THRESHOLD = 0.4
+    # Payload fields read downstream (prompt context, citations, reference ids)
+    PAYLOAD_FIELDS = ['text', 'source_id', 'document_name', 'heading1', 'heading2']
+    # Field every stored chunk has: a hit without it still needs its payload fetched
+    PAYLOAD_MARKER_FIELD = 'source_id'
+    # Local indexes also keep the fields needed to apply delete events
+    INDEX_PAYLOAD_FIELDS = PAYLOAD_FIELDS + ['tenant_id', 'type']
+    # Tenant of the global legal knowledge base
+    GLOBAL_TENANT_ID = 1
+
+    def __init__(self, host: Optional[str]=None, port: Optional[int]=None, collection_name: Optional[str]=None, search_engine: Optional[str]=None, keyword_engine: Optional[str]=None, local_vector_index: Optional[bool]=None, lazy_payload: Optional[bool]=None, rerank_served: Optional[bool]=None):
         self.host = host or settings.qdrant_host
         self.port = port or settings.qdrant_port
         self.collection_name = collection_name or settings.qdrant_collection
+        self.search_engine = (search_engine or settings.hybrid_search_engine).lower()
+        self.keyword_engine = (keyword_engine or settings.keyword_search_engine).lower()
+        self.local_vector_index = settings.local_vector_index_enabled if local_vector_index is None else local_vector_index
+        self.lazy_payload = settings.qdrant_lazy_payload if lazy_payload is None else lazy_payload
+        self.rerank_served = settings.hybrid_rerank_served if rerank_served is None else rerank_served
         self.client = AsyncQdrantClient(host=self.host, port=self.port)
-        logger.info(f'Initialized QdrantService: {self.host}:{self.port}, collection={self.collection_name}')
+        self.text_store = get_chunk_text_store()
+        if self.text_store is not None and self.keyword_engine == 'qdrant':
+            # Qdrant MatchText filters run on the payload, which no longer has the texts
+            raise ValueError('CHUNK_TEXT_STORE_PATH moves chunk texts out of Qdrant: set KEYWORD_SEARCH_ENGINE=bm25')
+        logger.info(
+            f'Initialized QdrantService: {self.host}:{self.port}, collection={self.collection_name}, '
+            f'search_engine={self.search_engine}, keyword_engine={self.keyword_engine}, '
+            f'local_vector_index={self.local_vector_index}, lazy_payload={self.lazy_payload}, rerank_served={self.rerank_served}, '
+            f'chunk_text_store={self.text_store.path if self.text_store is not None else None}'
+        )
+
+    @classmethod
+    def _scope_source(cls, tenant_id: Optional[int]) -> str:
+        """Source tag of hits from a tenant scope."""
+        return SOURCE_GLOBAL if tenant_id == cls.GLOBAL_TENANT_ID else SOURCE_TENANT
+
+    def _candidate_payload(self, *fields: str):
+        """
+        Payload selector of candidate searches.
+
+        With lazy payloads candidates carry only the given fields (ids and
+        scores otherwise) and fetch_payloads hydrates the final top-k;
+        without, they carry the projected PAYLOAD_FIELDS right away.
+        """
+        if self.lazy_payload:
+            return list(fields) if fields else False
+        return self.PAYLOAD_FIELDS + [field for field in fields if field not in self.PAYLOAD_FIELDS]
+
+    @staticmethod
+    def _build_exact_tenant_filter(tenant_id: int) -> Filter:
+        return Filter(
+            must=[FieldCondition(key='tenant_id', match=MatchValue(value=tenant_id))]
+        )
+
+    @staticmethod
+    def _build_keyword_filter(keywords: List[str], tenant_id: int) -> Filter:
+        """
+        Build a filter that must match tenant_id and should match any keyword
+        in text, document_name, heading1 or heading2.
+        """
+        keyword_conditions = []
+        for keyword in keywords:
+            for field in ('text', 'document_name', 'heading1', 'heading2'):
+                keyword_conditions.append(
+                    FieldCondition(key=field, match=MatchText(text=keyword))
+                )
+
+        return Filter(
+            must=[
+                FieldCondition(key='tenant_id', match=MatchValue(value=tenant_id))
+            ],
+            should=keyword_conditions if keyword_conditions else None
+        )
+
+    def _build_vector_request(self, query_vector: List[float], tenant_id: int, limit: int) -> SearchRequest:
+        return SearchRequest(
+            vector=query_vector,
+            filter=self._build_exact_tenant_filter(tenant_id),
+            limit=limit,
+            with_payload=self._candidate_payload(),
+            with_vector=False  # Don't return vectors to save memory
+        )
+
+    def _build_keyword_request(self, query_vector: List[float], keywords: List[str], tenant_id: int, limit: int) -> SearchRequest:
+        return SearchRequest(
+            vector=query_vector,
+            filter=self._build_keyword_filter(keywords, tenant_id),
+            limit=limit,
+            score_threshold=self.KEYWORD_THRESHOLD,
+            with_payload=self._candidate_payload(),
+            with_vector=False
+        )
+
+    def _apply_similarity_threshold(self, results: List[RetrievalHit]) -> List[RetrievalHit]:
+        filtered_results = [r for r in results if r.score >= self.SIMILARITY_THRESHOLD]
+
+        # Log filtering activity
+        if len(filtered_results) < len(results):
+            logger.info(
+                f'Similarity filtering: {len(results)} -> {len(filtered_results)} results '
+                f'(excluded {len(results) - len(filtered_results)} below {self.SIMILARITY_THRESHOLD})'
+            )
+        return filtered_results
+
+    @traced('qdrant.search_batch')
+    @observe_latency(QDRANT_SEARCH_LATENCY, search_type='batch')
+    async def search_batch(self, requests: List[SearchRequest]) -> List[List[ScoredPoint]]:
+        """
+        Execute several sub-queries in a single Qdrant round trip.
+
+        Args:
+            requests: Search requests, each with its own vector, filter and limit
+
+        Returns:
+            One result list per request, in the same order as the requests
+        """
+        try:
+            results = await self.client.search_batch(
+                collection_name=self.collection_name,
+                requests=requests
+            )
+            logger.info(
+                f'Qdrant batch search completed: {len(requests)} sub-queries, '
+                f'results={[len(r) for r in results]}'
+            )
+            return results
+
+        except Exception as e:
+            logger.error(f'Qdrant batch search failed: {e}', exc_info=True)
+            raise Exception(f'Batch search failed: {str(e)}')
+
+    @traced('qdrant.retrieve')
+    @observe_latency(QDRANT_SEARCH_LATENCY, search_type='retrieve')
+    async def fetch_payloads(self, hits: List[RetrievalHit]) -> List[RetrievalHit]:
+        """
+        Fetch the PAYLOAD_FIELDS of the final hits in one batched retrieve.
+
+        Hits that already carry their payload (local tiers, eager payloads)
+        are kept as they are. Hits whose point was deleted since the search
+        are dropped. With the chunk text store, texts and headings are then
+        read from the store in one batched lookup.
+
+        Args:
+            hits: Final results, in prompt order
 
+        Returns:
+            The hits with payloads, in the same order
+        """
+        marker = self.PAYLOAD_MARKER_FIELD
+        missing_ids = list(dict.fromkeys(hit.id for hit in hits if marker not in hit.payload))
+        if missing_ids:
+            try:
+                records = await self.client.retrieve(
+                    collection_name=self.collection_name,
+                    ids=missing_ids,
+                    with_payload=self.PAYLOAD_FIELDS,
+                    with_vectors=False
+                )
+            except Exception as e:
+                logger.error(f'Qdrant payload retrieve failed: {e}', exc_info=True)
+                raise Exception(f'Payload retrieve failed: {str(e)}')
+
+            payloads = {record.id: record.payload or {} for record in records}
+            hits = [
+                hit if marker in hit.payload else hit.with_payload(payloads[hit.id])
+                for hit in hits
+                if marker in hit.payload or hit.id in payloads
+            ]
+            if len(payloads) < len(missing_ids):
+                logger.warning(f'Payload retrieve: {len(missing_ids) - len(payloads)} of {len(missing_ids)} points no longer exist')
+            logger.debug(f'Fetched payloads of {len(records)} points')
+        if self.text_store is not None:
+            hits = self._with_stored_texts(hits)
+        return hits
+
+    def _with_stored_texts(self, hits: List[RetrievalHit]) -> List[RetrievalHit]:
+        """Hits with text and headings from the chunk text store (points indexed before the store keep them in Qdrant)."""
+        texts = self.text_store.get_points(hit.id for hit in hits if 'text' not in hit.payload)
+        if not texts:
+            return hits
+        return [
+            hit.with_payload({**hit.payload, **texts[str(hit.id)]}) if 'text' not in hit.payload and str(hit.id) in texts else hit
+            for hit in hits
+        ]
+
+    @traced('local_vector.search')
+    @observe_latency(QDRANT_SEARCH_LATENCY, search_type='local_vector')
+    async def search_local_vectors(self, query_vector: List[float], tenant_id: int, limit: int) -> Optional[List[RetrievalHit]]:
+        """
+        Answer a tenant vector search from the in-process tier.
+
+        Returns:
+            Results sorted by cosine score, or None if the tenant is served by Qdrant
+        """
+        if not self.local_vector_index:
+            return None
+        try:
+            index = await get_local_vector_index_manager().get_index(tenant_id, self)
+        except Exception as e:
+            logger.error(f'Local vector index unavailable for tenant_id={tenant_id}: {e}', exc_info=True)
+            return None
+        if index is None:
+            return None
+
+        hits = index.search(query_vector, limit)
+        logger.info(f'Local vector search completed: tenant_id={tenant_id}, results={len(hits)}')
+        source = self._scope_source(tenant_id)
+        return [RetrievalHit(point_id, score, source, payload) for point_id, score, payload in hits]
+
+    async def search_vector_scopes(
+        self,
+        query_vector: List[float],
+        tenant_ids: List[int],
+        limit: int,
+        extra_requests: Optional[List[SearchRequest]] = None
+    ) -> tuple[List[List[RetrievalHit]], List[List[RetrievalHit]]]:
+        """
+        Vector search several tenant scopes, plus optional extra sub-queries.
+
+        Scopes served by the local vector tier are answered in-process; the
+        remaining scopes and the extra requests share one Qdrant batch request.
+        Scope hits are tagged tenant/global, extra request hits keyword.
+
+        Args:
+            query_vector: Query embedding
+            tenant_ids: Tenant scopes to search (one result list each)
+            limit: Results per scope
+            extra_requests: Additional Qdrant sub-queries (e.g. keyword search)
+
+        Returns:
+            (results per tenant scope, results per extra request)
+        """
+        extra_requests = extra_requests or []
+        local_results = [await self.search_local_vectors(query_vector, tenant_id, limit) for tenant_id in tenant_ids]
+
+        requests = [
+            self._build_vector_request(query_vector, tenant_id, limit)
+            for tenant_id, local in zip(tenant_ids, local_results)
+            if local is None
+        ] + extra_requests
+        remote_results = iter(await self.search_batch(requests)) if requests else iter(())
+
+        scope_results = [
+            local if local is not None else RetrievalHit.from_points(next(remote_results), self._scope_source(tenant_id))
+            for tenant_id, local in zip(tenant_ids, local_results)
+        ]
+        return scope_results, [RetrievalHit.from_points(results, SOURCE_KEYWORD) for results in remote_results]
+
+    @traced('qdrant.search')
+    @observe_latency(QDRANT_SEARCH_LATENCY, search_type='vector')
     async def search_with_tenant_filter(
         self,
         query_vector: List[float],
         tenant_id: int,
         limit: int = 5
-    ) -> List[ScoredPoint]:
+    ) -> List[RetrievalHit]:
         try:
             search_filter = Filter(
                 should=[
@@ -121,20 +472,15 @@ class QdrantService:
                 query_vector=query_vector,
                 query_filter=search_filter,
                 limit=limit,
+                with_payload=self._candidate_payload('tenant_id'),  # tenant_id tags the source
                 with_vectors=False  # Don't return vectors to save memory
             )
+            results = [
+                RetrievalHit.from_point(point, self._scope_source((point.payload or {}).get('tenant_id')))
+                for point in results
+            ]
 
-            # Adaptive similarity threshold: Lower threshold to reduce false negatives
-            # Old threshold (0.5) was too aggressive and filtered out valid abbreviation matches
-            SIMILARITY_THRESHOLD = 0.3
-            filtered_results = [r for r in results if r.score >= SIMILARITY_THRESHOLD]
-
-            # Log filtering activity
-            if len(filtered_results) < len(results):
-                logger.info(
-                    f'Similarity filtering: {len(results)} -> {len(filtered_results)} results '
-                    f'(excluded {len(results) - len(filtered_results)} below {SIMILARITY_THRESHOLD})'
-                )
+            filtered_results = self._apply_similarity_threshold(results)
 
             logger.info(
                 f'Qdrant search completed: tenant_id={tenant_id}, results={len(filtered_results)}'
@@ -148,36 +494,28 @@ class QdrantService:
             )
             raise Exception(f'Vector search failed: {str(e)}')
 
+    @traced('qdrant.search_exact_tenant')
+    @observe_latency(QDRANT_SEARCH_LATENCY, search_type='exact_tenant')
     async def search_exact_tenant(
         self,
         query_vector: List[float],
         tenant_id: int,
         limit: int = 1
-    ) -> List[ScoredPoint]:
+    ) -> List[RetrievalHit]:
         try:
-            search_filter = Filter(
-                must=[FieldCondition(key='tenant_id', match=MatchValue(value=tenant_id))]
-            )
-
-            results = await self.client.search(
-                collection_name=self.collection_name,
-                query_vector=query_vector,
-                query_filter=search_filter,
-                limit=limit,
-                with_vectors=False  # Don't return vectors to save memory
-            )
-
-            # Adaptive similarity threshold: Lower threshold to reduce false negatives
-            # Old threshold (0.5) was too aggressive and filtered out valid abbreviation matches
-            SIMILARITY_THRESHOLD = 0.3
-            filtered_results = [r for r in results if r.score >= SIMILARITY_THRESHOLD]
-
-            # Log filtering activity
-            if len(filtered_results) < len(results):
-                logger.info(
-                    f'Similarity filtering: {len(results)} -> {len(filtered_results)} results '
-                    f'(excluded {len(results) - len(filtered_results)} below {SIMILARITY_THRESHOLD})'
+            results = await self.search_local_vectors(query_vector, tenant_id, limit)
+            if results is None:
+                points = await self.client.search(
+                    collection_name=self.collection_name,
+                    query_vector=query_vector,
+                    query_filter=self._build_exact_tenant_filter(tenant_id),
+                    limit=limit,
+                    with_payload=self._candidate_payload(),
+                    with_vectors=False  # Don't return vectors to save memory
                 )
+                results = RetrievalHit.from_points(points, self._scope_source(tenant_id))
+
+            filtered_results = self._apply_similarity_threshold(results)
 
             logger.info(
                 f'Qdrant exact search completed: tenant_id={tenant_id}, results={len(filtered_results)}'
@@ -191,12 +529,18 @@ class QdrantService:
             )
             raise Exception(f'Vector search failed: {str(e)}')
 
+    @traced('embedding.request')
+    @observe_latency(EMBEDDING_LATENCY)
     async def get_embedding(self, text: str) -> List[float]:
         try:
+            # Propagate the trace so EmbeddingService spans join this one
+            traceparent = current_traceparent()
+            headers = {'traceparent': traceparent} if traceparent else None
             async with httpx.AsyncClient(timeout=30.0) as client:
                 response = await client.post(
                     f'{settings.embedding_service_url}/embed',
-                    json={'text': text}
+                    json={'text': text},
+                    headers=headers
                 )
                 response.raise_for_status()
                 result = response.json()
@@ -227,13 +571,15 @@ class QdrantService:
             logger.error(f'Qdrant health check failed: {e}')
             return False
 
+    @traced('qdrant.search_keywords')
+    @observe_latency(QDRANT_SEARCH_LATENCY, search_type='keywords')
     async def search_with_keywords(
         self,
         query_vector: List[float],
         keywords: List[str],
         tenant_id: int,
         limit: int = 10
-    ) -> List[ScoredPoint]:
+    ) -> List[RetrievalHit]:
         """
         Hybrid search: combines vector similarity with keyword matching.
 
@@ -247,59 +593,23 @@ class QdrantService:
             limit: Maximum number of results
 
         Returns:
-            List of ScoredPoint results ranked by hybrid score
+            List of RetrievalHit results ranked by hybrid score
         """
         try:
-            # Build keyword filters - match any of the keywords in text or metadata
-            keyword_conditions = []
-            for keyword in keywords:
-                # Match in text content
-                keyword_conditions.append(
-                    FieldCondition(
-                        key='text',
-                        match=MatchText(text=keyword)
-                    )
-                )
-                # Match in document name
-                keyword_conditions.append(
-                    FieldCondition(
-                        key='document_name',
-                        match=MatchText(text=keyword)
-                    )
-                )
-                # Match in headings
-                keyword_conditions.append(
-                    FieldCondition(
-                        key='heading1',
-                        match=MatchText(text=keyword)
-                    )
-                )
-                keyword_conditions.append(
-                    FieldCondition(
-                        key='heading2',
-                        match=MatchText(text=keyword)
-                    )
-                )
-
             # Build filter: must match tenant_id, should match keywords
-            search_filter = Filter(
-                must=[
-                    FieldCondition(key='tenant_id', match=MatchValue(value=tenant_id))
-                ],
-                should=keyword_conditions if keyword_conditions else None
-            )
+            search_filter = self._build_keyword_filter(keywords, tenant_id)
 
             # Execute search with lower threshold for keyword matches
-            # Reduced from 0.6 to 0.4 to improve recall for abbreviation queries
-            KEYWORD_THRESHOLD = 0.4
             results = await self.client.search(
                 collection_name=self.collection_name,
                 query_vector=query_vector,
                 query_filter=search_filter,
                 limit=limit,
-                score_threshold=KEYWORD_THRESHOLD,
+                score_threshold=self.KEYWORD_THRESHOLD,
+                with_payload=self._candidate_payload(),
                 with_vectors=False  # Don't return vectors to save memory
             )
+            results = RetrievalHit.from_points(results, SOURCE_KEYWORD)
 
             logger.info(
                 f'Keyword search completed: tenant_id={tenant_id}, '
@@ -316,13 +626,277 @@ class QdrantService:
             # Return empty list on error to allow graceful degradation
             return []
 
+    @traced('qdrant.count')
+    async def count_tenant_points(self, tenant_id: int) -> int:
+        result = await self.client.count(
+            collection_name=self.collection_name,
+            count_filter=self._build_exact_tenant_filter(tenant_id),
+            exact=True
+        )
+        return result.count
+
+    @traced('qdrant.scroll')
+    async def scroll_tenant_points(self, tenant_id: int, with_vectors: bool = False, batch_size: int = 256) -> list:
+        """
+        Scroll every point of a tenant, used to build in-process indexes.
+
+        Args:
+            tenant_id: Tenant whose points are read
+            with_vectors: Also return the stored vectors
+            batch_size: Points fetched per scroll page
+
+        Returns:
+            List of Records with INDEX_PAYLOAD_FIELDS payloads (texts from the chunk text store if enabled)
+        """
+        records = []
+        offset = None
+        while True:
+            page, offset = await self.client.scroll(
+                collection_name=self.collection_name,
+                scroll_filter=self._build_exact_tenant_filter(tenant_id),
+                limit=batch_size,
+                offset=offset,
+                with_payload=self.INDEX_PAYLOAD_FIELDS,
+                with_vectors=with_vectors
+            )
+            records.extend(page)
+            if offset is None:
+                break
+        if self.text_store is not None:
+            # Indexes tokenize and return the texts, so fill them in from the store,
+            # off the event loop (index builds run during live queries)
+            texts = await asyncio.to_thread(
+                self.text_store.get_points, [record.id for record in records if 'text' not in (record.payload or {})]
+            )
+            for record in records:
+                if str(record.id) in texts:
+                    record.payload = {**(record.payload or {}), **texts[str(record.id)]}
+        logger.info(f'Scrolled {len(records)} points for tenant_id={tenant_id}')
+        return records
+
+    async def warm_up_tenant(self, tenant_id: int, keyword_search: bool = True) -> Dict[str, bool]:
+        """
+        Load the tenant's in-process indexes (BM25 and/or local vectors) ahead of the search.
+
+        Meant to run concurrently with the embedding call so the first query of a
+        tenant doesn't pay for index loading on the critical path.
+
+        Args:
+            tenant_id: Tenant of the upcoming search
+            keyword_search: Whether the search will use keywords (BM25 indexes are skipped otherwise)
+
+        Returns:
+            Which indexes are ready, e.g. {'bm25': True, 'vector': False}
+        """
+        warmed = {}
+        if keyword_search and self.keyword_engine == 'bm25':
+            # Keyword search covers the tenant and the global legal knowledge base
+            try:
+                await asyncio.gather(*(
+                    get_bm25_index_manager().get_index(scope, self)
+                    for scope in dict.fromkeys([tenant_id, self.GLOBAL_TENANT_ID])
+                ))
+                warmed['bm25'] = True
+            except Exception as e:
+                logger.warning(f'BM25 warm-up failed for tenant_id={tenant_id}: {e}')
+                warmed['bm25'] = False
+        if self.local_vector_index:
+            try:
+                warmed['vector'] = await get_local_vector_index_manager().get_index(tenant_id, self) is not None
+            except Exception as e:
+                logger.warning(f'Local vector warm-up failed for tenant_id={tenant_id}: {e}')
+                warmed['vector'] = False
+        return warmed
+
+    @traced('bm25.search')
+    @observe_latency(QDRANT_SEARCH_LATENCY, search_type='bm25')
+    async def search_keywords_bm25(
+        self,
+        keywords: List[str],
+        tenant_id: int,
+        limit: int = 10
+    ) -> List[RetrievalHit]:
+        """
+        Keyword search against the in-process BM25 index of the tenant.
+
+        Unlike search_with_keywords this needs no query vector and no Qdrant
+        round trip once the tenant index is loaded.
+
+        Args:
+            keywords: List of keywords to match (e.g., ["điều 212", "BHXH"])
+            tenant_id: Tenant ID
+            limit: Maximum number of results
+
+        Returns:
+            List of RetrievalHit results ranked by BM25 score
+        """
+        try:
+            hits = await get_bm25_index_manager().search(tenant_id, keywords, self, limit)
+            results = [RetrievalHit(point_id, score, SOURCE_KEYWORD, payload) for point_id, score, payload in hits]
+            logger.info(
+                f'BM25 keyword search completed: tenant_id={tenant_id}, '
+                f'keywords={keywords}, results={len(results)}'
+            )
+            return results
+
+        except Exception as e:
+            logger.error(
+                f'BM25 keyword search failed for tenant_id={tenant_id}: {e}',
+                exc_info=True
+            )
+            # Return empty list on error to allow graceful degradation
+            return []
+
+    @traced('qdrant.query_points')
+    @observe_latency(QDRANT_SEARCH_LATENCY, search_type='server_fusion')
+    async def hybrid_search_server_fusion(
+        self,
+        query_vector: List[float],
+        keywords: List[str],
+        tenant_ids: List[int],
+        limit: int = 5
+    ) -> List[List[RetrievalHit]]:
+        """
+        Hybrid search of several tenant scopes with RRF fusion done inside Qdrant.
+
+        Expresses the vector + keyword retrieval of each scope as one query:
+        both searches become prefetch sub-queries and Qdrant fuses them with
+        RRF, returning only the top-k. The queries of all scopes share one
+        batched round trip.
+
+        Args:
+            query_vector: Query embedding
+            keywords: Extracted legal keywords
+            tenant_ids: Tenant scopes to search (one result list each)
+            limit: Candidates per prefetch and fused results per scope
+
+        Returns:
+            Results per scope ranked by Qdrant's RRF score
+        """
+        requests = [
+            QueryRequest(
+                prefetch=[
+                    Prefetch(
+                        query=query_vector,
+                        filter=self._build_exact_tenant_filter(tenant_id),
+                        score_threshold=self.SIMILARITY_THRESHOLD,
+                        limit=limit
+                    ),
+                    Prefetch(
+                        query=query_vector,
+                        filter=self._build_keyword_filter(keywords, tenant_id),
+                        score_threshold=self.KEYWORD_THRESHOLD,
+                        limit=limit
+                    )
+                ],
+                query=FusionQuery(fusion=Fusion.RRF),
+                limit=limit,
+                offset=0,
+                with_payload=self._candidate_payload(),
+                with_vector=False
+            )
+            for tenant_id in tenant_ids
+        ]
+
+        responses = await self.client.query_batch_points(
+            collection_name=self.collection_name,
+            requests=requests
+        )
+
+        logger.info(
+            f'Server-side hybrid search for tenants {tenant_ids}: '
+            f'keywords={keywords} → {[len(response.points) for response in responses]} fused'
+        )
+        return [
+            RetrievalHit.from_points(response.points, self._scope_source(tenant_id))
+            for tenant_id, response in zip(tenant_ids, responses)
+        ]
+
+    def _fuse_scope(self, vector_results: List[RetrievalHit], keyword_results: List[RetrievalHit], tenant_id: int, limit: int) -> List[RetrievalHit]:
+        """RRF of a scope's vector and keyword hits, all tagged with the scope's source."""
+        source = self._scope_source(tenant_id)
+        fused_results = ReciprocalRankFusion.fuse(vector_results, keyword_results, k=60, limit=limit)
+        return [hit if hit.source == source else RetrievalHit(hit.id, hit.score, source, hit.payload) for hit in fused_results]
+
+    async def search_scopes(
+        self,
+        query_vector: List[float],
+        keywords: List[str],
+        tenant_ids: List[int],
+        limit: int
+    ) -> tuple[List[List[RetrievalHit]], Optional[List[List[RetrievalHit]]]]:
+        """
+        Vector and keyword retrieval of several tenant scopes.
+
+        Vector results keep their cosine scores (the fallback logic needs
+        them). With keywords, every scope also gets a hybrid ranking from the
+        configured engines:
+        - keyword engine 'bm25': the in-process BM25 index of each scope,
+          queried concurrently with the vector searches and fused with RRF
+          in Python (the search engine setting doesn't apply)
+        - search engine 'server': Qdrant prefetch + RRF per scope, in one
+          batched query running concurrently with the vector searches
+        - search engine 'client': MatchText keyword sub-queries share the
+          vector search batch request and are fused with RRF in Python
+
+        Args:
+            query_vector: Query embedding
+            keywords: Extracted legal keywords (may be empty)
+            tenant_ids: Tenant scopes to search
+            limit: Candidates per sub-search and length of each hybrid ranking
+
+        Returns:
+            (vector results per scope above SIMILARITY_THRESHOLD,
+             hybrid ranking per scope, or None without keywords or if it failed)
+        """
+        use_bm25 = bool(keywords) and self.keyword_engine == 'bm25'
+        use_server = bool(keywords) and not use_bm25 and self.search_engine == 'server'
+        extra_requests = [
+            self._build_keyword_request(query_vector, keywords, tenant_id, limit)
+            for tenant_id in tenant_ids
+        ] if keywords and not (use_bm25 or use_server) else []
+
+        async def server_fusion():
+            return await self.hybrid_search_server_fusion(query_vector, keywords, tenant_ids, limit) if use_server else None
+
+        async def bm25_search():
+            if not use_bm25:
+                return None
+            return await asyncio.gather(*(self.search_keywords_bm25(keywords, tenant_id, limit) for tenant_id in tenant_ids))
+
+        vector_search, ranked, bm25_results = await asyncio.gather(
+            self.search_vector_scopes(query_vector, tenant_ids, limit, extra_requests=extra_requests),
+            server_fusion(),
+            bm25_search(),
+            return_exceptions=True
+        )
+        if isinstance(vector_search, Exception):
+            logger.error(f'Vector/keyword batch search failed: {vector_search}')
+            vector_search = ([[] for _ in tenant_ids], [[] for _ in extra_requests])
+        if isinstance(ranked, Exception):
+            # Degrade to the vector ranking
+            logger.error(f'Server-side hybrid search failed: {ranked}')
+            ranked = None
+
+        scope_results, keyword_results = vector_search
+        scope_results = [self._apply_similarity_threshold(results) for results in scope_results]
+        if use_bm25:
+            keyword_results = bm25_results
+        if extra_requests or use_bm25:
+            with get_tracer().start_span('rrf.fuse'):
+                ranked = [
+                    self._fuse_scope(vector_results, scope_keyword_results, tenant_id, limit)
+                    for tenant_id, vector_results, scope_keyword_results in zip(tenant_ids, scope_results, keyword_results)
+                ]
+        return scope_results, ranked
+
     async def hybrid_search_single_tenant(
         self,
         query_vector: List[float],
         keywords: List[str],
         tenant_id: int,
         limit: int = 5
-    ) -> List[ScoredPoint]:
+    ) -> List[RetrievalHit]:
         """
         Perform hybrid search for a single tenant using RRF fusion.
 
@@ -331,6 +905,10 @@ class QdrantService:
         2. Keyword-boosted search (exact term matching)
         3. RRF re-ranking
 
+        1 and 2 are retrieved by search_scopes with the configured engines
+        (client-side or Qdrant RRF, MatchText or in-process BM25 keywords).
+        Payloads are fetched only for the fused top-k (see fetch_payloads).
+
         Args:
             query_vector: Query embedding
             keywords: Extracted legal keywords
@@ -340,56 +918,24 @@ class QdrantService:
         Returns:
             Re-ranked results using RRF
         """
+        start_time = time.perf_counter()
         try:
-            # Run both searches in parallel
-            vector_task = self.search_exact_tenant(
-                query_vector=query_vector,
-                tenant_id=tenant_id,
-                limit=limit * 2  # Get more for better RRF
+            [vector_results], ranked = await self.search_scopes(
+                query_vector,
+                keywords,
+                [tenant_id],
+                limit * 2  # Get more for better RRF
             )
-
-            # Only run keyword search if we have keywords
-            if keywords:
-                keyword_task = self.search_with_keywords(
-                    query_vector=query_vector,
-                    keywords=keywords,
-                    tenant_id=tenant_id,
-                    limit=limit * 2
-                )
-                vector_results, keyword_results = await asyncio.gather(
-                    vector_task, keyword_task, return_exceptions=True
-                )
-
-                # Handle exceptions
-                if isinstance(vector_results, Exception):
-                    logger.error(f'Vector search failed: {vector_results}')
-                    vector_results = []
-                if isinstance(keyword_results, Exception):
-                    logger.error(f'Keyword search failed: {keyword_results}')
-                    keyword_results = []
-
-                # Fuse results using RRF
-                fused_results = ReciprocalRankFusion.fuse(
-                    vector_results=vector_results,
-                    keyword_results=keyword_results,
-                    k=60
-                )
-
-                logger.info(
-                    f'Hybrid search for tenant {tenant_id}: '
-                    f'{len(vector_results)} vector + {len(keyword_results)} keyword '
-                    f'→ {len(fused_results)} fused'
-                )
-
-                return fused_results[:limit]
-            else:
-                # No keywords - fall back to pure vector search
+            if ranked is None:
+                # No keywords (or the hybrid ranking failed) - pure vector search
                 logger.debug(f'No keywords for tenant {tenant_id}, using vector search only')
-                vector_results = await vector_task
-                if isinstance(vector_results, Exception):
-                    logger.error(f'Vector search failed: {vector_results}')
-                    return []
-                return vector_results
+                return await self.fetch_payloads(vector_results)
+
+            logger.info(
+                f'Hybrid search engine={self.search_engine}, keyword_engine={self.keyword_engine} for tenant {tenant_id}: '
+                f'top {len(ranked[0][:limit])} in {(time.perf_counter() - start_time) * 1000:.1f}ms'
+            )
+            return await self.fetch_payloads(ranked[0][:limit])
 
         except Exception as e:
             logger.error(
@@ -404,19 +950,24 @@ class QdrantService:
         keywords: List[str],
         tenant_id: int,
         limit: int = 5
-    ) -> tuple[List[ScoredPoint], List[ScoredPoint], bool]:
+    ) -> tuple[List[RetrievalHit], List[RetrievalHit], bool]:
         """
         Perform multi-source search with intelligent fallback from tenant to global docs.
 
         Flow:
         1. Vector search tenant docs (semantic similarity)
         2. Vector search global legal docs (semantic similarity)
-        3. Apply fallback logic based on tenant result quality (cosine scores)
-        4. RRF fusion to combine results from both sources
+           (1 and 2 are sent together as one Qdrant batch request)
+        3. With keywords and HYBRID_RERANK_SERVED, a hybrid vector + keyword
+           ranking per source from the configured search engine (see search_scopes)
+        4. Apply fallback logic based on tenant result quality (cosine scores);
+           with a hybrid ranking, each source's slots are filled from it
+        5. RRF fusion to combine results from both sources
+        6. Fetch the payloads of the final results in one retrieve
 
         Args:
             query_vector: Query embedding
-            keywords: Extracted legal keywords (reserved for future use)
+            keywords: Extracted legal keywords (ignored unless rerank_served: vector search only)
             tenant_id: Tenant ID
             limit: Total result limit
 
@@ -424,29 +975,14 @@ class QdrantService:
             (tenant_results, global_results, fallback_triggered)
         """
         try:
-            # Parallel vector search in both scopes
-            tenant_task = self.search_exact_tenant(
-                query_vector=query_vector,
-                tenant_id=tenant_id,
-                limit=limit * 2  # Get more for better selection
+            # Tenant and global searches share one Qdrant round trip
+            # (scopes served by the local vector tier skip Qdrant entirely)
+            (tenant_results, global_results), ranked = await self.search_scopes(
+                query_vector,
+                keywords if self.rerank_served else [],
+                [tenant_id, self.GLOBAL_TENANT_ID],
+                limit * 2  # Get more for better selection
             )
-            global_task = self.search_exact_tenant(
-                query_vector=query_vector,
-                tenant_id=1,  # Global legal knowledge base
-                limit=limit * 2
-            )
-
-            tenant_results, global_results = await asyncio.gather(
-                tenant_task, global_task, return_exceptions=True
-            )
-
-            # Handle exceptions
-            if isinstance(tenant_results, Exception):
-                logger.error(f'Tenant search failed: {tenant_results}')
-                tenant_results = []
-            if isinstance(global_results, Exception):
-                logger.error(f'Global search failed: {global_results}')
-                global_results = []
 
             # Apply fallback logic using cosine similarity scores (BEFORE RRF)
             tenant_filtered, global_filtered, fallback = HybridSearchStrategy.apply_fallback_logic(
@@ -454,22 +990,32 @@ class QdrantService:
                 global_results=global_results,
                 limit=limit
             )
+            if ranked is not None:
+                # Keywords re-rank each source; the cosine-based decision above still sets how many hits it gets
+                tenant_ranked, global_ranked = ranked
+                tenant_filtered = tenant_ranked[:len(tenant_filtered)]
+                global_filtered = global_ranked[:len(global_filtered)]
 
             # Apply RRF fusion to combine tenant and global results
             if tenant_filtered and global_filtered:
-                fused_results = ReciprocalRankFusion.fuse(
-                    tenant_results=tenant_filtered,
-                    global_results=global_filtered,
-                    k=60
-                )
-                # Split back into tenant and global based on original source
-                tenant_ids = {r.id for r in tenant_filtered}
-                final_tenant = [r for r in fused_results if r.id in tenant_ids]
-                final_global = [r for r in fused_results if r.id not in tenant_ids]
+                with get_tracer().start_span('rrf.fuse'):
+                    fused_results = ReciprocalRankFusion.fuse(
+                        tenant_results=tenant_filtered,
+                        global_results=global_filtered,
+                        k=60
+                    )
+                # Split back into tenant and global based on the source tag (tenant hits win on shared ids)
+                final_tenant = [r for r in fused_results if r.source != SOURCE_GLOBAL]
+                final_global = [r for r in fused_results if r.source == SOURCE_GLOBAL]
             else:
                 final_tenant = tenant_filtered
                 final_global = global_filtered
 
+            # Candidates came back without payloads: fetch them for the final results only
+            hydrated = await self.fetch_payloads(final_tenant + final_global)
+            final_tenant = [r for r in hydrated if r.source != SOURCE_GLOBAL]
+            final_global = [r for r in hydrated if r.source == SOURCE_GLOBAL]
+
             if fallback:
                 logger.warning(
                     f'Fallback activated for tenant {tenant_id}: '
@@ -477,7 +1023,8 @@ class QdrantService:
                 )
             else:
                 logger.info(
-                    f'Multi-source search for tenant {tenant_id}: '
+                    f'Multi-source search for tenant {tenant_id} '
+                    f'(engine={f"{self.search_engine}/{self.keyword_engine}" if ranked is not None else "vector"}): '
                     f'{len(final_tenant)} tenant + {len(final_global)} global results'
                 )
 
@@ -525,6 +1072,7 @@ class ChatBusiness:
             return "NONE"
 
     @staticmethod
+    @functools.lru_cache(maxsize=None)
     def _build_comparison_system_prompt(fallback_mode: bool = False) -> str:
         """
         Generates a comprehensive Vietnamese system prompt for COMPARISON mode.
@@ -575,6 +1123,7 @@ Hệ thống đã tự động tìm kiếm trong cơ sở dữ liệu pháp lu
         return base_prompt
 
     @staticmethod
+    @functools.lru_cache(maxsize=None)
     def _build_single_source_system_prompt(fallback_mode: bool = False) -> str:
         """
         Generates a minimal Vietnamese system prompt for SINGLE SOURCE mode.
@@ -608,6 +1157,7 @@ QUAN TRỌNG: Sao chép CHÍNH XÁC nhãn trong ngoặc vuông [...] từ "Thôn
         return base_prompt
 
     @staticmethod
+    @functools.lru_cache(maxsize=None)
     def _build_static_context_system_prompt() -> str:
         """
         Generates a system prompt for STATIC_CONTEXT mode.
@@ -644,80 +1194,21 @@ Bạn đang trả lời dựa trên thông tin tĩnh (Static Context), không ph
         """
         Post-processing cleanup to remove Vietnamese prefixes and reasoning steps.
         Removes prefixes like "Trả lời:", "Câu trả lời:", and chain-of-thought reasoning (Bước 1, 2, 3...).
-        """
-        cleaned = response.strip()
-
-        # Remove chain-of-thought reasoning steps (Bước 1, Bước 2, Bước 3, etc.)
-        # Strategy: Extract only the content after the last "Bước X:" pattern
-        import re
-
-        # Find all "Bước" step markers
-        steps = re.split(r'Bước \d+:', cleaned)
-
-        if len(steps) > 1:
-            # Take the last part (after the final "Bước X:")
-            cleaned = steps[-1].strip()
-            logger.debug(f'Removed {len(steps)-1} reasoning step(s) from response')
-
-        # List of Vietnamese prefixes to remove (case-insensitive)
-        prefixes_to_remove = [
-            "Trả lời:",
-            "Câu trả lời:",
-            "Câu trả lời cuối cùng:",
-            "Đáp án:",
-            "Kết luận:",
-            "Answer:",
-            "Final answer:",
-            "Xây dựng câu trả lời dựa trên các thông tin đã trích xuất.",
-            "Dựa trên thông tin đã trích xuất,",
-            "Trích dẫn chính xác từ ngữ cảnh và trả lời câu hỏi của người dùng.",
-            "Trích dẫn chính xác từ ngữ cảnh.",
-            "Trả lời câu hỏi của người dùng.",
-            "Dựa trên ngữ cảnh,",
-            "Dựa trên context,",
-            "Căn cứ vào thông tin,",
-            "Theo thông tin được cung cấp,",
-        ]
 
-        # Remove prefixes (case-insensitive) - loop multiple times in case of stacked prefixes
-        max_iterations = 5  # Prevent infinite loop
-        iteration = 0
-        while iteration < max_iterations:
-            removed = False
-            for prefix in prefixes_to_remove:
-                if cleaned.lower().startswith(prefix.lower()):
-                    cleaned = cleaned[len(prefix):].strip()
-                    logger.debug(f'Removed prefix "{prefix}" from response')
-                    removed = True
-                    break
-            if not removed:
-                break  # No more prefixes found
-            iteration += 1
-
-        # Remove instruction sentences that might appear as complete lines at the start
-        # Pattern: If first line is an instruction and second line starts with "Theo", keep from second line
-        lines = cleaned.split('\n')
-        if len(lines) > 1:
-            first_line_lower = lines[0].strip().lower()
-            instruction_patterns = [
-                'trích dẫn', 'trả lời', 'dựa trên', 'căn cứ', 'theo thông tin',
-                'hãy', 'cần', 'phải', 'nên', 'vui lòng'
-            ]
-            if any(pattern in first_line_lower for pattern in instruction_patterns):
-                if lines[1].strip().lower().startswith('theo'):
-                    # First line looks like instruction, second line is the real answer
-                    cleaned = '\n'.join(lines[1:]).strip()
-                    logger.debug('Removed instruction sentence from first line')
-
-        return cleaned
+        Runs the precompiled cleanup of src.response_cleanup on the complete
+        response; streamed responses use StreamingResponseCleaner directly.
+        """
+        return clean_response(response)
 
     @staticmethod
-    def _expand_query_with_prompt_config(raw_message: str, prompt_config: Optional[List[Dict[str, str]]]) -> str:
+    def _expand_query_with_prompt_config(raw_message: str, prompt_config: Optional[List[Dict[str, str]]], term_matches: Optional[List[TermMatch]] = None) -> str:
         """
         Step 1: Query Expansion (Keyword Mapping)
 
         Replaces keys found in raw_message with their corresponding values (descriptions)
         from prompt_config to create an enhanced_message with full semantic meaning.
+        Keys are matched in one pass (leftmost-longest, non-overlapping), so a replaced
+        value is never rewritten again by another key.
 
         Example: If config is {"OT": "Overtime Payment"} and user types "Calculate OT",
                  the enhanced_message will be "Calculate Overtime Payment"
@@ -725,6 +1216,7 @@ Bạn đang trả lời dựa trên thông tin tĩnh (Static Context), không ph
         Args:
             raw_message: The original user message
             prompt_config: List of key-value pairs for terminology expansion
+            term_matches: get_term_matcher(prompt_config).find(raw_message), if already computed
 
         Returns:
             enhanced_message: Message with keys replaced by their descriptions
@@ -733,22 +1225,14 @@ Bạn đang trả lời dựa trên thông tin tĩnh (Static Context), không ph
             logger.debug('No prompt_config provided, using raw message as-is')
             return raw_message
 
-        enhanced_message = raw_message
-        replacements_made = []
-
-        # Iterate through each key-value pair in prompt_config
-        for config_item in prompt_config:
-            key = config_item.get('key', '')
-            value = config_item.get('value', '')
-
-            if not key or not value:
-                continue
-
-            # Check if key exists in the message (case-sensitive exact match)
-            if key in enhanced_message:
-                enhanced_message = enhanced_message.replace(key, value)
-                replacements_made.append(f'"{key}" -> "{value}"')
-                logger.debug(f'Replaced key "{key}" with "{value}"')
+        if term_matches is None:
+            term_matches = get_term_matcher(prompt_config).find(raw_message)
+        enhanced_message = TermMatcher.replace(raw_message, term_matches)
+        replacements_made = sorted({
+            f'"{term.key}" -> "{term.value}"'
+            for term in (match.term(TENANT) for match in term_matches)
+            if term is not None and term.value
+        })
 
         if replacements_made:
             logger.info(f'Query expansion completed: {len(replacements_made)} replacement(s) made: {", ".join(replacements_made)}')
@@ -785,13 +1269,76 @@ Bạn đang trả lời dựa trên thông tin tĩnh (Static Context), không ph
         logger.info(f'Built terminology definitions with {len(prompt_config)} term(s)')
         return terminology_section
 
+    @staticmethod
+    def _build_conversation_history(system_prompt: Optional[str], compliance_system_prompt: str, terminology_definitions: str, layout: Optional[str] = None) -> List[Dict[str, str]]:
+        """
+        Orders the system messages according to PROMPT_LAYOUT.
+
+        - legacy: tenant SystemPrompt, compliance prompt, terminology definitions
+        - prefix_cache: per-tenant static content first (SystemPrompt, terminology),
+          then the scenario compliance prompt. Retrieved context and the question
+          always come last in the user message, so consecutive requests of a tenant
+          share a byte-identical prefix that Ollama can serve from its KV cache.
+
+        Args:
+            system_prompt: Tenant-specific behavioral instruction
+            compliance_system_prompt: Scenario-specific compliance prompt
+            terminology_definitions: Output of _build_terminology_definitions
+            layout: Overrides settings.prompt_layout
+
+        Returns:
+            List of system messages
+        """
+        layout = (layout or settings.prompt_layout).lower()
+        if layout == 'prefix_cache':
+            contents = [system_prompt, terminology_definitions, compliance_system_prompt]
+        else:
+            contents = [system_prompt, compliance_system_prompt, terminology_definitions]
+        return [{'role': 'system', 'content': content} for content in contents if content]
+
+    @staticmethod
+    def _build_compliance_system_prompt(scenario: str, fallback_mode: bool = False) -> str:
+        """
+        Selects the compliance system prompt of a scenario (BOTH, STATIC_CONTEXT, or a single source).
+
+        The prompts are built once per (scenario, fallback) and reused.
+        """
+        if scenario == "BOTH":
+            return ChatBusiness._build_comparison_system_prompt(fallback_mode)
+        if scenario == "STATIC_CONTEXT":
+            return ChatBusiness._build_static_context_system_prompt()
+        return ChatBusiness._build_single_source_system_prompt(fallback_mode)
+
+    @staticmethod
+    def _build_system_messages(scenario: str, fallback_mode: bool, tenant_id: int, system_prompt: Optional[str], terminology_definitions: str, layout: Optional[str] = None) -> List[Dict[str, str]]:
+        """
+        System messages of a request, memoized per (scenario, fallback, tenant).
+
+        The tenant's SystemPrompt and terminology definitions are part of the
+        key, so an updated tenant configuration gets new messages.
+
+        Returns:
+            New message dicts (callers append to the list) around cached contents
+        """
+        layout = (layout or settings.prompt_layout).lower()
+        key = (scenario, fallback_mode, tenant_id, layout, system_prompt, terminology_definitions)
+        contents = get_system_message_cache().get_or_render(key, lambda: tuple(
+            message['content'] for message in ChatBusiness._build_conversation_history(
+                system_prompt=system_prompt,
+                compliance_system_prompt=ChatBusiness._build_compliance_system_prompt(scenario, fallback_mode),
+                terminology_definitions=terminology_definitions,
+                layout=layout
+            )
+        ))
+        return [{'role': 'system', 'content': content} for content in contents]
+
     @staticmethod
     def _build_citation_label(result, is_company_rule: bool, index: int) -> str:
         """
         Builds a citation label from Qdrant result metadata.
 
         Args:
-            result: Qdrant ScoredPoint with payload containing metadata
+            result: RetrievalHit with payload containing metadata
             is_company_rule: True for company rules, False for legal documents
             index: Fallback index number if metadata is missing
 
@@ -832,14 +1379,51 @@ Bạn đang trả lời dựa trên thông tin tĩnh (Static Context), không ph
         else:
             return f"[{label}]"
 
+    @staticmethod
+    def _build_citation_fragment(result, is_company_rule: bool, index: int) -> str:
+        """
+        Renders a chunk as its citation label followed by its text.
+
+        Args:
+            result: RetrievalHit whose payload contains 'text'
+            is_company_rule: True for company rules, False for legal documents
+            index: Position in the group (only part of the label without document_name)
+
+        Returns:
+            Fragment string, starting with a newline
+        """
+        return f"\n{ChatBusiness._build_citation_label(result, is_company_rule, index)}\n{result.payload['text']}"
+
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def _build_group_header(is_company_rule: bool, scenario: str) -> str:
+        """
+        Builds the banner rendered above the company regulation or legal framework group.
+
+        Args:
+            is_company_rule: True for the company rules group, False for legal documents
+            scenario: One of "BOTH", "COMPANY_ONLY", "LEGAL_ONLY"
+
+        Returns:
+            Multi-line banner string
+        """
+        if is_company_rule:
+            title = "**═══ NỘI QUY CÔNG TY ═══**"
+            subtitle = "(Nguồn tài liệu duy nhất)" if scenario == "COMPANY_ONLY" else "(Quy định nội bộ - ưu tiên áp dụng)"
+        else:
+            title = "**═══ VĂN BẢN PHÁP LUẬT ═══**"
+            subtitle = "(Nguồn tài liệu duy nhất)" if scenario == "LEGAL_ONLY" else "(Quy định của Nhà nước - làm cơ sở đối chiếu)"
+        rule = "═══════════════════════════════════════"
+        return '\n'.join([rule, title, subtitle, rule])
+
     @staticmethod
     def _structure_context_for_compliance(company_rule_results: list, legal_base_results: list, tenant_id: int, scenario: str) -> tuple[str, list, int]:
         """
         Structures the retrieved document chunks into a clear, delimited context string.
 
         Args:
-            company_rule_results: Company regulation vectors
-            legal_base_results: Legal base vectors
+            company_rule_results: Company regulation hits (RetrievalHit)
+            legal_base_results: Legal base hits (RetrievalHit)
             tenant_id: Tenant identifier
             scenario: One of "BOTH", "COMPANY_ONLY", "LEGAL_ONLY", or "NONE"
 
@@ -851,27 +1435,16 @@ Bạn đang trả lời dựa trên thông tin tĩnh (Static Context), không ph
         documents_used = 0
 
         # Group A: Internal Policy (Company Rules) - Priority source
-        # Extract company rule documents with metadata
+        # Rendered label + text of each company rule document (cached per point)
         company_documents = [
-            {
-                'result': result,
-                'text': result.payload['text'],
-                'label': ChatBusiness._build_citation_label(result, is_company_rule=True, index=idx)
-            }
+            ChatBusiness._build_citation_fragment(result, is_company_rule=True, index=idx)
             for idx, result in enumerate(company_rule_results, 1)
             if hasattr(result, 'payload') and 'text' in result.payload
         ]
 
         if company_documents:
-            context_parts.append("═══════════════════════════════════════")
-            context_parts.append("**═══ NỘI QUY CÔNG TY ═══**")
-            if scenario == "COMPANY_ONLY":
-                context_parts.append("(Nguồn tài liệu duy nhất)")
-            else:
-                context_parts.append("(Quy định nội bộ - ưu tiên áp dụng)")
-            context_parts.append("═══════════════════════════════════════")
-            for doc in company_documents:
-                context_parts.append(f"\n{doc['label']}\n{doc['text']}")
+            context_parts.append(ChatBusiness._build_group_header(is_company_rule=True, scenario=scenario))
+            context_parts.extend(company_documents)
 
             # Collect source IDs
             for result in company_rule_results:
@@ -884,27 +1457,16 @@ Bạn đang trả lời dựa trên thông tin tĩnh (Static Context), không ph
             logger.warning(f'No COMPANY REGULATION documents found for tenant {tenant_id}')
 
         # Group B: Legal Framework (National Laws) - Reference/Validation source
-        # Extract legal documents with metadata
+        # Rendered label + text of each legal document (cached per point)
         legal_documents = [
-            {
-                'result': result,
-                'text': result.payload['text'],
-                'label': ChatBusiness._build_citation_label(result, is_company_rule=False, index=idx)
-            }
+            ChatBusiness._build_citation_fragment(result, is_company_rule=False, index=idx)
             for idx, result in enumerate(legal_base_results, 1)
             if hasattr(result, 'payload') and 'text' in result.payload
         ]
 
         if legal_documents:
-            context_parts.append("\n\n═══════════════════════════════════════")
-            context_parts.append("**═══ VĂN BẢN PHÁP LUẬT ═══**")
-            if scenario == "LEGAL_ONLY":
-                context_parts.append("(Nguồn tài liệu duy nhất)")
-            else:
-                context_parts.append("(Quy định của Nhà nước - làm cơ sở đối chiếu)")
-            context_parts.append("═══════════════════════════════════════")
-            for doc in legal_documents:
-                context_parts.append(f"\n{doc['label']}\n{doc['text']}")
+            context_parts.append("\n\n" + ChatBusiness._build_group_header(is_company_rule=False, scenario=scenario))
+            context_parts.extend(legal_documents)
 
             # Collect source IDs
             for result in legal_base_results:
@@ -924,39 +1486,106 @@ Bạn đang trả lời dựa trên thông tin tĩnh (Static Context), không ph
         return context_string, source_ids, documents_used
 
     @staticmethod
-    async def process_chat_message(conversation_id: int, user_id: int, message: str, tenant_id: int, ollama_service: OllamaService, qdrant_service: QdrantService, system_instruction: Optional[List[Dict[str, str]]]=None, system_prompt: Optional[str]=None) -> Dict[str, Any]:
-        try:
-            logger.info(f"[ConversationId: {conversation_id}] Processing message from User {user_id}, Tenant {tenant_id}: '{message[:50]}...'")
+    def _build_retrieval_pipeline(conversation_id: int, message: str, tenant_id: int, qdrant_service: QdrantService, system_instruction: Optional[List[Dict[str, str]]]=None) -> Pipeline:
+        """
+        Builds the retrieval half of process_chat_message as a stage DAG.
+
+        expand ──┬── keywords ──┬── warmup ─┐
+                 │              └───────────┼── search
+                 └── embedding ─────────────┘
+        terminology
+
+        Args:
+            conversation_id: Conversation ID for log prefixes
+            message: Raw user message
+            tenant_id: Tenant ID
+            qdrant_service: Qdrant service instance
+            system_instruction: Prompt config (key-value terminology)
 
+        Returns:
+            Pipeline whose results hold terms, expand, keywords, terminology, warmup, embedding and
+            search (company_rule_results, legal_base_results, fallback_triggered)
+        """
+        def terms(results: Dict[str, Any]) -> List[TermMatch]:
+            # One scan of the raw message for tenant terms and abbreviations,
+            # shared by query expansion and keyword extraction
+            return get_term_matcher(system_instruction).find(message)
+
+        def expand(results: Dict[str, Any]) -> str:
             # Step 1: Query Expansion (Keyword Mapping)
             # Replace keys in raw_user_message with their corresponding values (descriptions)
             # to create enhanced_message with full semantic meaning
-            enhanced_message = ChatBusiness._expand_query_with_prompt_config(message, system_instruction)
+            enhanced_message = ChatBusiness._expand_query_with_prompt_config(message, system_instruction, results['terms'])
             logger.info(f"[ConversationId: {conversation_id}] Enhanced message: '{enhanced_message[:50]}...'")
+            return enhanced_message
 
+        def keywords(results: Dict[str, Any]) -> List[str]:
             # Step 2: Legal Term Extraction & Keyword Preparation
             # Extract legal keywords from query for BM25 matching
             legal_keywords = LegalTermExtractor.extract_keywords(
-                query=enhanced_message,
-                system_instruction=system_instruction
+                query=results['expand'],
+                system_instruction=system_instruction,
+                term_matches=results['terms']
             )
             logger.info(
                 f'[ConversationId: {conversation_id}] Extracted {len(legal_keywords)} keywords: {legal_keywords}'
             )
+            return legal_keywords
+
+        def terminology(results: Dict[str, Any]) -> str:
+            return ChatBusiness._build_terminology_definitions(system_instruction)
 
+        async def warmup(results: Dict[str, Any]) -> Dict[str, bool]:
+            return await qdrant_service.warm_up_tenant(tenant_id, keyword_search=qdrant_service.rerank_served and bool(results['keywords']))
+
+        async def embedding(results: Dict[str, Any]) -> List[float]:
             # Step 3: Embedding & Hybrid Retrieval with Fallback
             # CRITICAL: Use enhanced_message (NOT raw message) for vector search
             # to find documents based on full semantic meaning, not abbreviations
-            query_embedding = await qdrant_service.get_embedding(enhanced_message)
+            return await qdrant_service.get_embedding(results['expand'])
 
+        async def search(results: Dict[str, Any]) -> tuple:
             # Perform hybrid search with intelligent fallback
-            company_rule_results, legal_base_results, fallback_triggered = await qdrant_service.hybrid_search_with_fallback(
-                query_vector=query_embedding,
-                keywords=legal_keywords,
+            return await qdrant_service.hybrid_search_with_fallback(
+                query_vector=results['embedding'],
+                keywords=results['keywords'],
                 tenant_id=tenant_id,
                 limit=5
             )
 
+        return Pipeline([
+            Stage('terms', terms),
+            Stage('expand', expand, depends_on=['terms']),
+            Stage('keywords', keywords, depends_on=['terms', 'expand']),
+            Stage('terminology', terminology),
+            # Warm-up only saves time; on failure or timeout the search loads indexes itself
+            Stage('warmup', warmup, depends_on=['keywords'], timeout=settings.warmup_stage_timeout, fallback=lambda results, error: {}),
+            Stage('embedding', embedding, depends_on=['expand'], timeout=settings.embedding_stage_timeout),
+            Stage('search', search, depends_on=['embedding', 'keywords', 'warmup'], timeout=settings.search_stage_timeout)
+        ])
+
+    @staticmethod
+    @traced('chat.process')
+    async def process_chat_message(conversation_id: int, user_id: int, message: str, tenant_id: int, ollama_service: OllamaService, qdrant_service: QdrantService, system_instruction: Optional[List[Dict[str, str]]]=None, system_prompt: Optional[str]=None, request_timestamp: Optional[datetime]=None) -> Dict[str, Any]:
+        set_baggage('tenant_id', tenant_id)
+        set_baggage('conversation_id', conversation_id)
+        message_started_at = time.perf_counter()
+        try:
+            logger.info(f"[ConversationId: {conversation_id}] Processing message from User {user_id}, Tenant {tenant_id}: '{message[:50]}...'")
+
+            # Steps 1-3 run as a stage DAG: expansion -> keywords/embedding -> hybrid search,
+            # with terminology building and tenant index warm-up overlapping the embedding call
+            timings = StageTimings()
+            retrieval = await ChatBusiness._build_retrieval_pipeline(
+                conversation_id=conversation_id,
+                message=message,
+                tenant_id=tenant_id,
+                qdrant_service=qdrant_service,
+                system_instruction=system_instruction
+            ).run(timings=timings)
+            legal_keywords = retrieval['keywords']
+            terminology_definitions = retrieval['terminology']
+            company_rule_results, legal_base_results, fallback_triggered = retrieval['search']
             logger.info(
                 f'[ConversationId: {conversation_id}] Hybrid search completed: '
                 f'{len(company_rule_results)} tenant + {len(legal_base_results)} global results '
@@ -970,6 +1599,8 @@ Bạn đang trả lời dựa trên thông tin tĩnh (Static Context), không ph
             # NEW: Handle NONE scenario - return error immediately without LLM generation
             if scenario == "NONE":
                 logger.warning(f'[ConversationId: {conversation_id}] No vectors found, returning error response')
+                logger.info(f'[ConversationId: {conversation_id}] Stage timings: {timings.summary()}')
+                observe_message_latency(scenario, time.perf_counter() - message_started_at)
                 timestamp = datetime.utcnow()
                 return {
                     'conversation_id': conversation_id,
@@ -981,17 +1612,32 @@ Bạn đang trả lời dựa trên thông tin tĩnh (Static Context), không ph
                     'rag_documents_used': 0,
                     'source_ids': [],
                     'reference_doc_id_list': [],  # NEW: Empty list for NONE scenario
-                    'scenario': scenario
+                    'scenario': scenario,
+                    'stage_timings': timings.to_dict()
                 }
 
+            prompt_started_at = time.perf_counter()
+
             # Step 2: Structure context with clear delimiters (skip for STATIC_CONTEXT)
             if scenario == "STATIC_CONTEXT":
                 # No RAG documents, only SystemPrompt - use simple prompt
                 context_string = ""
                 source_ids = []
                 documents_used = 0
+                budget_report = None
                 logger.info(f'[ConversationId: {conversation_id}] STATIC_CONTEXT mode - skipping document structuring')
             else:
+                # Fit retrieved chunks into the context token budget (trim or drop low-value chunks)
+                company_rule_results, legal_base_results, budget_report = ContextBudgeter().fit(
+                    company_rule_results,
+                    legal_base_results,
+                    group_headers=(
+                        ChatBusiness._build_group_header(is_company_rule=True, scenario=scenario),
+                        ChatBusiness._build_group_header(is_company_rule=False, scenario=scenario)
+                    )
+                )
+                logger.info(f'[ConversationId: {conversation_id}] Context budget report: {budget_report}')
+
                 context_string, source_ids, documents_used = ChatBusiness._structure_context_for_compliance(
                     company_rule_results=company_rule_results,
                     legal_base_results=legal_base_results,
@@ -1017,69 +1663,106 @@ Câu hỏi của người dùng: {message}"""
 Lưu ý: Hiện không tìm thấy tài liệu tham khảo liên quan. Hãy trả lời dựa trên kiến thức chung về pháp luật lao động Việt Nam."""
 
             # Step 4: Build conversation history with system prompt
-            conversation_history = []
-
             # Step 4.1: Tenant-specific behavioral instruction (SystemPrompt)
             # This comes FIRST to establish the overall persona/behavior
             if system_prompt:
-                conversation_history.append({'role': 'system', 'content': system_prompt})
                 logger.info(f'[ConversationId: {conversation_id}] Injected tenant-specific SystemPrompt')
 
-            # Step 4.2: Select compliance system prompt based on scenario (BOTH, ONE, or STATIC_CONTEXT) and fallback status
+            # Step 4.2: Compliance system prompt based on scenario (BOTH, ONE, or STATIC_CONTEXT) and fallback status
             if scenario == "BOTH":
-                compliance_system_prompt = ChatBusiness._build_comparison_system_prompt(
-                    fallback_mode=fallback_triggered
-                )
                 logger.info(
                     f'[ConversationId: {conversation_id}] Applied COMPARISON system prompt '
                     f'(fallback: {fallback_triggered})'
                 )
             elif scenario == "STATIC_CONTEXT":
-                compliance_system_prompt = ChatBusiness._build_static_context_system_prompt()
                 logger.info(
                     f'[ConversationId: {conversation_id}] Applied STATIC_CONTEXT system prompt '
                     f'(no RAG documents, using SystemPrompt only)'
                 )
             else:  # scenario in ["COMPANY_ONLY", "LEGAL_ONLY"]
-                compliance_system_prompt = ChatBusiness._build_single_source_system_prompt(
-                    fallback_mode=fallback_triggered
-                )
                 logger.info(
                     f'[ConversationId: {conversation_id}] Applied SINGLE SOURCE system prompt '
                     f'for {scenario} (fallback: {fallback_triggered})'
                 )
 
-            conversation_history.append({'role': 'system', 'content': compliance_system_prompt})
-
             # Step 3: System Prompt Injection
             # Inject prompt_config definitions into system prompt so LLM understands the terminology
-            terminology_definitions = ChatBusiness._build_terminology_definitions(system_instruction)
             if terminology_definitions:
-                conversation_history.append({'role': 'system', 'content': terminology_definitions})
                 logger.info(f'[ConversationId: {conversation_id}] Injected terminology definitions into system prompt')
 
+            # Memoized per (scenario, fallback, tenant): usually a lookup of cached strings
+            conversation_history = ChatBusiness._build_system_messages(
+                scenario=scenario,
+                fallback_mode=fallback_triggered,
+                tenant_id=tenant_id,
+                system_prompt=system_prompt,
+                terminology_definitions=terminology_definitions
+            )
+
+            # Report the prompt size sent to Ollama (drives prefill time / time-to-first-token)
+            prompt_tokens = get_token_counter().count_messages(
+                conversation_history + [{'role': 'user', 'content': enhanced_prompt}]
+            )
+            logger.info(f'[ConversationId: {conversation_id}] Prompt token count: {prompt_tokens}')
+            timings.record('prompt', prompt_started_at, 'ok')
+
+            # Step 4.5: Route to the small or large model using cheap request features
+            model_router = get_model_router()
+            route = model_router.classify(
+                question=message,
+                keywords=legal_keywords,
+                scenario=scenario,
+                context_tokens=budget_report['used'] if budget_report else 0,
+                large_model=ollama_service.model
+            )
+            logger.info(
+                f"[ConversationId: {conversation_id}] Model route: {route['tier']} -> {route['model']} "
+                f"(num_predict: {route['num_predict']}, reason: {route['reason']})"
+            )
+
+            async def generate() -> Tuple[str, Dict[str, Any]]:
+                started_at = time.perf_counter()
+                generated = await ollama_service.generate_response_with_stats(
+                    prompt=enhanced_prompt,
+                    conversation_history=conversation_history,
+                    temperature=0.1,  # Low temperature to reduce creativity and hallucinations
+                    tenant_id=tenant_id,  # Sticky backend keeps the tenant's prompt prefix cached
+                    model=route['model'],
+                    num_predict=route['num_predict']
+                )
+                model_router.record_latency(route['model'], time.perf_counter() - started_at)
+                return generated
+
             # Step 5: Generate AI response with temperature=0.1 to reduce hallucination
-            ai_response = await ollama_service.generate_response(
-                prompt=enhanced_prompt,
-                conversation_history=conversation_history,
-                temperature=0.1  # Low temperature to reduce creativity and hallucinations
+            # Admission control: bounded Ollama parallelism, requests past their deadline are shed
+            async with timings.measure('generate'):
+                ai_response, generation_stats = await get_llm_scheduler().run(
+                    generate,
+                    timestamp=request_timestamp,
+                    label=f'[ConversationId: {conversation_id}] '
+                )
+            observe_generation(route['tier'], generation_stats)
+            logger.info(
+                f'[ConversationId: {conversation_id}] Generated response (length: {len(ai_response)}, '
+                f"model: {route['model']}, prompt_layout: {settings.prompt_layout}, prompt_tokens: {prompt_tokens}, "
+                f"prompt_eval_count: {generation_stats['prompt_eval_count']}, "
+                f"prompt_eval_duration: {generation_stats['prompt_eval_duration_ms']}ms)"
             )
-            logger.info(f'[ConversationId: {conversation_id}] Generated response (length: {len(ai_response)})')
 
             # Step 5.5: Post-processing cleanup to remove leaked prefixes
-            ai_response = ChatBusiness._cleanup_response(ai_response)
+            async with timings.measure('cleanup'):
+                ai_response = ChatBusiness._cleanup_response(ai_response)
             logger.info(f'[ConversationId: {conversation_id}] Response after cleanup (length: {len(ai_response)})')
 
             # Step 6: Extract contexts for evaluation logging
-            contexts_list = []
-            # Collect company rule texts
-            for result in company_rule_results:
-                if hasattr(result, 'payload') and 'text' in result.payload:
-                    contexts_list.append(result.payload['text'])
-            # Collect legal framework texts
-            for result in legal_base_results:
+            # (point ids and scores are logged with them; texts are stored once per chunk)
+            contexts_list, context_point_ids, context_scores = [], [], []
+            # Collect company rule texts, then legal framework texts
+            for result in list(company_rule_results) + list(legal_base_results):
                 if hasattr(result, 'payload') and 'text' in result.payload:
                     contexts_list.append(result.payload['text'])
+                    context_point_ids.append(getattr(result, 'id', None))
+                    context_scores.append(getattr(result, 'score', None))
 
             # Step 7: Log evaluation metadata asynchronously (non-blocking)
             timestamp = datetime.utcnow()
@@ -1094,10 +1777,14 @@ Lưu ý: Hiện không tìm thấy tài liệu tham khảo liên quan. Hãy tr
                     conversation_id=conversation_id,
                     user_id=user_id,
                     tenant_id=tenant_id,
-                    timestamp=timestamp
+                    timestamp=timestamp,
+                    point_ids=context_point_ids,
+                    scores=context_scores
                 )
             )
             logger.debug(f'[ConversationId: {conversation_id}] Scheduled evaluation metadata logging')
+            logger.info(f'[ConversationId: {conversation_id}] Stage timings: {timings.summary()}')
+            observe_message_latency(scenario, time.perf_counter() - message_started_at)
 
             return {
                 'conversation_id': conversation_id,
@@ -1105,13 +1792,18 @@ Lưu ý: Hiện không tìm thấy tài liệu tham khảo liên quan. Hãy tr
                 'user_id': 0,
                 'tenant_id': tenant_id,
                 'timestamp': timestamp,
-                'model_used': ollama_service.model,
+                'model_used': route['model'],
                 'rag_documents_used': documents_used,
                 'source_ids': source_ids,
                 'reference_doc_id_list': source_ids,  # NEW: Also return as reference_doc_id_list for RabbitMQ event
                 'scenario': scenario,  # NEW: Include scenario for debugging
-                'fallback_triggered': fallback_triggered  # NEW: Include fallback status
+                'fallback_triggered': fallback_triggered,  # NEW: Include fallback status
+                'prompt_tokens': prompt_tokens,
+                'prompt_eval_count': generation_stats['prompt_eval_count'],
+                'prompt_eval_duration_ms': generation_stats['prompt_eval_duration_ms'],
+                'stage_timings': timings.to_dict()
             }
         except Exception as e:
             logger.error(f'[ConversationId: {conversation_id}] Failed to process message: {e}', exc_info=True)
+            observe_message_latency('ERROR', time.perf_counter() - message_started_at)
             raise
\ No newline at end of file
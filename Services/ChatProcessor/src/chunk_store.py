@@ -0,0 +1,264 @@
+"""
+Chunk Store Module
+
+Content-addressed, deduplicated storage of chunk texts (SQLite), used for:
+1. Evaluation logs: entries reference retrieved chunks by hash instead of
+   embedding the full text, so a chunk retrieved for many questions is
+   stored once (chunks.db next to the log segments)
+2. The out-of-band chunk text store (CHUNK_TEXT_STORE_PATH): EmbeddingService
+   writes the text and headings of every point here and Qdrant keeps only the
+   filterable payload fields; ChatProcessor reads the final top-k through a
+   memory-mapped, query-only connection with an LRU of hot chunks
+
+Both use the same schema: `contents` (hash -> text, headings) and `points`
+(point ID -> content hash), so identical chunks (e.g. the same article
+uploaded by several tenants) are stored once.
+
+EmbeddingService/src/chunk_store.py is a copy of this module (the services are
+built and deployed separately); keep the two in sync.
+"""
+
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from src.config import settings
+from src.logger import logger
+
+# File name of the chunk store inside an evaluation log directory
+CHUNK_STORE_FILENAME = 'chunks.db'
+
+# Payload fields that live in the store instead of Qdrant
+STORED_FIELDS = ('text', 'heading1', 'heading2')
+
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS contents (hash TEXT PRIMARY KEY, text TEXT NOT NULL, heading1 TEXT, heading2 TEXT)',
+    'CREATE TABLE IF NOT EXISTS points (point_id TEXT PRIMARY KEY, hash TEXT NOT NULL, tenant_id INTEGER, source_id INTEGER, type INTEGER)',
+    'CREATE INDEX IF NOT EXISTS points_by_source ON points (tenant_id, source_id, type)',
+    'CREATE INDEX IF NOT EXISTS points_by_hash ON points (hash)',
+)
+
+# SQLite limits the number of bound parameters per statement
+LOOKUP_BATCH_SIZE = 500
+
+MMAP_SIZE = 256 * 1024 * 1024
+
+
+def content_hash(text: str, heading1: Any = None, heading2: Any = None) -> str:
+    """Content address of a chunk (text, plus its headings if it has any)."""
+    key = text if heading1 is None and heading2 is None else '\x1e'.join(
+        str(part) if part is not None else '' for part in (text, heading1, heading2)
+    )
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()[:32]
+
+
+def chunk_hash(text: str) -> str:
+    """Content address of a chunk text."""
+    return content_hash(text)
+
+
+def split_payload(payload: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """(fields kept in Qdrant, fields moved to the store)"""
+    kept = {key: value for key, value in payload.items() if key not in STORED_FIELDS}
+    stored = {key: payload.get(key) for key in STORED_FIELDS}
+    return kept, stored
+
+
+class ChunkStore:
+    """
+    hash -> (text, heading1, heading2) contents and point ID -> hash references.
+
+    A writer creates the database (WAL, so readers in other processes aren't
+    blocked). A read_only store opens a query-only, memory-mapped connection
+    once the file exists and keeps up to cache_size point lookups in memory.
+    """
+
+    # Hashes known to be stored; skips redundant inserts for hot chunks
+    KNOWN_HASHES_LIMIT = 100_000
+
+    def __init__(self, path: str, read_only: bool = False, cache_size: int = 0):
+        self.path = Path(path)
+        self.read_only = read_only
+        self.cache_size = cache_size
+        self._cache: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+        self._known: set = set()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        if not read_only:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+            for statement in SCHEMA:
+                self._conn.execute(statement)
+            self._migrate_chunks_table()
+            self._conn.commit()
+
+    def _migrate_chunks_table(self) -> None:
+        """Move texts of the former evaluation-only `chunks (hash, text)` table into contents."""
+        if self._conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'chunks'").fetchone():
+            self._conn.execute('INSERT OR IGNORE INTO contents (hash, text) SELECT hash, text FROM chunks')
+            self._conn.execute('DROP TABLE chunks')
+            logger.info(f'Migrated chunk texts of {self.path} to the contents table')
+
+    def _connection(self) -> Optional[sqlite3.Connection]:
+        if self._conn is None:
+            if not self.path.exists():
+                logger.warning(f'Chunk store {self.path} does not exist yet')
+                return None
+            # Not mode=ro: WAL readers need to update the shared-memory index next to the database
+            self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            self._conn.execute('PRAGMA query_only=ON')
+            self._conn.execute(f'PRAGMA mmap_size={MMAP_SIZE}')
+        return self._conn
+
+    def _select_in(self, conn: sqlite3.Connection, query: str, keys: List[str]) -> Iterable[Tuple]:
+        """Rows of `query` (with one `{}` placeholder list) for keys, LOOKUP_BATCH_SIZE keys per statement."""
+        for start in range(0, len(keys), LOOKUP_BATCH_SIZE):
+            batch = keys[start:start + LOOKUP_BATCH_SIZE]
+            yield from conn.execute(query.format(','.join('?' * len(batch))), batch)
+
+    # --- Texts by content hash (evaluation logs) ----------------------------
+
+    def put_many(self, chunks: Dict[str, str]) -> int:
+        """
+        Store chunk texts keyed by chunk_hash(text).
+
+        Returns:
+            Number of chunks that were not known to be stored already
+        """
+        new = [(h, text) for h, text in chunks.items() if h not in self._known]
+        if not new:
+            return 0
+        with self._lock:
+            with self._conn:
+                self._conn.executemany('INSERT OR IGNORE INTO contents (hash, text) VALUES (?, ?)', new)
+        if len(self._known) > self.KNOWN_HASHES_LIMIT:
+            self._known.clear()
+        self._known.update(h for h, _ in new)
+        return len(new)
+
+    def get_many(self, hashes: Iterable[str]) -> Dict[str, str]:
+        """Look up chunk texts; unknown hashes are omitted from the result."""
+        unique = list(dict.fromkeys(hashes))
+        found: Dict[str, str] = {}
+        with self._lock:
+            conn = self._connection()
+            if conn is not None:
+                found.update(self._select_in(conn, 'SELECT hash, text FROM contents WHERE hash IN ({})', unique))
+        missing = len(unique) - len(found)
+        if missing:
+            logger.warning(f'{missing} chunk reference(s) not found in {self.path}')
+        return found
+
+    def count(self) -> int:
+        with self._lock:
+            conn = self._connection()
+            return conn.execute('SELECT COUNT(*) FROM contents').fetchone()[0] if conn is not None else 0
+
+    def resolve_contexts(self, logs: List[Dict]) -> List[List[str]]:
+        """
+        Rebuild the contexts of log entries, one batched lookup for all of them.
+
+        Entries in the old format (full `contexts` texts) are returned as-is.
+        """
+        refs = [ref['chunk'] for log in logs for ref in log.get('context_refs') or ()]
+        texts = self.get_many(refs) if refs else {}
+        contexts = []
+        for log in logs:
+            if 'context_refs' in log:
+                contexts.append([texts[ref['chunk']] for ref in log['context_refs'] if ref['chunk'] in texts])
+            else:
+                contexts.append(log.get('contexts', []))
+        return contexts
+
+    # --- Points (chunk text store) ------------------------------------------
+
+    def put_points(self, points: List[Tuple[str, Dict[str, Any]]]) -> None:
+        """Store the texts and headings of (point_id, full payload) pairs in one transaction."""
+        contents = {}
+        rows = []
+        for point_id, payload in points:
+            h = content_hash(payload.get('text', ''), payload.get('heading1'), payload.get('heading2'))
+            contents[h] = (h, payload.get('text', ''), payload.get('heading1'), payload.get('heading2'))
+            rows.append((str(point_id), h, payload.get('tenant_id'), payload.get('source_id'), payload.get('type')))
+        with self._lock:
+            with self._conn:
+                self._conn.executemany('INSERT OR IGNORE INTO contents (hash, text, heading1, heading2) VALUES (?, ?, ?, ?)', list(contents.values()))
+                self._conn.executemany('INSERT OR REPLACE INTO points (point_id, hash, tenant_id, source_id, type) VALUES (?, ?, ?, ?, ?)', rows)
+        logger.debug(f'Chunk store: {len(rows)} points, {len(contents)} distinct contents')
+
+    def delete_source(self, source_id: int, tenant_id: int, type: int) -> int:
+        """Remove the points of a source document and contents no other point references."""
+        where = 'tenant_id = ? AND source_id = ? AND type = ?'
+        params = (tenant_id, source_id, type)
+        with self._lock:
+            with self._conn:
+                hashes = [(h,) for (h,) in self._conn.execute(f'SELECT DISTINCT hash FROM points WHERE {where}', params)]
+                deleted = self._conn.execute(f'DELETE FROM points WHERE {where}', params).rowcount
+                self._conn.executemany(
+                    'DELETE FROM contents WHERE hash = ? AND NOT EXISTS (SELECT 1 FROM points WHERE points.hash = contents.hash)',
+                    hashes
+                )
+        return deleted
+
+    def get_points(self, point_ids: Iterable[Any]) -> Dict[str, Dict[str, Any]]:
+        """
+        Stored fields by point ID (as str); unknown points are omitted.
+
+        Cached chunks are served from memory, the rest with one query per
+        LOOKUP_BATCH_SIZE ids.
+        """
+        found: Dict[str, Dict[str, Any]] = {}
+        missing = []
+        with self._lock:
+            for point_id in dict.fromkeys(str(point_id) for point_id in point_ids):
+                fields = self._cache.get(point_id)
+                if fields is None:
+                    missing.append(point_id)
+                else:
+                    self._cache.move_to_end(point_id)
+                    found[point_id] = fields
+            conn = self._connection() if missing else None
+            if conn is not None:
+                rows = self._select_in(
+                    conn,
+                    'SELECT points.point_id, contents.text, contents.heading1, contents.heading2 '
+                    'FROM points JOIN contents ON contents.hash = points.hash WHERE points.point_id IN ({})',
+                    missing
+                )
+                for point_id, *values in rows:
+                    fields = {field: value for field, value in zip(STORED_FIELDS, values) if value is not None}
+                    found[point_id] = fields
+                    if self.cache_size:
+                        self._cache[point_id] = fields
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        not_found = sum(point_id not in found for point_id in missing)
+        if not_found:
+            logger.warning(f'{not_found} point(s) not found in chunk store {self.path}')
+        return found
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+_chunk_text_store = None
+
+
+def get_chunk_text_store() -> Optional[ChunkStore]:
+    """
+    Get or create the global chunk text store (read side, written by EmbeddingService).
+
+    Returns:
+        The shared store, or None when texts live in the Qdrant payloads (CHUNK_TEXT_STORE_PATH empty)
+    """
+    global _chunk_text_store
+    if _chunk_text_store is None and settings.chunk_text_store_path:
+        _chunk_text_store = ChunkStore(settings.chunk_text_store_path, read_only=True, cache_size=settings.chunk_text_cache_size)
+    return _chunk_text_store
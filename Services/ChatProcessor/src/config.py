@@ -8,12 +8,71 @@ class Settings(BaseSettings):
     rabbitmq_queue_input: str = 'UserPromptReceived'
     rabbitmq_queue_output: str = 'BotResponseCreated'
     ollama_base_url: str = 'http://localhost:11434'
+    ollama_base_urls: str = ''  # Comma-separated Ollama backends (overrides ollama_base_url)
+    ollama_sticky_slack: int = 2  # Extra in-flight requests tolerated on a tenant's sticky backend
+    ollama_ejection_seconds: float = 30.0  # Base cool-down for a failing backend
     ollama_model: str = 'ontocord/vistral:latest'
     ollama_timeout: int = 300
+    ollama_small_model: str = ''  # Fast model for simple single-source lookups ('' = always use ollama_model)
+    small_model_num_predict: int = 256  # Max answer tokens for the small model
+    large_model_num_predict: int = 0  # Max answer tokens for ollama_model (0 = model default)
+    small_model_max_keywords: int = 2  # More legal keywords than this -> large model
+    small_model_max_question_chars: int = 120
+    small_model_max_context_tokens: int = 1024
+    ollama_keep_alive: str = '30m'  # Keep the model loaded between requests ('' = Ollama default)
+    ollama_num_ctx: int = 8192  # Context window sent with every request (0 = model default)
+    ollama_num_parallel: int = 4  # Concurrent generations per backend (match the Ollama server's OLLAMA_NUM_PARALLEL)
+    llm_max_queue: int = 32  # Requests waiting for a slot before new ones are shed
+    llm_deadline_seconds: float = 180.0  # Deadline counted from the message timestamp (cancels generations before ollama_timeout)
+    prompt_layout: str = 'legacy'  # 'legacy' or 'prefix_cache' (static per-tenant prefix first)
     qdrant_host: str = 'localhost'
     qdrant_port: int = 6333
     qdrant_collection: str = 'documents'
     rag_top_k: int = 5
+    qdrant_lazy_payload: bool = True  # Searches return ids/scores; payloads of the final top-k come from one retrieve
+    chunk_text_store_path: str = ''  # SQLite store of chunk texts written by EmbeddingService (requires keyword_search_engine='bm25'); empty keeps texts in Qdrant
+    chunk_text_cache_size: int = 4096  # Hot chunks kept in memory
+    hybrid_search_engine: str = 'client'  # 'client' (Python RRF) or 'server' (Qdrant prefetch + RRF)
+    keyword_search_engine: str = 'qdrant'  # 'qdrant' (MatchText filters) or 'bm25' (in-process index)
+    hybrid_rerank_served: bool = False  # Re-rank served chat retrieval by keywords with the engines above (off: vector search only)
+    index_event_token: str = ''  # Shared secret required on /api/index/events ('' rejects all events)
+    bm25_snapshot_dir: str = 'bm25_index'
+    bm25_snapshot_max_age_hours: float = 24.0
+    local_vector_index_enabled: bool = False  # Serve small tenants from an in-process NumPy index
+    local_vector_max_points: int = 2000
+    local_vector_dtype: str = 'float32'  # 'float32' or 'float16'
+    embedding_stage_timeout: float = 30.0  # Per-stage timeouts of the chat pipeline (seconds)
+    search_stage_timeout: float = 30.0
+    warmup_stage_timeout: float = 20.0
+    tracing_enabled: bool = False
+    tracing_export_path: str = 'logs/traces.jsonl'  # Span export (JSON lines, OpenTelemetry field names)
+    tracing_max_mb: int = 100  # Rotate the span export by size (0 = never)
+    tracing_backup_count: int = 5  # Rotated span files kept
+    context_token_budget: int = 2048  # Max tokens of retrieved context in the prompt
+    context_min_chunk_tokens: int = 64  # Chunks that can't keep this many tokens are dropped
+    tokenizer_name: str = 'Viet-Mistral/Vistral-7B-Chat'  # HF tokenizer of ollama_model, from the local HF cache or a local directory (never downloaded)
+    tokenizer_chars_per_token: float = 3.0  # Estimate used when the tokenizer is unavailable
+    evaluation_log_dir: str = 'evaluation_logs'  # Append-only JSONL segments read by /evaluate-batch
+    evaluation_legacy_log_file: str = 'evaluation_logs.json'  # JSON array of older versions, imported into evaluation_log_dir once ('' = skip)
+    evaluation_flush_interval: float = 1.0  # fsync a batch at least this often (seconds)
+    evaluation_flush_max_entries: int = 100  # ... or as soon as this many entries are queued
+    evaluation_segment_max_mb: int = 64  # Rotate the active segment by size
+    evaluation_segment_max_age_hours: float = 24.0  # ... or by age
+    evaluation_retention_days: float = 0.0  # Segments older than this are dropped on compaction (0 = keep)
+    evaluation_scored_path: str = 'chat_logs_scored.jsonl'  # Checkpoint of scored entries (reruns resume)
+    evaluation_shard_size: int = 50  # Entries scored per worker call
+    evaluation_workers: int = 1  # Worker processes scoring shards concurrently
+    evaluation_judge: str = 'ragas'  # 'ragas' (OpenAI via ragas) or 'local' (LocalJudge, no OpenAI needed)
+    judge_api: str = 'ollama'  # 'ollama' (/api/chat) or 'openai' (OpenAI-compatible /v1/chat/completions)
+    judge_base_url: str = ''  # '' = ollama_base_url
+    judge_model: str = ''  # '' = ollama_model
+    judge_api_key: str = ''  # Bearer token for OpenAI-compatible servers that need one
+    judge_concurrency: int = 4  # Judge/embedding calls in flight
+    judge_timeout: float = 120.0
+    judge_relevancy_questions: int = 3  # Questions generated per answer for answer_relevancy
+    judge_cache_path: str = 'evaluation_logs/judge_cache.db'  # '' disables the judgment cache
+    batch_test_dir: str = 'batch_results'  # /api/test/batch writes <run_id>.jsonl here
+    batch_test_concurrency: int = 0  # Entities in flight (0 = LLM scheduler parallelism, also the cap)
     embedding_service_url: str = 'http://localhost:8000'
     fastapi_host: str = '0.0.0.0'
     fastapi_port: int = 8001
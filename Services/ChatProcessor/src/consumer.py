@@ -6,6 +6,7 @@ from aio_pika.abc import AbstractChannel, AbstractConnection, AbstractIncomingMe
 from src.config import settings
 from src.schemas import UserPromptReceivedMessage, BotResponseCreatedMessage
 from src.logger import logger, set_session_id, clear_session_id, get_session_id
+from src.tracing import get_tracer, traced, current_traceparent
 
 class RabbitMQService:
 
@@ -59,36 +60,42 @@ class RabbitMQService:
                 async with message.process():
                     import uuid
                     import traceback
-                    session_id = str(uuid.uuid4())[:8]
-                    set_session_id(session_id)
-                    try:
-                        body = message.body.decode()
-                        logger.info(f'RAW: {body}')
-                        data = json.loads(body)
-                        if 'message' in data:
-                            logger.info('Detected MassTransit envelope, extracting payload')
-                            payload = data['message']
-                        else:
-                            logger.info('No envelope detected, using raw data as payload')
-                            payload = data
-                        prompt_message = UserPromptReceivedMessage(**payload)
-                        logger.info(f'Received: Queue={self.input_queue_name} | ConversationId={prompt_message.conversation_id} | Message={prompt_message.message[:100]}')
-                        await message_handler(prompt_message)
-                        logger.info(f'Success: ConversationId={prompt_message.conversation_id} | Status=Processed')
-                    except json.JSONDecodeError as e:
-                        logger.error(f'Error: Failed to parse message | Reason=JSONDecodeError | Details={str(e)}')
-                        logger.error(f'Full traceback:\n{traceback.format_exc()}')
-                    except Exception as e:
-                        logger.error(f"Error: Failed to process message | ConversationId={(prompt_message.conversation_id if 'prompt_message' in locals() else 'Unknown')} | Reason={type(e).__name__} | Details={str(e)}")
-                        logger.error(f'Full traceback:\n{traceback.format_exc()}')
-                    finally:
-                        clear_session_id()
+                    incoming_traceparent = (message.headers or {}).get('traceparent')
+                    if isinstance(incoming_traceparent, bytes):
+                        incoming_traceparent = incoming_traceparent.decode()
+                    with get_tracer().start_span('rabbitmq.receive', {'queue': self.input_queue_name}, traceparent=incoming_traceparent) as span:
+                        # Session id derived from the trace id so log lines of all services correlate
+                        session_id = span.trace_id[:8] if span is not None else str(uuid.uuid4())[:8]
+                        set_session_id(session_id)
+                        try:
+                            body = message.body.decode()
+                            logger.info(f'RAW: {body}')
+                            data = json.loads(body)
+                            if 'message' in data:
+                                logger.info('Detected MassTransit envelope, extracting payload')
+                                payload = data['message']
+                            else:
+                                logger.info('No envelope detected, using raw data as payload')
+                                payload = data
+                            prompt_message = UserPromptReceivedMessage(**payload)
+                            logger.info(f'Received: Queue={self.input_queue_name} | ConversationId={prompt_message.conversation_id} | Message={prompt_message.message[:100]}')
+                            await message_handler(prompt_message)
+                            logger.info(f'Success: ConversationId={prompt_message.conversation_id} | Status=Processed')
+                        except json.JSONDecodeError as e:
+                            logger.error(f'Error: Failed to parse message | Reason=JSONDecodeError | Details={str(e)}')
+                            logger.error(f'Full traceback:\n{traceback.format_exc()}')
+                        except Exception as e:
+                            logger.error(f"Error: Failed to process message | ConversationId={(prompt_message.conversation_id if 'prompt_message' in locals() else 'Unknown')} | Reason={type(e).__name__} | Details={str(e)}")
+                            logger.error(f'Full traceback:\n{traceback.format_exc()}')
+                        finally:
+                            clear_session_id()
             await queue.consume(on_message)
             logger.info(f"Consumer registered for '{self.input_queue_name}'")
         except Exception as e:
             logger.error(f'Failed to setup consumer: {e}', exc_info=True)
             raise
 
+    @traced('rabbitmq.publish')
     async def publish_response(self, response: BotResponseCreatedMessage) -> None:
         if not self.channel:
             raise RuntimeError('Channel not initialized')
@@ -99,7 +106,8 @@ class RabbitMQService:
             envelope = {'messageId': str(uuid.uuid4()), 'conversationId': None, 'sourceAddress': f'rabbitmq://localhost/{self.input_queue_name}', 'destinationAddress': f'rabbitmq://localhost/{self.output_queue_name}', 'messageType': ['urn:message:ChatService.Events:BotResponseCreatedEvent'], 'message': payload, 'sentTime': datetime.now(timezone.utc).isoformat(), 'headers': {}, 'host': {'machineName': 'ChatProcessor', 'processName': 'python', 'assembly': 'ChatProcessor', 'assemblyVersion': '1.0.0'}}
             message_body = json.dumps(envelope)
             logger.info(f"Publishing MassTransit envelope to queue '{self.output_queue_name}': {message_body}")
-            message = Message(body=message_body.encode(), delivery_mode=DeliveryMode.PERSISTENT, content_type='application/json')
+            traceparent = current_traceparent()
+            message = Message(body=message_body.encode(), delivery_mode=DeliveryMode.PERSISTENT, content_type='application/json', headers={'traceparent': traceparent} if traceparent else None)
             await self.channel.default_exchange.publish(message, routing_key=self.output_queue_name)
             logger.info(f'Published response - ConversationId: {response.conversation_id}')
         except Exception as e:
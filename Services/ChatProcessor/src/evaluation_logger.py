@@ -1,16 +1,24 @@
 """
 Evaluation Logger Module
 
-Logs RAG interaction metadata to a local JSON file for offline evaluation using Ragas.
-This module provides thread-safe logging of question-answer pairs with retrieved contexts.
+Logs RAG interaction metadata for offline evaluation using Ragas.
+Entries are appended to an EvaluationLogStore (JSONL segments written by a
+background thread), so logging a message costs the same regardless of how
+many interactions were logged before.
+
+Retrieved contexts are logged as point id + score + chunk hash; the chunk
+texts go once into a content-addressed ChunkStore next to the segments.
+
+A JSON array file written by older versions is imported into the store once
+and renamed to <name>.imported.
 """
 import json
 import os
-import asyncio
-import threading
-from typing import List, Dict, Any
+from typing import Any, Dict, List, Optional
 from datetime import datetime
-from pathlib import Path
+from src.config import settings
+from src.chunk_store import CHUNK_STORE_FILENAME, ChunkStore, chunk_hash
+from src.evaluation_store import EvaluationLogStore
 from src.logger import logger
 
 
@@ -18,67 +26,68 @@ class EvaluationLogger:
     """
     Thread-safe logger for RAG evaluation metadata.
 
-    Logs interactions to a JSON file for later batch evaluation with Ragas framework.
-    Uses threading.Lock for cross-platform thread safety.
+    Logs interactions to an append-only segment store for later batch
+    evaluation with the Ragas framework.
     """
 
-    def __init__(self, log_file_path: str = "evaluation_logs.json"):
+    def __init__(self, log_dir: str = None, legacy_log_file: str = ''):
         """
         Initialize the evaluation logger.
 
         Args:
-            log_file_path: Path to the JSON log file (default: evaluation_logs.json in current directory)
+            log_dir: Directory of the segment store (default: settings.evaluation_log_dir)
+            legacy_log_file: JSON array file of older versions to import ('' = none)
         """
-        self.log_file_path = Path(log_file_path)
-        self._lock = threading.Lock()
-        self._ensure_file_exists()
-
-    def _ensure_file_exists(self):
-        """Ensure the log file exists and is initialized as an empty JSON array if new."""
-        if not self.log_file_path.exists():
-            try:
-                with open(self.log_file_path, 'w', encoding='utf-8') as f:
-                    json.dump([], f)
-                logger.info(f"Created new evaluation log file: {self.log_file_path}")
-            except Exception as e:
-                logger.error(f"Failed to create evaluation log file: {e}")
-
-    def _read_existing_logs(self, file) -> List[Dict[str, Any]]:
+        log_dir = log_dir or settings.evaluation_log_dir
+        self.chunk_store = ChunkStore(os.path.join(log_dir, CHUNK_STORE_FILENAME))
+        self.store = EvaluationLogStore(
+            log_dir,
+            flush_interval=settings.evaluation_flush_interval,
+            flush_max_entries=settings.evaluation_flush_max_entries,
+            segment_max_bytes=settings.evaluation_segment_max_mb * 1024 * 1024,
+            segment_max_age_seconds=settings.evaluation_segment_max_age_hours * 3600,
+            retention_seconds=settings.evaluation_retention_days * 86400,
+            before_write=self._store_chunks
+        )
+        if legacy_log_file and os.path.isfile(legacy_log_file):
+            self.import_legacy_file(legacy_log_file)
+
+    def import_legacy_file(self, path: str) -> int:
         """
-        Read existing logs from the file.
+        Append the entries of an old JSON array log file to the store, once.
+
+        Entries keep their full `contexts` texts (EvaluationService reads both
+        formats). The file is renamed after the entries are fsynced, so a
+        crash before that repeats the import instead of losing entries.
 
         Args:
-            file: Open file handle
+            path: Legacy log file (e.g. evaluation_logs.json)
 
         Returns:
-            List of existing log entries
+            int: Number of imported entries
         """
         try:
-            file.seek(0)
-            content = file.read()
-            if not content or content.strip() == "":
-                return []
-            return json.loads(content)
-        except json.JSONDecodeError:
-            logger.warning("Corrupted JSON file, starting fresh")
-            return []
-        except Exception as e:
-            logger.error(f"Error reading existing logs: {e}")
-            return []
-
-    def _write_logs(self, file, logs: List[Dict[str, Any]]):
-        """
-        Write logs to the file.
-
-        Args:
-            file: Open file handle
-            logs: List of log entries to write
-        """
-        file.seek(0)
-        file.truncate()
-        json.dump(logs, file, ensure_ascii=False, indent=2)
-        file.flush()
-        os.fsync(file.fileno())
+            with open(path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+        except json.JSONDecodeError as e:
+            logger.error(f"Legacy evaluation log {path} is not valid JSON, not imported: {e}")
+            return 0
+        for entry in entries:
+            self.store.append(entry)
+        if not self.store.flush(timeout=60.0) or self.store.failed:
+            logger.error(f"Importing legacy evaluation log {path} did not complete, will retry on next start")
+            return 0
+        os.replace(path, f"{path}.imported")
+        logger.info(f"Imported {len(entries)} entries from legacy evaluation log {path}")
+        return len(entries)
+
+    def _store_chunks(self, batch: List[Dict[str, Any]]) -> None:
+        """Persist the chunk texts of a batch before the entries referencing them (writer thread)."""
+        chunks: Dict[str, str] = {}
+        for entry in batch:
+            chunks.update(entry.pop('_chunks', None) or {})
+        if chunks:
+            self.chunk_store.put_many(chunks)
 
     def log_interaction(
         self,
@@ -88,10 +97,12 @@ class EvaluationLogger:
         conversation_id: int,
         user_id: int,
         tenant_id: int,
-        timestamp: datetime = None
+        timestamp: datetime = None,
+        point_ids: Optional[List[Any]] = None,
+        scores: Optional[List[float]] = None
     ) -> bool:
         """
-        Log a RAG interaction synchronously with thread locking for thread safety.
+        Log a RAG interaction (queues it for the background writer).
 
         Args:
             question: The original user query
@@ -101,6 +112,8 @@ class EvaluationLogger:
             user_id: Unique identifier for the user
             tenant_id: The specific ID of the enterprise (Tenant)
             timestamp: ISO 8601 formatted time (defaults to current time)
+            point_ids: Qdrant point id of each context (aligned with contexts)
+            scores: Retrieval score of each context (aligned with contexts)
 
         Returns:
             bool: True if logged successfully, False otherwise
@@ -109,33 +122,33 @@ class EvaluationLogger:
             timestamp = datetime.utcnow()
 
         # Construct metadata dictionary
+        # Contexts are stored by reference; the texts are deduplicated in the chunk store
+        hashes = [chunk_hash(text) for text in contexts]
+        chunks = dict(zip(hashes, contexts))
+        context_refs = [
+            {
+                "point_id": point_ids[i] if point_ids and i < len(point_ids) else None,
+                "score": round(scores[i], 6) if scores and i < len(scores) and scores[i] is not None else None,
+                "chunk": h
+            }
+            for i, h in enumerate(hashes)
+        ]
         metadata = {
             "question": question,
-            "contexts": contexts,
+            "context_refs": context_refs,
             "answer": answer,
             "conversation_id": conversation_id,
             "user_id": user_id,
             "tenant_id": tenant_id,
-            "timestamp": timestamp.isoformat()
+            "timestamp": timestamp.isoformat(),
+            "_chunks": chunks  # Removed by the writer thread after storing the texts
         }
 
         try:
-            # Acquire thread lock for thread safety
-            with self._lock:
-                # Open file and perform read-modify-write
-                with open(self.log_file_path, 'r+', encoding='utf-8') as f:
-                    # Read existing logs
-                    existing_logs = self._read_existing_logs(f)
-
-                    # Append new metadata
-                    existing_logs.append(metadata)
-
-                    # Write updated logs back
-                    self._write_logs(f, existing_logs)
-
-                    logger.debug(f"Logged evaluation metadata for conversation {conversation_id}")
-                    return True
-
+            # Queued for the background writer; batching and fsync happen off this thread
+            self.store.append(metadata)
+            logger.debug(f"Queued evaluation metadata for conversation {conversation_id}")
+            return True
         except Exception as e:
             logger.error(f"Failed to log evaluation metadata: {e}", exc_info=True)
             return False
@@ -148,13 +161,14 @@ class EvaluationLogger:
         conversation_id: int,
         user_id: int,
         tenant_id: int,
-        timestamp: datetime = None
+        timestamp: datetime = None,
+        point_ids: Optional[List[Any]] = None,
+        scores: Optional[List[float]] = None
     ) -> bool:
         """
-        Log a RAG interaction asynchronously in a background thread to avoid blocking.
+        Log a RAG interaction from async code.
 
-        This method runs the synchronous log_interaction in a thread pool to prevent
-        blocking the event loop during file I/O operations.
+        Appending only enqueues the entry, so no executor round trip is needed.
 
         Args:
             question: The original user query
@@ -164,22 +178,13 @@ class EvaluationLogger:
             user_id: Unique identifier for the user
             tenant_id: The specific ID of the enterprise
             timestamp: ISO 8601 formatted time (defaults to current time)
+            point_ids: Qdrant point id of each context
+            scores: Retrieval score of each context
 
         Returns:
             bool: True if logged successfully, False otherwise
         """
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(
-            None,
-            self.log_interaction,
-            question,
-            contexts,
-            answer,
-            conversation_id,
-            user_id,
-            tenant_id,
-            timestamp
-        )
+        return self.log_interaction(question, contexts, answer, conversation_id, user_id, tenant_id, timestamp, point_ids, scores)
 
     def get_logs_count(self) -> int:
         """
@@ -188,31 +193,28 @@ class EvaluationLogger:
         Returns:
             int: Number of log entries
         """
-        try:
-            with self._lock:
-                with open(self.log_file_path, 'r', encoding='utf-8') as f:
-                    logs = self._read_existing_logs(f)
-                    return len(logs)
-        except Exception as e:
-            logger.error(f"Failed to get logs count: {e}")
-            return 0
+        self.store.flush(timeout=5.0)
+        return self.store.count()
 
 
 # Global singleton instance
 _evaluation_logger = None
 
 
-def get_evaluation_logger(log_file_path: str = "evaluation_logs.json") -> EvaluationLogger:
+def get_evaluation_logger(log_dir: str = None) -> EvaluationLogger:
     """
     Get or create the global evaluation logger instance.
 
+    The legacy JSON log file (settings.evaluation_legacy_log_file) is imported
+    on creation.
+
     Args:
-        log_file_path: Path to the JSON log file
+        log_dir: Directory of the segment store (default: settings.evaluation_log_dir)
 
     Returns:
         EvaluationLogger: The global logger instance
     """
     global _evaluation_logger
     if _evaluation_logger is None:
-        _evaluation_logger = EvaluationLogger(log_file_path)
+        _evaluation_logger = EvaluationLogger(log_dir, settings.evaluation_legacy_log_file)
     return _evaluation_logger
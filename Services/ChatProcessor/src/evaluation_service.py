@@ -2,18 +2,46 @@
 Offline Evaluation Service using Ragas
 
 This module provides functionality to evaluate RAG responses using the Ragas framework.
-It reads logged chat interactions, evaluates them using faithfulness and answer_relevancy metrics,
-and saves the scored results to a new file.
+It streams logged chat interactions in fixed-size shards, scores each shard with
+faithfulness and answer_relevancy in a worker process, and appends the scored
+entries to a JSONL checkpoint file, so an interrupted run resumes where it stopped.
 """
+import asyncio
 import json
+import math
+import multiprocessing
 import os
-from typing import List, Dict, Any, Optional
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Iterator, Optional, Set
 from pathlib import Path
 from datasets import Dataset
 from ragas import evaluate
 from ragas.metrics import faithfulness, answer_relevancy
 from src.logger import logger
 from src.config import settings
+from src.evaluation_store import iter_segment_entries
+from src.chunk_store import CHUNK_STORE_FILENAME, ChunkStore
+from src.jobs import Job
+from src.judge import LocalJudge
+
+
+def score_shard(data: Dict[str, List[Any]]) -> Dict[str, List[float]]:
+    """
+    Score one shard with Ragas (runs in a worker process).
+
+    Args:
+        data: Columns question/contexts/answer of the shard
+
+    Returns:
+        Per-row scores keyed by metric name (NaN where Ragas failed to score a row)
+    """
+    results = EvaluationService().evaluate_batch(Dataset.from_dict(data))
+    frame = results.to_pandas()
+    scores = {}
+    for metric in ("faithfulness", "answer_relevancy"):
+        values = frame[metric].tolist() if metric in frame else []
+        scores[metric] = [math.nan if value is None else float(value) for value in values]
+    return scores
 
 
 class EvaluationService:
@@ -21,40 +49,58 @@ class EvaluationService:
     Service for batch evaluation of RAG responses using Ragas framework.
     """
 
-    def __init__(self, input_file: str = "chat_logs.json", output_file: str = "chat_logs_scored.json"):
+    def __init__(self, input_file: str = "chat_logs.json", output_file: str = "chat_logs_scored.jsonl"):
         """
         Initialize the evaluation service.
 
         Args:
-            input_file: Path to the input JSON file containing chat logs
-            output_file: Path to the output JSON file for scored results
+            input_file: Evaluation log store directory, or a legacy JSON array file
+            output_file: Path to the JSONL checkpoint file for scored results
         """
         self.input_file = Path(input_file)
         self.output_file = Path(output_file)
 
-    def load_logs(self) -> List[Dict[str, Any]]:
+    def iter_logs(self) -> Iterator[Dict[str, Any]]:
         """
-        Load chat logs from the input JSON file.
+        Stream chat log entries from the input store without loading them all.
 
-        Returns:
-            List of chat log entries
+        Yields:
+            Chat log entries, oldest first
 
         Raises:
-            FileNotFoundError: If the input file doesn't exist
-            json.JSONDecodeError: If the file contains invalid JSON
+            FileNotFoundError: If the input path doesn't exist
+            json.JSONDecodeError: If a legacy JSON file contains invalid JSON
         """
         if not self.input_file.exists():
             raise FileNotFoundError(f"Input file not found: {self.input_file}")
 
+        if self.input_file.is_dir():
+            yield from iter_segment_entries(self.input_file)
+            return
+
+        # Legacy single JSON array written by older versions
         try:
             with open(self.input_file, 'r', encoding='utf-8') as f:
-                logs = json.load(f)
-                logger.info(f"Loaded {len(logs)} entries from {self.input_file}")
-                return logs
+                yield from json.load(f)
         except json.JSONDecodeError as e:
             logger.error(f"Invalid JSON in {self.input_file}: {e}")
             raise
 
+    def load_logs(self) -> List[Dict[str, Any]]:
+        """
+        Load all chat log entries from the input store.
+
+        Returns:
+            List of chat log entries
+
+        Raises:
+            FileNotFoundError: If the input path doesn't exist
+            json.JSONDecodeError: If a legacy JSON file contains invalid JSON
+        """
+        logs = list(self.iter_logs())
+        logger.info(f"Loaded {len(logs)} entries from {self.input_file}")
+        return logs
+
     def filter_unevaluated_logs(self, logs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
         Filter logs to find entries where ragas_score is missing or null.
@@ -72,6 +118,27 @@ class EvaluationService:
         logger.info(f"Found {len(unevaluated)} unevaluated entries out of {len(logs)} total")
         return unevaluated
 
+    def resolve_contexts(self, logs: List[Dict[str, Any]]) -> List[List[str]]:
+        """
+        Rebuild context texts for log entries that reference chunks by hash.
+
+        Args:
+            logs: List of chat log entries (new `context_refs` or legacy `contexts` format)
+
+        Returns:
+            Context texts per entry, in the same order as logs
+        """
+        if not any("context_refs" in log for log in logs):
+            return [log.get("contexts", []) for log in logs]
+        chunk_store_path = self.input_file / CHUNK_STORE_FILENAME
+        if not chunk_store_path.exists():
+            raise FileNotFoundError(f"Chunk store not found: {chunk_store_path}")
+        chunk_store = ChunkStore(str(chunk_store_path))
+        try:
+            return chunk_store.resolve_contexts(logs)
+        finally:
+            chunk_store.close()
+
     def convert_to_dataset(self, logs: List[Dict[str, Any]]) -> Dataset:
         """
         Convert chat logs to HuggingFace Dataset format required by Ragas.
@@ -91,7 +158,7 @@ class EvaluationService:
         # Prepare data in the format required by Ragas
         data = {
             "question": [log["question"] for log in logs],
-            "contexts": [log["contexts"] for log in logs],
+            "contexts": self.resolve_contexts(logs),
             "answer": [log["answer"] for log in logs]
         }
 
@@ -149,7 +216,9 @@ class EvaluationService:
             logs: Original log entries
 
         Returns:
-            Updated log entries with ragas_score field
+            Scored log entries with ragas_score field; entries with a missing
+            or NaN metric (failed judgment) are left out, so they are neither
+            averaged nor checkpointed and a rerun scores them again
 
         Note:
             The average score is calculated as: (faithfulness + answer_relevancy) / 2
@@ -159,9 +228,12 @@ class EvaluationService:
         answer_relevancy_scores = results.get("answer_relevancy", [])
 
         # Update each log entry with the calculated score
+        scored_logs = []
         for i, log in enumerate(logs):
-            faithfulness_score = faithfulness_scores[i] if i < len(faithfulness_scores) else 0.0
-            relevancy_score = answer_relevancy_scores[i] if i < len(answer_relevancy_scores) else 0.0
+            faithfulness_score = faithfulness_scores[i] if i < len(faithfulness_scores) else math.nan
+            relevancy_score = answer_relevancy_scores[i] if i < len(answer_relevancy_scores) else math.nan
+            if math.isnan(faithfulness_score) or math.isnan(relevancy_score):
+                continue
 
             # Calculate average score
             average_score = (faithfulness_score + relevancy_score) / 2.0
@@ -170,96 +242,182 @@ class EvaluationService:
             log["ragas_score"] = average_score
             log["faithfulness"] = faithfulness_score
             log["answer_relevancy"] = relevancy_score
+            scored_logs.append(log)
 
-        logger.info(f"Calculated average scores for {len(logs)} entries")
-        return logs
+        failed = len(logs) - len(scored_logs)
+        if failed:
+            logger.warning(f"{failed} of {len(logs)} entries could not be scored, left for the next run")
+        logger.info(f"Calculated average scores for {len(scored_logs)} entries")
+        return scored_logs
+
+    @staticmethod
+    def entry_key(log: Dict[str, Any]) -> str:
+        """Unique key of a log entry (conversation_id + timestamp)."""
+        return f"{log.get('conversation_id', '')}_{log.get('timestamp', '')}"
+
+    def load_scored_keys(self) -> Set[str]:
+        """
+        Read the keys of entries already scored in the checkpoint file.
 
-    def save_scored_logs(self, all_logs: List[Dict[str, Any]], scored_logs: List[Dict[str, Any]]) -> None:
+        Returns:
+            Set of entry keys (only the keys are kept in memory)
+        """
+        keys: Set[str] = set()
+        if not self.output_file.exists():
+            return keys
+        with open(self.output_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    keys.add(self.entry_key(json.loads(line)))
+                except json.JSONDecodeError:
+                    continue  # Torn last line of an interrupted run
+        return keys
+
+    def iter_shards(self, shard_size: int, scored_keys: Set[str], job: Optional[Job] = None) -> Iterator[List[Dict[str, Any]]]:
         """
-        Save the scored results to a new output file.
+        Stream unevaluated, not yet checkpointed entries in shards of shard_size.
 
         Args:
-            all_logs: All original log entries
-            scored_logs: Newly scored log entries
+            shard_size: Entries per shard
+            scored_keys: Keys already present in the checkpoint file (skipped)
+            job: Job whose skipped counter is updated
 
-        Note:
-            This creates a new file to prevent data corruption/locking on the original file.
+        Yields:
+            Lists of log entries
+        """
+        shard: List[Dict[str, Any]] = []
+        for log in self.iter_logs():
+            if log.get("ragas_score") is not None:
+                continue
+            if self.entry_key(log) in scored_keys:
+                if job is not None:
+                    job.skipped += 1
+                continue
+            shard.append(log)
+            if len(shard) >= shard_size:
+                yield shard
+                shard = []
+        if shard:
+            yield shard
+
+    def shard_data(self, logs: List[Dict[str, Any]]) -> Dict[str, List[Any]]:
+        """Columns in the format required by Ragas, with contexts rebuilt from the chunk store."""
+        return {
+            "question": [log["question"] for log in logs],
+            "contexts": self.resolve_contexts(logs),
+            "answer": [log["answer"] for log in logs]
+        }
+
+    def append_scored_logs(self, scored_logs: List[Dict[str, Any]]) -> None:
+        """
+        Append scored entries to the checkpoint file and fsync.
+
+        Args:
+            scored_logs: Newly scored log entries
         """
-        # Create a mapping of scored entries by a unique key
-        # Using combination of question, conversation_id, and timestamp for uniqueness
-        scored_map = {}
-        for log in scored_logs:
-            key = f"{log.get('conversation_id', '')}_{log.get('timestamp', '')}"
-            scored_map[key] = log
-
-        # Update all_logs with scored entries
-        updated_logs = []
-        for log in all_logs:
-            key = f"{log.get('conversation_id', '')}_{log.get('timestamp', '')}"
-            if key in scored_map:
-                updated_logs.append(scored_map[key])
-            else:
-                updated_logs.append(log)
-
-        # Save to new file
         try:
-            with open(self.output_file, 'w', encoding='utf-8') as f:
-                json.dump(updated_logs, f, ensure_ascii=False, indent=2)
-            logger.info(f"Saved scored results to {self.output_file}")
+            with open(self.output_file, 'a', encoding='utf-8') as f:
+                for log in scored_logs:
+                    f.write(json.dumps(log, ensure_ascii=False, default=str) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
         except Exception as e:
             logger.error(f"Failed to save scored logs: {e}", exc_info=True)
             raise
 
-    async def run_evaluation(self) -> Dict[str, Any]:
- 
-        try:
-            # Step 1: Load logs
-            all_logs = self.load_logs()
-
-            # Step 2: Filter unevaluated entries
-            unevaluated_logs = self.filter_unevaluated_logs(all_logs)
-
-            if not unevaluated_logs:
-                logger.info("No unevaluated entries found. Nothing to process.")
-                return {
-                    "processed": 0,
-                    "file_saved": str(self.output_file),
-                    "message": "No unevaluated entries found"
-                }
-
-            # Step 3: Convert to Dataset
-            dataset = self.convert_to_dataset(unevaluated_logs)
-
-            # Step 4: Run evaluation
-            results = self.evaluate_batch(dataset)
+    async def run_evaluation(self, job: Optional[Job] = None) -> Dict[str, Any]:
+        """
+        Score all unevaluated entries shard by shard.
 
-            # Step 5: Calculate average scores
-            scored_logs = self.calculate_average_scores(results, unevaluated_logs)
+        With EVALUATION_JUDGE=ragas, up to settings.evaluation_workers shards
+        are scored at once in worker processes; with EVALUATION_JUDGE=local the
+        LocalJudge scores them on the event loop with bounded concurrency.
+        Each finished shard is checkpointed immediately. Entries already in
+        the checkpoint file are skipped, so a rerun resumes.
 
-            # Step 6: Save results
-            self.save_scored_logs(all_logs, scored_logs)
+        Args:
+            job: Job to report progress to (optional)
 
-            # Step 7: Return summary
-            summary = {
-                "processed": len(scored_logs),
-                "file_saved": str(self.output_file),
-                "message": f"Successfully evaluated {len(scored_logs)} entries"
-            }
-            logger.info(f"Evaluation complete: {summary}")
-            return summary
+        Returns:
+            Summary with processed/failed/skipped counts, the mean score of
+            this run's scored entries and the output file
+        """
+        job = job or Job('evaluation', 'evaluation')  # Detached job just for the counters
+        loop = asyncio.get_running_loop()
+        if settings.evaluation_judge not in ('ragas', 'local'):
+            raise ValueError(f"Unknown evaluation judge '{settings.evaluation_judge}' (expected 'ragas' or 'local')")
+        use_local_judge = settings.evaluation_judge == 'local'
+        workers = max(settings.evaluation_workers, 1)
+        scored_keys = await loop.run_in_executor(None, self.load_scored_keys)
+        logger.info(f"Resuming evaluation: {len(scored_keys)} entries already scored in {self.output_file}")
+
+        processed = 0
+        score_total = 0.0
+        shards = self.iter_shards(max(settings.evaluation_shard_size, 1), scored_keys, job)
+        in_flight: Dict[asyncio.Future, List[Dict[str, Any]]] = {}
+        # spawn: the parent has background threads (log writer, span exporter) that fork would copy mid-state
+        if use_local_judge:
+            judge = LocalJudge()
+            pool = None
+
+            def submit(data: Dict[str, List[Any]]) -> asyncio.Future:
+                return asyncio.ensure_future(judge.score_shard(data))
+        else:
+            pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+
+            def submit(data: Dict[str, List[Any]]) -> asyncio.Future:
+                return loop.run_in_executor(pool, score_shard, data)
+        try:
+            while True:
+                while len(in_flight) < workers:
+                    shard = await loop.run_in_executor(None, next, shards, None)
+                    if shard is None:
+                        break
+                    data = await loop.run_in_executor(None, self.shard_data, shard)
+                    in_flight[submit(data)] = shard
+                if not in_flight:
+                    break
+
+                done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    shard = in_flight.pop(future)
+                    scored_logs = self.calculate_average_scores(future.result(), shard)
+                    await loop.run_in_executor(None, self.append_scored_logs, scored_logs)
+                    processed += len(scored_logs)
+                    score_total += sum(log["ragas_score"] for log in scored_logs)
+                    job.advance(processed=len(scored_logs), failed=len(shard) - len(scored_logs))
+        finally:
+            for future in in_flight:
+                future.cancel()
+            if pool is not None:
+                # Don't block the event loop on worker shutdown; queued shards are dropped (a rerun resumes them)
+                pool.shutdown(wait=False, cancel_futures=True)
+            elif judge.cache is not None:
+                judge.cache.close()
+
+        summary = {
+            "processed": processed,
+            "failed": job.failed,
+            "skipped": job.skipped,
+            "average_ragas_score": score_total / processed if processed else None,
+            "file_saved": str(self.output_file),
+            "judge": settings.evaluation_judge,
+            "message": f"Successfully evaluated {processed} entries" if processed else "No unevaluated entries found"
+        }
+        if job.failed:
+            summary["message"] += f" ({job.failed} failed, retried on the next run)"
 
-        except Exception as e:
-            logger.error(f"Evaluation process failed: {e}", exc_info=True)
-            raise
+        logger.info(f"Evaluation complete: {summary}")
+        return summary
 
 
-def get_evaluation_service(input_file: str = "chat_logs.json", output_file: str = "chat_logs_scored.json") -> EvaluationService:
+def get_evaluation_service(input_file: str = "chat_logs.json", output_file: str = "chat_logs_scored.jsonl") -> EvaluationService:
     """
     Factory function to create an EvaluationService instance.
 
     Args:
-        input_file: Path to the input JSON file
-        output_file: Path to the output JSON file
+        input_file: Evaluation log store directory or legacy JSON file
+        output_file: Path to the JSONL checkpoint file
 
     Returns:
         EvaluationService instance
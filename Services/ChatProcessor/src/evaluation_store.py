@@ -0,0 +1,296 @@
+"""
+Evaluation Store Module
+
+Append-only storage for evaluation log entries:
+1. Entries go to a queue; a background thread appends them in batches to the
+   active JSONL segment and fsyncs when the batch is large or old enough
+2. The active segment is sealed (rotated) by size or age
+3. compact() merges small sealed segments and drops ones past retention
+4. iter_entries() streams entries segment by segment, oldest first
+
+Per-message cost is a queue put, independent of how much history exists.
+
+Readers hold a shared lock on the directory while streaming and compaction
+takes it exclusively without waiting, so a reader never sees a merged
+segment next to the parts it was merged from (or misses removed parts);
+compaction is skipped while someone is reading and runs at a later rotation.
+"""
+
+import json
+import os
+import queue
+import re
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from src.logger import logger
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, compaction runs unguarded
+    fcntl = None
+
+SEGMENT_PATTERN = re.compile(r'^segment-(\d{8})\.jsonl$')
+LOCK_FILENAME = '.segments.lock'
+
+
+@contextmanager
+def segment_lock(directory: Path, exclusive: bool = False):
+    """
+    Lock the segment set of a store directory (flock, across processes).
+
+    Yields True once locked; an exclusive request doesn't wait and yields
+    False while readers hold the lock.
+    """
+    if fcntl is None:
+        yield True
+        return
+    with open(Path(directory) / LOCK_FILENAME, 'a') as f:
+        try:
+            fcntl.flock(f.fileno(), (fcntl.LOCK_EX | fcntl.LOCK_NB) if exclusive else fcntl.LOCK_SH)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def list_segments(directory: Path) -> List[Path]:
+    """All segment files in a store directory, oldest first."""
+    return sorted(path for path in Path(directory).iterdir() if SEGMENT_PATTERN.match(path.name))
+
+
+def iter_segment_entries(directory: Path) -> Iterator[Dict[str, Any]]:
+    """
+    Stream entries of a store directory in write order without loading it all.
+
+    Usable from other processes (no writer thread is started); torn trailing
+    lines of a segment being written are skipped. Compaction is held off
+    until the iterator is exhausted or closed.
+    """
+    with segment_lock(directory):
+        for path in list_segments(directory):
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    try:
+                        yield json.loads(line)
+                    except json.JSONDecodeError:
+                        logger.warning(f'Skipping corrupted line in {path.name}')
+
+
+class EvaluationLogStore:
+    """
+    Directory of JSONL segments written by a single background thread.
+
+    Readers only see entries that have been flushed; call flush() first when
+    an up-to-date view is needed. before_write, if given, runs on the writer
+    thread with each batch before it is serialized (e.g. to persist data the
+    entries reference).
+    """
+
+    def __init__(self, directory: str, flush_interval: float = 1.0, flush_max_entries: int = 100, segment_max_bytes: int = 64 * 1024 * 1024, segment_max_age_seconds: float = 24 * 3600, retention_seconds: float = 0.0, before_write: Optional[Callable[[List[Dict[str, Any]]], None]] = None):
+        self.directory = Path(directory)
+        self.before_write = before_write
+        self.flush_interval = flush_interval
+        self.flush_max_entries = max(flush_max_entries, 1)
+        self.segment_max_bytes = segment_max_bytes
+        self.segment_max_age_seconds = segment_max_age_seconds
+        self.retention_seconds = retention_seconds
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        self._queue: 'queue.SimpleQueue[Any]' = queue.SimpleQueue()
+        self._file_lock = threading.Lock()  # Held while writing, rotating or compacting segments
+        self._file = None
+        self._segment_path: Optional[Path] = None
+        self._segment_opened_at = 0.0
+        self._closed = False
+        self.written = 0
+        self.failed = 0
+
+        self._thread = threading.Thread(target=self._run, name='evaluation-writer', daemon=True)
+        self._thread.start()
+
+    # --- Writing -----------------------------------------------------------
+
+    def append(self, entry: Dict[str, Any]) -> None:
+        """Queue an entry for the background writer (non-blocking)."""
+        if self._closed:
+            raise RuntimeError('EvaluationLogStore is closed')
+        self._queue.put(entry)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until everything queued so far is written and fsynced."""
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self, timeout: Optional[float] = 10.0) -> None:
+        """Flush pending entries and stop the writer thread."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+    def _run(self) -> None:
+        batch: List[Dict[str, Any]] = []
+        waiters: List[threading.Event] = []
+        batch_started_at = 0.0
+        while True:
+            timeout = None
+            if batch:
+                timeout = max(batch_started_at + self.flush_interval - time.monotonic(), 0.0)
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = ...  # Batch age reached flush_interval
+
+            stop = item is None
+            if isinstance(item, threading.Event):
+                waiters.append(item)
+            elif isinstance(item, dict):
+                if not batch:
+                    batch_started_at = time.monotonic()
+                batch.append(item)
+                if len(batch) < self.flush_max_entries:
+                    continue
+
+            if batch:
+                self._write_batch(batch)
+                batch = []
+            for waiter in waiters:
+                waiter.set()
+            waiters = []
+            if stop:
+                with self._file_lock:
+                    self._close_segment()
+                return
+
+    def _write_batch(self, batch: List[Dict[str, Any]]) -> None:
+        try:
+            if self.before_write is not None:
+                self.before_write(batch)
+            data = ''.join(json.dumps(entry, ensure_ascii=False, default=str) + '\n' for entry in batch)
+            with self._file_lock:
+                rotated = self._maybe_rotate()
+                self._file.write(data)
+                self._file.flush()
+                os.fsync(self._file.fileno())
+            self.written += len(batch)
+            if rotated:
+                self.compact()
+        except Exception as e:
+            self.failed += len(batch)
+            logger.error(f'Failed to write {len(batch)} evaluation log entries: {e}', exc_info=True)
+
+    def _maybe_rotate(self) -> bool:
+        """Open a new segment if there is none or the active one is full/old. Returns True if a segment was sealed."""
+        sealed = False
+        if self._file is not None:
+            too_big = self._file.tell() >= self.segment_max_bytes
+            too_old = time.monotonic() - self._segment_opened_at >= self.segment_max_age_seconds
+            if not (too_big or too_old):
+                return False
+            self._close_segment()
+            sealed = True
+        self._segment_path = self.directory / f'segment-{self._next_sequence():08d}.jsonl'
+        self._file = open(self._segment_path, 'a', encoding='utf-8')
+        self._segment_opened_at = time.monotonic()
+        logger.info(f'Opened evaluation log segment {self._segment_path.name}')
+        return sealed
+
+    def _close_segment(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self._segment_path = None
+
+    def _next_sequence(self) -> int:
+        segments = self.segments()
+        return int(SEGMENT_PATTERN.match(segments[-1].name).group(1)) + 1 if segments else 1
+
+    # --- Reading and maintenance --------------------------------------------
+
+    def segments(self) -> List[Path]:
+        return list_segments(self.directory)
+
+    def iter_entries(self) -> Iterator[Dict[str, Any]]:
+        return iter_segment_entries(self.directory)
+
+    def count(self) -> int:
+        total = 0
+        with segment_lock(self.directory):
+            for path in self.segments():
+                with open(path, 'rb') as f:
+                    total += sum(1 for line in f if line.strip())
+        return total
+
+    def compact(self) -> Dict[str, int]:
+        """
+        Drop sealed segments past retention and merge consecutive small ones.
+
+        Runs automatically after each rotation; safe to call at any time. A
+        segment's mtime is the time of its newest entry (merging keeps the
+        newest mtime of its parts), so retention drops only segments whose
+        entries are all past it.
+
+        Returns:
+            Counts of removed and merged segments (skipped: 1 if readers were active)
+        """
+        removed = merged = 0
+        with segment_lock(self.directory, exclusive=True) as locked:
+            if not locked:
+                logger.debug('Evaluation log readers active, compaction deferred')
+                return {'removed': 0, 'merged': 0, 'skipped': 1}
+            with self._file_lock:
+                sealed = [path for path in self.segments() if path != self._segment_path]
+                if self.retention_seconds > 0:
+                    cutoff = time.time() - self.retention_seconds
+                    for path in list(sealed):
+                        if path.stat().st_mtime < cutoff:
+                            path.unlink()
+                            sealed.remove(path)
+                            removed += 1
+
+                # Greedily pack runs of sealed segments into the first one of each run
+                group: List[Path] = []
+                group_bytes = 0
+                for path in sealed + [None]:
+                    size = path.stat().st_size if path is not None else 0
+                    if path is not None and group_bytes + size <= self.segment_max_bytes:
+                        group.append(path)
+                        group_bytes += size
+                        continue
+                    if len(group) > 1:
+                        merged += self._merge(group)
+                    group, group_bytes = ([path], size) if path is not None else ([], 0)
+
+        if removed or merged:
+            logger.info(f'Compacted evaluation logs: removed {removed}, merged {merged} segment(s)')
+        return {'removed': removed, 'merged': merged, 'skipped': 0}
+
+    @staticmethod
+    def _merge(paths: List[Path]) -> int:
+        target = paths[0]
+        newest_mtime = max(path.stat().st_mtime for path in paths)
+        tmp_path = target.with_suffix('.jsonl.tmp')
+        with open(tmp_path, 'wb') as out:
+            for path in paths:
+                with open(path, 'rb') as f:
+                    data = f.read()
+                out.write(data)
+                if data and not data.endswith(b'\n'):
+                    out.write(b'\n')
+            out.flush()
+            os.fsync(out.fileno())
+        os.utime(tmp_path, (newest_mtime, newest_mtime))  # Retention still sees the age of the newest entry
+        os.replace(tmp_path, target)
+        for path in paths[1:]:
+            path.unlink()
+        return len(paths) - 1
@@ -6,12 +6,68 @@ This module implements multi-source retrieval combining:
 2. Vector search (semantic similarity) for global legal docs
 3. RRF (Reciprocal Rank Fusion) for cross-source ranking
 4. Fallback mechanism (tenant → global legal docs)
+
+Results travel through retrieval, fusion and prompt assembly as RetrievalHit
+records instead of Qdrant's pydantic ScoredPoint.
 """
 
+import heapq
 import re
-from typing import List, Dict, Tuple, Optional
-from qdrant_client.models import ScoredPoint
+from itertools import islice
+from operator import attrgetter, itemgetter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 from src.logger import logger
+from src.term_matcher import ABBREVIATION, TermMatch, get_term_matcher
+
+
+# Source tags of retrieval hits
+SOURCE_TENANT = 'tenant'  # Company regulations of the requesting tenant
+SOURCE_GLOBAL = 'global'  # Global legal knowledge base (tenant 1)
+SOURCE_KEYWORD = 'keyword'  # Keyword / BM25 search
+
+
+class RetrievalHit:
+    """
+    Lightweight search result: id, score, source tag and a payload reference.
+
+    Replaces ScoredPoint inside the pipeline: no validation on creation and no
+    copy of the payload, so re-scoring a candidate (e.g. RRF) is cheap.
+    """
+
+    __slots__ = ('id', 'score', 'source', 'payload')
+
+    def __init__(self, id: Any, score: float, source: Optional[str] = None, payload: Optional[Dict[str, Any]] = None):
+        self.id = id
+        self.score = score
+        self.source = source
+        self.payload = payload if payload is not None else {}
+
+    @classmethod
+    def from_point(cls, point: Any, source: Optional[str] = None) -> 'RetrievalHit':
+        """Wrap a Qdrant ScoredPoint/Record (or another hit, keeping its source unless given)."""
+        return cls(point.id, getattr(point, 'score', None) or 0.0, source or getattr(point, 'source', None), point.payload)
+
+    @classmethod
+    def from_points(cls, points: Iterable[Any], source: Optional[str] = None) -> List['RetrievalHit']:
+        return [cls.from_point(point, source) for point in points]
+
+    def with_score(self, score: float) -> 'RetrievalHit':
+        return RetrievalHit(self.id, score, self.source, self.payload)
+
+    def with_payload(self, payload: Dict[str, Any]) -> 'RetrievalHit':
+        return RetrievalHit(self.id, self.score, self.source, payload)
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, RetrievalHit):
+            return NotImplemented
+        return (self.id, self.score, self.source, self.payload) == (other.id, other.score, other.source, other.payload)
+
+    def __hash__(self) -> int:
+        # Equal hits share their point id
+        return hash(self.id)
+
+    def __repr__(self) -> str:
+        return f'RetrievalHit(id={self.id!r}, score={self.score:.4f}, source={self.source!r})'
 
 
 class LegalTermExtractor:
@@ -42,14 +98,15 @@ class LegalTermExtractor:
         'HĐLĐ': 'Hợp đồng lao động',
     }
 
-    # Keep the set for quick lookup
+    # Keep the set for quick lookup (matching itself goes through src.term_matcher)
     COMMON_ABBREVIATIONS = set(ABBREVIATION_EXPANSIONS.keys())
 
     @classmethod
     def extract_keywords(
         cls,
         query: str,
-        system_instruction: Optional[List[Dict[str, str]]] = None
+        system_instruction: Optional[List[Dict[str, str]]] = None,
+        term_matches: Optional[List[TermMatch]] = None
     ) -> List[str]:
         """
         Extract legal keywords from query for BM25 matching.
@@ -57,6 +114,9 @@ class LegalTermExtractor:
         Args:
             query: User query string
             system_instruction: Tenant-specific term definitions
+            term_matches: Matches of get_term_matcher(system_instruction) already
+                computed for the query (e.g. on the raw message before expansion);
+                the query is scanned when omitted
 
         Returns:
             List of unique keywords extracted from query
@@ -83,28 +143,21 @@ class LegalTermExtractor:
         year_matches = cls.YEAR_PATTERN.findall(query)
         keywords.extend([m.lower() for m in year_matches])
 
-        # 6. Extract common abbreviations from query and expand them
-        query_upper = query.upper()
-        for abbr in cls.COMMON_ABBREVIATIONS:
-            if abbr in query_upper:
-                # Add the abbreviation itself
-                keywords.append(abbr)
-                # Also add the expanded full form for better matching
-                if abbr in cls.ABBREVIATION_EXPANSIONS:
-                    expanded_form = cls.ABBREVIATION_EXPANSIONS[abbr].lower()
-                    keywords.append(expanded_form)
-                    logger.debug(f'Expanded abbreviation "{abbr}" to "{expanded_form}"')
-
-        # 7. Extract tenant-specific terms from system_instruction
-        if system_instruction:
-            for config_item in system_instruction:
-                key = config_item.get('key', '')
-                if key and key in query:
-                    # Add both the key and value for better matching
-                    keywords.append(key.lower())
-                    value = config_item.get('value', '')
-                    if value:
-                        keywords.append(value.lower())
+        # 6-7. Common abbreviations (expanded to their full form) and tenant-specific
+        # terms from system_instruction, found in one pass by the term matcher
+        if term_matches is None:
+            term_matches = get_term_matcher(system_instruction).find(query)
+        for term in dict.fromkeys(term for match in term_matches for term in match.terms):
+            if term.kind == ABBREVIATION:
+                # Add the abbreviation itself and the expanded full form for better matching
+                keywords.append(term.key)
+                keywords.append(term.value.lower())
+                logger.debug(f'Expanded abbreviation "{term.key}" to "{term.value.lower()}"')
+            else:
+                # Add both the key and value for better matching
+                keywords.append(term.key.lower())
+                if term.value:
+                    keywords.append(term.value.lower())
 
         # Remove duplicates while preserving order
         seen = set()
@@ -127,13 +180,26 @@ class ReciprocalRankFusion:
 
     DEFAULT_K = 60  # Standard RRF constant
 
+    @staticmethod
+    def _top(rrf_scores: Dict[Any, float], result_map: Dict[Any, Any], limit: Optional[int]) -> List[RetrievalHit]:
+        """Hits ranked by RRF score; with a limit only the top-k are selected (heap) and built."""
+        if limit is None:
+            ranked = sorted(rrf_scores.items(), key=itemgetter(1), reverse=True)
+        else:
+            ranked = heapq.nlargest(limit, rrf_scores.items(), key=itemgetter(1))
+        return [
+            RetrievalHit(doc_id, rrf_score, getattr(result_map[doc_id], 'source', None), result_map[doc_id].payload)
+            for doc_id, rrf_score in ranked
+        ]
+
     @classmethod
     def fuse(
         cls,
-        tenant_results: List[ScoredPoint],
-        global_results: List[ScoredPoint],
-        k: int = DEFAULT_K
-    ) -> List[ScoredPoint]:
+        tenant_results: List[Any],
+        global_results: List[Any],
+        k: int = DEFAULT_K,
+        limit: Optional[int] = None
+    ) -> List[RetrievalHit]:
         """
         Combine results from tenant and global searches using RRF.
 
@@ -143,12 +209,13 @@ class ReciprocalRankFusion:
             tenant_results: Results from tenant-specific vector search
             global_results: Results from global legal docs vector search
             k: Constant to reduce impact of high ranks (default: 60)
+            limit: Only return the top-k fused results (None: all)
 
         Returns:
-            Re-ranked list of ScoredPoint objects sorted by RRF score
+            Re-ranked list of RetrievalHit objects sorted by RRF score
         """
         rrf_scores = {}
-        result_map = {}  # Store actual ScoredPoint objects
+        result_map = {}  # Store the original results (payload, source tag)
 
         # Process tenant search results
         for rank, result in enumerate(tenant_results, start=1):
@@ -164,24 +231,7 @@ class ReciprocalRankFusion:
             if doc_id not in result_map:
                 result_map[doc_id] = result
 
-        # Sort by RRF score (descending)
-        sorted_doc_ids = sorted(rrf_scores.items(), key=lambda x: x[1], reverse=True)
-
-        # Build final result list with updated scores
-        final_results = []
-        for doc_id, rrf_score in sorted_doc_ids:
-            result = result_map[doc_id]
-            # Create new ScoredPoint with RRF score
-            # Note: Qdrant's ScoredPoint is immutable, so we create a new instance
-            # Set vector=None to avoid memory duplication - vectors not needed after search
-            fused_result = ScoredPoint(
-                id=result.id,
-                version=result.version,
-                score=rrf_score,
-                payload=result.payload,
-                vector=None
-            )
-            final_results.append(fused_result)
+        final_results = cls._top(rrf_scores, result_map, limit)
 
         logger.info(
             f'RRF fusion: {len(tenant_results)} tenant + {len(global_results)} global '
@@ -193,9 +243,10 @@ class ReciprocalRankFusion:
     @classmethod
     def fuse_multi_source(
         cls,
-        result_lists: List[List[ScoredPoint]],
-        k: int = DEFAULT_K
-    ) -> List[ScoredPoint]:
+        result_lists: List[List[Any]],
+        k: int = DEFAULT_K,
+        limit: Optional[int] = None
+    ) -> List[RetrievalHit]:
         """
         Fuse multiple result lists using RRF.
 
@@ -204,6 +255,7 @@ class ReciprocalRankFusion:
         Args:
             result_lists: List of result lists to fuse
             k: RRF constant
+            limit: Only return the top-k fused results (None: all)
 
         Returns:
             Fused and re-ranked results
@@ -218,21 +270,7 @@ class ReciprocalRankFusion:
                 if doc_id not in result_map:
                     result_map[doc_id] = result
 
-        # Sort and build final results
-        sorted_doc_ids = sorted(rrf_scores.items(), key=lambda x: x[1], reverse=True)
-
-        final_results = []
-        for doc_id, rrf_score in sorted_doc_ids:
-            result = result_map[doc_id]
-            # Set vector=None to avoid memory duplication - vectors not needed after search
-            fused_result = ScoredPoint(
-                id=result.id,
-                version=result.version,
-                score=rrf_score,
-                payload=result.payload,
-                vector=None
-            )
-            final_results.append(fused_result)
+        final_results = cls._top(rrf_scores, result_map, limit)
 
         logger.info(f'Multi-source RRF fusion: {len(result_lists)} sources → {len(final_results)} results')
 
@@ -250,10 +288,10 @@ class HybridSearchStrategy:
     @classmethod
     def apply_fallback_logic(
         cls,
-        tenant_results: List[ScoredPoint],
-        global_results: List[ScoredPoint],
+        tenant_results: List[RetrievalHit],
+        global_results: List[RetrievalHit],
         limit: int = 5
-    ) -> Tuple[List[ScoredPoint], List[ScoredPoint], bool]:
+    ) -> Tuple[List[RetrievalHit], List[RetrievalHit], bool]:
         """
         Apply fallback logic based on tenant result quality.
 
@@ -275,33 +313,30 @@ class HybridSearchStrategy:
         fallback_triggered = False
 
         # Count high-quality tenant results using cosine similarity threshold
-        quality_tenant_results = [
-            r for r in tenant_results
-            if r.score >= cls.QUALITY_COSINE_THRESHOLD
-        ]
+        quality_tenant_count = sum(1 for r in tenant_results if r.score >= cls.QUALITY_COSINE_THRESHOLD)
 
-        if len(quality_tenant_results) < cls.MIN_TENANT_RESULTS:
+        if quality_tenant_count < cls.MIN_TENANT_RESULTS:
             # FALLBACK: Insufficient tenant results
             logger.warning(
-                f'Fallback triggered: Only {len(quality_tenant_results)} quality tenant results '
+                f'Fallback triggered: Only {quality_tenant_count} quality tenant results '
                 f'(need >= {cls.MIN_TENANT_RESULTS} with cosine >= {cls.QUALITY_COSINE_THRESHOLD})'
             )
             fallback_triggered = True
 
-            # Prioritize global results, keep all tenant results
-            # Lower the threshold for global results in fallback mode
-            quality_global_results = [
-                r for r in global_results
-                if r.score >= cls.FALLBACK_COSINE_THRESHOLD
-            ]
-
             # Balance: Keep up to 1-2 tenant results, rest from global
             tenant_limit = min(len(tenant_results), 2)
             global_limit = limit - tenant_limit
 
+            # Prioritize global results, keep all tenant results
+            # Lower the threshold for global results in fallback mode (stop once enough are found)
+            quality_global_results = list(islice(
+                (r for r in global_results if r.score >= cls.FALLBACK_COSINE_THRESHOLD),
+                max(global_limit, 0)
+            ))
+
             return (
                 tenant_results[:tenant_limit],
-                quality_global_results[:global_limit],
+                quality_global_results,
                 fallback_triggered
             )
         else:
@@ -323,10 +358,10 @@ class HybridSearchStrategy:
 
 
 def merge_and_deduplicate(
-    tenant_results: List[ScoredPoint],
-    global_results: List[ScoredPoint],
+    tenant_results: List[RetrievalHit],
+    global_results: List[RetrievalHit],
     limit: int = 5
-) -> List[ScoredPoint]:
+) -> List[RetrievalHit]:
     """
     Merge tenant and global results, remove duplicates, sort by score.
 
@@ -351,12 +386,12 @@ def merge_and_deduplicate(
         if result.id not in seen_ids:
             seen_ids[result.id] = result
 
-    # Sort by score and limit
-    merged = sorted(seen_ids.values(), key=lambda x: x.score, reverse=True)
+    # Top-k by score (heap selection, same order as a stable sort)
+    merged = heapq.nlargest(limit, seen_ids.values(), key=attrgetter('score'))
 
     logger.info(
         f'Merged results: {len(tenant_results)} tenant + {len(global_results)} global '
-        f'→ {len(seen_ids)} unique → top {min(limit, len(merged))}'
+        f'→ {len(seen_ids)} unique → top {len(merged)}'
     )
 
-    return merged[:limit]
+    return merged
@@ -0,0 +1,148 @@
+"""
+Jobs Module
+
+Registry of long-running background jobs (evaluation runs, batch tests):
+1. A job wraps an asyncio task and exposes status and progress counters
+2. At most one active job per key, so a second request for the same work
+   returns the running job instead of starting a duplicate
+3. GET /api/jobs/{job_id} reports the state of a job
+"""
+
+import asyncio
+import uuid
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from src.logger import logger
+
+PENDING = 'pending'
+RUNNING = 'running'
+COMPLETED = 'completed'
+FAILED = 'failed'
+
+
+class Job:
+    """State of one background job; the job function updates progress through it."""
+
+    def __init__(self, kind: str, key: str, total: Optional[int] = None):
+        self.id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.key = key
+        self.status = PENDING
+        self.total = total
+        self.processed = 0
+        self.failed = 0
+        self.skipped = 0  # Already done in a previous run (resumed)
+        self.created_at = datetime.utcnow()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.error: Optional[str] = None
+        self.result: Optional[Dict[str, Any]] = None
+        self.task: Optional[asyncio.Task] = None
+
+    @property
+    def active(self) -> bool:
+        return self.status in (PENDING, RUNNING)
+
+    def advance(self, processed: int = 0, failed: int = 0) -> None:
+        self.processed += processed
+        self.failed += failed
+
+    def to_dict(self) -> Dict[str, Any]:
+        elapsed = None
+        if self.started_at is not None:
+            elapsed = round(((self.finished_at or datetime.utcnow()) - self.started_at).total_seconds(), 1)
+        return {
+            'job_id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'total': self.total,
+            'processed': self.processed,
+            'failed': self.failed,
+            'skipped': self.skipped,
+            'created_at': self.created_at.isoformat(),
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'elapsed_seconds': elapsed,
+            'error': self.error,
+            'result': self.result
+        }
+
+
+class JobRegistry:
+    """In-process job registry (finished jobs are kept up to max_finished)."""
+
+    def __init__(self, max_finished: int = 100):
+        self.max_finished = max_finished
+        self._jobs: Dict[str, Job] = {}
+
+    def start(self, kind: str, func: Callable[[Job], Awaitable[Optional[Dict[str, Any]]]], key: Optional[str] = None, total: Optional[int] = None) -> Job:
+        """
+        Run func(job) as a background task.
+
+        Args:
+            kind: Job type, e.g. 'evaluation' or 'batch_test'
+            func: Coroutine function receiving the Job; its return value becomes job.result
+            key: Deduplication key (defaults to kind); an active job with the same key is returned as-is
+            total: Number of items, if known up front
+
+        Returns:
+            The new job, or the already active one with the same key
+        """
+        key = key or kind
+        for job in self._jobs.values():
+            if job.key == key and job.active:
+                logger.info(f'Job {job.id} ({kind}) already running for key {key}')
+                return job
+
+        job = Job(kind, key, total)
+        self._jobs[job.id] = job
+        job.task = asyncio.create_task(self._run(job, func))
+        self._prune()
+        return job
+
+    async def _run(self, job: Job, func: Callable[[Job], Awaitable[Optional[Dict[str, Any]]]]) -> None:
+        job.status = RUNNING
+        job.started_at = datetime.utcnow()
+        logger.info(f'Job {job.id} ({job.kind}) started')
+        try:
+            job.result = await func(job)
+            job.status = COMPLETED
+            logger.info(f'Job {job.id} ({job.kind}) completed: processed={job.processed}, failed={job.failed}, skipped={job.skipped}')
+        except asyncio.CancelledError:
+            job.status = FAILED
+            job.error = 'cancelled'
+            raise
+        except Exception as e:
+            job.status = FAILED
+            job.error = f'{type(e).__name__}: {e}'
+            logger.error(f'Job {job.id} ({job.kind}) failed: {e}', exc_info=True)
+        finally:
+            job.finished_at = datetime.utcnow()
+
+    def _prune(self) -> None:
+        finished = [job for job in self._jobs.values() if not job.active]
+        for job in finished[:max(len(finished) - self.max_finished, 0)]:
+            del self._jobs[job.id]
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def list(self, kind: Optional[str] = None) -> List[Job]:
+        return [job for job in self._jobs.values() if kind is None or job.kind == kind]
+
+
+# Global singleton instance
+_job_registry = None
+
+
+def get_job_registry() -> JobRegistry:
+    """
+    Get or create the global job registry.
+
+    Returns:
+        JobRegistry: The registry shared by the evaluation and batch test endpoints
+    """
+    global _job_registry
+    if _job_registry is None:
+        _job_registry = JobRegistry()
+    return _job_registry
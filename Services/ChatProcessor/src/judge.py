@@ -0,0 +1,216 @@
+"""
+Judge Module
+
+Local LLM-judge backend for offline evaluation (no OpenAI access needed):
+1. faithfulness: the judge model splits the answer into statements and marks
+   each as supported or not by the contexts; score = supported / total
+2. answer_relevancy: the judge model writes questions the answer would
+   answer; score = mean cosine similarity between their embeddings (local
+   EmbeddingService) and the original question, 0 for noncommittal answers
+3. Judge calls run through a bounded pool of concurrent requests
+4. Judgments are cached by (model, question, contexts hash, answer hash)
+
+The judge talks to Ollama (/api/chat) or any OpenAI-compatible server
+(/v1/chat/completions).
+"""
+
+import asyncio
+import hashlib
+import json
+import math
+import re
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import httpx
+import numpy as np
+from src.config import settings
+from src.logger import logger
+
+JSON_OBJECT_PATTERN = re.compile(r'\{.*\}', re.DOTALL)
+
+FAITHFULNESS_PROMPT = """Bạn là người chấm điểm. Hãy tách CÂU TRẢ LỜI thành các mệnh đề ngắn, độc lập và với mỗi mệnh đề cho biết nó có được suy ra trực tiếp từ NGỮ CẢNH hay không.
+
+NGỮ CẢNH:
+{contexts}
+
+CÂU TRẢ LỜI:
+{answer}
+
+Chỉ trả về JSON theo dạng: {{"statements": [{{"statement": "...", "supported": true}}]}}"""
+
+RELEVANCY_PROMPT = """Viết {count} câu hỏi mà CÂU TRẢ LỜI dưới đây trả lời trực tiếp, cùng ngôn ngữ với câu trả lời. Đặt "noncommittal" là true nếu câu trả lời né tránh hoặc nói không biết.
+
+CÂU TRẢ LỜI:
+{answer}
+
+Chỉ trả về JSON theo dạng: {{"questions": ["..."], "noncommittal": false}}"""
+
+
+def parse_json_object(text: str) -> Optional[Dict[str, Any]]:
+    """Extract the first JSON object from a model reply (tolerates surrounding prose or code fences)."""
+    match = JSON_OBJECT_PATTERN.search(text or '')
+    if not match:
+        return None
+    try:
+        value = json.loads(match.group(0))
+    except json.JSONDecodeError:
+        return None
+    return value if isinstance(value, dict) else None
+
+
+def judgment_key(model: str, question: str, contexts: List[str], answer: str) -> str:
+    """Cache key of a judgment: model + question + hash of the contexts + hash of the answer."""
+    contexts_hash = hashlib.sha256('\x1e'.join(contexts).encode('utf-8')).hexdigest()
+    answer_hash = hashlib.sha256(answer.encode('utf-8')).hexdigest()
+    question_hash = hashlib.sha256(question.encode('utf-8')).hexdigest()
+    return hashlib.sha256(f'{model}|{question_hash}|{contexts_hash}|{answer_hash}'.encode('utf-8')).hexdigest()
+
+
+def cosine_similarity(a: List[float], b: List[float]) -> float:
+    va, vb = np.asarray(a, dtype=np.float32), np.asarray(b, dtype=np.float32)
+    norm = float(np.linalg.norm(va) * np.linalg.norm(vb))
+    return float(np.dot(va, vb) / norm) if norm else 0.0
+
+
+class JudgmentCache:
+    """SQLite key -> scores table."""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('CREATE TABLE IF NOT EXISTS judgments (key TEXT PRIMARY KEY, scores TEXT NOT NULL)')
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Dict[str, float]]:
+        with self._lock:
+            row = self._conn.execute('SELECT scores FROM judgments WHERE key = ?', (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, key: str, scores: Dict[str, float]) -> None:
+        with self._lock:
+            with self._conn:
+                self._conn.execute('INSERT OR REPLACE INTO judgments (key, scores) VALUES (?, ?)', (key, json.dumps(scores)))
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class LocalJudge:
+    """
+    Scores (question, contexts, answer) triples with a local judge model.
+
+    Returns the same per-row score lists as the Ragas scorer, so
+    EvaluationService can use either backend.
+    """
+
+    def __init__(self, base_url: Optional[str] = None, model: Optional[str] = None, api: Optional[str] = None, concurrency: Optional[int] = None, cache_path: Optional[str] = None, timeout: Optional[float] = None):
+        self.api = api or settings.judge_api
+        if self.api not in ('ollama', 'openai'):
+            raise ValueError(f"Unknown judge API '{self.api}' (expected 'ollama' or 'openai')")
+        self.base_url = (base_url or settings.judge_base_url or settings.ollama_base_url).rstrip('/')
+        self.model = model or settings.judge_model or settings.ollama_model
+        self.timeout = timeout or settings.judge_timeout
+        self.num_questions = settings.judge_relevancy_questions
+        self._semaphore = asyncio.Semaphore(concurrency or settings.judge_concurrency)
+        cache_path = cache_path if cache_path is not None else settings.judge_cache_path
+        self.cache = JudgmentCache(cache_path) if cache_path else None
+        self.cache_hits = 0
+        self.calls = 0
+        logger.info(f'LocalJudge initialized: api={self.api}, url={self.base_url}, model={self.model}')
+
+    async def _chat(self, client: httpx.AsyncClient, prompt: str) -> str:
+        """One judge completion (temperature 0), bounded by the concurrency semaphore."""
+        messages = [{'role': 'user', 'content': prompt}]
+        async with self._semaphore:
+            self.calls += 1
+            if self.api == 'ollama':
+                response = await client.post(
+                    f'{self.base_url}/api/chat',
+                    json={'model': self.model, 'messages': messages, 'stream': False, 'format': 'json', 'options': {'temperature': 0}}
+                )
+                response.raise_for_status()
+                return response.json().get('message', {}).get('content', '')
+
+            headers = {'Authorization': f'Bearer {settings.judge_api_key}'} if settings.judge_api_key else None
+            response = await client.post(
+                f'{self.base_url}/v1/chat/completions',
+                json={'model': self.model, 'messages': messages, 'temperature': 0},
+                headers=headers
+            )
+            response.raise_for_status()
+            return response.json()['choices'][0]['message']['content']
+
+    async def _embed(self, client: httpx.AsyncClient, text: str) -> List[float]:
+        async with self._semaphore:
+            response = await client.post(f'{settings.embedding_service_url}/embed', json={'text': text})
+            response.raise_for_status()
+            return response.json()['vector']
+
+    async def faithfulness(self, client: httpx.AsyncClient, contexts: List[str], answer: str) -> float:
+        reply = parse_json_object(await self._chat(client, FAITHFULNESS_PROMPT.format(contexts='\n\n'.join(contexts), answer=answer)))
+        statements = [s for s in (reply or {}).get('statements', []) if isinstance(s, dict)]
+        if not statements:
+            raise ValueError('Judge returned no statements')
+        return sum(1 for s in statements if s.get('supported') is True) / len(statements)
+
+    async def answer_relevancy(self, client: httpx.AsyncClient, question: str, answer: str) -> float:
+        reply = parse_json_object(await self._chat(client, RELEVANCY_PROMPT.format(count=self.num_questions, answer=answer)))
+        if reply is None:
+            raise ValueError('Judge returned no JSON')
+        if reply.get('noncommittal') is True:
+            return 0.0
+        generated = [q for q in reply.get('questions', []) if isinstance(q, str) and q.strip()]
+        if not generated:
+            raise ValueError('Judge returned no questions')
+        vectors = await asyncio.gather(*(self._embed(client, text) for text in [question] + generated))
+        return float(np.mean([cosine_similarity(vectors[0], vector) for vector in vectors[1:]]))
+
+    async def judge(self, client: httpx.AsyncClient, question: str, contexts: List[str], answer: str) -> Dict[str, float]:
+        """Score one entry; cached judgments are returned without calling the model."""
+        key = judgment_key(self.model, question, contexts, answer)
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                self.cache_hits += 1
+                return cached
+
+        faithfulness, relevancy = await asyncio.gather(
+            self.faithfulness(client, contexts, answer),
+            self.answer_relevancy(client, question, answer)
+        )
+        scores = {'faithfulness': faithfulness, 'answer_relevancy': relevancy}
+        if self.cache is not None:
+            self.cache.put(key, scores)
+        return scores
+
+    async def score_shard(self, data: Dict[str, List[Any]]) -> Dict[str, List[float]]:
+        """
+        Score a shard concurrently (at most `concurrency` judge calls in flight).
+
+        Args:
+            data: Columns question/contexts/answer
+
+        Returns:
+            Per-row scores keyed by metric name; rows whose judgment failed are NaN
+        """
+        async with httpx.AsyncClient(timeout=self.timeout) as client:
+            rows = zip(data['question'], data['contexts'], data['answer'])
+            results = await asyncio.gather(
+                *(self.judge(client, question, contexts, answer) for question, contexts, answer in rows),
+                return_exceptions=True
+            )
+
+        scores: Dict[str, List[float]] = {'faithfulness': [], 'answer_relevancy': []}
+        for result in results:
+            if isinstance(result, BaseException):
+                logger.warning(f'Judgment failed, leaving the entry unscored: {type(result).__name__}: {result}')
+                result = {}
+            for metric in scores:
+                scores[metric].append(result.get(metric, math.nan))
+        return scores
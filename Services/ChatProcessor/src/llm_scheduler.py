@@ -0,0 +1,231 @@
+"""
+LLM Request Scheduler Module
+
+Admission control in front of OllamaService:
+1. At most `parallelism` generations run at once (OLLAMA_NUM_PARALLEL per backend)
+2. Other requests wait in an earliest-deadline-first queue
+3. Requests that can no longer finish before their deadline are shed
+   instead of piling up inside Ollama
+"""
+
+import asyncio
+import heapq
+import itertools
+import time
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, TypeVar
+from src.config import settings
+from src.logger import logger
+from src.metrics import LLM_ACTIVE, LLM_QUEUE_DEPTH, LLM_QUEUE_WAIT, LLM_SHED
+from src.ollama_pool import ollama_backend_urls
+
+T = TypeVar('T')
+
+# Weight of the newest sample in the moving average of generation time
+SERVICE_TIME_EWMA_ALPHA = 0.2
+
+
+class LLMOverloadedError(Exception):
+    """Raised when a request is shed (queue full or deadline can't be met)."""
+
+    def __init__(self, reason: str, message: str):
+        super().__init__(message)
+        self.reason = reason
+
+
+def deadline_from_timestamp(timestamp: Optional[datetime], deadline_seconds: Optional[float] = None) -> Optional[float]:
+    """
+    Convert a message timestamp into a deadline on the event loop clock.
+
+    Args:
+        timestamp: When the user sent the message (naive datetimes are treated as UTC)
+        deadline_seconds: Time budget from the timestamp (defaults to settings.llm_deadline_seconds)
+
+    Returns:
+        Deadline comparable with loop.time(), or None if no timestamp was given
+    """
+    if timestamp is None:
+        return None
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    budget = deadline_seconds if deadline_seconds is not None else settings.llm_deadline_seconds
+    age = (datetime.now(timezone.utc) - timestamp).total_seconds()
+    return asyncio.get_running_loop().time() + budget - max(age, 0.0)
+
+
+class LLMScheduler:
+    """
+    Bounded-parallelism, earliest-deadline-first scheduler for LLM calls.
+
+    A request is shed when:
+    - queue_full: max_queue requests are already waiting
+    - deadline: its remaining time is shorter than the average generation time
+      (checked on admission and again when it reaches the head of the queue)
+    - timeout: its deadline passes while it is still running
+    """
+
+    def __init__(self, parallelism: Optional[int] = None, max_queue: Optional[int] = None, deadline_seconds: Optional[float] = None):
+        self.parallelism = parallelism or settings.ollama_num_parallel * len(ollama_backend_urls())
+        self.max_queue = max_queue if max_queue is not None else settings.llm_max_queue
+        self.deadline_seconds = deadline_seconds if deadline_seconds is not None else settings.llm_deadline_seconds
+        self.active = 0
+        self._queue: List[Any] = []  # heap of (deadline, seq, future)
+        self._seq = itertools.count()
+        self.avg_service_seconds: Optional[float] = None
+
+        self.admitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.shed: Dict[str, int] = {'queue_full': 0, 'deadline': 0, 'timeout': 0}
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(1 for _, _, future in self._queue if not future.done())
+
+    def _can_meet(self, deadline: float, now: float) -> bool:
+        return deadline - now >= (self.avg_service_seconds or 0.0)
+
+    def _shed(self, reason: str, label: str) -> LLMOverloadedError:
+        self.shed[reason] += 1
+        LLM_SHED.labels(reason=reason).inc()
+        logger.warning(
+            f'{label}LLM request shed (reason={reason}, active={self.active}, queue_depth={self.queue_depth})'
+        )
+        return LLMOverloadedError(reason, f'LLM overloaded: request shed ({reason})')
+
+    def _dispatch_next(self) -> None:
+        """Hand free slots to queued requests, shedding those that would miss their deadline."""
+        now = asyncio.get_running_loop().time()
+        while self._queue and self.active < self.parallelism:
+            deadline, _, future = heapq.heappop(self._queue)
+            if future.done():  # Waiter gave up (cancelled or timed out)
+                continue
+            if not self._can_meet(deadline, now):
+                future.set_exception(self._shed('deadline', ''))
+                continue
+            self.active += 1
+            future.set_result(None)
+
+    async def _acquire(self, deadline: float, label: str) -> None:
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        if not self._can_meet(deadline, now):
+            raise self._shed('deadline', label)
+        if self.active < self.parallelism and self.queue_depth == 0:
+            self.active += 1
+            return
+        if self.queue_depth >= self.max_queue:
+            raise self._shed('queue_full', label)
+
+        future = loop.create_future()
+        heapq.heappush(self._queue, (deadline, next(self._seq), future))
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout=max(deadline - now, 0.0))
+        except asyncio.TimeoutError:
+            if future.done() and not future.cancelled():
+                if future.exception() is not None:
+                    # Dispatch shed it just as we timed out (and already counted it)
+                    raise future.exception()
+                # Slot was granted just as we timed out: give it back
+                self._release()
+            else:
+                future.cancel()
+            raise self._shed('deadline', label)
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled() and future.exception() is None:
+                self._release()
+            else:
+                future.cancel()
+            raise
+
+    def _release(self) -> None:
+        self.active -= 1
+        self._dispatch_next()
+
+    async def run(self, call: Callable[[], Awaitable[T]], timestamp: Optional[datetime] = None, label: str = '') -> T:
+        """
+        Run an LLM call under admission control.
+
+        Args:
+            call: Zero-argument coroutine factory performing the Ollama request
+            timestamp: When the user sent the message; the deadline is timestamp + deadline_seconds
+            label: Log prefix (e.g. "[ConversationId: 1] ")
+
+        Returns:
+            The result of call()
+
+        Raises:
+            LLMOverloadedError: If the request was shed
+        """
+        loop = asyncio.get_running_loop()
+        deadline = deadline_from_timestamp(timestamp, self.deadline_seconds)
+        if deadline is None:
+            deadline = loop.time() + self.deadline_seconds
+
+        enqueued_at = loop.time()
+        await self._acquire(deadline, label)
+        wait_seconds = loop.time() - enqueued_at
+        self.admitted += 1
+        self.total_wait_seconds += wait_seconds
+        self.max_wait_seconds = max(self.max_wait_seconds, wait_seconds)
+        LLM_QUEUE_WAIT.observe(wait_seconds)
+        if wait_seconds > 0.01:
+            logger.info(f'{label}LLM request waited {wait_seconds:.2f}s for a slot')
+
+        started_at = time.perf_counter()
+        try:
+            # Cancelling the HTTP request makes Ollama stop generating, freeing the slot for others
+            result = await asyncio.wait_for(call(), timeout=max(deadline - loop.time(), 0.001))
+        except asyncio.TimeoutError:
+            self.failed += 1
+            raise self._shed('timeout', label)
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self._release()
+
+        service_seconds = time.perf_counter() - started_at
+        if self.avg_service_seconds is None:
+            self.avg_service_seconds = service_seconds
+        else:
+            self.avg_service_seconds += SERVICE_TIME_EWMA_ALPHA * (service_seconds - self.avg_service_seconds)
+        self.completed += 1
+        return result
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'parallelism': self.parallelism,
+            'active': self.active,
+            'queue_depth': self.queue_depth,
+            'max_queue': self.max_queue,
+            'deadline_seconds': self.deadline_seconds,
+            'admitted': self.admitted,
+            'completed': self.completed,
+            'failed': self.failed,
+            'shed': dict(self.shed),
+            'avg_wait_ms': round(self.total_wait_seconds / self.admitted * 1000, 1) if self.admitted else 0.0,
+            'max_wait_ms': round(self.max_wait_seconds * 1000, 1),
+            'avg_service_ms': round(self.avg_service_seconds * 1000, 1) if self.avg_service_seconds is not None else None
+        }
+
+
+# Global singleton instance
+_llm_scheduler = None
+
+
+def get_llm_scheduler() -> LLMScheduler:
+    """
+    Get or create the global LLM scheduler.
+
+    Returns:
+        LLMScheduler: The scheduler shared by the RabbitMQ consumer and the HTTP endpoints
+    """
+    global _llm_scheduler
+    if _llm_scheduler is None:
+        _llm_scheduler = LLMScheduler()
+        LLM_QUEUE_DEPTH.set_function(lambda: _llm_scheduler.queue_depth)
+        LLM_ACTIVE.set_function(lambda: _llm_scheduler.active)
+    return _llm_scheduler
@@ -0,0 +1,144 @@
+"""
+Metrics Module
+
+Prometheus metrics for capacity planning of Ollama and Qdrant, served at
+GET /metrics. Label values come from small fixed sets (search type, model
+tier, scenario, shed reason) so cardinality stays bounded.
+"""
+
+import functools
+import time
+from datetime import datetime, timezone
+from typing import Callable, Optional
+from prometheus_client import Counter, Gauge, Histogram
+
+# Buckets in seconds: sub-millisecond local searches up to multi-minute generations
+FAST_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+SLOW_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0, 180.0, 300.0)
+TOKEN_BUCKETS = (16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192)
+
+SCENARIOS = ('BOTH', 'COMPANY_ONLY', 'LEGAL_ONLY', 'STATIC_CONTEXT', 'NONE', 'ERROR')
+
+EMBEDDING_LATENCY = Histogram(
+    'chatprocessor_embedding_request_seconds',
+    'Latency of EmbeddingService /embed calls',
+    buckets=FAST_BUCKETS
+)
+QDRANT_SEARCH_LATENCY = Histogram(
+    'chatprocessor_search_seconds',
+    'Retrieval latency by search type',
+    ['search_type'],  # batch, vector, exact_tenant, keywords, server_fusion, bm25, local_vector, retrieve
+    buckets=FAST_BUCKETS
+)
+LLM_PROMPT_TOKENS = Histogram(
+    'chatprocessor_llm_prompt_tokens',
+    'Prompt tokens evaluated by Ollama (prompt_eval_count)',
+    ['model_tier'],
+    buckets=TOKEN_BUCKETS
+)
+LLM_EVAL_TOKENS = Histogram(
+    'chatprocessor_llm_eval_tokens',
+    'Generated tokens (eval_count)',
+    ['model_tier'],
+    buckets=TOKEN_BUCKETS
+)
+LLM_PROMPT_EVAL_SECONDS = Histogram(
+    'chatprocessor_llm_prompt_eval_seconds',
+    'Ollama prompt evaluation time (prompt_eval_duration)',
+    ['model_tier'],
+    buckets=SLOW_BUCKETS
+)
+LLM_EVAL_SECONDS = Histogram(
+    'chatprocessor_llm_eval_seconds',
+    'Ollama generation time (eval_duration)',
+    ['model_tier'],
+    buckets=SLOW_BUCKETS
+)
+MESSAGE_LATENCY = Histogram(
+    'chatprocessor_message_seconds',
+    'End-to-end process_chat_message latency by scenario',
+    ['scenario'],
+    buckets=SLOW_BUCKETS
+)
+CONSUMER_IN_FLIGHT = Gauge(
+    'chatprocessor_consumer_in_flight_messages',
+    'RabbitMQ messages currently being processed'
+)
+RABBITMQ_QUEUE_WAIT = Histogram(
+    'chatprocessor_rabbitmq_queue_wait_seconds',
+    'Time between the message timestamp and the consumer picking it up',
+    buckets=SLOW_BUCKETS
+)
+LLM_QUEUE_WAIT = Histogram(
+    'chatprocessor_llm_queue_wait_seconds',
+    'Time spent waiting for an LLM scheduler slot',
+    buckets=SLOW_BUCKETS
+)
+LLM_QUEUE_DEPTH = Gauge(
+    'chatprocessor_llm_queue_depth',
+    'Requests waiting for an LLM scheduler slot'
+)
+LLM_ACTIVE = Gauge(
+    'chatprocessor_llm_active_requests',
+    'Generations currently admitted by the LLM scheduler'
+)
+LLM_SHED = Counter(
+    'chatprocessor_llm_shed_total',
+    'Requests shed by the LLM scheduler',
+    ['reason']  # queue_full, deadline, timeout
+)
+
+
+def observe_latency(histogram: Histogram, **labels) -> Callable:
+    """Decorator observing the duration of an async function (also on failure)."""
+    metric = histogram.labels(**labels) if labels else histogram
+
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            started_at = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                metric.observe(time.perf_counter() - started_at)
+        return wrapper
+    return decorator
+
+
+def track_in_flight(gauge: Gauge) -> Callable:
+    """Decorator counting concurrent executions of an async function."""
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            gauge.inc()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                gauge.dec()
+        return wrapper
+    return decorator
+
+
+def observe_message_latency(scenario: Optional[str], seconds: float) -> None:
+    MESSAGE_LATENCY.labels(scenario=scenario if scenario in SCENARIOS else 'ERROR').observe(seconds)
+
+
+def observe_generation(model_tier: str, stats: dict) -> None:
+    """Record Ollama's token counts and durations for one generation."""
+    if stats.get('prompt_eval_count') is not None:
+        LLM_PROMPT_TOKENS.labels(model_tier=model_tier).observe(stats['prompt_eval_count'])
+    if stats.get('eval_count') is not None:
+        LLM_EVAL_TOKENS.labels(model_tier=model_tier).observe(stats['eval_count'])
+    if stats.get('prompt_eval_duration_ms') is not None:
+        LLM_PROMPT_EVAL_SECONDS.labels(model_tier=model_tier).observe(stats['prompt_eval_duration_ms'] / 1000)
+    if stats.get('eval_duration_ms') is not None:
+        LLM_EVAL_SECONDS.labels(model_tier=model_tier).observe(stats['eval_duration_ms'] / 1000)
+
+
+def observe_queue_wait(timestamp: Optional[datetime]) -> None:
+    """Record how long a RabbitMQ message waited before being consumed."""
+    if timestamp is None:
+        return
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    RABBITMQ_QUEUE_WAIT.observe(max((datetime.now(timezone.utc) - timestamp).total_seconds(), 0.0))
@@ -0,0 +1,132 @@
+"""
+Model Router Module
+
+Chooses the generation model per request from cheap features computed
+before generation:
+- scenario (from ChatBusiness._detect_scenario)
+- number of legal keywords (from LegalTermExtractor)
+- retrieved context size in tokens
+- question length
+
+Simple single-source lookups ("BHYT là gì") go to a small, fast model with a
+lower num_predict; comparisons and long or keyword-heavy questions go to the
+large model. Decisions and per-model latency are logged so the thresholds
+can be tuned.
+"""
+
+from typing import Any, Dict, List, Optional
+from src.config import settings
+from src.logger import logger
+
+SMALL = 'small'
+LARGE = 'large'
+
+
+class ModelRouter:
+    """
+    Rule-based small/large model routing.
+
+    Routing is disabled (everything goes to the large model) when no small
+    model is configured.
+    """
+
+    SINGLE_SOURCE_SCENARIOS = ('COMPANY_ONLY', 'LEGAL_ONLY', 'STATIC_CONTEXT')
+
+    def __init__(
+        self,
+        small_model: Optional[str] = None,
+        large_model: Optional[str] = None,
+        small_num_predict: Optional[int] = None,
+        large_num_predict: Optional[int] = None,
+        max_keywords: Optional[int] = None,
+        max_question_chars: Optional[int] = None,
+        max_context_tokens: Optional[int] = None
+    ):
+        self.small_model = small_model if small_model is not None else settings.ollama_small_model
+        self.large_model = large_model or settings.ollama_model
+        self.small_num_predict = small_num_predict if small_num_predict is not None else settings.small_model_num_predict
+        self.large_num_predict = large_num_predict if large_num_predict is not None else settings.large_model_num_predict
+        self.max_keywords = max_keywords if max_keywords is not None else settings.small_model_max_keywords
+        self.max_question_chars = max_question_chars if max_question_chars is not None else settings.small_model_max_question_chars
+        self.max_context_tokens = max_context_tokens if max_context_tokens is not None else settings.small_model_max_context_tokens
+        self.latency: Dict[str, Dict[str, float]] = {}
+
+    def classify(self, question: str, keywords: List[str], scenario: str, context_tokens: int, large_model: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Pick the model tier for a request.
+
+        Args:
+            question: Raw user question
+            keywords: Legal keywords extracted from the question
+            scenario: BOTH, COMPANY_ONLY, LEGAL_ONLY or STATIC_CONTEXT
+            context_tokens: Tokens of retrieved context in the prompt
+            large_model: Model of the calling OllamaService (default: the router's large_model)
+
+        Returns:
+            Dictionary with tier, model, num_predict (None = model default) and reason
+        """
+        if not self.small_model:
+            reason = 'routing disabled'
+        elif scenario not in self.SINGLE_SOURCE_SCENARIOS:
+            reason = f'scenario {scenario}'
+        elif len(keywords) > self.max_keywords:
+            reason = f'{len(keywords)} keywords > {self.max_keywords}'
+        elif len(question) > self.max_question_chars:
+            reason = f'question {len(question)} chars > {self.max_question_chars}'
+        elif context_tokens > self.max_context_tokens:
+            reason = f'context {context_tokens} tokens > {self.max_context_tokens}'
+        else:
+            return {
+                'tier': SMALL,
+                'model': self.small_model,
+                'num_predict': self.small_num_predict or None,
+                'reason': 'simple single-source lookup'
+            }
+        return {
+            'tier': LARGE,
+            'model': large_model or self.large_model,
+            'num_predict': self.large_num_predict or None,
+            'reason': reason
+        }
+
+    def record_latency(self, model: str, seconds: float) -> None:
+        """Accumulate generation latency per model."""
+        stats = self.latency.setdefault(model, {'count': 0, 'total_seconds': 0.0, 'max_seconds': 0.0})
+        stats['count'] += 1
+        stats['total_seconds'] += seconds
+        stats['max_seconds'] = max(stats['max_seconds'], seconds)
+        logger.info(
+            f"Model {model}: generation took {seconds:.2f}s "
+            f"(avg {stats['total_seconds'] / stats['count']:.2f}s over {stats['count']} requests)"
+        )
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'small_model': self.small_model or None,
+            'large_model': self.large_model,
+            'models': {
+                model: {
+                    'count': stats['count'],
+                    'avg_ms': round(stats['total_seconds'] / stats['count'] * 1000, 1),
+                    'max_ms': round(stats['max_seconds'] * 1000, 1)
+                }
+                for model, stats in self.latency.items()
+            }
+        }
+
+
+# Global singleton instance
+_model_router = None
+
+
+def get_model_router() -> ModelRouter:
+    """
+    Get or create the global model router.
+
+    Returns:
+        ModelRouter: The router holding per-model latency statistics
+    """
+    global _model_router
+    if _model_router is None:
+        _model_router = ModelRouter()
+    return _model_router
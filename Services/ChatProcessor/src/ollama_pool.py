@@ -0,0 +1,192 @@
+"""
+Ollama Backend Pool Module
+
+Spreads generation over several Ollama servers:
+1. Per-backend model availability from /api/tags (refreshed periodically)
+2. Tenant-sticky routing (rendezvous hashing) so a tenant's prompt prefix
+   stays warm in one backend's KV cache
+3. Least-loaded fallback when the sticky backend is busier than the others
+4. Passive health checks: backends failing with connection errors, timeouts
+   or 5xx responses are ejected for a growing cool-down period
+"""
+
+import asyncio
+import hashlib
+import time
+from typing import Dict, List, Optional, Set
+import httpx
+from src.config import settings
+from src.logger import logger
+
+
+def ollama_backend_urls() -> List[str]:
+    """Backends from OLLAMA_BASE_URLS (comma-separated), falling back to OLLAMA_BASE_URL."""
+    urls = [url.strip().rstrip('/') for url in settings.ollama_base_urls.split(',') if url.strip()]
+    return urls or [settings.ollama_base_url.rstrip('/')]
+
+
+def normalize_model_name(model: str) -> str:
+    """Ollama's name for a model: untagged names refer to the ':latest' tag."""
+    return model if ':' in model.rsplit('/', 1)[-1] else f'{model}:latest'
+
+
+class OllamaBackend:
+    """Routing state of a single Ollama server."""
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url.rstrip('/')
+        self.chat_endpoint = f'{self.base_url}/api/chat'
+        self.in_flight = 0
+        self.models: Optional[Set[str]] = None  # None = not fetched yet, assume available
+        self.models_fetched_at = 0.0
+        self.consecutive_failures = 0
+        self.ejected_until = 0.0
+
+    def is_healthy(self, now: float) -> bool:
+        return now >= self.ejected_until
+
+    def has_model(self, model: str) -> bool:
+        return self.models is None or normalize_model_name(model) in self.models
+
+    def get_stats(self) -> Dict:
+        now = time.monotonic()
+        return {
+            'base_url': self.base_url,
+            'healthy': self.is_healthy(now),
+            'in_flight': self.in_flight,
+            'consecutive_failures': self.consecutive_failures,
+            'ejected_for_seconds': round(max(self.ejected_until - now, 0.0), 1),
+            'models': sorted(self.models) if self.models is not None else None
+        }
+
+
+class OllamaBackendPool:
+    """
+    Chooses an Ollama backend for each request.
+
+    A tenant's sticky backend is used unless it has more than sticky_slack
+    requests in flight above the least-loaded candidate.
+    """
+
+    def __init__(self, base_urls: Optional[List[str]] = None, sticky_slack: Optional[int] = None, ejection_seconds: Optional[float] = None, model_refresh_seconds: float = 300.0):
+        self.backends = [OllamaBackend(url) for url in (base_urls or ollama_backend_urls())]
+        self.sticky_slack = sticky_slack if sticky_slack is not None else settings.ollama_sticky_slack
+        self.ejection_seconds = ejection_seconds if ejection_seconds is not None else settings.ollama_ejection_seconds
+        self.model_refresh_seconds = model_refresh_seconds
+        self._refresh_lock = asyncio.Lock()
+
+    @staticmethod
+    def _affinity(tenant_id: int, backend: OllamaBackend) -> int:
+        digest = hashlib.md5(f'{tenant_id}|{backend.base_url}'.encode()).digest()
+        return int.from_bytes(digest[:8], 'big')
+
+    def candidates(self, model: str, exclude: Optional[Set[str]] = None) -> List[OllamaBackend]:
+        """
+        Backends that may serve the model, minus the excluded base URLs.
+
+        When no backend lists the model (stale listings, a name Ollama resolves
+        differently), every backend is a candidate and Ollama decides.
+        """
+        exclude = exclude or set()
+        listing = [b for b in self.backends if b.has_model(model)]
+        if not listing:
+            logger.warning(f"No Ollama backend lists model '{model}', trying all backends")
+            listing = self.backends
+        return [b for b in listing if b.base_url not in exclude]
+
+    def select(self, model: str, tenant_id: Optional[int] = None, exclude: Optional[Set[str]] = None) -> OllamaBackend:
+        """
+        Pick a backend for a request.
+
+        Args:
+            model: Model that must be available on the backend
+            tenant_id: Enables sticky routing when given
+            exclude: Base URLs already tried for this request
+
+        Returns:
+            The chosen backend (an ejected one only if nothing else can serve the model)
+
+        Raises:
+            RuntimeError: Every backend that can serve the model was excluded
+        """
+        now = time.monotonic()
+        candidates = self.candidates(model, exclude)
+        healthy = [b for b in candidates if b.is_healthy(now)]
+        if not healthy:
+            if not candidates:
+                raise RuntimeError(f"No Ollama backend left to try for model '{model}'")
+            # Everything is ejected: try the one whose cool-down ends first
+            return min(candidates, key=lambda b: b.ejected_until)
+
+        least_loaded = min(healthy, key=lambda b: b.in_flight)
+        if tenant_id is None:
+            return least_loaded
+        sticky = max(healthy, key=lambda b: self._affinity(tenant_id, b))
+        if sticky.in_flight - least_loaded.in_flight > self.sticky_slack:
+            return least_loaded
+        return sticky
+
+    def mark_success(self, backend: OllamaBackend) -> None:
+        backend.consecutive_failures = 0
+        backend.ejected_until = 0.0
+
+    def mark_failure(self, backend: OllamaBackend, reason: str) -> None:
+        """Eject a failing backend; the cool-down doubles with each consecutive failure (max 8x)."""
+        backend.consecutive_failures += 1
+        cooldown = self.ejection_seconds * min(2 ** (backend.consecutive_failures - 1), 8)
+        backend.ejected_until = time.monotonic() + cooldown
+        logger.warning(
+            f'Ejected Ollama backend {backend.base_url} for {cooldown:.0f}s '
+            f'({reason}, consecutive failures: {backend.consecutive_failures})'
+        )
+
+    async def fetch_models(self, backend: OllamaBackend) -> Optional[Set[str]]:
+        try:
+            async with httpx.AsyncClient(timeout=5.0) as client:
+                response = await client.get(f'{backend.base_url}/api/tags')
+                response.raise_for_status()
+                data = response.json()
+            backend.models = {normalize_model_name(model.get('name', '')) for model in data.get('models', [])}
+            backend.models_fetched_at = time.monotonic()
+            self.mark_success(backend)
+            return backend.models
+        except Exception as e:
+            # Keep the previous model list and retry after the next refresh interval
+            backend.models_fetched_at = time.monotonic()
+            logger.error(f'Failed to list models on Ollama backend {backend.base_url}: {e}')
+            self.mark_failure(backend, 'model listing failed')
+            return None
+
+    async def refresh_models(self, force: bool = False) -> None:
+        """Re-read /api/tags of backends whose model list is older than model_refresh_seconds."""
+        def stale_backends() -> List[OllamaBackend]:
+            now = time.monotonic()
+            return [b for b in self.backends if force or now - b.models_fetched_at > self.model_refresh_seconds]
+
+        if not stale_backends():
+            return
+        async with self._refresh_lock:
+            # Another request may have refreshed while we waited for the lock
+            stale = stale_backends()
+            await asyncio.gather(*(self.fetch_models(b) for b in stale))
+
+    def get_stats(self) -> List[Dict]:
+        return [backend.get_stats() for backend in self.backends]
+
+
+# Global singleton instance
+_ollama_backend_pool = None
+
+
+def get_ollama_backend_pool() -> OllamaBackendPool:
+    """
+    Get or create the global backend pool.
+
+    Returns:
+        OllamaBackendPool: The pool shared by every OllamaService built from settings,
+        so load and health state is seen by the RabbitMQ consumer and the HTTP endpoints alike
+    """
+    global _ollama_backend_pool
+    if _ollama_backend_pool is None:
+        _ollama_backend_pool = OllamaBackendPool()
+    return _ollama_backend_pool
@@ -0,0 +1,171 @@
+"""
+Pipeline Module
+
+Small async DAG executor for the chat message pipeline:
+1. Stages declare their dependencies; a stage starts as soon as all of its
+   dependencies have finished, so independent stages overlap
+2. Each stage can have a timeout and a fallback used on timeout or error
+3. Per-stage timings are collected for every message
+"""
+
+import asyncio
+import inspect
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Union
+from src.logger import logger
+from src.tracing import get_tracer
+
+StageFunc = Callable[[Dict[str, Any]], Union[Any, Awaitable[Any]]]
+
+
+class StageFailedError(Exception):
+    """Raised when a stage without fallback fails; the original error is chained."""
+
+    def __init__(self, stage: str, error: BaseException):
+        super().__init__(f"Stage '{stage}' failed: {type(error).__name__}: {error}")
+        self.stage = stage
+
+
+class Stage:
+    """
+    A unit of pipeline work.
+
+    func receives the dict of results produced so far (keyed by stage name)
+    and may be sync or async. fallback receives (results, error) and its
+    return value replaces the stage result.
+    """
+
+    def __init__(self, name: str, func: StageFunc, depends_on: Iterable[str] = (), timeout: Optional[float] = None, fallback: Optional[Callable[[Dict[str, Any], BaseException], Any]] = None):
+        self.name = name
+        self.func = func
+        self.depends_on = tuple(depends_on)
+        self.timeout = timeout
+        self.fallback = fallback
+
+
+class StageTimings:
+    """Per-stage start offset, duration and status for one message."""
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.stages: Dict[str, Dict[str, Any]] = {}
+
+    def record(self, name: str, started_at: float, status: str) -> None:
+        self.stages[name] = {
+            'start_ms': round((started_at - self.started_at) * 1000, 1),
+            'duration_ms': round((time.perf_counter() - started_at) * 1000, 1),
+            'status': status
+        }
+
+    @asynccontextmanager
+    async def measure(self, name: str):
+        """Time (and trace) an inline step that is not part of a DAG."""
+        started_at = time.perf_counter()
+        status = 'ok'
+        try:
+            with get_tracer().start_span(f'stage.{name}'):
+                yield
+        except BaseException:
+            status = 'error'
+            raise
+        finally:
+            self.record(name, started_at, status)
+
+    def total_ms(self) -> float:
+        return round((time.perf_counter() - self.started_at) * 1000, 1)
+
+    def summary(self) -> str:
+        parts = [
+            f"{name}={stage['duration_ms']}ms" + ('' if stage['status'] == 'ok' else f"({stage['status']})")
+            for name, stage in self.stages.items()
+        ]
+        return ', '.join(parts) + f', total={self.total_ms()}ms'
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'stages': dict(self.stages), 'total_ms': self.total_ms()}
+
+
+class Pipeline:
+    """
+    Runs a set of stages respecting their dependencies.
+
+    If a stage fails and has no fallback, every other running stage is
+    cancelled and StageFailedError is raised.
+    """
+
+    def __init__(self, stages: List[Stage]):
+        self.stages = {stage.name: stage for stage in stages}
+        for stage in stages:
+            missing = [dep for dep in stage.depends_on if dep not in self.stages]
+            if missing:
+                raise ValueError(f"Stage '{stage.name}' depends on unknown stage(s): {missing}")
+        self._check_acyclic()
+
+    def _check_acyclic(self) -> None:
+        visiting, done = set(), set()
+
+        def visit(name: str) -> None:
+            if name in done:
+                return
+            if name in visiting:
+                raise ValueError(f"Pipeline has a dependency cycle through '{name}'")
+            visiting.add(name)
+            for dep in self.stages[name].depends_on:
+                visit(dep)
+            visiting.discard(name)
+            done.add(name)
+
+        for name in self.stages:
+            visit(name)
+
+    async def _run_stage(self, stage: Stage, tasks: Dict[str, asyncio.Task], results: Dict[str, Any], timings: StageTimings) -> Any:
+        if stage.depends_on:
+            await asyncio.gather(*(tasks[dep] for dep in stage.depends_on))
+
+        started_at = time.perf_counter()
+        with get_tracer().start_span(f'stage.{stage.name}') as span:
+            try:
+                value = stage.func(results)
+                if inspect.isawaitable(value):
+                    value = await asyncio.wait_for(value, timeout=stage.timeout)
+                status = 'ok'
+            except Exception as e:
+                status = 'timeout' if isinstance(e, asyncio.TimeoutError) else 'error'
+                if stage.fallback is None:
+                    timings.record(stage.name, started_at, status)
+                    raise StageFailedError(stage.name, e) from e
+                logger.warning(f"Stage '{stage.name}' {status} ({type(e).__name__}: {e}), using fallback")
+                value = stage.fallback(results, e)
+                status = f'fallback:{status}'
+                if span is not None:
+                    span.set_attribute('fallback', status)
+
+        results[stage.name] = value
+        timings.record(stage.name, started_at, status)
+        return value
+
+    async def run(self, results: Optional[Dict[str, Any]] = None, timings: Optional[StageTimings] = None) -> Dict[str, Any]:
+        """
+        Execute all stages.
+
+        Args:
+            results: Initial values visible to stage functions
+            timings: Collector to record into (a new one is created if omitted)
+
+        Returns:
+            Dictionary of stage results keyed by stage name
+        """
+        results = results if results is not None else {}
+        timings = timings or StageTimings()
+        tasks: Dict[str, asyncio.Task] = {}
+        for name, stage in self.stages.items():
+            tasks[name] = asyncio.ensure_future(self._run_stage(stage, tasks, results, timings))
+        try:
+            await asyncio.gather(*tasks.values())
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            raise
+        return results
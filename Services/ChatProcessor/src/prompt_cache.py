@@ -0,0 +1,65 @@
+"""
+Prompt Cache Module
+
+Memoized, immutable pieces of the chat prompt: system messages per
+(scenario, fallback, tenant), including the tenant's SystemPrompt and
+terminology definitions.
+
+Citation fragments (label and text of a retrieved chunk) are not cached:
+keying them safely on the chunk text costs about as much as rendering them.
+"""
+
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, TypeVar
+
+# System message sets kept for the most recently active tenants and scenarios
+SYSTEM_MESSAGE_CACHE_SIZE = 1024
+
+T = TypeVar('T')
+
+
+class RenderCache:
+    """Bounded LRU of rendered values with hit/miss counters."""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: 'OrderedDict[Hashable, Any]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_or_render(self, key: Hashable, render: Callable[[], T]) -> T:
+        value = self._entries.get(key)
+        if value is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+        self.misses += 1
+        value = render()
+        self._entries[key] = value
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+        return value
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+_system_message_cache = None
+
+
+def get_system_message_cache() -> RenderCache:
+    """
+    Get or create the global system message cache.
+
+    Returns:
+        RenderCache: System message contents keyed by scenario, fallback, tenant and layout
+    """
+    global _system_message_cache
+    if _system_message_cache is None:
+        _system_message_cache = RenderCache(SYSTEM_MESSAGE_CACHE_SIZE)
+    return _system_message_cache
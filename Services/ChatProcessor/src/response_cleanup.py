@@ -0,0 +1,213 @@
+"""
+Response Cleanup Module
+
+Removes reasoning steps and instruction prefixes from generated answers,
+incrementally, so streamed answers can be cleaned chunk by chunk:
+1. "Bước N:" step markers: only the text after the last marker is kept
+2. Up to MAX_PREFIX_REMOVALS leading prefixes ("Trả lời:", "Dựa trên ngữ cảnh,", ...)
+   are removed, case-insensitively
+3. A first line that reads like an instruction is dropped when the second
+   line starts with "Theo"
+4. Surrounding whitespace is stripped
+
+Output is held back only while it may still turn out to be a prefix or a
+step marker, plus trailing whitespace. Rules 1 and 3 can only be decided
+after text was committed; the cleaner then emits a reset (discard what was
+emitted so far) followed by the kept text, so the final text always equals
+the batch result.
+"""
+
+import re
+from typing import List, NamedTuple
+from src.logger import logger
+
+STEP_MARKER = re.compile(r'Bước \d+:')
+# A step marker that may still be completed by the next chunk
+PARTIAL_STEP_MARKER = re.compile(r'B(?:ư(?:ớ(?:c(?: \d*)?)?)?)?\Z')
+
+# Checked in order, the first match is removed
+PREFIXES = (
+    "Trả lời:",
+    "Câu trả lời:",
+    "Câu trả lời cuối cùng:",
+    "Đáp án:",
+    "Kết luận:",
+    "Answer:",
+    "Final answer:",
+    "Xây dựng câu trả lời dựa trên các thông tin đã trích xuất.",
+    "Dựa trên thông tin đã trích xuất,",
+    "Trích dẫn chính xác từ ngữ cảnh và trả lời câu hỏi của người dùng.",
+    "Trích dẫn chính xác từ ngữ cảnh.",
+    "Trả lời câu hỏi của người dùng.",
+    "Dựa trên ngữ cảnh,",
+    "Dựa trên context,",
+    "Căn cứ vào thông tin,",
+    "Theo thông tin được cung cấp,",
+)
+_LOWER_PREFIXES = tuple((prefix, prefix.lower()) for prefix in PREFIXES)
+MAX_PREFIX_REMOVALS = 5
+
+# A first line containing one of these is an instruction if the second line starts with "theo"
+INSTRUCTION_PATTERNS = ('trích dẫn', 'trả lời', 'dựa trên', 'căn cứ', 'theo thông tin', 'hãy', 'cần', 'phải', 'nên', 'vui lòng')
+ANSWER_START = 'theo'
+
+# Phases of the text after the last step marker
+_PREFIX, _FIRST_LINE, _SECOND_LINE, _BODY = range(4)
+
+
+class CleanupUpdate(NamedTuple):
+    text: str  # Cleaned text to append
+    reset: bool  # Discard everything emitted before `text` first
+
+
+class StreamingResponseCleaner:
+    """
+    Incremental equivalent of the batch cleanup.
+
+    Usage:
+        cleaner = StreamingResponseCleaner()
+        for chunk in stream:
+            update = cleaner.feed(chunk)   # apply update.reset, then append update.text
+        update = cleaner.finish()
+        cleaner.text                       # == clean_response(full response)
+    """
+
+    def __init__(self):
+        self._raw = ''  # Possible start of a step marker
+        self._parts: List[str] = []  # Committed text since the last reset
+        self._update_parts: List[str] = []
+        self._update_reset = False
+        self._start_segment()
+
+    def _start_segment(self) -> None:
+        self._phase = _PREFIX
+        self._head = ''  # Text that may still start with a prefix
+        self._removed = 0
+        self._held_ws = ''  # Trailing whitespace, committed once more text follows
+        self._first_line: List[str] = []
+        self._second_line = ''
+
+    @property
+    def text(self) -> str:
+        """Cleaned text committed so far."""
+        return ''.join(self._parts)
+
+    def feed(self, chunk: str) -> CleanupUpdate:
+        """Process the next chunk of the response."""
+        raw = self._raw + chunk
+        position = 0
+        for marker in STEP_MARKER.finditer(raw):
+            position = marker.end()
+        if position:
+            # Everything before the last step marker is reasoning
+            logger.debug('Removed reasoning step(s) from streamed response')
+            self._reset()
+            self._start_segment()
+        partial = PARTIAL_STEP_MARKER.search(raw, position)
+        held = partial.start() if partial else len(raw)
+        self._raw = raw[held:]
+        self._consume(raw[position:held], final=False)
+        return self._take_update()
+
+    def finish(self) -> CleanupUpdate:
+        """Flush held-back text at the end of the response."""
+        raw, self._raw = self._raw, ''
+        self._consume(raw, final=True)
+        return self._take_update()
+
+    def _reset(self) -> None:
+        if self._parts:
+            self._update_reset = True
+        self._parts = []
+        self._update_parts = []
+
+    def _take_update(self) -> CleanupUpdate:
+        update = CleanupUpdate(''.join(self._update_parts), self._update_reset)
+        self._update_parts = []
+        self._update_reset = False
+        return update
+
+    def _emit(self, text: str) -> None:
+        """Commit text, holding back trailing whitespace."""
+        text = self._held_ws + text
+        kept = text.rstrip()
+        self._held_ws = text[len(kept):]
+        if kept:
+            self._parts.append(kept)
+            self._update_parts.append(kept)
+
+    def _consume(self, text: str, final: bool) -> None:
+        if self._phase == _PREFIX:
+            text = self._strip_prefixes(self._head + text, final)
+            if text is None:
+                return
+        if self._phase == _FIRST_LINE:
+            text = self._track_first_line(text, final)
+        if self._phase == _SECOND_LINE:
+            text = self._track_second_line(text, final)
+        if self._phase == _BODY and text:
+            self._emit(text)
+
+    def _strip_prefixes(self, head: str, final: bool):
+        """Text after the removed prefixes, or None while a prefix may still match."""
+        while True:
+            head = head.lstrip()
+            if not head:
+                self._head = ''
+                return None
+            if self._removed == MAX_PREFIX_REMOVALS:
+                break
+            lowered = head.lower()
+            for prefix, lower_prefix in _LOWER_PREFIXES:
+                if lowered.startswith(lower_prefix):
+                    head = head[len(prefix):]
+                    self._removed += 1
+                    logger.debug(f'Removed prefix "{prefix}" from response')
+                    break
+                if not final and lower_prefix.startswith(lowered):
+                    self._head = head  # Too short to decide
+                    return None
+            else:
+                break
+        self._head = ''
+        self._phase = _FIRST_LINE
+        return head
+
+    def _track_first_line(self, text: str, final: bool) -> str:
+        end = text.find('\n')
+        if end < 0:
+            self._first_line.append(text)
+            self._emit(text)
+            return ''
+        self._first_line.append(text[:end])
+        self._emit(text[:end + 1])
+        first_line = ''.join(self._first_line).strip().lower()
+        self._first_line = []
+        self._phase = _SECOND_LINE if any(pattern in first_line for pattern in INSTRUCTION_PATTERNS) else _BODY
+        return text[end + 1:]
+
+    def _track_second_line(self, text: str, final: bool) -> str:
+        end = text.find('\n')
+        line = self._second_line + (text if end < 0 else text[:end])
+        start = line.lstrip()
+        if end < 0 and len(start) < len(ANSWER_START) and not final:
+            self._second_line = line
+            self._emit(text)
+            return ''
+        self._second_line = ''
+        self._phase = _BODY
+        if start.lower().startswith(ANSWER_START):
+            # The first line was an instruction: keep from the second line
+            logger.debug('Removed instruction sentence from first line')
+            self._reset()
+            self._held_ws = ''
+            return start + (text[end:] if end >= 0 else '')
+        return text
+
+
+def clean_response(response: str) -> str:
+    """Cleanup of a complete response."""
+    cleaner = StreamingResponseCleaner()
+    cleaner.feed(response)
+    cleaner.finish()
+    return cleaner.text
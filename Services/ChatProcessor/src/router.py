@@ -1,11 +1,17 @@
-import asyncio
-import json
-from pathlib import Path
-from typing import List
-from fastapi import APIRouter, HTTPException
-from src.schemas import ChatRequest, ChatResponse, BatchTestRequest, TestEntity
+import secrets
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from src.schemas import ChatRequest, ChatResponse, BatchTestRequest, TestEntity, IndexEvent
 from src.business import ChatBusiness, OllamaService, QdrantService
 from src.evaluation_service import get_evaluation_service
+from src.bm25_index import get_bm25_index_manager
+from src.vector_index import get_local_vector_index_manager
+from src.llm_scheduler import get_llm_scheduler, LLMOverloadedError
+from src.model_router import get_model_router
+from src.jobs import get_job_registry
+from src.batch_runner import BatchTestRunner, new_run_id
+from src.config import settings
 from src.logger import logger
 router = APIRouter()
 ollama_service = OllamaService()
@@ -30,94 +36,134 @@ async def test_chat(request: ChatRequest):
             system_instruction=request.system_instruction
         )
         return ChatResponse(**result)
+    except LLMOverloadedError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         logger.error(f'Error processing chat request: {e}', exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get('/metrics')
+async def metrics():
+    """Prometheus metrics (search/embedding/LLM latencies, token counts, queue gauges)."""
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+@router.get('/api/llm/scheduler')
+async def llm_scheduler_stats():
+    """Queue depth, wait times and shed counts of the LLM request scheduler."""
+    return get_llm_scheduler().get_stats()
+
+@router.get('/api/llm/backends')
+async def llm_backends():
+    """Health, load and model availability of each Ollama backend."""
+    return ollama_service.pool.get_stats()
+
+@router.get('/api/llm/models')
+async def llm_model_stats():
+    """Configured small/large models and generation latency per model."""
+    return get_model_router().get_stats()
+
+def require_index_event_token(x_index_event_token: str = Header(default='')) -> None:
+    """Rejects index events without the shared INDEX_EVENT_TOKEN (all of them when none is configured)."""
+    if not settings.index_event_token or not secrets.compare_digest(x_index_event_token, settings.index_event_token):
+        raise HTTPException(status_code=403, detail='Invalid or missing index event token')
+
+@router.post('/api/index/events', dependencies=[Depends(require_index_event_token)])
+async def index_event(event: IndexEvent):
+    """
+    Receives vectorize/delete events from EmbeddingService and applies them
+    to the in-process BM25 and local vector indexes.
+    """
+    if event.collection_name and event.collection_name != qdrant_service.collection_name:
+        return {'status': 'ignored', 'bm25': 0, 'vector': 0}
+
+    bm25_manager = get_bm25_index_manager()
+    vector_manager = get_local_vector_index_manager()
+    if event.action == 'upsert':
+        points = [
+            (point.id, point.vector, {key: point.payload[key] for key in QdrantService.INDEX_PAYLOAD_FIELDS if key in point.payload})
+            for point in event.points
+        ]
+        bm25_applied = await bm25_manager.apply_upsert(event.tenant_id, [(point_id, payload) for point_id, _, payload in points])
+        vector_applied = vector_manager.apply_upsert(event.tenant_id, points)
+    elif event.action == 'delete':
+        if event.source_id is None:
+            raise HTTPException(status_code=400, detail='source_id is required for delete events')
+        bm25_applied = await bm25_manager.apply_delete(event.tenant_id, event.source_id, event.type)
+        vector_applied = vector_manager.apply_delete(event.tenant_id, event.source_id, event.type)
+    else:
+        raise HTTPException(status_code=400, detail=f'Unknown index event action: {event.action}')
+
+    logger.info(
+        f'Applied index event: action={event.action}, tenant_id={event.tenant_id}, '
+        f'bm25={bm25_applied}, vector={vector_applied}'
+    )
+    return {'status': 'ok', 'bm25': bm25_applied, 'vector': vector_applied}
+
 @router.post('/evaluate-batch')
 async def evaluate_batch():
-
-    try:
-        evaluation_service = get_evaluation_service(
-            input_file="evaluation_logs.json",
-            output_file="chat_logs_scored.json"
-        )
-
-        # Run the evaluation process
-        summary = await evaluation_service.run_evaluation()
-
-        return summary
-
-    except FileNotFoundError as e:
-        logger.error(f'Input file not found: {e}')
-        raise HTTPException(status_code=404, detail=str(e))
-    except Exception as e:
-        logger.error(f'Error during batch evaluation: {e}', exc_info=True)
-        raise HTTPException(status_code=500, detail=str(e))
-
-async def process_batch_in_background(entities: List[TestEntity]):
-    """Background task to process batch test entities."""
-    results = []
-    logger.info(f'Starting background processing of {len(entities)} entities')
-
-    for idx, entity in enumerate(entities):
-        try:
-            logger.info(f'Processing entity {idx + 1}/{len(entities)}: TC_id={entity.TC_id}, tenant_id={entity.tenant_id}')
-
-            # Use conversation_id=0 and user_id=0 for test requests
-            result = await ChatBusiness.process_chat_message(
-                conversation_id=0,
-                user_id=0,
-                message=entity.questions,
-                tenant_id=entity.tenant_id,
-                ollama_service=ollama_service,
-                qdrant_service=qdrant_service
-            )
-
-            # Collect result with TC_id and answer
-            results.append({
-                'TC_id': entity.TC_id,
-                'answer': result.get('message', '')
-            })
-
-            logger.info(f'Completed entity {idx + 1}/{len(entities)}: TC_id={entity.TC_id}')
-
-            # Wait 3 seconds before processing next entity
-            if idx < len(entities) - 1:  # Don't wait after the last entity
-                logger.info(f'Waiting 0.5 seconds before next entity...')
-                await asyncio.sleep(0.5)
-
-        except Exception as e:
-            logger.error(f'Error processing entity TC_id={entity.TC_id}: {e}', exc_info=True)
-            results.append({
-                'TC_id': entity.TC_id,
-                'answer': f'Error: {str(e)}'
-            })
-
-    # Write results to tdd.json file
-    try:
-        output_file = Path('tdd.json')
-        with output_file.open('w', encoding='utf-8') as f:
-            json.dump(results, f, ensure_ascii=False, indent=2)
-        logger.info(f'Successfully wrote {len(results)} results to {output_file}')
-    except Exception as e:
-        logger.error(f'Failed to write results to file: {e}', exc_info=True)
+    """
+    Starts (or returns the already running) Ragas evaluation job.
+    Progress is reported by GET /api/jobs/{job_id}.
+    """
+    evaluation_service = get_evaluation_service(
+        input_file=settings.evaluation_log_dir,
+        output_file=settings.evaluation_scored_path
+    )
+    if not evaluation_service.input_file.exists():
+        logger.error(f'Input file not found: {evaluation_service.input_file}')
+        raise HTTPException(status_code=404, detail=f'Input file not found: {evaluation_service.input_file}')
+
+    job = get_job_registry().start('evaluation', evaluation_service.run_evaluation)
+    return job.to_dict()
+
+@router.get('/api/jobs')
+async def list_jobs(kind: Optional[str] = None):
+    """Recent background jobs (evaluation runs, batch tests)."""
+    return [job.to_dict() for job in get_job_registry().list(kind)]
+
+@router.get('/api/jobs/{job_id}')
+async def job_status(job_id: str):
+    """Status and progress of a background job."""
+    job = get_job_registry().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f'Job not found: {job_id}')
+    return job.to_dict()
 
 @router.post('/api/test/batch')
 async def batch_test(request: BatchTestRequest):
     """
-    Batch test endpoint that processes entities in the background.
-    Returns immediately with 202 Accepted status.
-    Results are written to tdd.json after processing completes.
+    Batch test endpoint that processes entities in a background job.
+    Returns immediately with the job; progress is reported by GET /api/jobs/{job_id}.
+    Results are appended to <BATCH_TEST_DIR>/<run_id>.jsonl as they complete;
+    re-submitting with the same run_id resumes, skipping answered TC_ids.
     """
     logger.info(f'Received batch test request with {len(request.entities)} entities')
+    try:
+        runner = BatchTestRunner(request.run_id or new_run_id())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    async def process(entity: TestEntity):
+        # Use conversation_id=0 and user_id=0 for test requests
+        return await ChatBusiness.process_chat_message(
+            conversation_id=0,
+            user_id=0,
+            message=entity.questions,
+            tenant_id=entity.tenant_id,
+            ollama_service=ollama_service,
+            qdrant_service=qdrant_service
+        )
 
-    # Spawn background task
-    asyncio.create_task(process_batch_in_background(request.entities))
-
-    # Return immediately
+    job = get_job_registry().start(
+        'batch_test',
+        lambda job: runner.run(request.entities, process, job),
+        key=f'batch_test:{runner.run_id}',
+        total=len(request.entities)
+    )
     return {
         'status': 'accepted',
         'message': f'Processing {len(request.entities)} entities in background',
-        'output_file': 'tdd.json'
+        'run_id': runner.run_id,
+        'output_file': str(runner.output_file),
+        'job': job.to_dict()
     }
\ No newline at end of file
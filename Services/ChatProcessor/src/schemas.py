@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Any, Union
 from pydantic import BaseModel, Field, ConfigDict
 
 class PromptConfigDto(BaseModel):
@@ -43,6 +43,10 @@ class ChatResponse(BaseModel):
     rag_documents_used: int
     source_ids: Optional[List] = []
     scenario: Optional[str] = None  # NEW: Scenario for debugging (BOTH, COMPANY_ONLY, LEGAL_ONLY, NONE)
+    prompt_tokens: Optional[int] = None  # Tokens in the prompt sent to Ollama
+    prompt_eval_count: Optional[int] = None  # Prompt tokens Ollama actually evaluated (lower = prefix cache hit)
+    prompt_eval_duration_ms: Optional[float] = None
+    stage_timings: Optional[Dict[str, Any]] = None  # Per-stage start/duration/status of the pipeline
 
 class TestEntity(BaseModel):
     tenant_id: int
@@ -50,4 +54,18 @@ class TestEntity(BaseModel):
     questions: str
 
 class BatchTestRequest(BaseModel):
-    entities: List[TestEntity]
\ No newline at end of file
+    entities: List[TestEntity]
+    run_id: Optional[str] = None  # Resume an earlier run (answered TC_ids are skipped)
+
+class IndexedPoint(BaseModel):
+    id: Union[str, int]
+    payload: Dict[str, Any]
+    vector: Optional[List[float]] = None
+
+class IndexEvent(BaseModel):
+    action: str  # 'upsert' (vectorize) or 'delete'
+    tenant_id: int
+    collection_name: Optional[str] = None
+    points: List[IndexedPoint] = Field(default_factory=list)  # upsert only
+    source_id: Optional[int] = None  # delete only
+    type: Optional[int] = None  # delete only
\ No newline at end of file
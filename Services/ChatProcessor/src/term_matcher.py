@@ -0,0 +1,206 @@
+"""
+Term Matcher Module
+
+Single-pass multi-pattern matching of tenant terminology and legal
+abbreviations in user queries:
+1. A matcher (term trie plus a compiled start-position prefilter) is built
+   once per tenant system_instruction dictionary (plus the built-in
+   abbreviations) and cached by a hash of the dictionary contents
+2. One left-to-right scan of the query yields leftmost-longest,
+   non-overlapping matches, shared by query expansion and keyword extraction
+
+This is not Aho-Corasick: there are no failure links, the trie is walked
+afresh from each candidate start position.
+3. Expansion replaces all matches at once, so a replacement value is never
+   matched again by a later key
+"""
+
+import hashlib
+import re
+from collections import OrderedDict
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+from src.logger import logger
+
+# Compiled matchers kept for the most recently seen tenant dictionaries
+MATCHER_CACHE_SIZE = 256
+
+TENANT = 'tenant'
+ABBREVIATION = 'abbreviation'
+
+
+class Term(NamedTuple):
+    key: str
+    value: str
+    kind: str  # TENANT (case-sensitive) or ABBREVIATION (case-insensitive)
+
+
+class TermMatch(NamedTuple):
+    start: int
+    end: int
+    terms: Tuple[Term, ...]  # Every term matching this span (e.g. a tenant key that is also an abbreviation)
+
+    def term(self, kind: str) -> Optional[Term]:
+        return next((term for term in self.terms if term.kind == kind), None)
+
+
+def _fold(text: str) -> str:
+    """Lowercase without changing the length, so offsets map back to the original text."""
+    folded = text.lower()
+    if len(folded) == len(text):
+        return folded
+    return ''.join(lower if len(lower) == 1 else char for char, lower in ((char, char.lower()) for char in text))
+
+
+class TermMatcher:
+    """
+    Trie over case-folded term keys, with a compiled prefilter for start positions.
+
+    The prefilter is one regular expression matching the first two characters
+    of every key, so the scan skips text that can't start a term at C speed and
+    only walks the trie where a term may begin. Each walk stops at the first
+    character without a child node, so it is bounded by the longest key: the
+    worst case is O(query length x longest key), in practice a few short walks.
+    The number of keys only affects how many positions pass the prefilter.
+    """
+
+    def __init__(self, terms: Iterable[Term]):
+        self._children: List[Dict[str, int]] = [{}]
+        self._terms: List[Tuple[Term, ...]] = [()]
+        self._case_sensitive: List[bool] = [False]  # Node holds a tenant key to compare against the original text
+        self._size = 0
+        for term in terms:
+            if term.key:
+                self._add(term)
+        self._prefilter = self._compile_prefilter()
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _add(self, term: Term) -> None:
+        node = 0
+        for char in _fold(term.key):
+            next_node = self._children[node].get(char)
+            if next_node is None:
+                next_node = len(self._children)
+                self._children[node][char] = next_node
+                self._children.append({})
+                self._terms.append(())
+                self._case_sensitive.append(False)
+            node = next_node
+        if not any(existing.key == term.key and existing.kind == term.kind for existing in self._terms[node]):
+            # First definition of a key wins, as with the former sequential replacement
+            self._terms[node] += (term,)
+            self._size += 1
+            if term.kind == TENANT:
+                self._case_sensitive[node] = True
+
+    def _compile_prefilter(self) -> Optional['re.Pattern']:
+        """Pattern matching the first character of every position where the first two characters of some key occur."""
+        singles = []
+        branches = []
+        for char, child in self._children[0].items():
+            if self._terms[child]:
+                singles.append(re.escape(char))  # One-character key: any occurrence can start a match
+            else:
+                # Consume only the first character (a lookahead checks the second), so candidates may overlap
+                branches.append(re.escape(char) + '(?=[' + ''.join(re.escape(second) for second in self._children[child]) + '])')
+        if singles:
+            branches.append('[' + ''.join(singles) + ']')
+        return re.compile('|'.join(branches)) if branches else None
+
+    def find(self, text: str) -> List[TermMatch]:
+        """
+        Leftmost-longest, non-overlapping matches in one pass over the text.
+
+        Tenant keys match case-sensitively, abbreviations case-insensitively.
+        """
+        if self._prefilter is None or not text:
+            return []
+        children, terms, case_sensitive = self._children, self._terms, self._case_sensitive
+        folded = _fold(text)
+        length = len(folded)
+        matches = []
+        position = 0
+        for candidate in self._prefilter.finditer(folded):
+            start = candidate.start()
+            if start < position:
+                continue  # Inside the previous match
+            node = 0
+            longest = None
+            for index in range(start, length):
+                node = children[node].get(folded[index])
+                if node is None:
+                    break
+                if terms[node]:
+                    end = index + 1
+                    matched = terms[node] if not case_sensitive[node] else tuple(
+                        term for term in terms[node]
+                        if term.kind == ABBREVIATION or text[start:end] == term.key
+                    )
+                    if matched:
+                        longest = TermMatch(start, end, matched)
+            if longest is not None:
+                matches.append(longest)
+                position = longest.end
+        return matches
+
+    @staticmethod
+    def replace(text: str, matches: List[TermMatch], kind: str = TENANT) -> str:
+        """Text with every match of `kind` replaced by its value, in one pass."""
+        parts = []
+        position = 0
+        for match in matches:
+            term = match.term(kind)
+            if term is None or not term.value:
+                continue
+            parts.append(text[position:match.start])
+            parts.append(term.value)
+            position = match.end
+        if not parts:
+            return text
+        parts.append(text[position:])
+        return ''.join(parts)
+
+
+_matchers: 'OrderedDict[str, TermMatcher]' = OrderedDict()
+
+
+def _tenant_terms(system_instruction: Optional[List[Dict[str, str]]]) -> List[Term]:
+    return [
+        Term(item.get('key', ''), item.get('value', ''), TENANT)
+        for item in system_instruction or []
+        if item.get('key')
+    ]
+
+
+def dictionary_digest(system_instruction: Optional[List[Dict[str, str]]]) -> str:
+    """Hash of the (key, value) pairs of a tenant dictionary."""
+    if not system_instruction:
+        return ''
+    contents = '\x1f'.join([f"{item.get('key', '')}\x1e{item.get('value', '')}" for item in system_instruction])
+    return hashlib.blake2b(contents.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def get_term_matcher(system_instruction: Optional[List[Dict[str, str]]] = None) -> TermMatcher:
+    """
+    Matcher for a tenant dictionary plus the built-in legal abbreviations.
+
+    Compiled matchers are cached by a hash of the dictionary contents, so every
+    message of a tenant reuses the same matcher.
+    """
+    digest = dictionary_digest(system_instruction)
+    matcher = _matchers.get(digest)
+    if matcher is not None:
+        _matchers.move_to_end(digest)
+        return matcher
+
+    from src.hybrid_search import LegalTermExtractor
+
+    tenant_terms = _tenant_terms(system_instruction)
+    abbreviations = [Term(key, value, ABBREVIATION) for key, value in LegalTermExtractor.ABBREVIATION_EXPANSIONS.items()]
+    matcher = TermMatcher(tenant_terms + abbreviations)
+    _matchers[digest] = matcher
+    if len(_matchers) > MATCHER_CACHE_SIZE:
+        _matchers.popitem(last=False)
+    logger.debug(f'Compiled term matcher with {len(matcher)} terms ({len(tenant_terms)} tenant)')
+    return matcher
@@ -0,0 +1,227 @@
+"""
+Context Token Budget Module
+
+Keeps the prompt sent to Ollama within a predictable token budget:
+1. Counts tokens with the target model's tokenizer (falls back to a
+   character-based estimate when `transformers` is not installed)
+2. Spends the context budget across company and legal groups by priority and score
+3. Trims or drops low-value chunks that don't fit
+"""
+
+import asyncio
+import math
+from typing import Any, Dict, List, Optional, Tuple
+from src.config import settings
+from src.hybrid_search import RetrievalHit
+from src.logger import logger
+
+# Rough per-message overhead of the chat template (role markers, separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+# Newlines and brackets around each chunk's citation label
+CHUNK_OVERHEAD_TOKENS = 4
+TRIM_MARKER = '…'
+
+
+class TokenCounter:
+    """
+    Counts tokens with the generation model's HuggingFace tokenizer.
+
+    The tokenizer is loaded once at startup (load_async) from local files
+    only: a hub name must already be in the HuggingFace cache, or
+    tokenizer_name is a local directory. Until it is loaded, or if it can't
+    be, counts are estimated from text length.
+    """
+
+    def __init__(self, tokenizer_name: Optional[str] = None, chars_per_token: Optional[float] = None):
+        self.tokenizer_name = tokenizer_name if tokenizer_name is not None else settings.tokenizer_name
+        self.chars_per_token = chars_per_token or settings.tokenizer_chars_per_token
+        self._tokenizer = None
+        self._load_attempted = False
+
+    def load(self) -> bool:
+        """Load the tokenizer (blocking; call once, off the event loop). Returns whether it is available."""
+        if self._load_attempted:
+            return self._tokenizer is not None
+        self._load_attempted = True
+        if not self.tokenizer_name:
+            return False
+        try:
+            from transformers import AutoTokenizer
+            self._tokenizer = AutoTokenizer.from_pretrained(self.tokenizer_name, local_files_only=True)
+            logger.info(f'Loaded tokenizer {self.tokenizer_name} for prompt token counting')
+        except Exception as e:
+            logger.warning(
+                f'Tokenizer {self.tokenizer_name} unavailable ({e}), '
+                f'estimating tokens at {self.chars_per_token} chars/token'
+            )
+        return self._tokenizer is not None
+
+    async def load_async(self) -> bool:
+        """Load the tokenizer in a worker thread so the event loop keeps running."""
+        return await asyncio.to_thread(self.load)
+
+    def _get_tokenizer(self):
+        return self._tokenizer
+
+    @property
+    def exact(self) -> bool:
+        return self._tokenizer is not None
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        tokenizer = self._get_tokenizer()
+        if tokenizer is not None:
+            return len(tokenizer.encode(text, add_special_tokens=False))
+        return math.ceil(len(text) / self.chars_per_token)
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """Cut text to at most max_tokens tokens, preferring a word boundary."""
+        if max_tokens <= 0:
+            return ''
+        tokenizer = self._get_tokenizer()
+        if tokenizer is not None:
+            token_ids = tokenizer.encode(text, add_special_tokens=False)
+            if len(token_ids) <= max_tokens:
+                return text
+            truncated = tokenizer.decode(token_ids[:max_tokens])
+        else:
+            max_chars = int(max_tokens * self.chars_per_token)
+            if len(text) <= max_chars:
+                return text
+            truncated = text[:max_chars]
+
+        boundary = truncated.rfind(' ')
+        if boundary > len(truncated) // 2:
+            truncated = truncated[:boundary]
+        return truncated.rstrip()
+
+    def count_messages(self, messages: List[Dict[str, str]]) -> int:
+        """Count the tokens of a chat request (contents plus template overhead)."""
+        return sum(self.count(message.get('content', '')) + MESSAGE_OVERHEAD_TOKENS for message in messages)
+
+
+class ContextBudgeter:
+    """
+    Fits retrieved chunks into a context token budget.
+
+    Allocation order:
+    1. The best chunk of each group, company regulations first (priority source)
+    2. Remaining chunks by score (ties go to company regulations)
+
+    A chunk that doesn't fit is trimmed if at least min_chunk_tokens of its
+    text still fit, otherwise dropped. Kept chunks retain their original order.
+    """
+
+    def __init__(self, token_counter: Optional[TokenCounter] = None, budget: Optional[int] = None, min_chunk_tokens: Optional[int] = None):
+        self.token_counter = token_counter or get_token_counter()
+        self.budget = budget if budget is not None else settings.context_token_budget
+        self.min_chunk_tokens = min_chunk_tokens if min_chunk_tokens is not None else settings.context_min_chunk_tokens
+
+    def _label_tokens(self, payload: Dict[str, Any]) -> int:
+        label = ' - '.join(
+            str(payload.get(field)) for field in ('document_name', 'heading1', 'heading2') if payload.get(field)
+        )
+        return self.token_counter.count(label) + CHUNK_OVERHEAD_TOKENS
+
+    @staticmethod
+    def _with_text(result, text: str) -> RetrievalHit:
+        payload = dict(result.payload)
+        payload['text'] = text
+        return RetrievalHit.from_point(result).with_payload(payload)
+
+    def fit(self, company_results: list, legal_results: list, group_headers: Tuple[str, str] = ('', '')) -> Tuple[list, list, Dict[str, Any]]:
+        """
+        Select and trim chunks so the rendered context stays within budget.
+
+        Args:
+            company_results: Company regulation results, ranked
+            legal_results: Legal base results, ranked
+            group_headers: Banner text rendered above the (company, legal) groups
+
+        Returns:
+            (company_kept, legal_kept, report) where report has budget/used/kept/trimmed/dropped
+        """
+        groups = [list(company_results), list(legal_results)]
+        candidates = []  # (group, position, result, label_tokens, text_tokens)
+        for group_index, results in enumerate(groups):
+            for position, result in enumerate(results):
+                payload = getattr(result, 'payload', None) or {}
+                if 'text' not in payload:
+                    continue
+                candidates.append((
+                    group_index,
+                    position,
+                    result,
+                    self._label_tokens(payload),
+                    self.token_counter.count(payload['text'])
+                ))
+
+        remaining = self.budget
+        present_groups = {c[0] for c in candidates}
+        header_tokens = {group_index: self.token_counter.count(group_headers[group_index]) for group_index in present_groups}
+        # Reserve the headers up front; only those of groups that keep a chunk are rendered
+        remaining -= sum(header_tokens.values())
+
+        # Best chunk of each group first, then everything else by score
+        leaders = []
+        for group_index in sorted(present_groups):
+            leaders.append(next(c for c in candidates if c[0] == group_index))
+        leader_keys = {(c[0], c[1]) for c in leaders}
+        others = sorted(
+            (c for c in candidates if (c[0], c[1]) not in leader_keys),
+            key=lambda c: (-(c[2].score or 0.0), c[0])
+        )
+
+        kept: Dict[Tuple[int, int], Any] = {}
+        trimmed = 0
+        dropped = 0
+        for group_index, position, result, label_tokens, text_tokens in leaders + others:
+            cost = label_tokens + text_tokens
+            if cost <= remaining:
+                kept[(group_index, position)] = result
+                remaining -= cost
+                continue
+
+            text_allowance = remaining - label_tokens
+            if text_allowance >= self.min_chunk_tokens:
+                text = self.token_counter.truncate(result.payload['text'], text_allowance - 1) + TRIM_MARKER
+                kept[(group_index, position)] = self._with_text(result, text)
+                remaining -= label_tokens + self.token_counter.count(text)
+                trimmed += 1
+            else:
+                dropped += 1
+
+        company_kept = [kept[key] for key in sorted(kept) if key[0] == 0]
+        legal_kept = [kept[key] for key in sorted(kept) if key[0] == 1]
+        unused_headers = sum(tokens for group_index, tokens in header_tokens.items() if not (company_kept, legal_kept)[group_index])
+        report = {
+            'budget': self.budget,
+            'used': self.budget - remaining - unused_headers,
+            'kept': len(kept),
+            'trimmed': trimmed,
+            'dropped': dropped,
+            'exact': self.token_counter.exact
+        }
+        logger.info(
+            f"Context budget: {report['used']}/{report['budget']} tokens, "
+            f"{report['kept']} kept ({trimmed} trimmed), {dropped} dropped"
+        )
+        return company_kept, legal_kept, report
+
+
+# Global singleton instance
+_token_counter = None
+
+
+def get_token_counter() -> TokenCounter:
+    """
+    Get or create the global token counter (the tokenizer is loaded once per process).
+
+    Returns:
+        TokenCounter: The global token counter
+    """
+    global _token_counter
+    if _token_counter is None:
+        _token_counter = TokenCounter()
+    return _token_counter
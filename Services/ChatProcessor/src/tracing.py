@@ -0,0 +1,240 @@
+"""
+Tracing Module
+
+Lightweight tracing spans for the chat path:
+1. Spans nest through a ContextVar, so child tasks (pipeline stages,
+   create_task) inherit the current span automatically
+2. The W3C `traceparent` header carries the trace into EmbeddingService
+3. Finished spans are appended as JSON lines (OpenTelemetry field names) by a
+   background thread, so p95 per stage and tenant can be computed offline
+
+`tenant_id` and `conversation_id` set via set_baggage() are copied onto every
+descendant span.
+
+EmbeddingService/src/tracing.py is a copy of this module (the services are
+built and deployed separately); keep the two in sync.
+"""
+
+import functools
+import inspect
+import json
+import os
+import queue
+import re
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Optional, Tuple
+from src.config import settings
+from src.logger import logger
+
+_current_span: ContextVar[Optional['Span']] = ContextVar('current_span', default=None)
+TRACEPARENT_PATTERN = re.compile(r'^00-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$')
+
+
+class Span:
+    """A timed operation within a trace."""
+
+    __slots__ = ('trace_id', 'span_id', 'parent_span_id', 'name', 'attributes', 'baggage', 'start_ns', 'end_ns', 'status', 'error')
+
+    def __init__(self, name: str, trace_id: str, parent_span_id: Optional[str], baggage: Dict[str, Any], attributes: Optional[Dict[str, Any]] = None):
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_span_id = parent_span_id
+        self.name = name
+        self.baggage = dict(baggage)
+        self.attributes = dict(attributes or {})
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.status = 'OK'
+        self.error: Optional[str] = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def set_baggage(self, key: str, value: Any) -> None:
+        """Attribute propagated to every span started below this one."""
+        self.baggage[key] = value
+
+    @property
+    def traceparent(self) -> str:
+        return f'00-{self.trace_id}-{self.span_id}-01'
+
+    def to_dict(self, service_name: str) -> Dict[str, Any]:
+        return {
+            'traceId': self.trace_id,
+            'spanId': self.span_id,
+            'parentSpanId': self.parent_span_id,
+            'name': self.name,
+            'service': service_name,
+            'startTimeUnixNano': self.start_ns,
+            'endTimeUnixNano': self.end_ns,
+            'durationMs': round((self.end_ns - self.start_ns) / 1e6, 3),
+            'attributes': {**self.baggage, **self.attributes},
+            'status': {'code': self.status, 'message': self.error} if self.error else {'code': self.status}
+        }
+
+
+def parse_traceparent(header: Optional[str]) -> Optional[Tuple[str, str]]:
+    """Return (trace_id, parent_span_id) from a W3C traceparent header, or None if invalid."""
+    if not header:
+        return None
+    match = TRACEPARENT_PATTERN.match(header.strip().lower())
+    if not match or match.group(1) == '0' * 32:
+        return None
+    return match.group(1), match.group(2)
+
+
+class JsonlSpanExporter:
+    """
+    Appends finished spans to a JSONL file from a daemon thread.
+
+    The file is rotated by size like logging's RotatingFileHandler:
+    `path` -> `path.1` -> ... -> `path.<backup_count>`, the oldest is dropped.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 0, backup_count: int = 5):
+        self.path = path
+        self.max_bytes = max_bytes  # 0 = never rotate
+        self.backup_count = backup_count
+        self._queue: 'queue.SimpleQueue[Dict[str, Any]]' = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name='span-exporter', daemon=True)
+        self._thread.start()
+
+    def export(self, span: Dict[str, Any]) -> None:
+        self._queue.put(span)
+
+    def _run(self) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        while True:
+            batch = [self._queue.get()]
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write_batch(batch)
+            except Exception as e:
+                logger.error(f'Failed to export {len(batch)} span(s) to {self.path}: {e}')
+
+    def _write_batch(self, batch) -> None:
+        if self.max_bytes and os.path.exists(self.path) and os.path.getsize(self.path) >= self.max_bytes:
+            self._rotate()
+        with open(self.path, 'a', encoding='utf-8') as f:
+            for span in batch:
+                f.write(json.dumps(span, ensure_ascii=False, default=str) + '\n')
+
+    def _rotate(self) -> None:
+        for index in range(self.backup_count - 1, 0, -1):
+            source = f'{self.path}.{index}'
+            if os.path.exists(source):
+                os.replace(source, f'{self.path}.{index + 1}')
+        if self.backup_count > 0:
+            os.replace(self.path, f'{self.path}.1')
+        else:
+            os.remove(self.path)
+
+
+class Tracer:
+    """Creates spans and hands finished ones to the exporter."""
+
+    def __init__(self, service_name: str, exporter: Optional[JsonlSpanExporter] = None, enabled: bool = True):
+        self.service_name = service_name
+        self.exporter = exporter
+        self.enabled = enabled
+
+    @contextmanager
+    def start_span(self, name: str, attributes: Optional[Dict[str, Any]] = None, traceparent: Optional[str] = None):
+        """
+        Start a span as a child of the current span (or of an incoming traceparent).
+
+        Usable as `with tracer.start_span(...) as span:` in sync and async code.
+        Exceptions mark the span as ERROR and are re-raised.
+        """
+        if not self.enabled:
+            yield None
+            return
+
+        parent = _current_span.get()
+        remote = parse_traceparent(traceparent)
+        if remote:
+            trace_id, parent_span_id = remote
+            baggage = {}
+        elif parent is not None:
+            trace_id, parent_span_id, baggage = parent.trace_id, parent.span_id, parent.baggage
+        else:
+            trace_id, parent_span_id, baggage = secrets.token_hex(16), None, {}
+
+        span = Span(name, trace_id, parent_span_id, baggage, attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.status = 'ERROR'
+            span.error = f'{type(e).__name__}: {e}'
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end_ns = time.time_ns()
+            if self.exporter is not None:
+                self.exporter.export(span.to_dict(self.service_name))
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def current_traceparent() -> Optional[str]:
+    """traceparent header value for outgoing requests, or None outside a trace."""
+    span = _current_span.get()
+    return span.traceparent if span is not None else None
+
+
+def set_baggage(key: str, value: Any) -> None:
+    """Tag the current span and all of its future descendants (e.g. tenant_id)."""
+    span = _current_span.get()
+    if span is not None:
+        span.set_baggage(key, value)
+
+
+def traced(name: str) -> Callable:
+    """Decorator running a sync or async function inside a span named `name`."""
+    def decorator(func: Callable) -> Callable:
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with get_tracer().start_span(name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with get_tracer().start_span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# Global singleton instance
+_tracer = None
+
+
+def get_tracer() -> Tracer:
+    """
+    Get or create the global tracer.
+
+    Returns:
+        Tracer: Exports to TRACING_EXPORT_PATH (rotated at TRACING_MAX_MB) when TRACING_ENABLED is true
+    """
+    global _tracer
+    if _tracer is None:
+        exporter = None
+        if settings.tracing_enabled:
+            exporter = JsonlSpanExporter(settings.tracing_export_path, settings.tracing_max_mb * 1024 * 1024, settings.tracing_backup_count)
+        _tracer = Tracer('chatprocessor', exporter, enabled=settings.tracing_enabled)
+    return _tracer
@@ -0,0 +1,206 @@
+"""
+Local Vector Index Module
+
+Optional in-process vector tier for small tenants. Most tenants only have a few
+hundred company-regulation chunks, so their vectors fit in a contiguous NumPy
+matrix and top-k is one matrix-vector product plus argpartition, with no
+network hop to Qdrant.
+
+Routing is automatic by tenant size: tenants with more than
+LOCAL_VECTOR_MAX_POINTS points (e.g. the global legal base, tenant 1) keep
+going to Qdrant. Local indexes are built by scrolling Qdrant and kept in sync
+from vectorize/delete events sent by EmbeddingService.
+"""
+
+import asyncio
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+import numpy as np
+from src.config import settings
+from src.logger import logger
+
+
+class LocalVectorIndex:
+    """
+    Brute-force cosine index over the chunks of a single tenant.
+
+    Vectors are L2-normalized on insert so cosine similarity is a dot product.
+    Changes are buffered in per-point dicts and the contiguous matrix is
+    rebuilt lazily on the next search.
+    """
+
+    def __init__(self, tenant_id: int, dtype: str = 'float32'):
+        self.tenant_id = tenant_id
+        self.dtype = np.dtype(dtype)
+        self.vectors: Dict[Any, np.ndarray] = {}
+        self.payloads: Dict[Any, Dict[str, Any]] = {}
+        self._matrix: Optional[np.ndarray] = None
+        self._row_ids: List[Any] = []
+
+    def __len__(self) -> int:
+        return len(self.vectors)
+
+    def add(self, point_id: Any, vector: List[float], payload: Dict[str, Any]) -> None:
+        """Add or replace a point."""
+        array = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(array)
+        if norm > 0:
+            array = array / norm
+        self.vectors[point_id] = array.astype(self.dtype)
+        self.payloads[point_id] = payload
+        self._matrix = None
+
+    def remove(self, point_id: Any) -> bool:
+        if self.vectors.pop(point_id, None) is None:
+            return False
+        self.payloads.pop(point_id, None)
+        self._matrix = None
+        return True
+
+    def remove_source(self, source_id: int, doc_type: Optional[int] = None) -> int:
+        """Remove every chunk of a source document (mirrors EmbeddingService.delete_by_filter)."""
+        matching = [
+            point_id for point_id, payload in self.payloads.items()
+            if payload.get('source_id') == source_id
+            and (doc_type is None or payload.get('type') == doc_type)
+        ]
+        for point_id in matching:
+            self.remove(point_id)
+        return len(matching)
+
+    def _ensure_matrix(self) -> np.ndarray:
+        if self._matrix is None:
+            self._row_ids = list(self.vectors.keys())
+            if self._row_ids:
+                self._matrix = np.ascontiguousarray(np.stack([self.vectors[i] for i in self._row_ids]))
+            else:
+                self._matrix = np.empty((0, 0), dtype=self.dtype)
+        return self._matrix
+
+    def search(self, query_vector: List[float], limit: int = 10) -> List[Tuple[Any, float, Dict[str, Any]]]:
+        """
+        Top-k cosine similarity search.
+
+        Args:
+            query_vector: Query embedding
+            limit: Maximum number of results
+
+        Returns:
+            List of (point_id, cosine_score, payload) sorted by score descending
+        """
+        matrix = self._ensure_matrix()
+        row_count = matrix.shape[0]
+        if row_count == 0 or limit <= 0:
+            return []
+
+        query = np.asarray(query_vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm > 0:
+            query = query / norm
+
+        scores = matrix.dot(query.astype(self.dtype)).astype(np.float32)
+
+        if row_count > limit:
+            top_rows = np.argpartition(scores, row_count - limit)[row_count - limit:]
+        else:
+            top_rows = np.arange(row_count)
+        top_rows = top_rows[np.argsort(-scores[top_rows], kind='stable')]
+
+        row_ids = self._row_ids
+        return [(row_ids[row], float(scores[row]), self.payloads[row_ids[row]]) for row in top_rows]
+
+
+class LocalVectorIndexManager:
+    """
+    Decides which tenants are served locally and owns their indexes.
+
+    A tenant is loaded on first query if its point count is at most max_points;
+    larger tenants are remembered as oversized and always routed to Qdrant.
+    """
+
+    def __init__(self, max_points: Optional[int] = None, dtype: Optional[str] = None):
+        self.max_points = max_points if max_points is not None else settings.local_vector_max_points
+        self.dtype = dtype or settings.local_vector_dtype
+        self.indexes: Dict[int, LocalVectorIndex] = {}
+        self.oversized: Set[int] = set()
+        self._build_locks: Dict[int, asyncio.Lock] = {}
+
+    async def get_index(self, tenant_id: int, qdrant_service) -> Optional[LocalVectorIndex]:
+        """Return the local index for a small tenant, or None if it must go to Qdrant."""
+        index = self.indexes.get(tenant_id)
+        if index is not None:
+            return index
+        if tenant_id in self.oversized:
+            return None
+
+        lock = self._build_locks.setdefault(tenant_id, asyncio.Lock())
+        async with lock:
+            if tenant_id in self.indexes:
+                return self.indexes[tenant_id]
+            if tenant_id in self.oversized:
+                return None
+
+            point_count = await qdrant_service.count_tenant_points(tenant_id)
+            if point_count > self.max_points:
+                self.oversized.add(tenant_id)
+                logger.info(
+                    f'Tenant {tenant_id} has {point_count} points (> {self.max_points}), '
+                    f'routing vector search to Qdrant'
+                )
+                return None
+
+            start_time = time.perf_counter()
+            index = LocalVectorIndex(tenant_id, self.dtype)
+            records = await qdrant_service.scroll_tenant_points(tenant_id, with_vectors=True)
+            for record in records:
+                if record.vector is not None:
+                    index.add(record.id, record.vector, record.payload or {})
+            self.indexes[tenant_id] = index
+            logger.info(
+                f'Built local vector index for tenant {tenant_id}: {len(index)} points '
+                f'({self.dtype}) in {time.perf_counter() - start_time:.2f}s'
+            )
+            return index
+
+    def apply_upsert(self, tenant_id: int, points: List[Tuple[Any, Optional[List[float]], Dict[str, Any]]]) -> int:
+        """Apply a vectorize event to a loaded tenant index."""
+        index = self.indexes.get(tenant_id)
+        if index is None:
+            return 0
+        if any(vector is None for _, vector, _ in points):
+            # Event without vectors: rebuild from Qdrant on next query
+            del self.indexes[tenant_id]
+            return 0
+        for point_id, vector, payload in points:
+            index.add(point_id, vector, payload)
+        if len(index) > self.max_points:
+            # Tenant outgrew the local tier
+            del self.indexes[tenant_id]
+            self.oversized.add(tenant_id)
+            logger.info(f'Tenant {tenant_id} outgrew the local vector tier ({len(index)} points)')
+        return len(points)
+
+    def apply_delete(self, tenant_id: int, source_id: int, doc_type: Optional[int] = None) -> int:
+        """Apply a delete event. Oversized tenants are re-evaluated on next query."""
+        self.oversized.discard(tenant_id)
+        index = self.indexes.get(tenant_id)
+        if index is None:
+            return 0
+        return index.remove_source(source_id, doc_type)
+
+
+# Global singleton instance
+_local_vector_index_manager = None
+
+
+def get_local_vector_index_manager() -> LocalVectorIndexManager:
+    """
+    Get or create the global local vector index manager.
+
+    Returns:
+        LocalVectorIndexManager: The global manager instance shared by all QdrantService instances
+    """
+    global _local_vector_index_manager
+    if _local_vector_index_manager is None:
+        _local_vector_index_manager = LocalVectorIndexManager()
+    return _local_vector_index_manager
@@ -0,0 +1,18 @@
+"""
+Shared Test Fixtures
+
+- Spans of the global tracer go to a temporary directory instead of logs/
+"""
+
+import pytest
+from src import tracing
+
+
+@pytest.fixture(autouse=True, scope="session")
+def tracer_in_tmp_path(tmp_path_factory):
+    """Export spans of code under test to a temporary file."""
+    previous = tracing._tracer
+    path = tmp_path_factory.mktemp("tracing") / "traces.jsonl"
+    tracing._tracer = tracing.Tracer("chatprocessor", tracing.JsonlSpanExporter(str(path)))
+    yield path
+    tracing._tracer = previous
@@ -0,0 +1,78 @@
+"""
+Unit Tests for Batch Test Runner Module
+
+Tests for:
+- BatchTestRunner (bounded concurrency, streamed results, resume by TC_id)
+"""
+
+import asyncio
+import json
+import pytest
+from src.batch_runner import BatchTestRunner
+from src.jobs import Job
+from src.schemas import TestEntity as Entity
+
+
+def _entities(count):
+    return [Entity(tenant_id=1, TC_id=f"TC{i:03d}", questions=f"Câu hỏi {i}") for i in range(count)]
+
+
+def _read(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+class TestBatchTestRunner:
+    """Test suite for BatchTestRunner."""
+
+    @pytest.mark.asyncio
+    async def test_concurrency_is_bounded(self, tmp_path):
+        """Test that no more than `concurrency` entities are processed at once."""
+        active = peak = 0
+
+        async def process(entity):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+            return {"message": "ok", "scenario": "LEGAL_ONLY", "model_used": "m"}
+
+        runner = BatchTestRunner("run-1", concurrency=2, output_dir=str(tmp_path))
+        summary = await runner.run(_entities(6), process, Job("batch_test", "k"))
+
+        assert peak == 2
+        assert summary["processed"] == 6
+        records = _read(runner.output_file)
+        assert {record["TC_id"] for record in records} == {f"TC{i:03d}" for i in range(6)}
+        assert all(record["scenario"] == "LEGAL_ONLY" and record["latency_ms"] >= 0 for record in records)
+
+    @pytest.mark.asyncio
+    async def test_resume_skips_answered_and_retries_errors(self, tmp_path):
+        """Test that a resubmitted run only processes missing or failed TC_ids."""
+        async def flaky(entity):
+            if entity.TC_id == "TC001":
+                raise RuntimeError("ollama down")
+            return {"message": "ok"}
+
+        runner = BatchTestRunner("run-2", output_dir=str(tmp_path))
+        first = Job("batch_test", "k")
+        await runner.run(_entities(3), flaky, first)
+        assert first.failed == 1
+
+        seen = []
+
+        async def process(entity):
+            seen.append(entity.TC_id)
+            return {"message": "ok"}
+
+        second = Job("batch_test", "k")
+        await BatchTestRunner("run-2", output_dir=str(tmp_path)).run(_entities(4), process, second)
+
+        assert sorted(seen) == ["TC001", "TC003"]
+        assert second.skipped == 2
+
+    def test_rejects_unsafe_run_id(self, tmp_path):
+        """Test that run ids can't escape the output directory."""
+        with pytest.raises(ValueError):
+            BatchTestRunner("../etc/passwd", output_dir=str(tmp_path))
@@ -0,0 +1,160 @@
+"""
+Unit Tests for BM25 Index Module
+
+Tests for:
+- tokenize
+- BM25Index
+- BM25IndexManager (snapshots and change events)
+"""
+
+import pytest
+from types import SimpleNamespace
+from src.bm25_index import tokenize, BM25Index, BM25IndexManager
+
+
+def _payload(text: str, source_id: int = 1, doc_type: int = 1, document_name: str = "") -> dict:
+    return {
+        "text": text,
+        "source_id": source_id,
+        "type": doc_type,
+        "document_name": document_name,
+        "heading1": "",
+        "heading2": ""
+    }
+
+
+class FakeQdrantService:
+    """Minimal stand-in exposing scroll_tenant_points."""
+
+    def __init__(self, points):
+        self.points = points
+        self.scroll_calls = 0
+
+    async def scroll_tenant_points(self, tenant_id: int, with_vectors: bool = False):
+        self.scroll_calls += 1
+        return [SimpleNamespace(id=point_id, payload=payload) for point_id, payload in self.points]
+
+
+class TestTokenize:
+    """Test suite for tokenize."""
+
+    def test_keeps_vietnamese_diacritics(self):
+        """Test that Vietnamese words are lowercased but not stripped of diacritics."""
+        assert tokenize("Bảo hiểm Xã hội") == ["bảo", "hiểm", "xã", "hội"]
+
+    def test_splits_on_punctuation(self):
+        """Test that punctuation separates tokens."""
+        assert tokenize("Điều 212, khoản 2.") == ["điều", "212", "khoản", "2"]
+
+    def test_empty_text(self):
+        """Test tokenizing empty text."""
+        assert tokenize("") == []
+
+
+class TestBM25Index:
+    """Test suite for BM25Index."""
+
+    def _build_index(self) -> BM25Index:
+        index = BM25Index(tenant_id=2)
+        index.add("doc1", _payload("Người lao động được đóng bảo hiểm xã hội bắt buộc", source_id=10))
+        index.add("doc2", _payload("Thời giờ làm việc không quá 8 giờ trong một ngày", source_id=10))
+        index.add("doc3", _payload("Nghỉ phép năm 12 ngày làm việc", source_id=11, document_name="Nội quy BHXH"))
+        return index
+
+    def test_ranks_matching_document_first(self):
+        """Test that the document containing the query terms ranks first."""
+        index = self._build_index()
+        results = index.search(["bảo hiểm xã hội"], limit=3)
+
+        assert results[0][0] == "doc1"
+        assert results[0][1] > 0
+
+    def test_matches_metadata_fields(self):
+        """Test that document_name is indexed alongside text."""
+        index = self._build_index()
+        results = index.search(["BHXH"], limit=3)
+
+        assert [point_id for point_id, _, _ in results] == ["doc3"]
+
+    def test_no_match_returns_empty(self):
+        """Test that unknown terms return no results."""
+        index = self._build_index()
+        assert index.search(["pccc"], limit=3) == []
+
+    def test_respects_limit(self):
+        """Test that search returns at most `limit` results."""
+        index = self._build_index()
+        results = index.search(["ngày", "làm", "việc"], limit=1)
+        assert len(results) == 1
+
+    def test_replace_document(self):
+        """Test that re-adding a point ID replaces its postings."""
+        index = self._build_index()
+        index.add("doc1", _payload("Phòng cháy chữa cháy", source_id=10))
+
+        assert index.search(["bảo hiểm"], limit=3) == []
+        assert index.search(["phòng cháy"], limit=3)[0][0] == "doc1"
+        assert len(index) == 3
+
+    def test_remove_source(self):
+        """Test that deleting a source removes all of its chunks."""
+        index = self._build_index()
+        removed = index.remove_source(10, doc_type=1)
+
+        assert removed == 2
+        assert len(index) == 1
+        assert index.search(["bảo hiểm"], limit=3) == []
+
+    def test_snapshot_round_trip(self):
+        """Test that an index rebuilt from its snapshot ranks identically."""
+        index = self._build_index()
+        restored = BM25Index.from_snapshot(index.to_snapshot())
+
+        assert restored.search(["làm việc"], limit=3) == index.search(["làm việc"], limit=3)
+
+
+class TestBM25IndexManager:
+    """Test suite for BM25IndexManager."""
+
+    @pytest.mark.asyncio
+    async def test_builds_once_and_reuses_snapshot(self, tmp_path):
+        """Test that the index is built from Qdrant once and then loaded from snapshot."""
+        qdrant = FakeQdrantService([("doc1", _payload("Bảo hiểm y tế"))])
+
+        manager = BM25IndexManager(snapshot_dir=str(tmp_path), max_snapshot_age_hours=1)
+        results = await manager.search(2, ["bảo hiểm"], qdrant, limit=5)
+        assert results[0][0] == "doc1"
+        assert qdrant.scroll_calls == 1
+
+        # A fresh manager (e.g. after restart) loads the snapshot instead of scrolling
+        restarted = BM25IndexManager(snapshot_dir=str(tmp_path), max_snapshot_age_hours=1)
+        results = await restarted.search(2, ["bảo hiểm"], qdrant, limit=5)
+        assert results[0][0] == "doc1"
+        assert qdrant.scroll_calls == 1
+
+    @pytest.mark.asyncio
+    async def test_applies_upsert_and_delete_events(self, tmp_path):
+        """Test that change events update a loaded index."""
+        qdrant = FakeQdrantService([("doc1", _payload("Bảo hiểm y tế", source_id=1))])
+        manager = BM25IndexManager(snapshot_dir=str(tmp_path), max_snapshot_age_hours=1)
+        await manager.get_index(2, qdrant)
+
+        await manager.apply_upsert(2, [("doc2", _payload("Hợp đồng lao động", source_id=2))])
+        assert (await manager.search(2, ["hợp đồng"], qdrant))[0][0] == "doc2"
+
+        removed = await manager.apply_delete(2, source_id=2, doc_type=1)
+        assert removed == 1
+        assert await manager.search(2, ["hợp đồng"], qdrant) == []
+
+    @pytest.mark.asyncio
+    async def test_event_for_unloaded_tenant_invalidates_snapshot(self, tmp_path):
+        """Test that events for unloaded tenants force a rebuild from Qdrant."""
+        qdrant = FakeQdrantService([("doc1", _payload("Bảo hiểm y tế"))])
+        manager = BM25IndexManager(snapshot_dir=str(tmp_path), max_snapshot_age_hours=1)
+        await manager.get_index(2, qdrant)
+
+        restarted = BM25IndexManager(snapshot_dir=str(tmp_path), max_snapshot_age_hours=1)
+        await restarted.apply_upsert(2, [("doc2", _payload("Hợp đồng lao động"))])
+        await restarted.get_index(2, qdrant)
+
+        assert qdrant.scroll_calls == 2
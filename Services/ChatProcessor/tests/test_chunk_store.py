@@ -0,0 +1,106 @@
+"""
+Unit Tests for Chunk Store Module
+
+Tests for:
+- ChunkStore (deduplication, batched lookups, context resolution, legacy table)
+- ChunkStore points (shared contents, LRU of hot chunks, missing store, deletes)
+- EvaluationLogger chunk references
+"""
+
+import sqlite3
+from src.chunk_store import ChunkStore, chunk_hash
+from src.evaluation_logger import EvaluationLogger
+
+
+class TestChunkStore:
+    """Test suite for ChunkStore."""
+
+    def test_deduplicates_texts(self, tmp_path):
+        """Test that the same text is stored once."""
+        store = ChunkStore(str(tmp_path / "chunks.db"))
+        text = "Điều 1. Phạm vi điều chỉnh"
+        store.put_many({chunk_hash(text): text})
+        store.put_many({chunk_hash(text): text})
+
+        assert store.count() == 1
+        assert store.get_many([chunk_hash(text), "missing"]) == {chunk_hash(text): text}
+
+    def test_resolve_contexts_mixed_formats(self, tmp_path):
+        """Test that referenced and legacy inline contexts are both rebuilt in order."""
+        store = ChunkStore(str(tmp_path / "chunks.db"))
+        texts = ["chunk a", "chunk b"]
+        store.put_many({chunk_hash(text): text for text in texts})
+        logs = [
+            {"context_refs": [{"point_id": 2, "score": 0.5, "chunk": chunk_hash("chunk b")},
+                              {"point_id": 1, "score": 0.4, "chunk": chunk_hash("chunk a")}]},
+            {"contexts": ["legacy text"]}
+        ]
+
+        assert store.resolve_contexts(logs) == [["chunk b", "chunk a"], ["legacy text"]]
+
+    def test_migrates_legacy_chunks_table(self, tmp_path):
+        """Test that texts of the former chunks table stay resolvable by their hash."""
+        conn = sqlite3.connect(str(tmp_path / "chunks.db"))
+        with conn:
+            conn.execute("CREATE TABLE chunks (hash TEXT PRIMARY KEY, text TEXT NOT NULL)")
+            conn.execute("INSERT INTO chunks VALUES (?, ?)", (chunk_hash("old chunk"), "old chunk"))
+        conn.close()
+
+        store = ChunkStore(str(tmp_path / "chunks.db"))
+
+        assert store.get_many([chunk_hash("old chunk")]) == {chunk_hash("old chunk"): "old chunk"}
+
+
+class TestChunkStorePoints:
+    """Test suite for point lookups of the out-of-band chunk text store."""
+
+    def test_batched_lookup_with_shared_contents(self, tmp_path):
+        """Test that points with the same content share a row and unknown points are omitted."""
+        writer = ChunkStore(str(tmp_path / "chunks.db"))
+        article = {"text": "Điều 113. Nghỉ hằng năm", "heading1": "Chương VII", "heading2": "Điều 113", "tenant_id": 2, "source_id": 1, "type": 2}
+        writer.put_points([("a", article), ("b", {**article, "tenant_id": 3}), ("c", {"text": "Điều 105. Thời giờ làm việc"})])
+        store = ChunkStore(str(tmp_path / "chunks.db"), read_only=True, cache_size=10)
+
+        found = store.get_points(["a", "b", "c", "missing"])
+
+        assert writer.count() == 2
+        assert set(found) == {"a", "b", "c"}
+        assert found["b"] == {"text": "Điều 113. Nghỉ hằng năm", "heading1": "Chương VII", "heading2": "Điều 113"}
+        assert found["c"] == {"text": "Điều 105. Thời giờ làm việc"}
+
+    def test_hot_chunks_served_from_cache(self, tmp_path):
+        """Test that cached chunks skip the database and the LRU stays bounded."""
+        writer = ChunkStore(str(tmp_path / "chunks.db"))
+        writer.put_points([(str(i), {"text": f"chunk {i}", "tenant_id": 2, "source_id": 1, "type": 2}) for i in range(3)])
+        store = ChunkStore(str(tmp_path / "chunks.db"), read_only=True, cache_size=2)
+        store.get_points(["0", "1"])
+
+        assert writer.delete_source(1, 2, 2) == 3
+        assert store.get_points([0, 1, 2]) == {"0": {"text": "chunk 0"}, "1": {"text": "chunk 1"}}
+        assert len(store._cache) == 2 and writer.count() == 0
+
+    def test_missing_store(self, tmp_path):
+        """Test that a store EmbeddingService hasn't created yet resolves nothing and isn't created."""
+        store = ChunkStore(str(tmp_path / "absent.db"), read_only=True)
+
+        assert store.get_points(["a"]) == {}
+        assert not (tmp_path / "absent.db").exists()
+
+
+class TestEvaluationLoggerReferences:
+    """Test suite for chunk references written by EvaluationLogger."""
+
+    def test_entries_reference_chunks(self, tmp_path):
+        """Test that entries carry ids/scores/hashes and texts land in the chunk store."""
+        evaluation_logger = EvaluationLogger(str(tmp_path / "logs"))
+        contexts = ["Điều 5. " + "nội dung " * 200, "Quy định nội bộ"]
+        for conversation_id in range(3):
+            evaluation_logger.log_interaction("question", contexts, "answer", conversation_id, 1, 1, point_ids=["p1", "p2"], scores=[0.91, 0.42])
+        evaluation_logger.store.close()
+
+        entries = list(evaluation_logger.store.iter_entries())
+        assert len(entries) == 3
+        assert "contexts" not in entries[0] and "_chunks" not in entries[0]
+        assert entries[0]["context_refs"][0] == {"point_id": "p1", "score": 0.91, "chunk": chunk_hash(contexts[0])}
+        assert evaluation_logger.chunk_store.count() == 2
+        assert evaluation_logger.chunk_store.resolve_contexts(entries)[2] == contexts
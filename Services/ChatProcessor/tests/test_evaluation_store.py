@@ -0,0 +1,136 @@
+"""
+Unit Tests for Evaluation Store Module
+
+Tests for:
+- EvaluationLogStore (batched writes, rotation, compaction, retention)
+- iter_segment_entries (streaming reader, compaction held off while reading)
+- EvaluationLogger legacy JSON import
+"""
+
+import json
+import os
+import time
+import pytest
+from src.evaluation_logger import EvaluationLogger
+from src.evaluation_store import EvaluationLogStore, iter_segment_entries
+
+
+@pytest.fixture
+def store_factory(tmp_path):
+    stores = []
+
+    def make(**kwargs):
+        store = EvaluationLogStore(str(tmp_path / "logs"), **kwargs)
+        stores.append(store)
+        return store
+
+    yield make
+    for store in stores:
+        store.close()
+
+
+def _write_segments(directory, count, mtimes=None):
+    """Sealed segments with one entry each."""
+    directory.mkdir(parents=True, exist_ok=True)
+    for i in range(count):
+        path = directory / f"segment-{i + 1:08d}.jsonl"
+        path.write_text(json.dumps({"i": i}) + "\n", encoding="utf-8")
+        if mtimes:
+            os.utime(path, (mtimes[i], mtimes[i]))
+
+
+class TestEvaluationLogStore:
+    """Test suite for EvaluationLogStore."""
+
+    def test_append_and_stream_in_order(self, store_factory, tmp_path):
+        """Test that entries are streamed back in write order after a flush."""
+        store = store_factory(flush_interval=10)
+        for i in range(5):
+            store.append({"conversation_id": i})
+        assert store.flush(timeout=5)
+
+        assert [entry["conversation_id"] for entry in iter_segment_entries(tmp_path / "logs")] == [0, 1, 2, 3, 4]
+        assert store.count() == 5
+
+    def test_batch_written_by_size(self, store_factory):
+        """Test that a full batch is written without waiting for the interval."""
+        store = store_factory(flush_interval=60, flush_max_entries=3)
+        for i in range(3):
+            store.append({"i": i})
+        for _ in range(100):
+            if store.written == 3:
+                break
+            time.sleep(0.01)
+        assert store.written == 3
+
+    def test_rotation_by_size(self, store_factory):
+        """Test that the active segment is sealed once it exceeds the size limit."""
+        store = store_factory(flush_max_entries=1, segment_max_bytes=200)
+        for i in range(6):
+            store.append({"answer": "x" * 100, "i": i})
+            store.flush(timeout=5)
+
+        assert len(store.segments()) > 1
+        assert [entry["i"] for entry in store.iter_entries()] == list(range(6))
+
+    def test_compaction_merges_small_segments(self, store_factory):
+        """Test that small sealed segments are merged without losing or reordering entries."""
+        store = store_factory(flush_max_entries=1, segment_max_bytes=10_000, segment_max_age_seconds=0)
+        for i in range(4):
+            store.append({"i": i})
+            store.flush(timeout=5)
+
+        store.compact()
+        assert len(store.segments()) <= 2
+        assert [entry["i"] for entry in store.iter_entries()] == [0, 1, 2, 3]
+
+    def test_merged_segment_keeps_entry_age(self, store_factory, tmp_path):
+        """Test that merging doesn't make old entries look new to retention."""
+        _write_segments(tmp_path / "logs", 3, mtimes=[time.time() - 7200, time.time() - 7200, time.time()])
+        store = store_factory(retention_seconds=3600)
+        store._merge(store.segments()[:2])
+
+        assert store.segments()[0].stat().st_mtime < time.time() - 3600
+        assert store.compact()["removed"] == 1
+        assert [entry["i"] for entry in store.iter_entries()] == [2]
+
+    def test_compaction_deferred_while_reading(self, store_factory, tmp_path):
+        """Test that a streaming reader sees every entry once while compaction is attempted."""
+        _write_segments(tmp_path / "logs", 4)
+        store = store_factory()
+
+        reader = store.iter_entries()
+        seen = [next(reader)["i"]]
+        assert store.compact()["skipped"] == 1
+        seen += [entry["i"] for entry in reader]
+
+        assert seen == [0, 1, 2, 3]
+        assert len(store.segments()) == 4
+        assert store.compact()["merged"] == 3
+
+    def test_close_flushes_pending_entries(self, store_factory):
+        """Test that closing writes queued entries and rejects new ones."""
+        store = store_factory(flush_interval=60)
+        store.append({"i": 1})
+        store.close()
+
+        assert store.count() == 1
+        with pytest.raises(RuntimeError):
+            store.append({"i": 2})
+
+
+class TestLegacyImport:
+    """Test suite for importing the JSON array log of older versions."""
+
+    def test_imports_once_and_renames(self, tmp_path):
+        """Test that legacy entries land in the store and the file is not imported twice."""
+        legacy = tmp_path / "evaluation_logs.json"
+        legacy.write_text(json.dumps([{"question": "q1", "contexts": ["c"], "answer": "a"}, {"question": "q2"}]), encoding="utf-8")
+
+        first = EvaluationLogger(str(tmp_path / "logs"), legacy_log_file=str(legacy))
+        first.store.close()
+        second = EvaluationLogger(str(tmp_path / "logs"), legacy_log_file=str(legacy))
+        second.store.close()
+
+        assert [entry["question"] for entry in iter_segment_entries(tmp_path / "logs")] == ["q1", "q2"]
+        assert not legacy.exists() and (tmp_path / "evaluation_logs.json.imported").exists()
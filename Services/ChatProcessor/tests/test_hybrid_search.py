@@ -14,6 +14,9 @@ from src.hybrid_search import (
     LegalTermExtractor,
     ReciprocalRankFusion,
     HybridSearchStrategy,
+    RetrievalHit,
+    SOURCE_GLOBAL,
+    SOURCE_TENANT,
     merge_and_deduplicate
 )
 
@@ -370,6 +373,35 @@ class TestMergeAndDeduplicate:
         assert merged[0].id == "doc2"  # Highest score (0.9)
 
 
+class TestRetrievalHit:
+    """Test suite for RetrievalHit and top-k fusion."""
+
+    def test_from_point_keeps_payload_reference(self):
+        """Test conversion from ScoredPoint without copying the payload, and hashing by point id."""
+        payload = {"text": "Điều 113", "source_id": 7}
+        point = ScoredPoint(id=1, version=3, score=0.8, payload=payload, vector=None)
+
+        hit = RetrievalHit.from_point(point, SOURCE_TENANT)
+        rescored = hit.with_score(0.01)
+
+        assert (hit.id, hit.score, hit.source) == (1, 0.8, SOURCE_TENANT)
+        assert rescored.payload is hit.payload
+        assert {hit, RetrievalHit.from_point(point, SOURCE_TENANT)} == {hit}
+
+    def test_fuse_top_k_matches_full_ranking(self):
+        """Test that heap top-k fusion returns the prefix of the full ranking."""
+        tenant = [RetrievalHit(i, 1.0 - i / 100, SOURCE_TENANT) for i in range(0, 60)]
+        global_ = [RetrievalHit(i, 1.0 - i / 100, SOURCE_GLOBAL) for i in range(30, 90)]
+
+        full = ReciprocalRankFusion.fuse(tenant, global_)
+        top = ReciprocalRankFusion.fuse(tenant, global_, limit=5)
+
+        assert [(r.id, r.score) for r in top] == [(r.id, r.score) for r in full[:5]]
+        # Shared ids keep the tenant hit (and its source tag)
+        assert all(r.source == SOURCE_TENANT for r in full if r.id < 60)
+        assert all(r.source == SOURCE_GLOBAL for r in full if r.id >= 60)
+
+
 # Integration Test Examples (require Qdrant connection)
 class TestHybridSearchIntegration:
     """Integration tests for hybrid search (requires running Qdrant instance)."""
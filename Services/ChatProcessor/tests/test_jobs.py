@@ -0,0 +1,78 @@
+"""
+Unit Tests for Jobs Module
+
+Tests for:
+- JobRegistry (lifecycle, deduplication, failures)
+"""
+
+import asyncio
+import pytest
+from src.jobs import JobRegistry, COMPLETED, FAILED, RUNNING
+
+
+class TestJobRegistry:
+    """Test suite for JobRegistry."""
+
+    @pytest.mark.asyncio
+    async def test_job_lifecycle(self):
+        """Test that progress and the return value are exposed on the job."""
+        registry = JobRegistry()
+
+        async def work(job):
+            job.advance(processed=3, failed=1)
+            return {"ok": True}
+
+        job = registry.start("evaluation", work, total=4)
+        await job.task
+
+        status = registry.get(job.id).to_dict()
+        assert status["status"] == COMPLETED
+        assert (status["processed"], status["failed"], status["total"]) == (3, 1, 4)
+        assert status["result"] == {"ok": True}
+
+    @pytest.mark.asyncio
+    async def test_active_job_is_reused(self):
+        """Test that starting the same key twice returns the running job."""
+        registry = JobRegistry()
+        release = asyncio.Event()
+
+        async def work(job):
+            await release.wait()
+
+        first = registry.start("evaluation", work)
+        await asyncio.sleep(0)
+        second = registry.start("evaluation", work)
+        assert second is first and first.status == RUNNING
+
+        release.set()
+        await first.task
+        assert registry.start("evaluation", work) is not first
+
+    @pytest.mark.asyncio
+    async def test_failure_is_recorded(self):
+        """Test that exceptions mark the job failed instead of propagating."""
+        registry = JobRegistry()
+
+        async def work(job):
+            raise ValueError("OPENAI_API_KEY is not set")
+
+        job = registry.start("evaluation", work)
+        await job.task
+
+        assert job.status == FAILED
+        assert "OPENAI_API_KEY" in job.error
+
+    @pytest.mark.asyncio
+    async def test_finished_jobs_are_pruned(self):
+        """Test that only max_finished completed jobs are kept."""
+        registry = JobRegistry(max_finished=2)
+
+        async def work(job):
+            return None
+
+        for i in range(4):
+            job = registry.start("batch_test", work, key=f"run-{i}")
+            await job.task
+        registry.start("batch_test", work, key="last")
+
+        assert len([job for job in registry.list("batch_test") if not job.active]) <= 2
@@ -0,0 +1,92 @@
+"""
+Unit Tests for Judge Module
+
+Tests for:
+- parse_json_object, judgment_key
+- LocalJudge (scoring, caching, failed judgments)
+"""
+
+import json
+import math
+import pytest
+from src.judge import LocalJudge, parse_json_object, judgment_key
+
+
+class FakeJudge(LocalJudge):
+    """LocalJudge with canned model replies and embeddings."""
+
+    def __init__(self, cache_path=""):
+        super().__init__(base_url="http://judge", model="judge-model", api="ollama", concurrency=2, cache_path=cache_path)
+        self.prompts = []
+
+    async def _chat(self, client, prompt):
+        self.prompts.append(prompt)
+        if "NGỮ CẢNH" in prompt:
+            if "broken" in prompt:
+                return "not json"
+            return json.dumps({"statements": [{"statement": "a", "supported": True}, {"statement": "b", "supported": False}]})
+        if "tôi không biết" in prompt:
+            return json.dumps({"questions": [], "noncommittal": True})
+        return "```json\n" + json.dumps({"questions": ["q1", "q2"], "noncommittal": False}) + "\n```"
+
+    async def _embed(self, client, text):
+        return [1.0, 0.0] if text in ("question", "q1") else [0.0, 1.0]
+
+
+class TestHelpers:
+    """Test suite for module helpers."""
+
+    def test_parse_json_object(self):
+        """Test that JSON is extracted from fenced or chatty replies."""
+        assert parse_json_object('Sure! {"a": 1} hope this helps') == {"a": 1}
+        assert parse_json_object("no json here") is None
+        assert parse_json_object("[1, 2]") is None
+
+    def test_judgment_key_depends_on_all_inputs(self):
+        """Test that changing any input changes the cache key."""
+        key = judgment_key("m", "q", ["c1", "c2"], "a")
+        assert key == judgment_key("m", "q", ["c1", "c2"], "a")
+        assert key != judgment_key("m", "q", ["c1c2"], "a")
+        assert key != judgment_key("m", "q", ["c1", "c2"], "a2")
+        assert key != judgment_key("other", "q", ["c1", "c2"], "a")
+
+
+class TestLocalJudge:
+    """Test suite for LocalJudge."""
+
+    @pytest.mark.asyncio
+    async def test_scores_shard(self):
+        """Test faithfulness, answer relevancy and noncommittal answers."""
+        judge = FakeJudge()
+        scores = await judge.score_shard({
+            "question": ["question", "question"],
+            "contexts": [["ctx"], ["ctx"]],
+            "answer": ["answer", "tôi không biết"]
+        })
+
+        assert scores["faithfulness"] == [0.5, 0.5]
+        assert scores["answer_relevancy"] == [pytest.approx(0.5), 0.0]
+
+    @pytest.mark.asyncio
+    async def test_failed_judgment_is_nan(self):
+        """Test that an unparseable judge reply leaves the row unscored instead of failing the shard."""
+        judge = FakeJudge()
+        scores = await judge.score_shard({
+            "question": ["question", "question"],
+            "contexts": [["broken"], ["ctx"]],
+            "answer": ["answer", "answer"]
+        })
+
+        assert math.isnan(scores["faithfulness"][0])
+        assert scores["faithfulness"][1] == 0.5
+
+    @pytest.mark.asyncio
+    async def test_cache_skips_model_calls(self, tmp_path):
+        """Test that a repeated judgment is served from the cache."""
+        cache_path = str(tmp_path / "judge_cache.db")
+        data = {"question": ["question"], "contexts": [["ctx"]], "answer": ["answer"]}
+        first = await FakeJudge(cache_path).score_shard(data)
+
+        judge = FakeJudge(cache_path)
+        assert await judge.score_shard(data) == first
+        assert judge.prompts == [] and judge.cache_hits == 1
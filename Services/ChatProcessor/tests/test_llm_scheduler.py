@@ -0,0 +1,117 @@
+"""
+Unit Tests for LLM Request Scheduler Module
+
+Tests for:
+- LLMScheduler (parallelism, EDF queue, load shedding)
+"""
+
+import asyncio
+import pytest
+from datetime import datetime, timedelta
+from src.llm_scheduler import LLMScheduler, LLMOverloadedError
+
+
+def _slow_call(seconds: float, result: str = "ok"):
+    async def call():
+        await asyncio.sleep(seconds)
+        return result
+    return call
+
+
+class TestLLMScheduler:
+    """Test suite for LLMScheduler."""
+
+    @pytest.mark.asyncio
+    async def test_enforces_parallelism(self):
+        """Test that no more than `parallelism` calls run at once."""
+        scheduler = LLMScheduler(parallelism=2, max_queue=10, deadline_seconds=5)
+        running = 0
+        peak = 0
+
+        async def call():
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.02)
+            running -= 1
+            return "ok"
+
+        results = await asyncio.gather(*(scheduler.run(call) for _ in range(5)))
+        assert results == ["ok"] * 5
+        assert peak == 2
+        assert scheduler.get_stats()["completed"] == 5
+
+    @pytest.mark.asyncio
+    async def test_sheds_when_queue_full(self):
+        """Test that requests beyond max_queue fail fast."""
+        scheduler = LLMScheduler(parallelism=1, max_queue=1, deadline_seconds=5)
+        results = await asyncio.gather(
+            *(scheduler.run(_slow_call(0.05)) for _ in range(3)),
+            return_exceptions=True
+        )
+
+        shed = [r for r in results if isinstance(r, LLMOverloadedError)]
+        assert len(shed) == 1 and shed[0].reason == "queue_full"
+        assert scheduler.get_stats()["shed"]["queue_full"] == 1
+
+    @pytest.mark.asyncio
+    async def test_sheds_expired_message(self):
+        """Test that a message older than the deadline is rejected without calling Ollama."""
+        scheduler = LLMScheduler(parallelism=1, max_queue=10, deadline_seconds=1)
+        called = False
+
+        async def call():
+            nonlocal called
+            called = True
+
+        with pytest.raises(LLMOverloadedError) as exc_info:
+            await scheduler.run(call, timestamp=datetime.utcnow() - timedelta(seconds=5))
+        assert exc_info.value.reason == "deadline"
+        assert called is False
+
+    @pytest.mark.asyncio
+    async def test_queued_request_shed_at_deadline(self):
+        """Test that a queued request gives up when its deadline passes while waiting."""
+        scheduler = LLMScheduler(parallelism=1, max_queue=10, deadline_seconds=0.05)
+        results = await asyncio.gather(
+            scheduler.run(_slow_call(0.04)),
+            scheduler.run(_slow_call(0.04)),
+            return_exceptions=True
+        )
+
+        assert results[0] == "ok"
+        assert isinstance(results[1], LLMOverloadedError)
+        assert scheduler.active == 0 and scheduler.queue_depth == 0
+
+    @pytest.mark.asyncio
+    async def test_shed_by_dispatch_at_timeout_counted_once(self, monkeypatch):
+        """Test that a request shed by dispatch just as its wait times out counts as one shed."""
+        scheduler = LLMScheduler(parallelism=1, max_queue=10, deadline_seconds=5)
+        scheduler.active = 1  # A running generation holds the only slot
+
+        async def shed_then_time_out(awaitable, timeout):
+            scheduler.avg_service_seconds = 60.0  # The queued request can no longer make its deadline
+            scheduler._release()  # The running generation finishes: dispatch sheds the queued request
+            awaitable.cancel()  # Like wait_for on timeout; the shielded future keeps its exception
+            raise asyncio.TimeoutError
+
+        monkeypatch.setattr(asyncio, "wait_for", shed_then_time_out)
+        with pytest.raises(LLMOverloadedError):
+            await scheduler._acquire(asyncio.get_running_loop().time() + 5, "")
+        monkeypatch.undo()
+
+        assert scheduler.shed == {"queue_full": 0, "deadline": 1, "timeout": 0}
+        assert scheduler.active == 0
+
+    @pytest.mark.asyncio
+    async def test_releases_slot_on_error(self):
+        """Test that a failing call frees its slot."""
+        scheduler = LLMScheduler(parallelism=1, max_queue=10, deadline_seconds=5)
+
+        async def failing():
+            raise RuntimeError("ollama down")
+
+        with pytest.raises(RuntimeError):
+            await scheduler.run(failing)
+        assert await scheduler.run(_slow_call(0)) == "ok"
+        assert scheduler.get_stats()["failed"] == 1
@@ -0,0 +1,66 @@
+"""
+Unit Tests for Metrics Module
+
+Tests for:
+- observe_latency / track_in_flight decorators
+- observe_generation, observe_message_latency
+- /metrics exposition
+"""
+
+import pytest
+from prometheus_client import REGISTRY, generate_latest
+from src.metrics import (
+    CONSUMER_IN_FLIGHT, QDRANT_SEARCH_LATENCY,
+    observe_latency, track_in_flight, observe_generation, observe_message_latency
+)
+
+
+def _sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+class TestDecorators:
+    """Test suite for the metric decorators."""
+
+    @pytest.mark.asyncio
+    async def test_observe_latency_counts_failures(self):
+        """Test that a failing call is still observed."""
+        @observe_latency(QDRANT_SEARCH_LATENCY, search_type='bm25')
+        async def search():
+            raise RuntimeError("qdrant down")
+
+        before = _sample('chatprocessor_search_seconds_count', search_type='bm25')
+        with pytest.raises(RuntimeError):
+            await search()
+        assert _sample('chatprocessor_search_seconds_count', search_type='bm25') == before + 1
+
+    @pytest.mark.asyncio
+    async def test_track_in_flight(self):
+        """Test that the gauge is raised during the call and restored after."""
+        seen = []
+
+        @track_in_flight(CONSUMER_IN_FLIGHT)
+        async def process():
+            seen.append(_sample('chatprocessor_consumer_in_flight_messages'))
+
+        before = _sample('chatprocessor_consumer_in_flight_messages')
+        await process()
+        assert seen == [before + 1]
+        assert _sample('chatprocessor_consumer_in_flight_messages') == before
+
+
+class TestObservers:
+    """Test suite for the observe_* helpers."""
+
+    def test_generation_stats_by_tier(self):
+        """Test that Ollama counters are recorded under the model tier and missing fields are skipped."""
+        before = _sample('chatprocessor_llm_prompt_tokens_sum', model_tier='small')
+        observe_generation('small', {'prompt_eval_count': 120, 'eval_count': None, 'prompt_eval_duration_ms': 250.0})
+        assert _sample('chatprocessor_llm_prompt_tokens_sum', model_tier='small') == before + 120
+        assert _sample('chatprocessor_llm_prompt_eval_seconds_sum', model_tier='small') >= 0.25
+
+    def test_unknown_scenario_is_bucketed(self):
+        """Test that unexpected scenario values don't create new label values."""
+        observe_message_latency('SOMETHING_NEW', 0.5)
+        assert b'scenario="SOMETHING_NEW"' not in generate_latest()
+        assert _sample('chatprocessor_message_seconds_count', scenario='ERROR') >= 1
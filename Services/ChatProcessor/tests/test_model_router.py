@@ -0,0 +1,77 @@
+"""
+Unit Tests for Model Router Module
+
+Tests for:
+- ModelRouter.classify
+- ModelRouter latency statistics
+"""
+
+from src.model_router import ModelRouter, SMALL, LARGE
+
+
+def _router(small_model: str = "qwen2.5:1.5b") -> ModelRouter:
+    return ModelRouter(
+        small_model=small_model,
+        large_model="ontocord/vistral:latest",
+        small_num_predict=256,
+        large_num_predict=0,
+        max_keywords=2,
+        max_question_chars=120,
+        max_context_tokens=1024
+    )
+
+
+class TestModelRouter:
+    """Test suite for ModelRouter."""
+
+    def test_simple_lookup_goes_to_small_model(self):
+        """Test that a short single-source question is routed to the small model."""
+        route = _router().classify("BHYT là gì", ["bhyt"], "COMPANY_ONLY", context_tokens=300)
+
+        assert route["tier"] == SMALL
+        assert route["model"] == "qwen2.5:1.5b"
+        assert route["num_predict"] == 256
+
+    def test_comparison_goes_to_large_model(self):
+        """Test that BOTH-scenario questions always use the large model."""
+        route = _router().classify("BHYT là gì", ["bhyt"], "BOTH", context_tokens=300)
+
+        assert route["tier"] == LARGE
+        assert route["model"] == "ontocord/vistral:latest"
+        assert route["num_predict"] is None
+
+    def test_keyword_heavy_question_goes_to_large_model(self):
+        """Test that many legal keywords mark a complex question."""
+        route = _router().classify("BHYT BHXH BHTN", ["bhyt", "bhxh", "bhtn"], "LEGAL_ONLY", context_tokens=300)
+        assert route["tier"] == LARGE
+
+    def test_large_context_goes_to_large_model(self):
+        """Test that a big retrieved context is sent to the large model."""
+        route = _router().classify("BHYT là gì", ["bhyt"], "LEGAL_ONLY", context_tokens=2000)
+        assert route["tier"] == LARGE
+
+    def test_routing_disabled_without_small_model(self):
+        """Test that everything goes to the large model when no small model is configured."""
+        route = _router(small_model="").classify("BHYT là gì", [], "COMPANY_ONLY", context_tokens=0)
+
+        assert route["tier"] == LARGE
+        assert route["reason"] == "routing disabled"
+
+    def test_large_route_uses_service_model(self):
+        """Test that the calling service's model replaces the configured large model."""
+        router = _router()
+
+        large = router.classify("BHYT là gì", ["bhyt"], "BOTH", context_tokens=300, large_model="qwen2.5:14b")
+        small = router.classify("BHYT là gì", ["bhyt"], "COMPANY_ONLY", context_tokens=300, large_model="qwen2.5:14b")
+
+        assert large["model"] == "qwen2.5:14b"
+        assert small["model"] == "qwen2.5:1.5b"
+
+    def test_latency_stats_per_model(self):
+        """Test that latency is aggregated per model."""
+        router = _router()
+        router.record_latency("qwen2.5:1.5b", 0.5)
+        router.record_latency("qwen2.5:1.5b", 1.5)
+
+        stats = router.get_stats()["models"]["qwen2.5:1.5b"]
+        assert stats == {"count": 2, "avg_ms": 1000.0, "max_ms": 1500.0}
@@ -0,0 +1,102 @@
+"""
+Unit Tests for Ollama Backend Pool Module
+
+Tests for:
+- OllamaBackendPool (sticky routing, least-loaded fallback, passive ejection)
+- Model name matching (untagged names, unlisted models)
+"""
+
+import pytest
+from src.ollama_pool import OllamaBackendPool, normalize_model_name
+
+MODEL = "ontocord/vistral:latest"
+URLS = ["http://ollama-1:11434", "http://ollama-2:11434", "http://ollama-3:11434"]
+
+
+def _pool(**kwargs) -> OllamaBackendPool:
+    return OllamaBackendPool(URLS, sticky_slack=kwargs.get("sticky_slack", 2), ejection_seconds=30)
+
+
+class TestOllamaBackendPool:
+    """Test suite for OllamaBackendPool."""
+
+    def test_tenant_is_sticky(self):
+        """Test that a tenant keeps hitting the same backend."""
+        pool = _pool()
+        chosen = {pool.select(MODEL, tenant_id=7).base_url for _ in range(10)}
+        assert len(chosen) == 1
+
+    def test_tenants_spread_over_backends(self):
+        """Test that different tenants are distributed across backends."""
+        pool = _pool()
+        chosen = {pool.select(MODEL, tenant_id=tenant_id).base_url for tenant_id in range(50)}
+        assert chosen == set(URLS)
+
+    def test_overloaded_sticky_backend_falls_back_to_least_loaded(self):
+        """Test that a sticky backend busier than sticky_slack is bypassed."""
+        pool = _pool(sticky_slack=1)
+        sticky = pool.select(MODEL, tenant_id=7)
+        sticky.in_flight = 3
+
+        chosen = pool.select(MODEL, tenant_id=7)
+        assert chosen is not sticky
+        assert chosen.in_flight == 0
+
+    def test_ejected_backend_is_skipped(self):
+        """Test that a failing backend receives no traffic during its cool-down."""
+        pool = _pool()
+        sticky = pool.select(MODEL, tenant_id=7)
+        pool.mark_failure(sticky, "timeout")
+
+        assert pool.select(MODEL, tenant_id=7) is not sticky
+        pool.mark_success(sticky)
+        assert pool.select(MODEL, tenant_id=7) is sticky
+
+    def test_cooldown_grows_with_consecutive_failures(self):
+        """Test that repeated failures extend the ejection."""
+        pool = _pool()
+        backend = pool.backends[0]
+        pool.mark_failure(backend, "timeout")
+        first = backend.ejected_until
+        pool.mark_failure(backend, "timeout")
+        assert backend.ejected_until > first + 25
+
+    def test_routes_only_to_backends_with_model(self):
+        """Test that per-backend model availability is respected."""
+        pool = _pool()
+        pool.backends[0].models = {MODEL}
+        pool.backends[1].models = {"llama3:8b"}
+        pool.backends[2].models = {"llama3:8b"}
+
+        assert {pool.select(MODEL, tenant_id=t).base_url for t in range(20)} == {URLS[0]}
+        with pytest.raises(RuntimeError):
+            pool.select(MODEL, exclude={URLS[0]})
+
+    def test_untagged_model_matches_latest(self):
+        """Test that OLLAMA_MODEL=llama3 is served by a backend listing llama3:latest."""
+        pool = _pool()
+        pool.backends[0].models = {normalize_model_name("ontocord/vistral:latest")}
+        pool.backends[1].models = {normalize_model_name("llama3:latest")}
+        pool.backends[2].models = {normalize_model_name("llama3:8b")}
+
+        assert pool.select("llama3", tenant_id=7) is pool.backends[1]
+        assert normalize_model_name("registry:5000/llama3") == "registry:5000/llama3:latest"
+
+    def test_unlisted_model_falls_back_to_healthy_backends(self):
+        """Test that a model no backend lists is still routed instead of failing the request."""
+        pool = _pool()
+        for backend in pool.backends:
+            backend.models = {"llama3:8b"}
+        pool.mark_failure(pool.backends[0], "timeout")
+
+        chosen = {pool.select("missing", tenant_id=t).base_url for t in range(20)}
+        assert chosen == set(URLS[1:])
+
+    def test_all_ejected_returns_earliest_recovery(self):
+        """Test that requests still go somewhere when every backend is ejected."""
+        pool = _pool()
+        for backend in pool.backends:
+            pool.mark_failure(backend, "connection failed")
+        pool.mark_failure(pool.backends[0], "connection failed")
+
+        assert pool.select(MODEL, tenant_id=7) is not pool.backends[0]
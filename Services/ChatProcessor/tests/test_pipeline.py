@@ -0,0 +1,115 @@
+"""
+Unit Tests for Pipeline Module
+
+Tests for:
+- Pipeline (dependency order, overlap, timeouts, fallbacks)
+- StageTimings
+"""
+
+import asyncio
+import pytest
+from src.pipeline import Pipeline, Stage, StageTimings, StageFailedError
+
+
+def _sleeper(seconds: float, value):
+    async def func(results):
+        await asyncio.sleep(seconds)
+        return value
+    return func
+
+
+class TestPipeline:
+    """Test suite for Pipeline."""
+
+    @pytest.mark.asyncio
+    async def test_dependencies_see_upstream_results(self):
+        """Test that a stage receives the results of its dependencies."""
+        pipeline = Pipeline([
+            Stage("a", lambda results: 2),
+            Stage("b", lambda results: results["a"] * 10, depends_on=["a"])
+        ])
+        results = await pipeline.run()
+        assert results["b"] == 20
+
+    @pytest.mark.asyncio
+    async def test_independent_stages_overlap(self):
+        """Test that independent stages run concurrently."""
+        timings = StageTimings()
+        pipeline = Pipeline([
+            Stage("embedding", _sleeper(0.05, "vec")),
+            Stage("warmup", _sleeper(0.05, "ok")),
+            Stage("search", lambda results: (results["embedding"], results["warmup"]), depends_on=["embedding", "warmup"])
+        ])
+        results = await pipeline.run(timings=timings)
+
+        assert results["search"] == ("vec", "ok")
+        assert timings.total_ms() < 90
+        assert timings.stages["search"]["start_ms"] >= 45
+
+    @pytest.mark.asyncio
+    async def test_timeout_uses_fallback(self):
+        """Test that a timed-out stage falls back and downstream stages still run."""
+        timings = StageTimings()
+        pipeline = Pipeline([
+            Stage("warmup", _sleeper(1, "late"), timeout=0.01, fallback=lambda results, error: "skipped"),
+            Stage("search", lambda results: results["warmup"], depends_on=["warmup"])
+        ])
+        results = await pipeline.run(timings=timings)
+
+        assert results["search"] == "skipped"
+        assert timings.stages["warmup"]["status"] == "fallback:timeout"
+
+    @pytest.mark.asyncio
+    async def test_failure_without_fallback_cancels_pipeline(self):
+        """Test that a required stage failure aborts the run."""
+        cancelled = False
+
+        async def slow(results):
+            nonlocal cancelled
+            try:
+                await asyncio.sleep(1)
+            except asyncio.CancelledError:
+                cancelled = True
+                raise
+
+        def fail(results):
+            raise ConnectionError("embedding service down")
+
+        pipeline = Pipeline([Stage("embedding", fail), Stage("warmup", slow)])
+        with pytest.raises(StageFailedError) as exc_info:
+            await pipeline.run()
+
+        assert exc_info.value.stage == "embedding"
+        assert isinstance(exc_info.value.__cause__, ConnectionError)
+        assert cancelled is True
+
+    def test_rejects_unknown_dependency(self):
+        """Test that misspelled dependencies are caught at build time."""
+        with pytest.raises(ValueError):
+            Pipeline([Stage("search", lambda results: None, depends_on=["embeding"])])
+
+    def test_rejects_cycle(self):
+        """Test that dependency cycles are rejected."""
+        with pytest.raises(ValueError):
+            Pipeline([
+                Stage("a", lambda results: None, depends_on=["b"]),
+                Stage("b", lambda results: None, depends_on=["a"])
+            ])
+
+
+class TestStageTimings:
+    """Test suite for StageTimings."""
+
+    @pytest.mark.asyncio
+    async def test_measure_inline_step(self):
+        """Test that inline steps are recorded with their status."""
+        timings = StageTimings()
+        async with timings.measure("cleanup"):
+            pass
+        with pytest.raises(RuntimeError):
+            async with timings.measure("generate"):
+                raise RuntimeError("boom")
+
+        assert timings.stages["cleanup"]["status"] == "ok"
+        assert timings.stages["generate"]["status"] == "error"
+        assert "generate=" in timings.summary()
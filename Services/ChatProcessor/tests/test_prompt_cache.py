@@ -0,0 +1,80 @@
+"""
+Unit Tests for Prompt Cache Module
+
+Tests for:
+- RenderCache (LRU bound, hit counting)
+- Citation fragments in ChatBusiness._structure_context_for_compliance
+- Memoized system messages in ChatBusiness._build_system_messages
+"""
+
+from src.business import ChatBusiness
+from src.hybrid_search import RetrievalHit
+from src.prompt_cache import RenderCache
+
+
+def _hit(point_id, text, **fields):
+    return RetrievalHit(point_id, 0.8, "global", {"text": text, "source_id": point_id, **fields})
+
+
+class TestRenderCache:
+    """Test suite for RenderCache."""
+
+    def test_renders_once_and_evicts_least_recent(self):
+        """Test that a cached key isn't rendered again and the size stays bounded."""
+        cache = RenderCache(max_size=2)
+        renders = []
+        render = lambda key: lambda: renders.append(key) or f"value {key}"
+
+        cache.get_or_render("a", render("a"))
+        cache.get_or_render("b", render("b"))
+        cache.get_or_render("a", render("a"))
+        cache.get_or_render("c", render("c"))  # Evicts "b"
+        cache.get_or_render("b", render("b"))
+
+        assert renders == ["a", "b", "c", "b"]
+        assert (cache.hits, cache.misses, len(cache)) == (1, 4, 2)
+
+
+class TestCitationFragments:
+    """Test suite for citation fragments."""
+
+    def test_context_matches_uncached_rendering(self):
+        """Test that the context string is the label and text of every chunk."""
+        legal = [_hit(1, "Điều 113. Nghỉ hằng năm", document_name="Bộ luật Lao động 2019", heading2="Điều 113"), _hit(2, "Không có tên")]
+
+        context, source_ids, count = ChatBusiness._structure_context_for_compliance([], legal, tenant_id=2, scenario="LEGAL_ONLY")
+
+        header = ChatBusiness._build_group_header(is_company_rule=False, scenario="LEGAL_ONLY")
+        assert context == "\n".join([
+            "\n\n" + header,
+            "\n[Bộ luật Lao động 2019 - Điều 113]\nĐiều 113. Nghỉ hằng năm",
+            "\n[Văn bản #2]\nKhông có tên"
+        ])
+        assert (source_ids, count) == ([1, 2], 2)
+
+
+class TestSystemMessages:
+    """Test suite for memoized system messages."""
+
+    def test_same_as_conversation_history_and_safe_to_extend(self):
+        """Test that cached messages equal the uncached build and callers get a fresh list."""
+        args = dict(scenario="BOTH", fallback_mode=True, tenant_id=2, system_prompt="persona", terminology_definitions="terms", layout="legacy")
+        expected = ChatBusiness._build_conversation_history(
+            "persona", ChatBusiness._build_comparison_system_prompt(fallback_mode=True), "terms", layout="legacy"
+        )
+
+        first = ChatBusiness._build_system_messages(**args)
+        first.append({"role": "user", "content": "question"})
+
+        assert first[:-1] == expected
+        assert ChatBusiness._build_system_messages(**args) == expected
+
+    def test_tenant_configuration_is_part_of_the_key(self):
+        """Test that a changed SystemPrompt produces new messages."""
+        args = dict(scenario="LEGAL_ONLY", fallback_mode=False, tenant_id=3, terminology_definitions="", layout="legacy")
+
+        before = ChatBusiness._build_system_messages(system_prompt="old persona", **args)
+        after = ChatBusiness._build_system_messages(system_prompt="new persona", **args)
+
+        assert before[0]["content"] == "old persona"
+        assert after[0]["content"] == "new persona"
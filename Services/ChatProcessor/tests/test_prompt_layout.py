@@ -0,0 +1,58 @@
+"""
+Unit Tests for Prompt Layout and Ollama Generation Stats
+
+Tests for:
+- ChatBusiness._build_conversation_history
+- OllamaService._extract_stats
+"""
+
+from src.business import ChatBusiness, OllamaService
+
+
+class TestBuildConversationHistory:
+    """Test suite for ChatBusiness._build_conversation_history."""
+
+    def test_legacy_order(self):
+        """Test that the legacy layout keeps the original message order."""
+        history = ChatBusiness._build_conversation_history(
+            system_prompt="persona", compliance_system_prompt="compliance",
+            terminology_definitions="terms", layout="legacy"
+        )
+        assert [m["content"] for m in history] == ["persona", "compliance", "terms"]
+
+    def test_prefix_cache_puts_static_content_first(self):
+        """Test that per-tenant static content precedes the scenario prompt."""
+        history = ChatBusiness._build_conversation_history(
+            system_prompt="persona", compliance_system_prompt="compliance",
+            terminology_definitions="terms", layout="prefix_cache"
+        )
+        assert [m["content"] for m in history] == ["persona", "terms", "compliance"]
+        assert all(m["role"] == "system" for m in history)
+
+    def test_prefix_is_stable_across_scenarios(self):
+        """Test that different scenarios of a tenant share the same leading messages."""
+        both = ChatBusiness._build_conversation_history("persona", "comparison", "terms", layout="prefix_cache")
+        single = ChatBusiness._build_conversation_history("persona", "single", "terms", layout="prefix_cache")
+        assert both[:2] == single[:2]
+
+    def test_skips_empty_messages(self):
+        """Test that missing SystemPrompt/terminology produce no empty messages."""
+        history = ChatBusiness._build_conversation_history(None, "compliance", "", layout="prefix_cache")
+        assert history == [{"role": "system", "content": "compliance"}]
+
+
+class TestExtractStats:
+    """Test suite for OllamaService._extract_stats."""
+
+    def test_converts_durations_to_ms(self):
+        """Test that nanosecond durations are reported in milliseconds."""
+        stats = OllamaService._extract_stats({
+            "prompt_eval_count": 42,
+            "prompt_eval_duration": 125_000_000,
+            "eval_count": 10,
+            "eval_duration": 2_000_000_000
+        })
+        assert stats["prompt_eval_count"] == 42
+        assert stats["prompt_eval_duration_ms"] == 125.0
+        assert stats["eval_duration_ms"] == 2000.0
+        assert stats["load_duration_ms"] is None
@@ -0,0 +1,173 @@
+"""
+Component Tests for QdrantService Payload Handling
+
+Tests for:
+- Lazy payloads (candidates without payloads, one retrieve for the final hits)
+- Payload projection to PAYLOAD_FIELDS
+- Texts from the out-of-band chunk text store
+- Search engine switches on the served ChatBusiness retrieval path
+"""
+
+import pytest
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.models import PointStruct
+from benchmarks.corpus import build_corpus, seed_collection
+from benchmarks.fakes import hash_embedding
+from src import bm25_index
+from src.business import ChatBusiness, QdrantService
+from src.chunk_store import ChunkStore
+from src.hybrid_search import HybridSearchStrategy, RetrievalHit, SOURCE_TENANT
+
+COLLECTION = "documents"
+
+
+async def _service(lazy_payload: bool = True, search_engine: str = "client", keyword_engine: str = "qdrant", chunks_per_topic: int = 4, rerank_served: bool = True) -> QdrantService:
+    service = QdrantService(collection_name=COLLECTION, search_engine=search_engine, keyword_engine=keyword_engine, local_vector_index=False, lazy_payload=lazy_payload, rerank_served=rerank_served)
+    service.client = AsyncQdrantClient(location=":memory:")
+    payloads = build_corpus(chunks_per_topic=chunks_per_topic, tenants=1)
+    for payload in payloads:
+        payload["ingestion_metadata"] = {"pages": list(range(50))}  # Large field nobody reads
+    await seed_collection(service.client, COLLECTION, payloads)
+    return service
+
+
+class TestLazyPayloads:
+    """Test suite for candidate searches without payloads."""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("lazy_payload", [True, False])
+    async def test_final_results_carry_projected_payloads(self, lazy_payload):
+        """Test that both modes return the same hits with only PAYLOAD_FIELDS."""
+        service = await _service(lazy_payload)
+        query_vector = hash_embedding("Người lao động được nghỉ hằng năm bao nhiêu ngày?", 384)
+
+        tenant_results, global_results, _ = await service.hybrid_search_with_fallback(query_vector, [], tenant_id=2, limit=5)
+
+        assert tenant_results or global_results
+        for hit in tenant_results + global_results:
+            assert set(hit.payload) == set(QdrantService.PAYLOAD_FIELDS)
+
+    @pytest.mark.asyncio
+    async def test_candidates_have_no_payload(self):
+        """Test that lazy candidate searches skip payloads and fetch_payloads fills them in order."""
+        service = await _service(lazy_payload=True)
+        query_vector = hash_embedding("Thời giờ làm việc bình thường", 384)
+
+        candidates = await service.search_exact_tenant(query_vector, tenant_id=1, limit=6)
+        hydrated = await service.fetch_payloads(candidates)
+
+        assert candidates and all(hit.payload == {} for hit in candidates)
+        assert [hit.id for hit in hydrated] == [hit.id for hit in candidates]
+        assert all(hit.payload["text"] for hit in hydrated)
+
+    @pytest.mark.asyncio
+    async def test_deleted_points_dropped(self):
+        """Test that hits whose point no longer exists are dropped and hydrated hits are kept."""
+        service = await _service(lazy_payload=True)
+        local_hit = RetrievalHit(10_000, 0.9, SOURCE_TENANT, {"source_id": 1, "text": "local"})
+
+        hydrated = await service.fetch_payloads([RetrievalHit(20_000, 0.8, SOURCE_TENANT), local_hit, RetrievalHit(1, 0.7, SOURCE_TENANT)])
+
+        assert [hit.id for hit in hydrated] == [10_000, 1]
+        assert hydrated[0] is local_hit
+
+    @pytest.mark.asyncio
+    async def test_texts_from_chunk_text_store(self, tmp_path):
+        """Test that texts moved out of Qdrant are filled in from the chunk text store."""
+        service = await _service(lazy_payload=True)
+        candidates = await service.search_exact_tenant(hash_embedding("Hợp đồng lao động", 384), tenant_id=2, limit=3)
+        writer = ChunkStore(str(tmp_path / "chunks.db"))
+        writer.put_points([(hit.id, {"text": f"stored {hit.id}", "tenant_id": 2, "source_id": 1}) for hit in candidates])
+        await service.client.overwrite_payload(COLLECTION, payload={"source_id": 1, "tenant_id": 2}, points=[hit.id for hit in candidates])
+        service.text_store = ChunkStore(str(tmp_path / "chunks.db"), read_only=True)
+
+        hydrated = await service.fetch_payloads(candidates)
+
+        assert candidates
+        assert [hit.payload["text"] for hit in hydrated] == [f"stored {hit.id}" for hit in candidates]
+
+    def test_text_store_refuses_qdrant_keyword_filters(self, tmp_path, monkeypatch):
+        """Test that MatchText keyword search can't be combined with texts moved out of Qdrant."""
+        monkeypatch.setattr("src.business.get_chunk_text_store", lambda: ChunkStore(str(tmp_path / "chunks.db"), read_only=True))
+
+        with pytest.raises(ValueError, match="KEYWORD_SEARCH_ENGINE=bm25"):
+            QdrantService(collection_name=COLLECTION, keyword_engine="qdrant")
+        assert QdrantService(collection_name=COLLECTION, keyword_engine="bm25").text_store is not None
+
+
+async def _served_search(service: QdrantService, message: str, tenant_id: int = 2, system_instruction=None) -> dict:
+    """Run the retrieval pipeline of ChatBusiness.process_chat_message."""
+    async def get_embedding(text):
+        return hash_embedding(text, 384)
+
+    service.get_embedding = get_embedding
+    return await ChatBusiness._build_retrieval_pipeline(1, message, tenant_id, service, system_instruction).run()
+
+
+class TestServedHybridSearch:
+    """Test suite for the engine switches on the path chat messages take."""
+
+    QUESTION = "Theo Điều 113 Bộ luật Lao động 2019, người lao động làm việc đủ 12 tháng được nghỉ hằng năm bao nhiêu ngày?"
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("search_engine", ["client", "server"])
+    async def test_search_engine_ranks_served_results(self, search_engine):
+        """Test that HYBRID_SEARCH_ENGINE=server serves the Qdrant-fused ranking of each source."""
+        service = await _service(search_engine=search_engine, chunks_per_topic=8)
+        fused = []
+        server_fusion = service.hybrid_search_server_fusion
+
+        async def spy(*args, **kwargs):
+            fused.append(await server_fusion(*args, **kwargs))
+            return fused[-1]
+
+        service.hybrid_search_server_fusion = spy
+
+        company_rule_results, legal_base_results, _ = (await _served_search(service, self.QUESTION))["search"]
+
+        assert company_rule_results and legal_base_results
+        assert len(fused) == (1 if search_engine == "server" else 0)
+        if fused:
+            tenant_ranked, global_ranked = fused[0]
+            assert [hit.id for hit in company_rule_results] == [hit.id for hit in tenant_ranked[:len(company_rule_results)]]
+            assert [hit.id for hit in legal_base_results] == [hit.id for hit in global_ranked[:len(legal_base_results)]]
+
+    @pytest.mark.asyncio
+    async def test_vector_only_unless_rerank_enabled(self):
+        """Test that by default keywords send no keyword sub-queries and don't re-rank served results."""
+        service = await _service(chunks_per_topic=8, rerank_served=False)
+        batches = []
+        search_vector_scopes = service.search_vector_scopes
+
+        async def spy(*args, **kwargs):
+            batches.append(kwargs.get("extra_requests"))
+            return await search_vector_scopes(*args, **kwargs)
+
+        service.search_vector_scopes = spy
+        results = await _served_search(service, self.QUESTION)
+        query_vector = hash_embedding(results["expand"], 384)
+        (tenant_results, global_results), _ = await service.search_scopes(query_vector, [], [2, 1], 10)
+        expected = HybridSearchStrategy.apply_fallback_logic(tenant_results=tenant_results, global_results=global_results, limit=5)
+
+        company_rule_results, legal_base_results, _ = results["search"]
+        assert results["keywords"] and batches[0] == []
+        assert {hit.id for hit in company_rule_results + legal_base_results} == {hit.id for hit in expected[0] + expected[1]}
+
+    @pytest.mark.asyncio
+    async def test_bm25_keyword_engine_serves_keyword_only_match(self, tmp_path, monkeypatch):
+        """Test that KEYWORD_SEARCH_ENGINE=bm25 serves a chunk only BM25 finds and warms both scopes."""
+        monkeypatch.setattr(bm25_index, "_bm25_index_manager", bm25_index.BM25IndexManager(snapshot_dir=str(tmp_path)))
+        service = await _service(keyword_engine="bm25", chunks_per_topic=8)
+        message = "Người lao động làm việc đủ 12 tháng được nghỉ hằng năm bao nhiêu ngày theo quy chế XYZ?"
+        # Opposite of the query vector: no vector search can return it
+        vector = [-value for value in hash_embedding(message.replace("XYZ", "ưu đãi riêng"), 384)]
+        await service.client.upsert(COLLECTION, points=[PointStruct(id=9999, vector=vector, payload={
+            "text": "Nhân viên được thêm 02 ngày nghỉ ưu đãi riêng.", "source_id": 9999, "tenant_id": 2, "type": 2
+        })])
+
+        results = await _served_search(service, message, system_instruction=[{"key": "XYZ", "value": "ưu đãi riêng"}])
+
+        company_rule_results, _, _ = results["search"]
+        assert results["warmup"] == {"bm25": True}
+        assert set(bm25_index.get_bm25_index_manager().indexes) == {1, 2}
+        assert 9999 in [hit.id for hit in company_rule_results]
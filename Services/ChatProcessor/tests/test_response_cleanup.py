@@ -0,0 +1,105 @@
+"""
+Unit Tests for Response Cleanup Module
+
+Tests for:
+- clean_response (batch cleanup rules)
+- StreamingResponseCleaner (same result for any chunking, bounded hold-back, resets)
+"""
+
+import random
+import re
+from src.response_cleanup import PREFIXES, StreamingResponseCleaner, clean_response
+
+
+def _reference_cleanup(response):
+    """The former batch implementation of ChatBusiness._cleanup_response."""
+    cleaned = response.strip()
+    steps = re.split(r'Bước \d+:', cleaned)
+    if len(steps) > 1:
+        cleaned = steps[-1].strip()
+    for _ in range(5):
+        for prefix in PREFIXES:
+            if cleaned.lower().startswith(prefix.lower()):
+                cleaned = cleaned[len(prefix):].strip()
+                break
+        else:
+            break
+    lines = cleaned.split('\n')
+    if len(lines) > 1:
+        first_line_lower = lines[0].strip().lower()
+        patterns = ['trích dẫn', 'trả lời', 'dựa trên', 'căn cứ', 'theo thông tin', 'hãy', 'cần', 'phải', 'nên', 'vui lòng']
+        if any(pattern in first_line_lower for pattern in patterns) and lines[1].strip().lower().startswith('theo'):
+            cleaned = '\n'.join(lines[1:]).strip()
+    return cleaned
+
+
+def _stream(chunks):
+    """Apply the updates of a streamed cleanup the way a client would."""
+    cleaner = StreamingResponseCleaner()
+    shown = ''
+    for update in [cleaner.feed(chunk) for chunk in chunks] + [cleaner.finish()]:
+        shown = ('' if update.reset else shown) + update.text
+    assert shown == cleaner.text
+    return shown
+
+
+def _random_chunks(rng, text):
+    chunks, position = [], 0
+    while position < len(text):
+        size = rng.randint(1, 8)
+        chunks.append(text[position:position + size])
+        position += size
+    return chunks
+
+
+class TestCleanResponse:
+    """Test suite for the batch cleanup rules."""
+
+    def test_removes_steps_and_stacked_prefixes(self):
+        """Test that reasoning steps and several prefixes are removed."""
+        response = "Bước 1: Đọc ngữ cảnh.\nBước 2: Trả lời: Kết luận: Theo [Bộ luật Lao động 2019 - Điều 113], NLĐ được nghỉ 12 ngày.  "
+
+        assert clean_response(response) == "Theo [Bộ luật Lao động 2019 - Điều 113], NLĐ được nghỉ 12 ngày."
+
+    def test_drops_instruction_first_line(self):
+        """Test that an instruction line before a "Theo" line is dropped."""
+        assert clean_response("Hãy trích dẫn điều luật.\n  Theo [Điều 5], có.\nHết.") == "Theo [Điều 5], có.\nHết."
+        assert clean_response("Câu hỏi hay.\nTheo [Điều 5], có.") == "Câu hỏi hay.\nTheo [Điều 5], có."
+
+
+class TestStreamingResponseCleaner:
+    """Test suite for incremental cleanup."""
+
+    def test_matches_batch_cleanup_for_any_chunking(self):
+        """Test that streamed results equal the reference on random responses and chunk sizes."""
+        rng = random.Random(5)
+        pieces = list(PREFIXES) + [
+            "Bước 1:", "Bước 12:", "Bước", "Bư", "B", "Theo [Điều 5], ", "theo", "hãy làm", "cần", "Nội dung",
+            "trả", "Trả lời", "\n", "\n\n", " ", "  ", "\t", "Đáp", "ANSWER:", ".", "1", ":"
+        ]
+        for _ in range(3000):
+            response = "".join(rng.choice(pieces) for _ in range(rng.randint(0, 12)))
+            expected = _reference_cleanup(response)
+
+            assert clean_response(response) == expected, response
+            assert _stream(_random_chunks(rng, response)) == expected, response
+
+    def test_holds_back_only_possible_prefixes(self):
+        """Test that text is committed as soon as no prefix or step marker can match."""
+        cleaner = StreamingResponseCleaner()
+
+        assert cleaner.feed("  Trả l").text == ""
+        assert cleaner.feed("ời: Theo [Điều 5]").text == "Theo [Điều 5]"
+        assert cleaner.feed(", có.  B").text == ", có."
+        assert cleaner.feed("ảng").text == "  Bảng"
+        assert cleaner.finish() == ("", False)
+
+    def test_late_step_marker_resets_output(self):
+        """Test that a step marker after committed text discards it."""
+        cleaner = StreamingResponseCleaner()
+        cleaner.feed("Phân tích câu hỏi. ")
+
+        update = cleaner.feed("Bước 2: Đáp án: Có.")
+
+        assert update == ("Có.", True)
+        assert cleaner.text == "Có."
@@ -1,57 +1,74 @@
-import asyncio
+"""
+Component Tests for ChatProcessor Services
+
+Tests for:
+- UserPromptReceivedMessage / BotResponseCreatedMessage (aliases, JSON round-trip)
+- OllamaService against the benchmark fake backend (health check, generation)
+"""
+
 import json
-from datetime import datetime
-from app.models import UserPromptReceivedMessage, BotResponseCreatedMessage
-from app.services import OllamaService
-
-async def test_ollama_service():
-    print('\n' + '=' * 60)
-    print('Testing Ollama Service')
-    print('=' * 60)
-    ollama = OllamaService()
-    print('\n1. Running health check...')
-    healthy = await ollama.health_check()
-    print(f"   Ollama health: {('✓ OK' if healthy else '✗ FAILED')}")
-    if healthy:
-        print('\n2. Testing response generation...')
+import pytest
+from benchmarks.fakes import FakeBackendServer
+from src.business import OllamaService
+from src.schemas import BotResponseCreatedMessage, UserPromptReceivedMessage
+
+
+class TestMessageModels:
+    """Test suite for the RabbitMQ message schemas."""
+
+    def test_prompt_message_accepts_csharp_aliases(self):
+        """Test that the camelCase fields of the C# event are mapped."""
+        message = UserPromptReceivedMessage(**{
+            "conversationId": 123,
+            "messageId": 7,
+            "message": "Quy định về nghỉ phép năm?",
+            "token": "jwt",
+            "systemInstruction": [{"key": "tone", "value": "formal"}]
+        })
+
+        assert message.conversation_id == 123
+        assert message.message_id == 7
+        assert message.system_instruction[0].key == "tone"
+
+    def test_json_round_trip(self):
+        """Test serialization and deserialization of both messages."""
+        prompt = UserPromptReceivedMessage(conversation_id=123, message_id=7, message="What is Python?", token="jwt")
+        response = BotResponseCreatedMessage(
+            conversation_id=123, request_id=7, message="Python is a programming language.", token="jwt",
+            model_used="llama2", reference_doc_id_list=[1, 2]
+        )
+
+        assert UserPromptReceivedMessage(**json.loads(prompt.model_dump_json())).message_id == 7
+        data = json.loads(response.model_dump_json(by_alias=True))
+        assert data["requestId"] == 7
+        assert data["referenceDocIdList"] == [1, 2]
+        assert data["modelUsed"] == "llama2"
+
+
+class TestOllamaService:
+    """Test suite for OllamaService against a local fake backend."""
+
+    @pytest.mark.asyncio
+    async def test_health_check_and_generation(self, caplog):
+        """Test health check (an untagged model name matches ':latest') and generation with Ollama timing stats."""
+        server = await FakeBackendServer(ttft=0.01, tokens_per_second=1000, num_tokens=8).start()
         try:
-            response = await ollama.generate_response('Say hello in one sentence.')
-            print(f'   Response: {response[:100]}...')
-            print('   ✓ Response generation successful')
-        except Exception as e:
-            print(f'   ✗ Failed: {e}')
-    else:
-        print('\n   Skipping response generation test (Ollama not available)')
-
-async def test_message_models():
-    print('\n' + '=' * 60)
-    print('Testing Message Models')
-    print('=' * 60)
-    print('\n1. Testing UserPromptReceivedMessage...')
-    prompt_msg = UserPromptReceivedMessage(conversation_id=123, message='What is Python?', user_id=456, tenant_id=2, timestamp=datetime.utcnow())
-    print(f'   Created: {prompt_msg.model_dump_json(indent=2)}')
-    print('   ✓ UserPromptReceivedMessage works')
-    print('\n2. Testing BotResponseCreatedMessage...')
-    response_msg = BotResponseCreatedMessage(conversation_id=123, message='Python is a programming language.', user_id=0, tenant_id=2, timestamp=datetime.utcnow(), model_used='llama2')
-    print(f'   Created: {response_msg.model_dump_json(indent=2)}')
-    print('   ✓ BotResponseCreatedMessage works')
-    print('\n3. Testing JSON round-trip...')
-    json_str = prompt_msg.model_dump_json()
-    reconstructed = UserPromptReceivedMessage(**json.loads(json_str))
-    assert reconstructed.conversation_id == prompt_msg.conversation_id
-    print('   ✓ JSON serialization/deserialization works')
-
-async def main():
-    print('\n╔════════════════════════════════════════════════════════════╗')
-    print('║        ChatProcessor Service Component Tests               ║')
-    print('╚════════════════════════════════════════════════════════════╝')
-    await test_message_models()
-    await test_ollama_service()
-    print('\n' + '=' * 60)
-    print('Tests completed!')
-    print('=' * 60)
-    print('\nNote: RabbitMQ tests require running RabbitMQ server.')
-    print('      Use the full service to test RabbitMQ integration.')
-    print()
-if __name__ == '__main__':
-    asyncio.run(main())
\ No newline at end of file
+            ollama = OllamaService(base_url=server.url, model=server.model)
+            assert await ollama.health_check()
+            assert "not found" not in caplog.text
+
+            answer, stats = await ollama.generate_response_with_stats("Say hello in one sentence.")
+            assert answer.strip()
+            assert stats["eval_count"] == 8
+            assert stats["backend"] == server.url
+        finally:
+            await server.stop()
+
+    @pytest.mark.asyncio
+    async def test_health_check_fails_without_backend(self):
+        """Test that an unreachable Ollama reports unhealthy instead of raising."""
+        server = await FakeBackendServer().start()
+        url = server.url
+        await server.stop()
+
+        assert not await OllamaService(base_url=url, model="bench-model").health_check()
@@ -0,0 +1,96 @@
+"""
+Unit Tests for Term Matcher Module
+
+Tests for:
+- TermMatcher (leftmost-longest non-overlapping matches, case handling, replacement)
+- get_term_matcher (per-dictionary cache)
+- LegalTermExtractor / query expansion sharing one scan
+"""
+
+import random
+from src.hybrid_search import LegalTermExtractor
+from src.term_matcher import ABBREVIATION, TENANT, Term, TermMatcher, get_term_matcher
+
+
+def _tenant(*pairs):
+    return TermMatcher([Term(key, value, TENANT) for key, value in pairs])
+
+
+def _naive_matches(text, keys):
+    """Reference leftmost-longest, non-overlapping matching."""
+    matches, position = [], 0
+    while position < len(text):
+        found = [key for key in keys if text.startswith(key, position)]
+        if found:
+            key = max(found, key=len)
+            matches.append((position, position + len(key)))
+            position += len(key)
+        else:
+            position += 1
+    return matches
+
+
+class TestTermMatcher:
+    """Test suite for TermMatcher."""
+
+    def test_leftmost_longest_non_overlapping(self):
+        """Test that the longest key wins at a position and overlaps are dropped."""
+        matcher = _tenant(("OT", "Overtime"), ("OT rate", "Overtime rate"), ("she", ""), ("hers", ""))
+
+        spans = [(m.start, m.end) for m in matcher.find("OT rate and OT; ushers")]
+
+        assert spans == [(0, 7), (12, 14), (17, 20)]
+
+    def test_matches_reference_implementation(self):
+        """Test the matcher against naive matching on random inputs with overlapping keys."""
+        rng = random.Random(3)
+        for _ in range(200):
+            keys = list({"".join(rng.choice("ab") for _ in range(rng.randint(1, 4))) for _ in range(5)})
+            text = "".join(rng.choice("abc") for _ in range(30))
+            matcher = _tenant(*((key, key.upper()) for key in keys))
+
+            assert [(m.start, m.end) for m in matcher.find(text)] == _naive_matches(text, keys)
+
+    def test_case_handling(self):
+        """Test that tenant keys are case-sensitive and abbreviations are not."""
+        matcher = TermMatcher([Term("OT", "Overtime", TENANT), Term("BHXH", "Bảo hiểm xã hội", ABBREVIATION)])
+
+        matches = matcher.find("ot, OT và bhxh")
+
+        assert [(m.start, m.end) for m in matches] == [(4, 6), (10, 14)]
+        assert matches[1].term(ABBREVIATION).key == "BHXH"
+
+    def test_replace_does_not_cascade(self):
+        """Test that a replacement value is not rewritten by another key."""
+        matcher = _tenant(("A", "B"), ("B", "C"))
+
+        assert TermMatcher.replace("A B", matcher.find("A B")) == "B C"
+
+    def test_first_definition_wins(self):
+        """Test that a duplicated key keeps its first value."""
+        matcher = _tenant(("OT", "Overtime"), ("OT", "Other"))
+
+        assert TermMatcher.replace("OT", matcher.find("OT")) == "Overtime"
+
+
+class TestGetTermMatcher:
+    """Test suite for the compiled matcher cache."""
+
+    def test_cached_by_contents(self):
+        """Test that equal dictionaries share a matcher and changed ones don't."""
+        first = get_term_matcher([{"key": "OT", "value": "Overtime"}])
+
+        assert get_term_matcher([{"key": "OT", "value": "Overtime"}]) is first
+        assert get_term_matcher([{"key": "OT", "value": "Overtime pay"}]) is not first
+
+    def test_keywords_from_raw_message_matches(self):
+        """Test that keywords keep tenant keys found before expansion."""
+        system_instruction = [{"key": "OT", "value": "Overtime Payment"}, {"key": "BHXH", "value": "Quỹ BHXH công ty"}]
+        message = "How is OT calculated with BHXH?"
+        matches = get_term_matcher(system_instruction).find(message)
+        expanded = TermMatcher.replace(message, matches)
+
+        keywords = LegalTermExtractor.extract_keywords(expanded, system_instruction, term_matches=matches)
+
+        assert expanded == "How is Overtime Payment calculated with Quỹ BHXH công ty?"
+        assert keywords == ["ot", "overtime payment", "bhxh", "quỹ bhxh công ty", "BHXH", "bảo hiểm xã hội"]
@@ -0,0 +1,111 @@
+"""
+Unit Tests for Context Token Budget Module
+
+Tests for:
+- TokenCounter (character-based estimate)
+- ContextBudgeter
+"""
+
+from qdrant_client.models import ScoredPoint
+from src.token_budget import TokenCounter, ContextBudgeter, TRIM_MARKER
+
+
+def _point(point_id: int, score: float, text: str) -> ScoredPoint:
+    return ScoredPoint(
+        id=point_id,
+        version=0,
+        score=score,
+        payload={"text": text, "source_id": point_id, "document_name": "", "heading1": "", "heading2": ""}
+    )
+
+
+def _counter() -> TokenCounter:
+    # Empty tokenizer name -> deterministic 1 token per character
+    return TokenCounter(tokenizer_name="", chars_per_token=1.0)
+
+
+class TestTokenCounter:
+    """Test suite for TokenCounter without a tokenizer."""
+
+    def test_count_estimate(self):
+        """Test that counts fall back to chars_per_token."""
+        counter = TokenCounter(tokenizer_name="", chars_per_token=4.0)
+        assert counter.count("a" * 10) == 3
+        assert counter.count("") == 0
+        assert counter.exact is False
+
+    def test_truncate_prefers_word_boundary(self):
+        """Test that truncation cuts at a word boundary."""
+        counter = _counter()
+        assert counter.truncate("người lao động được", 12) == "người lao"
+
+    def test_missing_tokenizer_falls_back_to_estimate(self):
+        """Test that a tokenizer absent from local files is not fetched and counts stay estimated."""
+        counter = TokenCounter(tokenizer_name="missing-org/missing-tokenizer", chars_per_token=2.0)
+
+        assert counter.load() is False
+        assert counter.exact is False
+        assert counter.count("abcd") == 2
+
+    def test_count_messages_adds_overhead(self):
+        """Test that each chat message carries template overhead."""
+        counter = _counter()
+        messages = [{"role": "system", "content": "abc"}, {"role": "user", "content": "de"}]
+        assert counter.count_messages(messages) > 5
+
+
+class TestContextBudgeter:
+    """Test suite for ContextBudgeter."""
+
+    def test_everything_fits(self):
+        """Test that nothing is trimmed when the budget is large enough."""
+        company = [_point(1, 0.9, "a" * 50)]
+        legal = [_point(2, 0.8, "b" * 50)]
+        budgeter = ContextBudgeter(_counter(), budget=1000, min_chunk_tokens=10)
+
+        company_kept, legal_kept, report = budgeter.fit(company, legal)
+        assert company_kept == company and legal_kept == legal
+        assert report["trimmed"] == 0 and report["dropped"] == 0
+
+    def test_keeps_best_chunk_of_each_group(self):
+        """Test that a low-scoring legal leader wins over a higher-scoring second company chunk."""
+        company = [_point(1, 0.9, "a" * 50), _point(2, 0.85, "b" * 50)]
+        legal = [_point(3, 0.4, "c" * 50)]
+        budgeter = ContextBudgeter(_counter(), budget=120, min_chunk_tokens=30)
+
+        company_kept, legal_kept, report = budgeter.fit(company, legal)
+        assert [p.id for p in company_kept] == [1]
+        assert [p.id for p in legal_kept] == [3]
+        assert report["dropped"] == 1
+
+    def test_trims_chunk_that_partially_fits(self):
+        """Test that a chunk is trimmed when enough of it still fits."""
+        company = [_point(1, 0.9, "a" * 50), _point(2, 0.8, "word " * 20)]
+        budgeter = ContextBudgeter(_counter(), budget=100, min_chunk_tokens=10)
+
+        company_kept, _, report = budgeter.fit(company, [])
+        assert [p.id for p in company_kept] == [1, 2]
+        assert company_kept[1].payload["text"].endswith(TRIM_MARKER)
+        assert company[1].payload["text"] == "word " * 20  # Original result untouched
+        assert report["trimmed"] == 1
+        assert report["used"] <= 100
+
+    def test_group_headers_consume_budget(self):
+        """Test that group banner text is charged against the budget."""
+        company = [_point(1, 0.9, "a" * 50)]
+        budgeter = ContextBudgeter(_counter(), budget=60, min_chunk_tokens=40)
+
+        company_kept, _, report = budgeter.fit(company, [], group_headers=("h" * 30, ""))
+        assert company_kept == []
+        assert report["dropped"] == 1
+        assert report["used"] == 0
+
+    def test_used_counts_headers_of_kept_groups_only(self):
+        """Test that the header of a group whose chunks were all dropped isn't reported as used."""
+        company = [_point(1, 0.9, "a" * 50)]
+        legal = [_point(2, 0.8, "b" * 20)]
+        budgeter = ContextBudgeter(_counter(), budget=60, min_chunk_tokens=45)
+
+        company_kept, legal_kept, report = budgeter.fit(company, legal, group_headers=("h" * 10, "l" * 5))
+        assert (company_kept, legal_kept) == ([], legal)
+        assert report["used"] == 5 + 4 + 20
@@ -0,0 +1,147 @@
+"""
+Unit Tests for Tracing Module
+
+Tests for:
+- parse_traceparent
+- Tracer (nesting, baggage, remote parents, errors)
+- traced decorator
+- JsonlSpanExporter (size-based rotation)
+"""
+
+import asyncio
+import pytest
+from src.tracing import JsonlSpanExporter, Tracer, parse_traceparent, current_traceparent, set_baggage, traced
+
+
+class ListExporter:
+    """Collects exported spans in memory."""
+
+    def __init__(self):
+        self.spans = []
+
+    def export(self, span):
+        self.spans.append(span)
+
+    def by_name(self, name):
+        return next(span for span in self.spans if span["name"] == name)
+
+
+class TestParseTraceparent:
+    """Test suite for parse_traceparent."""
+
+    def test_valid_header(self):
+        """Test that trace and parent span ids are extracted."""
+        header = "00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01"
+        assert parse_traceparent(header) == ("4bf92f3577b34da6a3ce929d0e0e4736", "00f067aa0ba902b7")
+
+    def test_invalid_headers(self):
+        """Test that malformed or all-zero trace ids are rejected."""
+        assert parse_traceparent(None) is None
+        assert parse_traceparent("garbage") is None
+        assert parse_traceparent("00-" + "0" * 32 + "-00f067aa0ba902b7-01") is None
+
+
+class TestTracer:
+    """Test suite for Tracer."""
+
+    def test_child_spans_share_trace(self):
+        """Test that nested spans link to their parent."""
+        exporter = ListExporter()
+        tracer = Tracer("test", exporter)
+        with tracer.start_span("rabbitmq.receive") as root:
+            with tracer.start_span("jwt.validate"):
+                pass
+
+        child = exporter.by_name("jwt.validate")
+        assert child["traceId"] == root.trace_id
+        assert child["parentSpanId"] == root.span_id
+        assert exporter.by_name("rabbitmq.receive")["parentSpanId"] is None
+
+    def test_baggage_propagates_to_descendants(self):
+        """Test that tenant_id set on a parent is copied to later child spans."""
+        exporter = ListExporter()
+        tracer = Tracer("test", exporter)
+        with tracer.start_span("chat.process"):
+            set_baggage("tenant_id", 7)
+            with tracer.start_span("qdrant.search_batch"):
+                pass
+
+        assert exporter.by_name("qdrant.search_batch")["attributes"]["tenant_id"] == 7
+        assert exporter.by_name("chat.process")["attributes"]["tenant_id"] == 7
+
+    def test_remote_parent_and_outgoing_header(self):
+        """Test joining an incoming trace and producing the outgoing traceparent."""
+        exporter = ListExporter()
+        tracer = Tracer("test", exporter)
+        incoming = "00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01"
+        with tracer.start_span("http /embed", traceparent=incoming) as span:
+            outgoing = current_traceparent()
+
+        assert span.trace_id == "4bf92f3577b34da6a3ce929d0e0e4736"
+        assert span.parent_span_id == "00f067aa0ba902b7"
+        assert outgoing == f"00-{span.trace_id}-{span.span_id}-01"
+        assert current_traceparent() is None
+
+    def test_error_status(self):
+        """Test that exceptions mark the span as failed and propagate."""
+        exporter = ListExporter()
+        tracer = Tracer("test", exporter)
+        with pytest.raises(ValueError):
+            with tracer.start_span("ollama.generate"):
+                raise ValueError("bad response")
+
+        assert exporter.spans[0]["status"]["code"] == "ERROR"
+
+    @pytest.mark.asyncio
+    async def test_child_tasks_inherit_span(self):
+        """Test that concurrently started tasks become children of the current span."""
+        exporter = ListExporter()
+        tracer = Tracer("test", exporter)
+
+        async def stage(name):
+            with tracer.start_span(name):
+                await asyncio.sleep(0)
+
+        with tracer.start_span("chat.process") as root:
+            await asyncio.gather(stage("stage.embedding"), stage("stage.warmup"))
+
+        assert exporter.by_name("stage.embedding")["parentSpanId"] == root.span_id
+        assert exporter.by_name("stage.warmup")["parentSpanId"] == root.span_id
+
+    def test_disabled_tracer(self):
+        """Test that a disabled tracer yields no span and exports nothing."""
+        exporter = ListExporter()
+        tracer = Tracer("test", exporter, enabled=False)
+        with tracer.start_span("noop") as span:
+            assert span is None
+        assert exporter.spans == []
+
+
+class TestTracedDecorator:
+    """Test suite for the traced decorator."""
+
+    @pytest.mark.asyncio
+    async def test_wraps_async_function(self):
+        """Test that decorated coroutines keep their return value."""
+        @traced("qdrant.count")
+        async def count():
+            return 3
+
+        assert await count() == 3
+
+
+class TestJsonlSpanExporter:
+    """Test suite for JsonlSpanExporter."""
+
+    def test_rotates_by_size(self, tmp_path):
+        """Test that a full file is shifted to .1, .2 and the oldest backup is dropped."""
+        path = tmp_path / "traces.jsonl"
+        exporter = JsonlSpanExporter(str(path), max_bytes=1, backup_count=2)
+
+        for index in range(4):
+            exporter._write_batch([{"spanId": index}])
+
+        assert path.read_text() == '{"spanId": 3}\n'
+        assert (tmp_path / "traces.jsonl.1").read_text() == '{"spanId": 2}\n'
+        assert (tmp_path / "traces.jsonl.2").read_text() == '{"spanId": 1}\n'
+        assert not (tmp_path / "traces.jsonl.3").exists()
@@ -0,0 +1,127 @@
+"""
+Unit Tests for Local Vector Index Module
+
+Tests for:
+- LocalVectorIndex
+- LocalVectorIndexManager (size routing and change events)
+"""
+
+import numpy as np
+import pytest
+from types import SimpleNamespace
+from src.vector_index import LocalVectorIndex, LocalVectorIndexManager
+
+
+def _payload(source_id: int = 1, doc_type: int = 1) -> dict:
+    return {"text": f"Chunk of source {source_id}", "source_id": source_id, "type": doc_type}
+
+
+class FakeQdrantService:
+    """Minimal stand-in exposing count_tenant_points and scroll_tenant_points."""
+
+    def __init__(self, points):
+        self.points = points
+        self.scroll_calls = 0
+
+    async def count_tenant_points(self, tenant_id: int) -> int:
+        return len(self.points)
+
+    async def scroll_tenant_points(self, tenant_id: int, with_vectors: bool = False):
+        self.scroll_calls += 1
+        return [
+            SimpleNamespace(id=point_id, vector=vector, payload=payload)
+            for point_id, vector, payload in self.points
+        ]
+
+
+class TestLocalVectorIndex:
+    """Test suite for LocalVectorIndex."""
+
+    def _build_index(self, dtype: str = "float32") -> LocalVectorIndex:
+        index = LocalVectorIndex(tenant_id=2, dtype=dtype)
+        index.add("x", [1.0, 0.0, 0.0], _payload(1))
+        index.add("y", [0.0, 1.0, 0.0], _payload(1))
+        index.add("xy", [1.0, 1.0, 0.0], _payload(2))
+        return index
+
+    def test_top_k_by_cosine(self):
+        """Test that results are ordered by cosine similarity."""
+        index = self._build_index()
+        results = index.search([1.0, 0.2, 0.0], limit=3)
+
+        assert [point_id for point_id, _, _ in results] == ["x", "xy", "y"]
+        assert results[0][1] == pytest.approx(1.0 / np.sqrt(1.04), rel=1e-5)
+
+    def test_respects_limit(self):
+        """Test that argpartition top-k returns exactly `limit` best results."""
+        index = self._build_index()
+        results = index.search([0.0, 1.0, 0.0], limit=1)
+
+        assert [point_id for point_id, _, _ in results] == ["y"]
+
+    def test_float16_storage(self):
+        """Test that float16 matrices give the same ranking."""
+        index = self._build_index(dtype="float16")
+        results = index.search([1.0, 0.2, 0.0], limit=3)
+
+        assert [point_id for point_id, _, _ in results] == ["x", "xy", "y"]
+        assert index._ensure_matrix().dtype == np.float16
+
+    def test_remove_source(self):
+        """Test that deleting a source removes its rows from the matrix."""
+        index = self._build_index()
+        index.search([1.0, 0.0, 0.0], limit=3)  # Materialize matrix
+
+        assert index.remove_source(1) == 2
+        results = index.search([1.0, 0.0, 0.0], limit=3)
+        assert [point_id for point_id, _, _ in results] == ["xy"]
+
+    def test_empty_index(self):
+        """Test searching an empty index."""
+        assert LocalVectorIndex(tenant_id=2).search([1.0, 0.0], limit=5) == []
+
+
+class TestLocalVectorIndexManager:
+    """Test suite for LocalVectorIndexManager."""
+
+    @pytest.mark.asyncio
+    async def test_small_tenant_served_locally(self):
+        """Test that tenants under the size limit get a local index."""
+        qdrant = FakeQdrantService([("a", [1.0, 0.0], _payload())])
+        manager = LocalVectorIndexManager(max_points=10)
+
+        index = await manager.get_index(2, qdrant)
+        assert index is not None and len(index) == 1
+
+        await manager.get_index(2, qdrant)
+        assert qdrant.scroll_calls == 1
+
+    @pytest.mark.asyncio
+    async def test_large_tenant_routed_to_qdrant(self):
+        """Test that tenants over the size limit are not loaded."""
+        qdrant = FakeQdrantService([(str(i), [1.0, 0.0], _payload()) for i in range(5)])
+        manager = LocalVectorIndexManager(max_points=3)
+
+        assert await manager.get_index(1, qdrant) is None
+        assert qdrant.scroll_calls == 0
+
+    @pytest.mark.asyncio
+    async def test_upsert_beyond_limit_evicts_tenant(self):
+        """Test that a tenant growing past the limit leaves the local tier."""
+        qdrant = FakeQdrantService([("a", [1.0, 0.0], _payload())])
+        manager = LocalVectorIndexManager(max_points=2)
+        await manager.get_index(2, qdrant)
+
+        manager.apply_upsert(2, [("b", [0.0, 1.0], _payload()), ("c", [1.0, 1.0], _payload())])
+        assert 2 not in manager.indexes
+        assert 2 in manager.oversized
+
+    @pytest.mark.asyncio
+    async def test_delete_event(self):
+        """Test that delete events update the local index."""
+        qdrant = FakeQdrantService([("a", [1.0, 0.0], _payload(1)), ("b", [0.0, 1.0], _payload(2))])
+        manager = LocalVectorIndexManager(max_points=10)
+        index = await manager.get_index(2, qdrant)
+
+        assert manager.apply_delete(2, source_id=1, doc_type=1) == 1
+        assert [point_id for point_id, _, _ in index.search([1.0, 0.0], limit=5)] == ["b"]
@@ -7,32 +7,40 @@ import uuid
 from src.router import router
 from src.config import settings
 from src.logger import logger, set_session_id, clear_session_id
+from src.tracing import get_tracer
+from src.metrics import observe_request
 app = FastAPI(title='VN Law Embedding Service')
 
 @app.middleware('http')
 async def log_requests(request: Request, call_next):
-    session_id = str(uuid.uuid4())[:8]
-    set_session_id(session_id)
-    try:
-        body = await request.body()
-        body_str = body.decode('utf-8') if body else ''
-        query_params = dict(request.query_params)
-        logger.info(f"Request: {request.method} {request.url.path} | Query: {(json.dumps(query_params) if query_params else 'None')} | Body: {(body_str[:200] if body_str else 'None')}")
-    except Exception as e:
-        logger.error(f'Error logging request: {str(e)}')
-    start_time = time.time()
-    try:
-        response = await call_next(request)
-        process_time = time.time() - start_time
-        logger.info(f'Response: {response.status_code} | Process Time: {process_time:.3f}s')
-        return response
-    except Exception as e:
-        process_time = time.time() - start_time
-        logger.error(f'Exception: {str(e)} | Process Time: {process_time:.3f}s', exc_info=True)
-        clear_session_id()
-        return JSONResponse(status_code=500, content={'detail': str(e)})
-    finally:
-        clear_session_id()
+    with get_tracer().start_span(f'http {request.url.path}', {'http.method': request.method}, traceparent=request.headers.get('traceparent')) as span:
+        # Reuse the caller's trace id as session id so log lines correlate with ChatProcessor
+        session_id = span.trace_id[:8] if span is not None else str(uuid.uuid4())[:8]
+        set_session_id(session_id)
+        try:
+            body = await request.body()
+            body_str = body.decode('utf-8') if body else ''
+            query_params = dict(request.query_params)
+            logger.info(f"Request: {request.method} {request.url.path} | Query: {(json.dumps(query_params) if query_params else 'None')} | Body: {(body_str[:200] if body_str else 'None')}")
+        except Exception as e:
+            logger.error(f'Error logging request: {str(e)}')
+        start_time = time.time()
+        try:
+            response = await call_next(request)
+            process_time = time.time() - start_time
+            logger.info(f'Response: {response.status_code} | Process Time: {process_time:.3f}s')
+            observe_request(request.url.path, response.status_code, process_time)
+            if span is not None:
+                span.set_attribute('http.status_code', response.status_code)
+            return response
+        except Exception as e:
+            process_time = time.time() - start_time
+            logger.error(f'Exception: {str(e)} | Process Time: {process_time:.3f}s', exc_info=True)
+            observe_request(request.url.path, 500, process_time)
+            clear_session_id()
+            return JSONResponse(status_code=500, content={'detail': str(e)})
+        finally:
+            clear_session_id()
 app.include_router(router)
 if __name__ == '__main__':
     logger.info('Starting VN Law Embedding Service...')
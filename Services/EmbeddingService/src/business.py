@@ -5,6 +5,8 @@ from transformers import AutoTokenizer, AutoModel
 from qdrant_client import QdrantClient
 from qdrant_client.models import Distance, VectorParams, PointStruct, Filter, FieldCondition, MatchValue, FilterSelector
 from src.config import settings
+from src.index_events import IndexEventPublisher
+from src.chunk_store import get_chunk_text_store, split_payload
 
 class EmbeddingService:
 
@@ -25,6 +27,17 @@ class EmbeddingService:
         except Exception as e:
             print(f'Error connecting to Qdrant: {e}')
             raise
+        self.index_events = IndexEventPublisher()
+        self.text_store = get_chunk_text_store()
+
+    def _upsert(self, points: List[PointStruct], collection_name: str):
+        # With the text store, Qdrant keeps only filterable fields; index events still carry full payloads
+        stored = points
+        if self.text_store is not None:
+            self.text_store.put_points([(point.id, point.payload) for point in points])
+            stored = [PointStruct(id=point.id, vector=point.vector, payload=split_payload(point.payload)[0]) for point in points]
+        self.qdrant_client.upsert(collection_name=collection_name, points=stored)
+        self.index_events.publish_upsert(points, collection_name)
 
     def mean_pooling(self, model_output, attention_mask):
         token_embeddings = model_output[0]
@@ -57,7 +70,8 @@ class EmbeddingService:
         embedding = self.encode_text(text)
         self.ensure_collection(collection_name, len(embedding))
         point_id = str(uuid.uuid4())
-        self.qdrant_client.upsert(collection_name=collection_name, points=[PointStruct(id=point_id, vector=embedding, payload={'text': text, **metadata})])
+        point = PointStruct(id=point_id, vector=embedding, payload={'text': text, **metadata})
+        self._upsert([point], collection_name)
         return (point_id, len(embedding), collection_name)
 
     def vectorize_batch(self, items: list, collection_name: str=None):
@@ -74,13 +88,16 @@ class EmbeddingService:
             point_id = str(uuid.uuid4())
             points.append(PointStruct(id=point_id, vector=embedding, payload={'text': item.text, **item.metadata}))
         if points:
-            self.qdrant_client.upsert(collection_name=collection_name, points=points)
+            self._upsert(points, collection_name)
         return (len(points), collection_name)
 
     def delete_by_filter(self, source_id: int, tenant_id: int, type: int, collection_name: str=None):
         collection_name = collection_name or settings.qdrant_collection
         delete_filter = Filter(must=[FieldCondition(key='source_id', match=MatchValue(value=source_id)), FieldCondition(key='tenant_id', match=MatchValue(value=tenant_id)), FieldCondition(key='type', match=MatchValue(value=type))])
         self.qdrant_client.delete(collection_name=collection_name, points_selector=FilterSelector(filter=delete_filter))
+        if self.text_store is not None:
+            self.text_store.delete_source(source_id, tenant_id, type)
+        self.index_events.publish_delete(source_id, tenant_id, type, collection_name)
         return collection_name
 
     def search_similarity(self, query: str, tenant_id: int, limit: int = 3, score_threshold: float = 0.0, collection_name: str = None) -> List[Any]:
@@ -6,6 +6,13 @@ class Settings(BaseSettings):
     qdrant_host: str = os.getenv('QDRANT_HOST', 'localhost')
     qdrant_port: int = int(os.getenv('QDRANT_PORT', '6333'))
     qdrant_collection: str = os.getenv('QDRANT_COLLECTION', 'vn_law_documents')
+    index_event_url: str = os.getenv('INDEX_EVENT_URL', '')  # e.g. http://chatprocessor:8001/api/index/events
+    index_event_token: str = os.getenv('INDEX_EVENT_TOKEN', '')  # Shared secret, must match ChatProcessor's INDEX_EVENT_TOKEN
+    chunk_text_store_path: str = os.getenv('CHUNK_TEXT_STORE_PATH', '')  # e.g. /data/chunk_texts/chunks.db; empty keeps texts in Qdrant
+    tracing_enabled: bool = os.getenv('TRACING_ENABLED', 'false').lower() == 'true'
+    tracing_export_path: str = os.getenv('TRACING_EXPORT_PATH', 'logs/traces.jsonl')
+    tracing_max_mb: int = int(os.getenv('TRACING_MAX_MB', '100'))  # Rotate the span export by size (0 = never)
+    tracing_backup_count: int = int(os.getenv('TRACING_BACKUP_COUNT', '5'))
 
     class Config:
         env_file = '.env'
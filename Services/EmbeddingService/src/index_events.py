@@ -0,0 +1,79 @@
+import queue
+import threading
+import httpx
+from typing import List, Dict, Any, Optional
+from qdrant_client.models import PointStruct
+from src.config import settings
+from src.logger import logger
+
+# Payload fields ChatProcessor's in-process indexes keep (QdrantService.INDEX_PAYLOAD_FIELDS)
+INDEX_PAYLOAD_FIELDS = ('text', 'source_id', 'document_name', 'heading1', 'heading2', 'tenant_id', 'type')
+
+class IndexEventPublisher:
+    """
+    Notifies ChatProcessor about vectorize/delete operations so its in-process
+    indexes stay in sync with Qdrant. Disabled when INDEX_EVENT_URL is empty.
+
+    Best effort: events are queued and posted by a daemon thread with a short
+    timeout, so vectorize/delete requests never wait for ChatProcessor. When
+    the queue is full, events are dropped (ChatProcessor rebuilds its indexes
+    from Qdrant after a restart or snapshot expiry). Requests carry the shared
+    INDEX_EVENT_TOKEN in the X-Index-Event-Token header.
+    """
+
+    def __init__(self, url: str = None, token: str = None, timeout: float = 2.0, max_queue: int = 1000):
+        self.url = url if url is not None else settings.index_event_url
+        self.token = token if token is not None else settings.index_event_token
+        self.timeout = timeout
+        self._queue: 'queue.Queue[Dict[str, Any]]' = queue.Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.url)
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='index-event-publisher', daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        headers = {'X-Index-Event-Token': self.token} if self.token else {}
+        with httpx.Client(timeout=self.timeout, headers=headers) as client:
+            while True:
+                event = self._queue.get()
+                self._post(client, event)
+
+    def _post(self, client: httpx.Client, event: Dict[str, Any]) -> None:
+        try:
+            response = client.post(self.url, json=event)
+            response.raise_for_status()
+        except Exception as e:
+            logger.warning(f"Failed to publish index event (action={event['action']}, tenant_id={event['tenant_id']}): {e}")
+
+    def _enqueue(self, event: Dict[str, Any]) -> None:
+        self._start()
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            logger.warning(f"Index event queue full, dropped event (action={event['action']}, tenant_id={event['tenant_id']})")
+
+    def publish_upsert(self, points: List[PointStruct], collection_name: str) -> None:
+        if not self.enabled or not points:
+            return
+        by_tenant: Dict[Any, List[Dict[str, Any]]] = {}
+        for point in points:
+            tenant_id = point.payload.get('tenant_id')
+            if tenant_id is None:
+                continue
+            payload = {key: point.payload[key] for key in INDEX_PAYLOAD_FIELDS if key in point.payload}
+            by_tenant.setdefault(tenant_id, []).append({'id': point.id, 'payload': payload, 'vector': point.vector})
+        for tenant_id, tenant_points in by_tenant.items():
+            self._enqueue({'action': 'upsert', 'tenant_id': tenant_id, 'collection_name': collection_name, 'points': tenant_points})
+
+    def publish_delete(self, source_id: int, tenant_id: int, type: int, collection_name: str) -> None:
+        if not self.enabled:
+            return
+        self._enqueue({'action': 'delete', 'tenant_id': tenant_id, 'collection_name': collection_name, 'source_id': source_id, 'type': type})
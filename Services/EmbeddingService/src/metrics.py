@@ -0,0 +1,27 @@
+"""
+Metrics Module
+
+Prometheus metrics for EmbeddingService, served at GET /metrics. The route
+label only takes known paths ('other' otherwise) to keep cardinality bounded.
+"""
+
+from prometheus_client import Histogram
+
+ROUTES = ('/embed', '/vectorize', '/vectorize-batch', '/api/embeddings/delete', '/search', '/health', '/metrics')
+
+ENCODE_LATENCY = Histogram(
+    'embedding_encode_seconds',
+    'Model encode time per /embed request',
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+)
+HTTP_REQUEST_LATENCY = Histogram(
+    'embedding_http_request_seconds',
+    'HTTP request latency by route and status class',
+    ['route', 'status'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+)
+
+
+def observe_request(path: str, status_code: int, seconds: float) -> None:
+    route = path if path in ROUTES else 'other'
+    HTTP_REQUEST_LATENCY.labels(route=route, status=f'{status_code // 100}xx').observe(seconds)
@@ -1,8 +1,11 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Response
 from fastapi.concurrency import run_in_threadpool
 from src.schemas import EmbeddingRequest, EmbeddingResponse, VectorizeRequest, VectorizeResponse, BatchVectorizeRequest, DeleteRequest, SearchRequest
 from src.business import EmbeddingService
 from src.config import settings
+from src.tracing import get_tracer
+from src.metrics import ENCODE_LATENCY
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 from typing import List
 router = APIRouter()
 embedding_service = EmbeddingService()
@@ -10,7 +13,8 @@ embedding_service = EmbeddingService()
 @router.post('/embed', response_model=EmbeddingResponse)
 async def create_embedding(request: EmbeddingRequest):
     try:
-        embedding = await run_in_threadpool(embedding_service.create_embedding, request.text)
+        with get_tracer().start_span('embedding.encode', {'text_length': len(request.text)}), ENCODE_LATENCY.time():
+            embedding = await run_in_threadpool(embedding_service.create_embedding, request.text)
         return EmbeddingResponse(vector=embedding, dimensions=len(embedding))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -71,4 +75,8 @@ async def search_documents(request: SearchRequest):
         raise HTTPException(status_code=500, detail=str(e))
 @router.get('/health')
 def health_check():
-    return {'status': 'ok', 'model': settings.model_name, 'qdrant': f'{settings.qdrant_host}:{settings.qdrant_port}'}
\ No newline at end of file
+    return {'status': 'ok', 'model': settings.model_name, 'qdrant': f'{settings.qdrant_host}:{settings.qdrant_port}'}
+
+@router.get('/metrics')
+def metrics():
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
\ No newline at end of file